@@ -0,0 +1,419 @@
+"""
+Stand-in for DrissionPage's ``Chromium`` / ``ChromiumTab`` backed by ``BenchSite``.
+
+Covers the surface the crawl path uses (``new_tab``/``get``/``ele``/``eles``/
+``wait``/``listen``/``actions.scroll``/``run_js``/``run_cdp``/``driver``).
+Element lookups run DrissionPage's own locator engine over the served HTML
+(``make_session_ele``), so a missing anchor raises ``ElementNotFoundError``
+exactly like a live tab; interactions (click, drag, scroll) are no-ops except
+where they trigger the XHR pages the crawler listens for.
+
+``Timing`` sets the simulated latency of page loads and list pages and how
+much of the crawler's own fixed waits (``tab.wait(2)``) is really slept.
+``Faults`` injects load timeouts, blank detail pages and consent redirects.
+"""
+
+from __future__ import annotations
+
+import itertools
+import json
+import queue
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, List, Optional
+
+from DrissionPage._elements.session_element import SessionElement, make_session_ele
+from DrissionPage.errors import WaitTimeoutError
+
+from bench.maps_site import PAGE_SIZE, BenchSite
+from gmaps_crawler.pipeline.extractors.offline import extract_fields_html
+from gmaps_crawler.pipeline.extractors.page_extractors.batch_js import EXTRACT_FIELDS_JS
+
+CONSENT_URL = "https://consent.google.com/ml?continue=https://www.google.com/maps"
+_CONSENT_HTML = '<html><body><form><button aria-label="Accept all">Accept all</button></form></body></html>'
+_BLANK_HTML = "<html><body></body></html>"
+
+
+@dataclass
+class Timing:
+    """Median seconds per simulated operation (log-normal, ``sigma`` spread)."""
+
+    search_get: float = 0.3
+    detail_get: float = 0.15
+    website_get: float = 0.1
+    xhr_page: float = 0.05
+    sigma: float = 0.5
+    wait_scale: float = 0.02  # share of the crawler's explicit tab.wait() sleeps actually slept
+
+    def draw(self, median: float, rng: random.Random) -> float:
+        return median * rng.lognormvariate(0.0, self.sigma) if median > 0 else 0.0
+
+
+@dataclass
+class Faults:
+    """Per-load probabilities of injected failures."""
+
+    timeout_rate: float = 0.0  # tab.get raises WaitTimeoutError
+    blank_rate: float = 0.0  # detail page renders without its panel (ENFE)
+    consent_rate: float = 0.0  # the tab lands on the consent wall after a load
+
+
+class _Packet:
+    def __init__(self, url: str, body: Any) -> None:
+        self.url = url
+        self.response = type("Response", (), {"body": body})()
+
+
+class FakeListener:
+    def __init__(self, tab: "FakeTab") -> None:
+        self.tab = tab
+        self.targets: List[str] = []
+        self.listening = False
+        self._q: "queue.Queue[_Packet]" = queue.Queue()
+
+    def start(self, targets=None, is_regex=False, method=None, res_type=None) -> None:
+        self.targets = [targets] if isinstance(targets, str) else list(targets or [])
+        self.listening = True
+        self._q = queue.Queue()
+
+    def stop(self) -> None:
+        self.listening = False
+        self.targets = []
+
+    def emit(self, url: str, body: Any, delay: float = 0.0) -> None:
+        if not self.listening or (self.targets and not any(t in url for t in self.targets)):
+            return
+        packet = _Packet(url, body)
+        if delay > 0:
+            t = threading.Timer(delay, self._q.put, args=(packet,))
+            t.daemon = True
+            t.start()
+        else:
+            self._q.put(packet)
+
+    def wait(self, count=1, timeout=None, fit_count=True, raise_err=None):
+        try:
+            return self._q.get(timeout=timeout)
+        except queue.Empty:
+            return False
+
+
+class _Waiter:
+    def __init__(self, tab: "FakeTab") -> None:
+        self.tab = tab
+
+    def __call__(self, second: float = 0, scope: Optional[float] = None) -> "FakeTab":
+        self.tab.sleep(second if scope is None else random.uniform(second, scope))
+        return self.tab
+
+    def eles_loaded(self, locators, timeout=None, any_one=False, raise_err=None) -> bool:
+        locs = [locators] if isinstance(locators, str) else list(locators)
+        return all(bool(self.tab._root().ele(loc, timeout=0)) for loc in locs)
+
+    def doc_loaded(self, timeout=None, raise_err=None) -> "FakeTab":
+        return self.tab
+
+    def ele_displayed(self, loc_or_ele, timeout=None, raise_err=None) -> bool:
+        return self.eles_loaded(loc_or_ele)
+
+    def url_change(self, text: str, exclude: bool = False, timeout=None, raise_err=None) -> bool:
+        return (text in self.tab.url) != exclude
+
+
+class _ElementWaiter:
+    def __init__(self, ele: "FakeElement") -> None:
+        self.ele = ele
+
+    def __call__(self, second: float = 0, scope: Optional[float] = None) -> "FakeElement":
+        self.ele.tab.sleep(second)
+        return self.ele
+
+    def disabled_or_deleted(self, timeout=None, raise_err=None) -> bool:
+        return True
+
+    def displayed(self, timeout=None, raise_err=None) -> bool:
+        return True
+
+
+class _Scroll:
+    def __init__(self, ele: "FakeElement") -> None:
+        self.ele = ele
+
+    def __call__(self, pixel: int = 300) -> "FakeElement":
+        self.ele.tab._on_scroll(self.ele)
+        return self.ele
+
+    def to_top(self) -> "FakeElement":
+        return self.ele
+
+    def to_bottom(self) -> "FakeElement":
+        self.ele.tab._on_scroll(self.ele)
+        return self.ele
+
+
+class _States:
+    is_whole_in_viewport = True
+    is_displayed = True
+    is_enabled = True
+
+
+def _wrap(tab: "FakeTab", value: Any) -> Any:
+    if isinstance(value, SessionElement):
+        return FakeElement(tab, value)
+    if isinstance(value, list):
+        return [_wrap(tab, v) for v in value]
+    return value
+
+
+class FakeElement:
+    """A static element with the interaction methods of ``ChromiumElement``."""
+
+    def __init__(self, tab: "FakeTab", inner: SessionElement) -> None:
+        self.tab = tab
+        self._inner = inner
+        self.wait = _ElementWaiter(self)
+        self.scroll = _Scroll(self)
+        self.states = _States()
+
+    def __getattr__(self, name: str) -> Any:
+        value = getattr(self._inner, name)
+        if callable(value):
+            return lambda *a, **kw: _wrap(self.tab, value(*a, **kw))
+        return value
+
+    def __bool__(self) -> bool:
+        return True
+
+    def __repr__(self) -> str:
+        return f"<FakeElement {self._inner!r}>"
+
+    def click(self, by_js=None, timeout=None, wait_stop=True) -> bool:
+        self.tab._on_click(self)
+        return True
+
+    def drag(self, offset_x: int = 0, offset_y: int = 20, duration: float = 0.5) -> "FakeElement":
+        return self
+
+    def hover(self, offset_x=None, offset_y=None) -> "FakeElement":
+        return self
+
+    def input(self, vals, clear=False, by_js=False) -> "FakeElement":
+        return self
+
+
+class _Actions:
+    def __init__(self, tab: "FakeTab") -> None:
+        self.tab = tab
+
+    def scroll(self, delta_y: int = 0, delta_x: int = 0, on_ele=None) -> "_Actions":
+        self.tab._on_scroll(on_ele)
+        return self
+
+
+class _Driver:
+    """CDP session stub: callbacks are accepted and never fire."""
+
+    def set_callback(self, event: str, callback, immediate: bool = False) -> None:
+        pass
+
+    def run(self, _method: str, **kwargs) -> dict:
+        return {}
+
+
+class FakeTab:
+    _ids = itertools.count(1)
+
+    def __init__(self, browser: "FakeChromium") -> None:
+        self.browser = browser
+        self.site: BenchSite = browser.site
+        self.timing: Timing = browser.timing
+        self.faults: Faults = browser.faults
+        self.tab_id = f"fake-{next(self._ids)}"
+        self.url = "about:blank"
+        self.html = _BLANK_HTML
+        self.title = ""
+        self.listen = FakeListener(self)
+        self.wait = _Waiter(self)
+        self.actions = _Actions(self)
+        self.driver = _Driver()
+        self._rng = random.Random(f"{browser.seed}:{self.tab_id}")
+        self._root_cache: Optional[SessionElement] = None
+        self._interrupted: Optional[tuple] = None
+        self._search: Optional[dict] = None
+        self._place = None
+        self.closed = False
+
+    # ---- timing ----
+    def sleep(self, seconds: float) -> None:
+        if seconds > 0 and self.timing.wait_scale > 0:
+            time.sleep(seconds * self.timing.wait_scale)
+
+    def _latency(self, median: float) -> None:
+        s = self.timing.draw(median, self._rng)
+        if s > 0:
+            time.sleep(s)
+
+    # ---- navigation ----
+    def get(self, url: str, show_errmsg: bool = False, retry=None, interval=None, timeout=None) -> bool:
+        self.browser.count("loads")
+        self._search = None
+        self._place = None
+        search = self.site.parse_search_url(url)
+        place = self.site.place(url) if search is None else None
+        if search is not None:
+            self._latency(self.timing.search_get)
+            query, lat, lng = search
+            places = self.site.tile_places(query, lat, lng)
+            self._search = {"query": query, "places": places, "page": 0, "clicked": False}
+            self._set_page(url, self.site.search_html(query, empty=not places))
+        elif "/maps/place/" in url:
+            self._latency(self.timing.detail_get)
+            if self._rng.random() < self.faults.timeout_rate:
+                self.browser.count("timeouts")
+                raise WaitTimeoutError(f"page load timed out: {url[:80]}")
+            if place is None or self._rng.random() < self.faults.blank_rate:
+                self.browser.count("blank")
+                self._set_page(url, _BLANK_HTML)
+            else:
+                self._place = place
+                self._set_page(url, self.site.detail_html(place))
+        else:
+            self._latency(self.timing.website_get)
+            self._set_page(url, self.site.website_page(url))
+        if "google.com/maps" in url and self._rng.random() < self.faults.consent_rate:
+            self.browser.count("consent")
+            self._interrupted = (self.url, self.html)
+            self._set_page(CONSENT_URL, _CONSENT_HTML)
+        return True
+
+    def _set_page(self, url: str, page_html: str) -> None:
+        self.url = url
+        self.html = page_html
+        self._root_cache = None
+
+    def _root(self) -> SessionElement:
+        if self._root_cache is None:
+            self._root_cache = make_session_ele(self.html or _BLANK_HTML)
+        return self._root_cache
+
+    # ---- locating ----
+    def ele(self, locator, index: int = 1, timeout=None):
+        return _wrap(self, self._root().ele(locator, index=index))
+
+    def eles(self, locator, timeout=None):
+        return _wrap(self, self._root().eles(locator))
+
+    def s_ele(self, locator=None, index: int = 1, timeout=None):
+        return self._root().ele(locator, index=index)
+
+    # ---- interactions that produce traffic ----
+    def _on_click(self, ele: FakeElement) -> None:
+        label = ele._inner.attr("aria-label") or ""
+        if label == "Accept all" and self.url == CONSENT_URL and self._interrupted:
+            # back on the page the consent wall interrupted
+            self._set_page(*self._interrupted)
+            self._interrupted = None
+        elif label == "Search this area" and self._search is not None and not self._search["clicked"]:
+            self._search["clicked"] = True
+            self._emit_results_page()
+
+    def _on_scroll(self, ele: Optional[FakeElement]) -> None:
+        if self._search is not None and self._search["clicked"]:
+            self._emit_results_page()
+        elif self._place is not None:
+            self.listen.emit(
+                "https://www.google.com/search?q=local+guide+program&tbm=map",
+                self.site.social_body(self._place),
+                delay=self.timing.draw(self.timing.xhr_page, self._rng),
+            )
+
+    def _emit_results_page(self) -> None:
+        s = self._search
+        places = s["places"]
+        if s["page"] * PAGE_SIZE > len(places):
+            return
+        body = self.site.search_payload(places, s["page"])
+        s["page"] += 1
+        self.listen.emit(
+            "https://www.google.com/search?tbm=map&authuser=0&hl=en&q=" + s["query"].replace(" ", "+"),
+            body,
+            delay=self.timing.draw(self.timing.xhr_page, self._rng),
+        )
+
+    # ---- scripting / CDP ----
+    def run_js(self, script: str, *args, as_expr: bool = False, timeout=None) -> Any:
+        if script == EXTRACT_FIELDS_JS:
+            fields = extract_fields_html(self.html)
+            if fields.get("open_time"):
+                fields["open_time"] = fields["open_time"].split("\n")
+            return json.dumps(fields)
+        if "devicePixelRatio" in script:
+            return 1
+        return None
+
+    def run_cdp(self, cmd: str, **kwargs) -> dict:
+        return {}
+
+    def close(self, others: bool = False) -> None:
+        self.closed = True
+        self.listen.stop()
+        self.browser._closed_tab(self)
+
+
+class FakeChromium:
+    """Browser stand-in; pass ``FakeChromium.factory(site, ...)`` as ``browser_factory``."""
+
+    def __init__(self, site: BenchSite, *, timing: Optional[Timing] = None, faults: Optional[Faults] = None, seed: int = 0) -> None:
+        self.site = site
+        self.timing = timing or Timing()
+        self.faults = faults or Faults()
+        self.seed = seed
+        self.process_id = None
+        self.stats = {"loads": 0, "timeouts": 0, "blank": 0, "consent": 0, "tabs": 0}
+        self._tabs: List[FakeTab] = []
+        self._lock = threading.Lock()
+
+    @classmethod
+    def factory(cls, site: BenchSite, *, timing: Optional[Timing] = None, faults: Optional[Faults] = None):
+        seeds = itertools.count(1)
+        launched: List["FakeChromium"] = []
+
+        def make(**_kwargs) -> "FakeChromium":
+            b = cls(site, timing=timing, faults=faults, seed=next(seeds))
+            launched.append(b)
+            return b
+
+        make.launched = launched  # type: ignore[attr-defined]
+        return make
+
+    def new_tab(self, url: Optional[str] = None, new_window: bool = False, background: bool = False, new_context: bool = False) -> FakeTab:
+        tab = FakeTab(self)
+        with self._lock:
+            self._tabs.append(tab)
+        self.count("tabs")
+        if url:
+            tab.get(url)
+        return tab
+
+    def count(self, key: str) -> None:
+        with self._lock:
+            self.stats[key] += 1
+
+    def _closed_tab(self, tab: FakeTab) -> None:
+        with self._lock:
+            if tab in self._tabs:
+                self._tabs.remove(tab)
+
+    @property
+    def tabs_count(self) -> int:
+        return len(self._tabs)
+
+    @property
+    def latest_tab(self) -> Optional[FakeTab]:
+        return self._tabs[-1] if self._tabs else None
+
+    def quit(self, timeout: float = 5, force: bool = False, del_data: bool = False) -> None:
+        for tab in list(self._tabs):
+            tab.close()
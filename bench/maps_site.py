@@ -0,0 +1,218 @@
+"""
+Recorded / synthetic Google Maps content served by the fake browser.
+
+``BenchSite`` answers three kinds of URL the crawler loads:
+
+- ``/maps/search/<q>/@lat,lng,zoomz`` -> a search page (map container,
+  "Search this area" button, results list) plus the ``search?tbm=map`` XHR
+  pages its results arrive in (``search_payload``)
+- ``/maps/place/.../data=!...!1s<fid>!...`` -> a place detail page built
+  with the same aria-label + parent(4) anchors the extractors read, or the
+  stored snapshot of that place when a SnapshotStore root is given
+- anything else -> a business website (``data/example.html`` by default)
+
+Places are generated deterministically from ``seed`` and the tile centre, so
+two runs with the same arguments crawl exactly the same data.
+"""
+
+from __future__ import annotations
+
+import html
+import json
+import random
+import re
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import quote_plus, unquote_plus
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_WEBSITE_HTML = REPO_ROOT / "data" / "example.html"
+PAGE_SIZE = 20  # results per search XHR page (pipeline.search.xhr_cards.PAGE_SIZE)
+
+_SEARCH_RE = re.compile(r"/maps/search/([^/]+)/@(-?[\d.]+),(-?[\d.]+),")
+_FID_RE = re.compile(r"!1s([^!?&]+)")
+
+DAYS = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+
+
+@dataclass
+class Place:
+    fid: str
+    name: str
+    lat: float
+    lng: float
+    category: str
+    address: str
+    phone: str
+    plus_code: str
+    website: str
+    socials: Tuple[str, ...]
+    snapshot_key: str = ""  # recorded detail page in ``snapshot_root``
+
+
+@dataclass
+class BenchSite:
+    """Deterministic place universe keyed by tile centre."""
+
+    places_per_tile: int = 45
+    shared_ratio: float = 0.1  # share of a tile's places also listed by the previous tile
+    websites: int = 50  # distinct business websites (exercises the contact cache)
+    seed: int = 7
+    website_html: Optional[Path] = DEFAULT_WEBSITE_HTML
+    snapshot_root: Optional[Path] = None  # replay place pages stored by a live run (html_root)
+    _tiles: Dict[Tuple[float, float], List[Place]] = field(default_factory=dict)
+    _by_fid: Dict[str, Place] = field(default_factory=dict)
+    _last_tile: List[Place] = field(default_factory=list)
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+    _website_body: Optional[str] = None
+    _recorded: Optional[List[Place]] = None
+
+    # ---- place universe ----
+    def tile_places(self, query: str, lat: float, lng: float) -> List[Place]:
+        key = (round(lat, 6), round(lng, 6))
+        with self._lock:
+            places = self._tiles.get(key)
+            if places is None:
+                places = self._make_tile(query, key)
+                self._tiles[key] = places
+                self._last_tile = places
+            return places
+
+    def _make_tile(self, query: str, key: Tuple[float, float]) -> List[Place]:
+        if self.snapshot_root is not None:
+            # recorded pages are dealt out to tiles in order; later tiles come up empty
+            if self._recorded is None:
+                self._recorded = self._load_recorded()
+            places, self._recorded = self._recorded[: self.places_per_tile], self._recorded[self.places_per_tile:]
+            return places
+        rng = random.Random(f"{self.seed}:{key[0]}:{key[1]}")
+        word = (query.split(" ")[0] or "place").capitalize()
+        shared = self._last_tile[: int(len(self._last_tile) * self.shared_ratio)]
+        places = list(shared)
+        n = len(self._by_fid)
+        while len(places) < self.places_per_tile:
+            n += 1
+            lat = round(key[0] + rng.uniform(-0.01, 0.01), 7)
+            lng = round(key[1] + rng.uniform(-0.015, 0.015), 7)
+            site = rng.randrange(max(1, self.websites))
+            p = Place(
+                fid=f"0x{rng.getrandbits(60):x}:0x{n:x}",
+                name=f"{word} Bench {n}",
+                lat=lat,
+                lng=lng,
+                category=query,
+                address=f"{n} Rue du Banc, 75001 Paris, France",
+                phone=f"+33 1 {rng.randrange(10, 99)} {rng.randrange(10, 99)} {rng.randrange(10, 99)} {rng.randrange(10, 99)}",
+                plus_code=f"{rng.randrange(2, 9)}{rng.choice('CFGHJMPQRVWX')}{rng.randrange(2, 9)}{rng.choice('CFGHJMPQRVWX')}+{rng.randrange(10, 99)} Paris",
+                website=f"https://shop-{site}.bench.test/",
+                socials=(f"https://www.facebook.com/bench{site}", f"https://www.instagram.com/bench{site}"),
+            )
+            self._by_fid[p.fid] = p
+            places.append(p)
+        return places
+
+    def place(self, url: str) -> Optional[Place]:
+        m = _FID_RE.search(url or "")
+        return self._by_fid.get(m.group(1)) if m else None
+
+    @staticmethod
+    def parse_search_url(url: str) -> Optional[Tuple[str, float, float]]:
+        m = _SEARCH_RE.search(url or "")
+        if not m:
+            return None
+        return unquote_plus(m.group(1)), float(m.group(2)), float(m.group(3))
+
+    # ---- search ----
+    def search_html(self, query: str, *, empty: bool = False) -> str:
+        body = (
+            '<div class="id-content-container"><canvas></canvas></div>'
+            '<button aria-label="Search this area">Search this area</button>'
+            f'<div role="feed" aria-label="Results for {html.escape(query)}">'
+        )
+        body += "<div>No results found</div>" if empty else ""
+        return f"<html><body>{body}</div></body></html>"
+
+    def search_payload(self, places: List[Place], page: int, hl: str = "en") -> str:
+        """Body of results page ``page`` (0-based) in the ``)]}'`` + JSON shape."""
+        chunk = places[page * PAGE_SIZE:(page + 1) * PAGE_SIZE]
+        entries: List[list] = [["meta"]]
+        for p in chunk:
+            rec: list = [None] * 40
+            rec[9] = [None, None, p.lat, p.lng]
+            rec[10] = p.fid
+            rec[11] = p.name
+            rec[13] = [p.category]
+            rec[39] = p.address
+            entries.append([None] * 14 + [rec])
+        return ")]}'\n" + json.dumps([[None, entries]], separators=(",", ":"))
+
+    # ---- detail ----
+    def detail_html(self, place: Place) -> str:
+        if place.snapshot_key and self.snapshot_root is not None:
+            from gmaps_crawler.storage.snapshots import PLACE, SnapshotStore
+
+            stored = SnapshotStore(self.snapshot_root).get(PLACE, place.snapshot_key)
+            if stored:
+                return stored
+
+        def row(label: str, text: str, data_value: str = "") -> str:
+            dv = f' data-value="{data_value}"' if data_value else ""
+            return (
+                f'<div class="rogA2c"><div><div><div><button aria-label="{label}"{dv}></button></div></div></div>'
+                f'<div class="Io6YTe">{html.escape(text)}</div></div>'
+            )
+
+        hours = "".join(f"<tr><td>{d}</td><td>8 AM–7 PM</td></tr>" for d in DAYS)
+        panel = (
+            f'<h1 class="DUwDvf">{html.escape(place.name)}</h1>'
+            + row("Copy address", place.address, "Copy address")
+            + '<div class="OqCZI"><button aria-label="Show open hours for the week"></button></div>'
+            + row("Copy website", place.website.replace("https://", "").rstrip("/"))
+            + row("Call phone number", place.phone)
+            + row("Learn more about plus codes", place.plus_code)
+            + f'<table><tbody>{hours}</tbody></table>'
+        )
+        return f'<html><head><title>{html.escape(place.name)} - Google Maps</title></head><body><div role="main"><div><div class="m6QErb">{panel}</div></div></div></body></html>'
+
+    def _load_recorded(self) -> List[Place]:
+        """Places of the detail pages a live run stored (``SNAPSHOT_HTML``), in key order."""
+        from gmaps_crawler.storage.snapshots import PLACE, SnapshotStore
+        from gmaps_crawler.utils.geo_id import parse_lat_lng_from_href
+
+        out: List[Place] = []
+        for key, ref in SnapshotStore(self.snapshot_root).iter_refs(PLACE):
+            url = ref.get("url") or ""
+            fid = _FID_RE.search(url)
+            name = re.search(r"/maps/place/([^/]+)/", url)
+            try:
+                lat, lng = parse_lat_lng_from_href(url)
+            except Exception:
+                continue
+            if not (fid and name and lat and lng):
+                continue
+            p = Place(fid=fid.group(1), name=unquote_plus(name.group(1)), lat=lat, lng=lng, category="", address="",
+                      phone="", plus_code="", website="", socials=(), snapshot_key=key)
+            self._by_fid[p.fid] = p
+            out.append(p)
+        return out
+
+    def social_body(self, place: Place) -> str:
+        """Response of the ``local guide program`` request the social-media extractor listens for."""
+        return "".join(f'["{u}",0]' for u in (*place.socials, place.website) if u)
+
+    # ---- websites ----
+    def website_page(self, url: str) -> str:
+        if self._website_body is None:
+            path = self.website_html
+            self._website_body = (
+                path.read_text(encoding="utf-8", errors="replace")
+                if path and Path(path).exists()
+                else '<html><body><a href="mailto:contact@bench.test">contact@bench.test</a></body></html>'
+            )
+        return self._website_body
+
+    @staticmethod
+    def search_url(query: str, lat: float, lng: float, zoom: int = 16, hl: str = "en") -> str:
+        return f"https://www.google.com/maps/search/{quote_plus(query)}/@{lat},{lng},{zoom}z?hl={hl}"
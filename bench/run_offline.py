@@ -0,0 +1,257 @@
+"""
+Offline end-to-end crawl benchmark: crawl_city -> TileRunner / PipelinedTileEngine
+-> TabWorkerPool -> extract_pipeline -> DB, driven by the fake browser.
+
+A grid of ``--rows x --cols`` tiles is seeded into a fresh DB (so no bbox
+lookup or coverage probe runs), then ``crawl_city`` crawls it with
+``browser_factory`` pointing at ``FakeChromium``. Nothing touches the network:
+website contacts come from the fake browser fallback (``CONTACT_HTTP_ENABLED``
+is off for the run).
+
+Reported: places/sec, p50/p99 per stage (from ``utils.metrics``), peak RSS,
+DB row counts and injected faults. With ``--baseline`` the run fails (exit 1)
+when throughput drops, a stage p50 or peak RSS grows beyond
+``--max-regression``, or fewer places land than the site served.
+
+Usage:
+  python bench/run_offline.py --rows 3 --cols 3 --workers 4
+  python bench/run_offline.py --pipelined --adaptive-workers --timeout-rate 0.05 --blank-rate 0.05
+  python bench/run_offline.py --out bench/last.json --baseline bench/baseline.json --max-regression 0.25
+  python bench/run_offline.py --snapshots data/html   # replay place pages stored by a live run
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import resource
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT))
+
+import logger as _logging_setup  # noqa: E402,F401  (installs the repo's log handlers)
+
+from bench.fake_drission import FakeChromium, Faults, Timing  # noqa: E402
+from bench.maps_site import BenchSite  # noqa: E402
+from gmaps_crawler.config import settings  # noqa: E402
+from gmaps_crawler.pipeline.city.crawl_city import crawl_city  # noqa: E402
+from gmaps_crawler.storage.db import DB  # noqa: E402
+from gmaps_crawler.utils import metrics  # noqa: E402
+
+CITY = "Benchville"
+# stages whose baseline p50 is below this are too noisy to gate on
+MIN_GATED_P50_S = 0.005
+
+
+def seed_grid(db_path: Path, query: str, rows: int, cols: int, zoom: int) -> int:
+    db = DB(db_path)
+    try:
+        points = []
+        for r in range(rows):
+            for c in range(cols):
+                lat = round(48.80 + r * 0.02, 6)
+                lng = round(2.25 + c * 0.03, 6)
+                points.append((r * cols + c, r, c, lat, lng, BenchSite.search_url(query, lat, lng, zoom), 1920, 1080, 1920.0, 1080.0))
+        db.init_tiles(CITY, query, points)
+    finally:
+        db.close()
+    return len(points)
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024.0 * 1024.0) if sys.platform == "darwin" else rss / 1024.0
+
+
+def db_counts(db_path: Path, query: str) -> Dict[str, int]:
+    conn = sqlite3.connect(str(db_path))
+    try:
+        out = {"success": 0, "failed": 0}
+        for status, n in conn.execute("SELECT status, COUNT(*) FROM places WHERE city = ? AND query = ? GROUP BY status", (CITY, query)):
+            out[str(status)] = int(n)
+        out["tiles_completed"] = conn.execute(
+            "SELECT COUNT(*) FROM tiles WHERE city = ? AND query = ? AND status = 'completed'", (CITY, query)
+        ).fetchone()[0]
+        return out
+    finally:
+        conn.close()
+
+
+def stage_table() -> Dict[str, Dict[str, float]]:
+    hist = metrics.REGISTRY.summary()["histograms"].get("stage_seconds") or {}
+    out: Dict[str, Dict[str, float]] = {}
+    for row in hist.get("totals", []):
+        out[row["labels"].get("stage", "-")] = {k: row[k] for k in ("count", "sum_s", "p50_s", "p99_s", "max_s")}
+    return out
+
+
+def run(args: argparse.Namespace) -> Dict:
+    work = Path(args.workdir) if args.workdir else Path(tempfile.mkdtemp(prefix="gmaps-bench-"))
+    work.mkdir(parents=True, exist_ok=True)
+    db_path = work / "bench.sqlite"
+    tiles = seed_grid(db_path, args.query, args.rows, args.cols, args.zoom)
+
+    site = BenchSite(
+        places_per_tile=args.places_per_tile,
+        shared_ratio=args.shared_ratio,
+        websites=args.websites,
+        seed=args.seed,
+        website_html=Path(args.website_html) if args.website_html else None,
+        snapshot_root=Path(args.snapshots) if args.snapshots else None,
+    )
+    timing = Timing(
+        search_get=args.search_ms / 1000.0,
+        detail_get=args.detail_ms / 1000.0,
+        website_get=args.website_ms / 1000.0,
+        xhr_page=args.xhr_ms / 1000.0,
+        wait_scale=args.wait_scale,
+    )
+    faults = Faults(timeout_rate=args.timeout_rate, blank_rate=args.blank_rate, consent_rate=args.consent_rate)
+    factory = FakeChromium.factory(site, timing=timing, faults=faults)
+
+    # no network: website contacts go through the fake browser
+    settings.CONTACT_HTTP_ENABLED = False
+    settings.SNAPSHOT_HTML = not args.no_snapshots
+    settings.METRICS_DIR = str(work / "metrics")
+    settings.BROWSER_POOL_SIZE = 1
+
+    t0 = time.monotonic()
+    crawl_city(
+        CITY,
+        args.query,
+        zoom=args.zoom,
+        headless=True,
+        print_coverage=False,
+        workers=args.workers,
+        db_path=db_path,
+        csv_path=work / "places.csv",
+        html_root=work / "html",
+        retry_failed=False,
+        pipelined=args.pipelined,
+        adaptive_workers=args.adaptive_workers,
+        metrics_port=0,
+        browser_factory=factory,
+    )
+    wall = time.monotonic() - t0
+
+    counts = db_counts(db_path, args.query)
+    faults_seen: Dict[str, int] = {}
+    for b in factory.launched:  # type: ignore[attr-defined]
+        for k, v in b.stats.items():
+            faults_seen[k] = faults_seen.get(k, 0) + v
+    report = {
+        "config": {k: v for k, v in vars(args).items() if k not in ("out", "baseline", "max_regression", "keep")},
+        "tiles": tiles,
+        "tiles_completed": counts["tiles_completed"],
+        "places_served": len(site._by_fid),
+        "places_success": counts["success"],
+        "places_failed": counts["failed"],
+        "wall_s": round(wall, 3),
+        "places_per_s": round(counts["success"] / wall, 3) if wall > 0 else 0.0,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "browser": faults_seen,
+        "stages": stage_table(),
+    }
+    if not args.keep and not args.workdir:
+        shutil.rmtree(work, ignore_errors=True)
+    else:
+        report["workdir"] = str(work)
+    return report
+
+
+def print_report(rep: Dict) -> None:
+    print(
+        f"\ntiles={rep['tiles_completed']}/{rep['tiles']} places served={rep['places_served']} "
+        f"success={rep['places_success']} failed={rep['places_failed']} wall={rep['wall_s']:.1f}s "
+        f"rate={rep['places_per_s']:.2f} places/s peak_rss={rep['peak_rss_mb']:.0f}MiB"
+    )
+    print(f"browser: {rep['browser']}")
+    print(f"{'stage':<32}{'n':>7}{'total s':>10}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for name, s in sorted(rep["stages"].items(), key=lambda kv: -kv[1]["sum_s"]):
+        print(f"{name:<32}{s['count']:>7}{s['sum_s']:>10.2f}{1000 * s['p50_s']:>10.1f}{1000 * s['p99_s']:>10.1f}{1000 * s['max_s']:>10.1f}")
+
+
+def check(rep: Dict, base: Optional[Dict], tolerance: float) -> List[str]:
+    """Regressions of ``rep`` against ``base`` (plus completeness when no faults were injected)."""
+    problems: List[str] = []
+    cfg = rep["config"]
+    if not any(cfg.get(k) for k in ("timeout_rate", "blank_rate", "consent_rate")) and rep["places_success"] < rep["places_served"]:
+        problems.append(f"only {rep['places_success']}/{rep['places_served']} places landed")
+    if rep["tiles_completed"] < rep["tiles"]:
+        problems.append(f"only {rep['tiles_completed']}/{rep['tiles']} tiles completed")
+    if not base:
+        return problems
+    if rep["places_per_s"] < base["places_per_s"] * (1.0 - tolerance):
+        problems.append(f"throughput {rep['places_per_s']:.2f} < baseline {base['places_per_s']:.2f} places/s")
+    if rep["peak_rss_mb"] > base["peak_rss_mb"] * (1.0 + tolerance):
+        problems.append(f"peak RSS {rep['peak_rss_mb']:.0f} > baseline {base['peak_rss_mb']:.0f} MiB")
+    for name, b in base.get("stages", {}).items():
+        cur = rep["stages"].get(name)
+        if cur is None or b["p50_s"] < MIN_GATED_P50_S:
+            continue
+        if cur["p50_s"] > b["p50_s"] * (1.0 + tolerance):
+            problems.append(f"stage {name} p50 {1000 * cur['p50_s']:.1f}ms > baseline {1000 * b['p50_s']:.1f}ms")
+    return problems
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--query", default="Coffee Store")
+    p.add_argument("--rows", type=int, default=2)
+    p.add_argument("--cols", type=int, default=2)
+    p.add_argument("--zoom", type=int, default=16)
+    p.add_argument("--places-per-tile", type=int, default=45)
+    p.add_argument("--shared-ratio", type=float, default=0.1, help="Share of a tile's places the previous tile also lists.")
+    p.add_argument("--websites", type=int, default=50, help="Distinct business websites across all places.")
+    p.add_argument("--website-html", default=str(BenchSite.website_html), help="Page served for business websites.")
+    p.add_argument("--snapshots", help="SnapshotStore root (html_root) of a live run; its place pages are replayed.")
+    p.add_argument("--seed", type=int, default=7)
+    p.add_argument("--workers", type=int, default=4)
+    p.add_argument("--pipelined", action="store_true")
+    p.add_argument("--adaptive-workers", action="store_true")
+    p.add_argument("--no-snapshots", action="store_true", help="Do not store HTML snapshots during the run.")
+    p.add_argument("--search-ms", type=float, default=300.0, help="Median search page load.")
+    p.add_argument("--detail-ms", type=float, default=150.0, help="Median detail page load.")
+    p.add_argument("--website-ms", type=float, default=100.0, help="Median business website load.")
+    p.add_argument("--xhr-ms", type=float, default=50.0, help="Median delay of each listened XHR response.")
+    p.add_argument("--wait-scale", type=float, default=0.02, help="Share of the crawler's fixed tab.wait() sleeps slept (1 = real time).")
+    p.add_argument("--timeout-rate", type=float, default=0.0)
+    p.add_argument("--blank-rate", type=float, default=0.0)
+    p.add_argument("--consent-rate", type=float, default=0.0)
+    p.add_argument("--workdir", help="Keep DB, snapshots and metrics here (default: temp dir, removed).")
+    p.add_argument("--keep", action="store_true", help="Keep the temp work dir.")
+    p.add_argument("--out", help="Write the JSON report here.")
+    p.add_argument("--baseline", help="JSON report to compare against.")
+    p.add_argument("--max-regression", type=float, default=0.25, help="Allowed relative regression vs --baseline.")
+    p.add_argument("-v", "--verbose", action="store_true", help="Keep crawler INFO logs.")
+    return p.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    if not args.verbose:
+        for name in ("main", "crawler", "writer"):
+            logging.getLogger(name).setLevel(logging.WARNING)
+    rep = run(args)
+    print_report(rep)
+    if args.out:
+        Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.out).write_text(json.dumps(rep, indent=1), encoding="utf-8")
+    base = json.loads(Path(args.baseline).read_text(encoding="utf-8")) if args.baseline else None
+    problems = check(rep, base, args.max_regression)
+    for msg in problems:
+        print(f"REGRESSION: {msg}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
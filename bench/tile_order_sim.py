@@ -0,0 +1,233 @@
+"""
+Tile ordering simulation: replays one city grid in every ``pipeline.city.ordering``
+order and measures the locality each order buys. No browser, no network.
+
+Each tile's result list is modelled as the places inside its viewport (cell size
+/ 0.9, see ``crawl_city``), nearest first and capped at ``--result-cap``. Places
+come from a recorded DB (``--db``, the ``places`` rows of ``--city/--query`` over
+its ``tiles``) or from a synthetic clustered city.
+
+Reported per ordering:
+  dup_total   cards already seen earlier in the run (order-independent: every
+              overlap is paid once whatever the order; sanity check)
+  dup_recent  cards seen within the last ``--window`` tiles (warm in the
+              known-place index / contact cache / DB pages)
+  map_hit     LRU hit rate of the 256 px map tiles the viewports cover
+              (``--cache`` tiles, roughly the browser's memory cache)
+  jump_km     mean distance between consecutive tile centres
+
+Usage:
+  python bench/tile_order_sim.py
+  python bench/tile_order_sim.py --rows 30 --cols 40 --clusters 12 --window 8
+  python bench/tile_order_sim.py --db data/db/gmaps.sqlite --city Paris --query "coffee shops in Paris"
+"""
+from __future__ import annotations
+
+import argparse
+import math
+import random
+import sqlite3
+import sys
+from collections import OrderedDict, deque
+from pathlib import Path
+from typing import Deque, Dict, List, Sequence, Set, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from gmaps_crawler.geo.bbox import BoundingBox  # noqa: E402
+from gmaps_crawler.pipeline.city.grid import GridPoint, generate_grid_points, km_to_lat_deg, km_to_lon_deg  # noqa: E402
+from gmaps_crawler.pipeline.city.ordering import ORDERINGS, order_points  # noqa: E402
+
+# tile_index -> (lat, lng, depth)
+Tiles = Dict[int, Tuple[float, float, int]]
+# (place_id, lat, lng)
+Place = Tuple[str, float, float]
+
+
+def _haversine_km(a: Tuple[float, float], b: Tuple[float, float]) -> float:
+    lat1, lng1, lat2, lng2 = map(math.radians, (a[0], a[1], b[0], b[1]))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * 6371.0 * math.asin(math.sqrt(h))
+
+
+def _map_tiles(lat: float, lng: float, zoom: int, width_px: float, height_px: float) -> List[Tuple[int, int, int]]:
+    """Slippy-map tiles (z, x, y) a ``width_px x height_px`` viewport centred on lat/lng covers."""
+    n = 2 ** zoom
+    px = (lng + 180.0) / 360.0 * n * 256.0
+    py = (1.0 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2.0 * n * 256.0
+    x0, x1 = int((px - width_px / 2) // 256), int((px + width_px / 2) // 256)
+    y0, y1 = int((py - height_px / 2) // 256), int((py + height_px / 2) // 256)
+    return [(zoom, x, y) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1)]
+
+
+def result_lists(tiles: Tiles, places: Sequence[Place], view_w_km: float, view_h_km: float, cap: int) -> Dict[int, List[str]]:
+    """Place ids each tile's search returns (inside the viewport, nearest first, ``cap`` at most)."""
+    # bucket places on a coarse lat/lng grid so each tile only scans nearby ones
+    bucket_deg = km_to_lat_deg(max(view_w_km, view_h_km))
+    buckets: Dict[Tuple[int, int], List[Place]] = {}
+    for p in places:
+        buckets.setdefault((int(p[1] // bucket_deg), int(p[2] // bucket_deg)), []).append(p)
+    out: Dict[int, List[str]] = {}
+    for idx, (lat, lng, depth) in tiles.items():
+        half_h = km_to_lat_deg(view_h_km / 2 ** depth) / 2
+        half_w = km_to_lon_deg(view_w_km / 2 ** depth, lat) / 2
+        bi, bj = int(lat // bucket_deg), int(lng // bucket_deg)
+        reach = int(half_w // bucket_deg) + 1
+        hits: List[Tuple[float, str]] = []
+        for di in (-1, 0, 1):
+            for dj in range(-reach, reach + 1):
+                for pid, plat, plng in buckets.get((bi + di, bj + dj), ()):
+                    if abs(plat - lat) <= half_h and abs(plng - lng) <= half_w:
+                        hits.append(((plat - lat) ** 2 + (plng - lng) ** 2, pid))
+        hits.sort()
+        out[idx] = [pid for _, pid in hits[:cap]]
+    return out
+
+
+def replay(
+    order: Sequence[int],
+    tiles: Tiles,
+    results: Dict[int, List[str]],
+    *,
+    zoom: int,
+    viewport_px: Tuple[float, float],
+    window: int,
+    cache_tiles: int,
+) -> Dict[str, float]:
+    seen: Set[str] = set()
+    recent: Deque[Set[str]] = deque(maxlen=max(1, window))
+    lru: "OrderedDict[Tuple[int, int, int], None]" = OrderedDict()
+    cards = dup_total = dup_recent = 0
+    map_hits = map_total = 0
+    jump = 0.0
+    prev = None
+    for idx in order:
+        lat, lng, depth = tiles[idx]
+        ids = results.get(idx, [])
+        cards += len(ids)
+        for pid in ids:
+            if pid in seen:
+                dup_total += 1
+                if any(pid in r for r in recent):
+                    dup_recent += 1
+        seen.update(ids)
+        recent.append(set(ids))
+        for key in _map_tiles(lat, lng, zoom + depth, *viewport_px):
+            map_total += 1
+            if key in lru:
+                map_hits += 1
+                lru.move_to_end(key)
+            else:
+                lru[key] = None
+                if len(lru) > cache_tiles:
+                    lru.popitem(last=False)
+        if prev is not None:
+            jump += _haversine_km(prev, (lat, lng))
+        prev = (lat, lng)
+    return {
+        "cards": cards,
+        "dup_total": dup_total / cards if cards else 0.0,
+        "dup_recent": dup_recent / cards if cards else 0.0,
+        "map_hit": map_hits / map_total if map_total else 0.0,
+        "jump_km": jump / max(1, len(order) - 1),
+    }
+
+
+def synthetic_city(rows: int, cols: int, clusters: int, places: int, seed: int, zoom: int) -> Tuple[List[GridPoint], Tiles, List[Place], float, float]:
+    rng = random.Random(seed)
+    lat0, lng0 = 48.80, 2.25
+    # viewport of a 1920x1080 window at ``zoom``; cells are 90% of it with 25% overlap (as crawl_city)
+    mpp = 156543.03392 * math.cos(math.radians(lat0)) / (2 ** zoom)
+    view_w, view_h = mpp * 1920 / 1000.0, mpp * 1080 / 1000.0
+    cell_w, cell_h = view_w * 0.9, view_h * 0.9
+    bbox = BoundingBox(
+        min_lat=lat0, min_lon=lng0,
+        max_lat=lat0 + km_to_lat_deg(cell_h * 0.75 * rows),
+        max_lon=lng0 + km_to_lon_deg(cell_w * 0.75 * cols, lat0),
+    )
+    points = generate_grid_points(bbox, cell_width_km=cell_w, cell_height_km=cell_h, overlap_ratio=0.25)
+    centres = [(rng.uniform(bbox.min_lat, bbox.max_lat), rng.uniform(bbox.min_lon, bbox.max_lon), rng.uniform(0.3, 1.5)) for _ in range(clusters)]
+    out: List[Place] = []
+    for i in range(places):
+        if rng.random() < 0.2:
+            lat, lng = rng.uniform(bbox.min_lat, bbox.max_lat), rng.uniform(bbox.min_lon, bbox.max_lon)
+        else:
+            clat, clng, sigma_km = rng.choice(centres)
+            lat = clat + km_to_lat_deg(rng.gauss(0.0, sigma_km))
+            lng = clng + km_to_lon_deg(rng.gauss(0.0, sigma_km), clat)
+        out.append((f"p{i}", lat, lng))
+    tiles = {p.index: (p.latitude, p.longitude, 0) for p in points}
+    return points, tiles, out, view_w, view_h
+
+
+def recorded_city(db_path: Path, city: str, query: str) -> Tuple[List[GridPoint], Tiles, List[Place], float, float, Dict[int, int], int]:
+    conn = sqlite3.connect(str(db_path))
+    try:
+        rows = conn.execute(
+            "SELECT tile_index, tile_row, tile_col, tile_center_lat, tile_center_lng, COALESCE(depth, 0) FROM tiles "
+            "WHERE city=? AND query=? ORDER BY tile_index",
+            (city, query),
+        ).fetchall()
+        places = [(str(pid), float(lat), float(lng)) for pid, lat, lng in conn.execute(
+            "SELECT place_id, lat, lng FROM places WHERE city=? AND query=? AND lat != 0", (city, query)
+        )]
+        meta = conn.execute(
+            "SELECT cell_width_km, cell_height_km, zoom FROM runs WHERE city=? AND query=? AND cell_width_km IS NOT NULL "
+            "ORDER BY started_at DESC LIMIT 1",
+            (city, query),
+        ).fetchone()
+    finally:
+        conn.close()
+    if not rows:
+        raise SystemExit(f"no tiles for {city!r} / {query!r} in {db_path}")
+    cell_w, cell_h, zoom = (float(meta[0]), float(meta[1]), int(meta[2])) if meta else (3.0, 1.8, 16)
+    points = [GridPoint(index=int(i), latitude=float(la), longitude=float(ln), row=int(r), col=int(c)) for i, r, c, la, ln, _ in rows]
+    tiles = {int(i): (float(la), float(ln), int(d)) for i, _, _, la, ln, d in rows}
+    depths = {int(i): int(d) for i, _, _, _, _, d in rows}
+    return points, tiles, places, cell_w / 0.9, cell_h / 0.9, depths, zoom
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0], formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--db", type=Path, help="Recorded crawl DB (default: synthetic city).")
+    ap.add_argument("--city")
+    ap.add_argument("--query")
+    ap.add_argument("--rows", type=int, default=24)
+    ap.add_argument("--cols", type=int, default=32)
+    ap.add_argument("--clusters", type=int, default=8)
+    ap.add_argument("--places", type=int, default=20000)
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--zoom", type=int, default=16)
+    ap.add_argument("--result-cap", type=int, default=120)
+    ap.add_argument("--window", type=int, default=4, help="Tiles a seen card stays 'recent' (default: %(default)s).")
+    ap.add_argument("--cache", type=int, default=200, help="LRU capacity in 256px map tiles (default: %(default)s).")
+    ap.add_argument("--orders", nargs="*", default=list(ORDERINGS), choices=list(ORDERINGS))
+    args = ap.parse_args(argv)
+
+    depths: Dict[int, int] = {}
+    zoom = args.zoom
+    if args.db:
+        if not (args.city and args.query):
+            ap.error("--db needs --city and --query")
+        points, tiles, places, view_w, view_h, depths, zoom = recorded_city(args.db, args.city, args.query)
+    else:
+        points, tiles, places, view_w, view_h = synthetic_city(args.rows, args.cols, args.clusters, args.places, args.seed, zoom)
+    results = result_lists(tiles, places, view_w, view_h, args.result_cap)
+    weights = {idx: float(len(ids)) for idx, ids in results.items()}
+    # viewport in px at the grid's zoom (depth-d tiles use zoom + d with the same window)
+    mpp = 156543.03392 * math.cos(math.radians(points[0].latitude)) / (2 ** zoom)
+    viewport_px = (view_w * 1000.0 / mpp, view_h * 1000.0 / mpp)
+
+    print(f"tiles={len(tiles)} places={len(places)} cards={sum(len(v) for v in results.values())} window={args.window} cache={args.cache}")
+    print(f"{'order':<11} {'dup_total':>9} {'dup_recent':>10} {'map_hit':>8} {'jump_km':>8}")
+    for name in args.orders:
+        seq = order_points(points, name, depths=depths, weights=weights)
+        order = sorted(seq, key=seq.__getitem__)
+        r = replay(order, tiles, results, zoom=zoom, viewport_px=viewport_px, window=args.window, cache_tiles=args.cache)
+        print(f"{name:<11} {r['dup_total']:>9.3f} {r['dup_recent']:>10.3f} {r['map_hit']:>8.3f} {r['jump_km']:>8.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,88 @@
+"""
+Compare per-tab traffic and load time with and without a CDP block profile.
+
+Each URL is loaded in a fresh tab once per profile (``off`` first, then the
+chosen profile); bytes come from ``Network.loadingFinished``. Search URLs are
+also run through ``measure_map_coverage`` to confirm the map canvas and scale
+bar still render under the profile.
+
+Usage:
+  python scripts/bench_blocking.py --profile maps
+  python scripts/bench_blocking.py --url "https://www.google.com/maps/place/..." --repeat 3
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from gmaps_crawler.browser.blocking import PROFILES, TrafficMeter, apply_blocking  # noqa: E402
+from gmaps_crawler.browser.coverage import measure_map_coverage  # noqa: E402
+from gmaps_crawler.browser.drivers import create_browser  # noqa: E402
+from gmaps_crawler.pipeline.search.urls import build_search_url  # noqa: E402
+
+
+def load_once(browser, url: str, profile_name: str, check_coverage: bool) -> Dict[str, float]:
+    tab = browser.new_tab(background=False)
+    try:
+        blocker = apply_blocking(tab, PROFILES[profile_name]) if PROFILES.get(profile_name) else None
+        meter = TrafficMeter(tab).start()
+        tab.get(url)
+        tab.wait.doc_loaded()
+        time.sleep(2.0)  # late XHR / tile requests
+        out = meter.stop()
+        out["blocked"] = float(blocker.stats()["blocked_total"]) if blocker else 0.0
+        if check_coverage:
+            cov = measure_map_coverage(tab, attempts=5, interval=0.5, wait_before=1.0)
+            out["coverage_ok"] = 1.0 if cov else 0.0
+        return out
+    finally:
+        tab.close()
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--profile", default="maps", choices=[k for k in PROFILES if k != "off"])
+    ap.add_argument("--url", action="append", help="URL to load (repeatable); default: one Maps search URL")
+    ap.add_argument("--query", default="restaurant")
+    ap.add_argument("--lat", type=float, default=51.5072)
+    ap.add_argument("--lng", type=float, default=-0.1276)
+    ap.add_argument("--zoom", type=int, default=15)
+    ap.add_argument("--repeat", type=int, default=2)
+    ap.add_argument("--headless", action="store_true")
+    args = ap.parse_args()
+
+    urls: List[str] = args.url or [build_search_url(args.query, args.lat, args.lng, args.zoom, "en")]
+    browser = create_browser(headless=args.headless, window_width=1920, window_height=1080, proxy=None)
+    failed = False
+    try:
+        for url in urls:
+            is_search = "/maps/search/" in url
+            rows: Dict[str, List[Dict[str, float]]] = {}
+            for name in ("off", args.profile):
+                rows[name] = [load_once(browser, url, name, is_search) for _ in range(max(1, args.repeat))]
+            print(url[:100])
+            base: Optional[float] = None
+            for name, runs in rows.items():
+                kb = statistics.median(r["bytes"] for r in runs) / 1024.0
+                secs = statistics.median(r["elapsed_s"] for r in runs)
+                reqs = statistics.median(r["requests"] for r in runs)
+                blocked = statistics.median(r["blocked"] for r in runs)
+                cov = "" if not is_search else f" coverage={'ok' if all(r.get('coverage_ok') for r in runs) else 'FAILED'}"
+                saved = "" if base is None else f" ({100.0 * (1.0 - kb / max(base, 1e-9)):.0f}% less)"
+                print(f"  {name:<7} {kb:9.0f} KiB{saved} requests={reqs:.0f} blocked={blocked:.0f} load={secs:.2f}s{cov}")
+                base = kb if base is None else base
+                if is_search and not all(r.get("coverage_ok") for r in runs):
+                    failed = True
+    finally:
+        browser.quit()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+"""
+Benchmark detail-page field extraction: one run_js call vs per-field CDP calls.
+
+Usage:
+  # capture place pages once (saved as .mhtml)
+  python scripts/bench_extract.py --save-urls urls.txt --pages-dir data/bench_pages
+  # compare both paths on the saved pages
+  python scripts/bench_extract.py --pages-dir data/bench_pages --repeat 3
+
+Social media URLs and website contacts are network-bound and excluded.
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from gmaps_crawler.browser.drivers import create_browser  # noqa: E402
+from gmaps_crawler.pipeline.extractors.page_extractors.address import extract_address  # noqa: E402
+from gmaps_crawler.pipeline.extractors.page_extractors.batch_js import extract_fields_js  # noqa: E402
+from gmaps_crawler.pipeline.extractors.page_extractors.open_time import extract_open_time  # noqa: E402
+from gmaps_crawler.pipeline.extractors.page_extractors.phone import extract_phone  # noqa: E402
+from gmaps_crawler.pipeline.extractors.page_extractors.plus_code import extract_plus_code  # noqa: E402
+from gmaps_crawler.pipeline.extractors.page_extractors.website import extract_website  # noqa: E402
+
+PER_FIELD: Dict[str, Callable] = {
+    "address": extract_address,
+    "phone": extract_phone,
+    "plus_code": extract_plus_code,
+    "website": extract_website,
+    "open_time": extract_open_time,
+}
+
+
+def per_field(tab) -> Dict[str, str]:
+    out: Dict[str, str] = {}
+    for name, fn in PER_FIELD.items():
+        try:
+            out[name] = fn(tab)
+        except Exception:
+            out[name] = None  # type: ignore[assignment]
+    return out
+
+
+def save_pages(tab, urls: List[str], pages_dir: Path) -> None:
+    pages_dir.mkdir(parents=True, exist_ok=True)
+    for i, url in enumerate(urls):
+        tab.get(url)
+        tab.wait.ele_displayed("@aria-label=Copy address", timeout=15)
+        tab.save(path=str(pages_dir), name=f"place_{i:04d}")
+        print(f"saved {i + 1}/{len(urls)}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages-dir", type=Path, default=Path("data/bench_pages"))
+    parser.add_argument("--save-urls", type=Path, help="File with one place URL per line to capture first.")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--ele-timeout", type=float, default=2.0, help="Per-field element lookup timeout (s).")
+    parser.add_argument("--headless", action="store_true")
+    args = parser.parse_args()
+
+    browser = create_browser(headless=args.headless, window_width=1920, window_height=1080)
+    tab = browser.latest_tab
+    try:
+        if args.save_urls:
+            urls = [u.strip() for u in args.save_urls.read_text(encoding="utf-8").splitlines() if u.strip()]
+            save_pages(tab, urls, args.pages_dir)
+
+        pages = sorted(p for p in args.pages_dir.glob("*") if p.suffix.lower() in (".mhtml", ".html"))
+        if not pages:
+            print(f"no saved pages in {args.pages_dir}")
+            return
+        tab.set.timeouts(base=args.ele_timeout)
+
+        js_ms: List[float] = []
+        cdp_ms: List[float] = []
+        mismatches = 0
+        for page in pages:
+            for _ in range(max(1, args.repeat)):
+                tab.get(page.resolve().as_uri())
+                t0 = time.perf_counter()
+                js = extract_fields_js(tab)
+                js_ms.append((time.perf_counter() - t0) * 1000.0)
+
+                # reload so open_time clicks start from the same collapsed state
+                tab.get(page.resolve().as_uri())
+                t0 = time.perf_counter()
+                ref = per_field(tab)
+                cdp_ms.append((time.perf_counter() - t0) * 1000.0)
+
+                for name in ("address", "phone", "plus_code", "website"):
+                    if (js.get(name) or "") != (ref.get(name) or ""):
+                        mismatches += 1
+                        print(f"[diff] {page.name} {name}: js={js.get(name)!r} cdp={ref.get(name)!r}")
+
+        def fmt(xs: List[float]) -> str:
+            return f"mean={statistics.mean(xs):.1f}ms p50={statistics.median(xs):.1f}ms max={max(xs):.1f}ms"
+
+        print(f"pages={len(pages)} runs={len(js_ms)}")
+        print(f"[run_js]    {fmt(js_ms)}")
+        print(f"[per-field] {fmt(cdp_ms)}")
+        print(f"speedup={statistics.mean(cdp_ms) / max(1e-9, statistics.mean(js_ms)):.1f}x field_mismatches={mismatches}")
+    finally:
+        browser.quit()
+
+
+if __name__ == "__main__":
+    main()
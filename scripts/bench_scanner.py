@@ -0,0 +1,101 @@
+"""
+Benchmark the website contact scanner: ``scan_html`` vs the
+original per-email / per-domain loops (kept below verbatim as the reference).
+
+Usage:
+  python scripts/bench_scanner.py                      # data/example.html
+  python scripts/bench_scanner.py --html page.html --repeat 5 --inflate 4
+
+Both implementations must return identical emails (incl. order), phones and
+social links; the script exits non-zero otherwise.
+"""
+from __future__ import annotations
+
+import argparse
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Set, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from gmaps_crawler.pipeline.extractors.web_extractors.scanner import SOCIAL_DOMAINS, scan_html  # noqa: E402
+from gmaps_crawler.pipeline.extractors.web_extractors.utils import extract_base64_links  # noqa: E402
+
+Result = Tuple[List[str], Set[str], Dict[str, Set[str]]]
+
+
+def reference_scan(html_content: str) -> Result:
+    """Body of the scan loop in extract_emails_phones_socials before scanner.py."""
+    email_pattern = r'(?<![\/:@])\b[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}\b(?![\/:])'
+    phone_pattern = r'\+\d[\d\s\-]{6,15}\d'
+    url_pattern = r'https?://[^\s"\'<>]+'
+    emails: Dict[str, None] = {}
+    phones: Set[str] = set()
+    socials: Dict[str, Set[str]] = {k: set() for k in SOCIAL_DOMAINS}
+
+    for e in re.findall(email_pattern, html_content):
+        e = e.lower()
+        if any(x in e for x in ['sentry.io', 'amazonaws.com', 'cloudflare.com']):
+            continue
+        if re.search(r'https?://[^"\'\s]*' + re.escape(e), html_content):
+            continue
+        if re.search(r'\.(jpg|jpeg|png|gif|svg|webp)$', e, re.IGNORECASE):
+            continue
+        emails.setdefault(e, None)
+
+    for p in re.findall(phone_pattern, html_content):
+        phones.add(re.sub(r'\s+', '', p))
+
+    for link in re.findall(url_pattern, html_content):
+        link_lower = link.lower()
+        for platform, domains in SOCIAL_DOMAINS.items():
+            if any(d in link_lower for d in domains):
+                socials[platform].add(link)
+
+    for d_link in extract_base64_links(html_content):
+        for platform, domains in SOCIAL_DOMAINS.items():
+            if any(d in d_link.lower() for d in domains):
+                socials[platform].add(d_link)
+    return list(emails), phones, socials
+
+
+def timeit(fn: Callable[[str], Result], html: str, repeat: int) -> Tuple[float, Result]:
+    samples = []
+    out = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn(html)
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples), out
+
+
+def main() -> int:
+    root = Path(__file__).resolve().parents[1]
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--html", type=Path, default=root / "data" / "example.html")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--inflate", type=int, default=1, help="concatenate the page N times")
+    args = ap.parse_args()
+
+    html = args.html.read_text(encoding="utf-8", errors="replace") * max(1, args.inflate)
+    ref_s, ref = timeit(reference_scan, html, args.repeat)
+    new_s, new = timeit(scan_html, html, args.repeat)
+
+    print(f"page={args.html.name} size={len(html) / 1e6:.2f}MB emails={len(new[0])} phones={len(new[1])} "
+          f"socials={sum(len(v) for v in new[2].values())}")
+    print(f"reference: {ref_s * 1000:9.1f} ms")
+    print(f"scan_html: {new_s * 1000:9.1f} ms  speedup x{ref_s / max(new_s, 1e-9):.1f}")
+    if ref != new:
+        for name, a, b in zip(("emails", "phones", "socials"), ref, new):
+            if a != b:
+                print(f"MISMATCH in {name}")
+        return 1
+    print("outputs identical")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,192 @@
+"""
+DevTools request blocking profiles for crawler tabs.
+
+``options.no_imgs`` (Blink's image switch) also kills the map canvas, so
+blocking is done per tab over CDP instead:
+
+- ``Fetch`` pauses requests of the blocked resource types (images, media,
+  fonts) and fails them, except URLs matching ``keep_urls`` (map tiles,
+  sprites of the scale bar/controls) which continue untouched
+- ``Network.setBlockedURLs`` drops known tracker / telemetry endpoints
+
+``TrafficMeter`` sums the bytes a tab received so profiles can be compared.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+from logger import crawler_thread_logger as logger
+
+from gmaps_crawler.config import settings
+
+TRACKER_URLS: Tuple[str, ...] = (
+    "*google-analytics.com*",
+    "*googletagmanager.com*",
+    "*googleadservices.com*",
+    "*doubleclick.net*",
+    "*connect.facebook.net*",
+    "*facebook.com/tr*",
+    "*hotjar.com*",
+    "*clarity.ms*",
+    "*play.google.com/log*",
+    "*/gen_204*",
+    "*/maps/preview/log204*",
+)
+
+# map canvas (raster/vector tiles) and the sprites of the scale bar/controls
+MAP_KEEP_URLS: Tuple[str, ...] = (
+    "/maps/vt",
+    "/vt?",
+    "/vt/",
+    "khms",
+    "/kh?",
+    "maps.gstatic.com/mapfiles",
+    "maps.gstatic.com/tactile",
+)
+
+
+@dataclass(frozen=True)
+class BlockProfile:
+    name: str
+    resource_types: Tuple[str, ...] = ()
+    blocked_urls: Tuple[str, ...] = ()
+    keep_urls: Tuple[str, ...] = ()
+
+
+PROFILES: Dict[str, Optional[BlockProfile]] = {
+    "off": None,
+    # detail/search tabs: no photos/fonts/trackers, map canvas + scale bar intact
+    "maps": BlockProfile(
+        name="maps",
+        resource_types=("Image", "Media", "Font"),
+        blocked_urls=TRACKER_URLS,
+        keep_urls=MAP_KEEP_URLS,
+    ),
+    # business websites: only the HTML/scripts matter for contact scanning
+    "strict": BlockProfile(
+        name="strict",
+        resource_types=("Image", "Media", "Font", "Stylesheet"),
+        blocked_urls=TRACKER_URLS,
+        keep_urls=MAP_KEEP_URLS,
+    ),
+}
+
+
+def get_profile(name: Optional[str] = None) -> Optional[BlockProfile]:
+    """Profile by name (default: settings.BLOCK_PROFILE); unknown names disable blocking."""
+    key = (name if name is not None else settings.BLOCK_PROFILE) or "off"
+    if key not in PROFILES:
+        logger.warning("unknown block profile %r; blocking disabled", key)
+        return None
+    return PROFILES[key]
+
+
+@dataclass
+class Interceptor:
+    tab: object
+    profile: BlockProfile
+    blocked: Dict[str, int] = field(default_factory=dict)
+    kept: int = 0
+    trackers_enabled: bool = False
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def _on_paused(self, **params) -> None:
+        request_id = params.get("requestId")
+        url = (params.get("request") or {}).get("url", "")
+        rtype = params.get("resourceType", "")
+        try:
+            if any(k in url for k in self.profile.keep_urls):
+                with self._lock:
+                    self.kept += 1
+                self.tab.driver.run("Fetch.continueRequest", requestId=request_id)
+            else:
+                with self._lock:
+                    self.blocked[rtype] = self.blocked.get(rtype, 0) + 1
+                self.tab.driver.run("Fetch.failRequest", requestId=request_id, errorReason="BlockedByClient")
+        except Exception as e:  # tab closing; the request dies with it
+            logger.debug("fetch intercept failed for %s: %s", url[:80], e)
+
+    def detach(self) -> None:
+        try:
+            self.tab.driver.set_callback("Fetch.requestPaused", None, immediate=True)
+            self.tab.run_cdp("Fetch.disable")
+            if self.trackers_enabled:
+                self.tab.run_cdp("Network.setBlockedURLs", urls=[])
+        except Exception as e:
+            logger.debug("block profile detach failed: %s", e)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            out = {f"blocked_{k.lower()}": v for k, v in self.blocked.items()}
+            out["blocked_total"] = sum(self.blocked.values())
+            out["kept"] = self.kept
+        return out
+
+
+def apply_blocking(tab, profile: Optional[BlockProfile] = None, *, name: Optional[str] = None) -> Optional[Interceptor]:
+    """Install ``profile`` (or the named / configured one) on ``tab``; None when blocking is off.
+
+    Call before navigating; failures are logged and leave the tab unblocked.
+    """
+    if profile is None:
+        profile = get_profile(name)
+    if profile is None:
+        return None
+    icp = Interceptor(tab=tab, profile=profile)
+    try:
+        if profile.blocked_urls:
+            tab.run_cdp("Network.enable")
+            tab.run_cdp("Network.setBlockedURLs", urls=list(profile.blocked_urls))
+            icp.trackers_enabled = True
+        if profile.resource_types:
+            tab.driver.set_callback("Fetch.requestPaused", icp._on_paused, immediate=True)
+            tab.run_cdp(
+                "Fetch.enable",
+                patterns=[{"urlPattern": "*", "resourceType": t, "requestStage": "Request"} for t in profile.resource_types],
+            )
+    except Exception as e:
+        logger.warning("block profile %s not applied: %s", profile.name, e)
+        icp.detach()
+        return None
+    return icp
+
+
+class TrafficMeter:
+    """Bytes received by one tab (``Network.loadingFinished.encodedDataLength``) and request count."""
+
+    def __init__(self, tab) -> None:
+        self.tab = tab
+        self.bytes = 0
+        self.requests = 0
+        self.failed = 0
+        self._lock = threading.Lock()
+        self._t0 = 0.0
+
+    def _on_finished(self, **params) -> None:
+        with self._lock:
+            self.bytes += int(params.get("encodedDataLength") or 0)
+            self.requests += 1
+
+    def _on_failed(self, **params) -> None:
+        with self._lock:
+            self.failed += 1
+
+    def start(self) -> "TrafficMeter":
+        self.tab.run_cdp("Network.enable")
+        self.tab.driver.set_callback("Network.loadingFinished", self._on_finished)
+        self.tab.driver.set_callback("Network.loadingFailed", self._on_failed)
+        self._t0 = time.perf_counter()
+        return self
+
+    def stop(self) -> Dict[str, float]:
+        try:
+            self.tab.driver.set_callback("Network.loadingFinished", None)
+            self.tab.driver.set_callback("Network.loadingFailed", None)
+        except Exception:
+            pass
+        with self._lock:
+            return {"bytes": self.bytes, "requests": self.requests, "failed": self.failed, "elapsed_s": time.perf_counter() - self._t0}
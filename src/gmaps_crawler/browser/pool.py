@@ -0,0 +1,271 @@
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, List, Optional
+
+from DrissionPage._base.chromium import Chromium
+from logger import crawler_thread_logger as logger
+
+from gmaps_crawler.browser.drivers import create_browser
+from gmaps_crawler.config import settings
+
+try:  # psutil ships with DrissionPage, but keep RSS checks optional
+    import psutil  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    psutil = None  # type: ignore
+
+
+@dataclass
+class _PooledBrowser:
+    browser: Chromium
+    proxy: Optional[str]
+    created_at: float
+    tiles_served: int = 0
+
+
+def browser_rss_mb(browser: Chromium) -> Optional[float]:
+    """Resident memory of a Chromium process tree in MB (None if unknown)."""
+    if psutil is None:
+        return None
+    pid = getattr(browser, "process_id", None)
+    if not pid:
+        return None
+    try:
+        proc = psutil.Process(int(pid))
+        total = proc.memory_info().rss
+        for child in proc.children(recursive=True):
+            try:
+                total += child.memory_info().rss
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        return total / (1024.0 * 1024.0)
+    except Exception as e:
+        logger.debug("browser rss probe failed: %s", e)
+        return None
+
+
+class BrowserPool:
+    """Lease warm Chromium instances to tiles instead of launching one per tile.
+
+    A browser is recycled (quit and relaunched on next lease) when:
+    1. it has served ``max_tiles`` tiles
+    2. its process tree RSS crosses ``max_rss_mb``
+    3. the requested proxy differs from the one it was launched with
+    4. the caller releases it as unhealthy
+    """
+
+    def __init__(
+        self,
+        *,
+        headless: bool,
+        window_width: Optional[int] = None,
+        window_height: Optional[int] = None,
+        size: Optional[int] = None,
+        max_tiles: Optional[int] = None,
+        max_rss_mb: Optional[float] = None,
+        factory: Optional[Callable[..., Chromium]] = None,
+    ) -> None:
+        self.headless = headless
+        self.window_width = window_width
+        self.window_height = window_height
+        self.size = max(1, int(size or settings.BROWSER_POOL_SIZE))
+        self.max_tiles = int(max_tiles if max_tiles is not None else settings.BROWSER_RECYCLE_TILES)
+        self.max_rss_mb = float(max_rss_mb if max_rss_mb is not None else settings.BROWSER_RECYCLE_RSS_MB)
+        self._factory = factory or create_browser
+
+        self._cond = threading.Condition()
+        self._idle: List[_PooledBrowser] = []
+        self._leased: Dict[int, _PooledBrowser] = {}
+        self._reserved = 0  # slots taken by launches in flight
+        self._closed = False
+
+        self._stats: Dict[str, float] = {
+            "leases": 0,
+            "launches": 0,
+            "reuses": 0,
+            "launch_ms_total": 0.0,
+            "lease_wait_ms_total": 0.0,
+            "lease_wait_ms_max": 0.0,
+            "recycled_tiles": 0,
+            "recycled_rss": 0,
+            "recycled_proxy": 0,
+            "recycled_unhealthy": 0,
+        }
+
+    # ---- public API ----
+    def lease(self, *, proxy: Optional[str] = None, timeout: Optional[float] = None) -> Chromium:
+        """Return a browser for exclusive use; blocks while all slots are leased."""
+        t0 = time.monotonic()
+        stale: Optional[_PooledBrowser] = None
+        entry: Optional[_PooledBrowser] = None
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("BrowserPool is closed")
+                if self._idle:
+                    entry = self._pick_idle(proxy)
+                    if entry.proxy != proxy:
+                        stale, entry = entry, None
+                        self._stats["recycled_proxy"] += 1
+                        self._reserved += 1
+                    break
+                if len(self._leased) + self._reserved < self.size:
+                    self._reserved += 1
+                    break
+                remaining = None if timeout is None else timeout - (time.monotonic() - t0)
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError("BrowserPool lease timed out")
+                self._cond.wait(remaining)
+            if entry is not None:
+                self._leased[id(entry.browser)] = entry
+                self._stats["reuses"] += 1
+                self._record_wait(t0)
+
+        if stale is not None:
+            self._quit(stale)
+        if entry is not None:
+            return entry.browser
+
+        try:
+            entry = self._launch(proxy)
+        except Exception:
+            with self._cond:
+                self._reserved -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._reserved -= 1
+            self._leased[id(entry.browser)] = entry
+            self._record_wait(t0)
+        return entry.browser
+
+    def release(self, browser: Chromium, *, healthy: bool = True, count_tile: bool = True) -> None:
+        """Return a leased browser; it is recycled if any limit was reached.
+
+        ``count_tile=False`` when the holder already counted its tiles with :meth:`note_tile`.
+        """
+        with self._cond:
+            entry = self._leased.pop(id(browser), None)
+        if entry is None:
+            logger.warning("[browser-pool] release of unknown browser ignored")
+            return
+        if count_tile:
+            entry.tiles_served += 1
+
+        reason = self._recycle_reason(entry, healthy)
+        if reason or self._closed:
+            if reason:
+                with self._cond:
+                    self._stats[f"recycled_{reason}"] += 1
+                logger.info("[browser-pool] recycle browser after %d tile(s): %s", entry.tiles_served, reason)
+            self._quit(entry)
+            with self._cond:
+                self._cond.notify()
+            return
+
+        with self._cond:
+            self._idle.append(entry)
+            self._cond.notify()
+
+    def note_tile(self, browser: Chromium) -> None:
+        """Count a tile served by a browser that stays leased across tiles."""
+        with self._cond:
+            entry = self._leased.get(id(browser))
+            if entry is not None:
+                entry.tiles_served += 1
+
+    def recycle_due(self, browser: Chromium) -> Optional[str]:
+        """Recycle reason a long-lived holder should act on (release and lease again), or None."""
+        with self._cond:
+            entry = self._leased.get(id(browser))
+        return self._recycle_reason(entry, True) if entry is not None else None
+
+    @contextmanager
+    def leased(self, *, proxy: Optional[str] = None) -> Iterator[Chromium]:
+        browser = self.lease(proxy=proxy)
+        healthy = True
+        try:
+            yield browser
+        except BaseException:
+            healthy = False
+            raise
+        finally:
+            self.release(browser, healthy=healthy)
+
+    def close(self) -> None:
+        """Quit idle browsers; leased ones are quit when released."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        for entry in idle:
+            self._quit(entry)
+
+    def stats(self) -> Dict[str, float]:
+        """Counters plus the estimated startup time saved by reuse."""
+        with self._cond:
+            out = dict(self._stats)
+        launches = int(out["launches"])
+        avg_launch = (out["launch_ms_total"] / launches) if launches else 0.0
+        out["launch_ms_avg"] = avg_launch
+        out["saved_startup_ms_est"] = avg_launch * out["reuses"]
+        return out
+
+    def log_stats(self) -> None:
+        s = self.stats()
+        logger.info(
+            "[browser-pool] leases=%d launches=%d reuses=%d wait_total=%dms wait_max=%dms "
+            "launch_avg=%dms saved_est=%dms recycled(tiles=%d rss=%d proxy=%d unhealthy=%d)",
+            s["leases"], s["launches"], s["reuses"],
+            s["lease_wait_ms_total"], s["lease_wait_ms_max"],
+            s["launch_ms_avg"], s["saved_startup_ms_est"],
+            s["recycled_tiles"], s["recycled_rss"], s["recycled_proxy"], s["recycled_unhealthy"],
+        )
+
+    # ---- helpers ----
+    def _pick_idle(self, proxy: Optional[str]) -> _PooledBrowser:
+        for i, entry in enumerate(self._idle):
+            if entry.proxy == proxy:
+                return self._idle.pop(i)
+        return self._idle.pop(0)
+
+    def _record_wait(self, t0: float) -> None:
+        waited = (time.monotonic() - t0) * 1000.0
+        self._stats["leases"] += 1
+        self._stats["lease_wait_ms_total"] += waited
+        self._stats["lease_wait_ms_max"] = max(self._stats["lease_wait_ms_max"], waited)
+
+    def _launch(self, proxy: Optional[str]) -> _PooledBrowser:
+        t0 = time.monotonic()
+        browser = self._factory(
+            headless=self.headless,
+            window_width=self.window_width,
+            window_height=self.window_height,
+            proxy=proxy,
+        )
+        elapsed = (time.monotonic() - t0) * 1000.0
+        with self._cond:
+            self._stats["launches"] += 1
+            self._stats["launch_ms_total"] += elapsed
+        logger.debug("[browser-pool] launched browser proxy=%s elapsed=%dms", proxy or "", elapsed)
+        return _PooledBrowser(browser=browser, proxy=proxy, created_at=time.monotonic())
+
+    def _recycle_reason(self, entry: _PooledBrowser, healthy: bool) -> Optional[str]:
+        if not healthy:
+            return "unhealthy"
+        if self.max_tiles > 0 and entry.tiles_served >= self.max_tiles:
+            return "tiles"
+        if self.max_rss_mb > 0:
+            rss = browser_rss_mb(entry.browser)
+            if rss is not None and rss >= self.max_rss_mb:
+                return "rss"
+        return None
+
+    def _quit(self, entry: _PooledBrowser) -> None:
+        try:
+            entry.browser.quit(timeout=5, force=True, del_data=False)
+        except Exception as e:
+            logger.warning("[browser-pool] browser quit failed: %s", e)
@@ -1,10 +1,12 @@
 from __future__ import annotations
 
 import argparse
+import os
 from pathlib import Path
 from typing import Dict, Optional, Sequence
 
 from gmaps_crawler.pipeline.city.crawl_city import crawl_city
+from gmaps_crawler.pipeline.city.ordering import ORDERINGS
 from gmaps_crawler.pipeline.exec.stop import install_signal_handlers
 
 
@@ -28,6 +30,19 @@ def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
     parser.add_argument("--proxy-source", action="append")
     parser.add_argument("--proxy-strategy", choices=["round_robin", "random"], default="round_robin")
     parser.add_argument("--workers", type=int, default=1, help="Number of parallel workers for detail extraction (default: %(default)s).")
+    parser.add_argument("--adaptive", action="store_true", help="Adaptive quadtree tiling: split tiles whose result list hits the cap.")
+    parser.add_argument("--max-depth", type=int, default=2, help="Max quadtree split depth in adaptive mode (default: %(default)s).")
+    parser.add_argument("--tile-order", choices=list(ORDERINGS), default=None, help="Tile visit order (default: settings.TILE_ORDER).")
+    parser.add_argument("--pipelined", action="store_true", help="Harvest the next tile while details of the current one are extracted.")
+    parser.add_argument("--processes", type=int, default=1, help="Crawler processes (one browser each) claiming tiles from the DB via leases.")
+    parser.add_argument("--claim", action="store_true", help="Claim tiles from an existing grid in a shared DB (run on several hosts with the same --db-path).")
+    parser.add_argument("--adaptive-workers", action="store_true", default=None, help="AIMD concurrency: --workers becomes the ceiling, actual concurrency follows latency/failure signals.")
+    parser.add_argument("--block-profile", choices=["off", "maps", "strict"], default=None, help="CDP request blocking for crawler tabs (default: settings.BLOCK_PROFILE).")
+    parser.add_argument("--metrics-port", type=int, default=None, help="Serve Prometheus metrics on 127.0.0.1:PORT (default: settings.METRICS_PORT, 0 = off).")
+    parser.add_argument("--log-json", type=Path, default=None, help="Also write structured JSON-lines logs here (default: $LOG_JSON_PATH, unset = off).")
+    parser.add_argument("--log-done-every", type=int, default=None, help="Keep 1 of every N per-task done lines on console/app.log (default: $LOG_DONE_EVERY or 20).")
+    parser.add_argument("--log-dir", type=Path, default=None, help="Directory of app.log (default: $LOG_DIR or <project>/logs).")
+    parser.add_argument("--no-log-queue", action="store_true", help="Render logs synchronously in the calling thread instead of via the listener thread.")
     parser.add_argument("--db-path", type=Path, default=Path("data/db/gmaps.sqlite"))
     parser.add_argument("--csv-path", type=Path, default=Path("data/places.csv"))
     parser.add_argument("--html-root", type=Path, default=Path("data/html"))
@@ -36,8 +51,24 @@ def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
 
 def main(argv: Optional[Sequence[str]] = None) -> None:
     # 使用自定义 logger（导入即全局生效）
-    import logger  # noqa: F401
+    import logger
     args = parse_args(argv)
+    # shard processes re-import logger, so pass the overrides through the environment too
+    if args.log_json is not None:
+        os.environ["LOG_JSON_PATH"] = str(args.log_json)
+    if args.log_done_every is not None:
+        os.environ["LOG_DONE_EVERY"] = str(args.log_done_every)
+    if args.no_log_queue:
+        os.environ["LOG_QUEUE"] = "0"
+    if args.log_dir is not None:
+        os.environ["LOG_DIR"] = str(args.log_dir.resolve())
+    if args.log_json is not None or args.log_done_every is not None or args.no_log_queue or args.log_dir is not None:
+        logger.configure(
+            use_queue=False if args.no_log_queue else None,
+            json_path=None if args.log_json is None else str(args.log_json),
+            done_every=args.log_done_every,
+            log_dir=None if args.log_dir is None else str(args.log_dir),
+        )
     # Enable Ctrl+C graceful stop
     install_signal_handlers()
     crawl_city(
@@ -60,6 +91,15 @@ def main(argv: Optional[Sequence[str]] = None) -> None:
         db_path=args.db_path,
         csv_path=args.csv_path,
         html_root=args.html_root,
+        adaptive=args.adaptive,
+        max_depth=args.max_depth,
+        pipelined=args.pipelined,
+        adaptive_workers=args.adaptive_workers,
+        processes=args.processes,
+        claim=args.claim,
+        block_profile=args.block_profile,
+        metrics_port=args.metrics_port,
+        tile_order=args.tile_order,
     )
 
 
@@ -28,6 +28,75 @@ class Settings(BaseSettings):
     # 写入线程进度日志频率（每写入 N 条打印一次）
     WRITER_PROGRESS_EVERY: int = 10
 
+    # 批量写入（group commit）：每 N 行或每 T 毫秒提交一次，先到先提交
+    DB_BATCH_SIZE: int = 100
+    DB_BATCH_INTERVAL_MS: float = 250.0
+
+    # 浏览器池配置（跨 tile 复用 Chromium）
+    BROWSER_POOL_SIZE: int = 1  # 同时存活的浏览器数量
+    BROWSER_RECYCLE_TILES: int = 50  # 每个浏览器服务 N 个 tile 后重启（0 = 不限）
+    BROWSER_RECYCLE_RSS_MB: float = 1500.0  # 进程树 RSS 超过阈值后重启（0 = 不检查）
+
+    # 流水线模式：卡片采集与详情抓取重叠，全局详情队列上限（满则采集阶段阻塞）
+    PIPELINE_QUEUE_SIZE: int = 200
+
+    # 详情页字段提取：一次 run_js 取回全部 DOM 字段（失败时回退到逐字段提取）
+    EXTRACT_USE_JS: bool = True
+
+    # HTML 快照：详情页/搜索列表页压缩存档到 html_root，便于离线重新提取
+    SNAPSHOT_HTML: bool = True
+    SNAPSHOT_QUEUE_SIZE: int = 256  # 后台写入队列上限（满则丢弃快照，不阻塞标签页）
+
+    # 商家网站联系方式抓取：优先 HTTP 直连（aiohttp），仅 JS 渲染站点回退到浏览器
+    CONTACT_HTTP_ENABLED: bool = True
+    CONTACT_HTTP_TIMEOUT: float = 10.0  # 单个请求总超时（秒）
+    CONTACT_HTTP_PER_HOST: int = 2  # 每个域名并发连接数
+    CONTACT_HTTP_CONCURRENCY: int = 16  # 全局并发连接数
+    CONTACT_HTTP_MAX_BYTES: int = 2_000_000  # 响应体大小上限（字节）
+    # 网站联系方式缓存（按规范化 URL，跨地点/跨运行共享）
+    CONTACT_CACHE_ENABLED: bool = True
+    CONTACT_CACHE_TTL_DAYS: float = 30.0  # 过期天数
+    CONTACT_CACHE_MAX_ENTRIES: int = 10000  # 内存 LRU 条目上限
+
+    # 自适应并发（AIMD）：健康时每个窗口 +1，超时/同意页/ENFE 激增时乘以 AIMD_DECREASE；--workers 为上限
+    AIMD_ENABLED: bool = False
+    AIMD_MIN_WORKERS: int = 1
+    AIMD_INITIAL_WORKERS: int = 0  # 初始并发（0 = 从 AIMD_MIN_WORKERS 开始）
+    AIMD_WINDOW: int = 20  # 每 N 个样本评估一次
+    AIMD_DECREASE: float = 0.5  # 乘性减小系数
+    AIMD_LATENCY_TARGET_S: float = 25.0  # 单个地点耗时中位数上限（秒）
+    AIMD_MAX_FAILURE_RATE: float = 0.3  # 窗口失败率上限
+    AIMD_MAX_ENFE_RATE: float = 0.2  # 窗口内 ElementNotFoundError 比例上限
+
+    # 多进程/多主机分片：tile 租约时长（秒，心跳每 1/3 续约一次）与认领模式下失败 tile 的最大尝试次数
+    TILE_LEASE_S: float = 120.0
+    TILE_MAX_ATTEMPTS: int = 3
+    # tile 访问顺序：index（按 tile_index 逐行）/ serpentine（蛇形）/ hilbert / zorder / spiral（从结果最密处螺旋向外）
+    TILE_ORDER: str = "hilbert"
+    # 网格裁剪到城市行政边界多边形（Overpass out geom，缓存于 data/cache/city_polygons/）；取不到时退回整个 bbox
+    GRID_CLIP_POLYGON: bool = True
+    POLYGON_SIMPLIFY_M: float = 50.0  # 边界简化容差（米，Douglas-Peucker）
+    # 网格分块：每块 N 个 tile 批量生成并写入 tiles（国家级区域也只占一块的内存）；主循环按页读取 tile
+    GRID_CHUNK_SIZE: int = 50_000
+    TILE_PAGE_SIZE: int = 1000
+
+    # 标签页 CDP 资源拦截：off 不拦截；maps 拦截图片/媒体/字体与追踪脚本（保留地图瓦片和比例尺）；strict 另拦截样式表
+    BLOCK_PROFILE: str = "off"
+
+    # 结果卡片从监听到的 search?tbm=map 响应解析（翻页耗尽即停止滚动）；解析不到时回退到 DOM 遍历
+    CARDS_FROM_XHR: bool = True
+
+    # 阶段耗时指标（直方图/计数器，按 tile、worker 打标签）：METRICS_PORT > 0 时在本地暴露 Prometheus 文本端点；运行结束写 JSON 汇总
+    METRICS_ENABLED: bool = True
+    METRICS_PORT: int = 0  # 0 = 不启动 HTTP 端点
+    METRICS_DIR: str = "data/metrics"
+
+    # 失败重跑批量模式：K 个浏览器 × 每个 M 个标签页持续消费失败 place（M 由 workers 均分）
+    RERUN_BATCH: bool = True
+    RERUN_BROWSERS: int = 1
+    RERUN_LEASE_PLACES: int = 50  # 每次租用浏览器处理的 place 数；归还时浏览器池检查 RSS
+    RERUN_RECYCLE_PLACES: int = 500  # 每个浏览器处理 N 个 place 后重启（0 = 不限，仍检查 RSS）
+
     class Config:
         env_file = ".env"
 
@@ -10,6 +10,7 @@ from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 from logger import writer_thread_logger as logger
 
+import numpy as np
 import pandas as pd
 from gmaps_crawler.config import settings  # noqa: F401 (import to initialize logging)
 
@@ -82,21 +83,52 @@ def split_location_fields(location_text: str, city_fallback: str = "") -> Tuple[
         return parts[0], "", ""
     return city_fallback, "", ""
 
+COMMON_URLS = frozenset([
+    "youtube.com", "bilibili.com", "tiktok.com", "vimeo.com",
+    "facebook.com", "twitter.com", "instagram.com", "weibo.com",
+    "reddit.com", "linkedin.com", "pinterest.com", "threads.net",
+    "google.com", "baidu.com", "bing.com", "yahoo.com", "duckduckgo.com",
+    "amazon.com", "taobao.com", "tmall.com", "jd.com", "ebay.com",
+    "cnn.com", "bbc.com", "nytimes.com", "foxnews.com", "reuters.com",
+    "spotify.com", "soundcloud.com", "apple.com/music", "netflix.com",
+    "disneyplus.com", "hulu.com",
+    "gmail.com", "outlook.com", "yahoo.com/mail", "163.com", "qq.com",
+    "quora.com", "zhihu.com", "douban.com", "stackoverflow.com",
+    "wikipedia.org", "canva.com", "medium.com", "notion.so",
+    "figma.com", "github.com", "gitlab.com",
+])
+
+# 过滤掉不符合正常手机号格式的项（如 +2336-237 这种）
+PHONE_VALID_RE = re.compile(r"^(?:\+(?:[1-9]\d{0,2})(?:[-\s]?\d{6,})?)$")
+
+# Desired columns & order (per client doc)
+EXPORT_COLUMNS = [
+    "business_name",
+    "instagram_handle",
+    "city",
+    "state_province",
+    "country",
+    "full_address",
+    "phone",
+    "additional_phones",
+    "google_maps_url",
+    "website_url",
+    "opening_hours",
+    "google_knowledge_url",
+    "social_medias_raw",
+    "facebook_url",
+    "twitter_url",
+    "yelp_url",
+    "email",
+    "email_owner_name",
+    "source_url",
+    "scrape_notes",
+]
+
+_TEXT_COLUMNS = ["name", "href", "city", "address", "location", "phone", "website", "open_time"]
+
+
 def website_filter(website_url: Union[str, List[str]]):
-    common_urls = [
-        "youtube.com", "bilibili.com", "tiktok.com", "vimeo.com",
-        "facebook.com", "twitter.com", "instagram.com", "weibo.com",
-        "reddit.com", "linkedin.com", "pinterest.com", "threads.net",
-        "google.com", "baidu.com", "bing.com", "yahoo.com", "duckduckgo.com",
-        "amazon.com", "taobao.com", "tmall.com", "jd.com", "ebay.com",
-        "cnn.com", "bbc.com", "nytimes.com", "foxnews.com", "reuters.com",
-        "spotify.com", "soundcloud.com", "apple.com/music", "netflix.com",
-        "disneyplus.com", "hulu.com",
-        "gmail.com", "outlook.com", "yahoo.com/mail", "163.com", "qq.com",
-        "quora.com", "zhihu.com", "douban.com", "stackoverflow.com",
-        "wikipedia.org", "canva.com", "medium.com", "notion.so",
-        "figma.com", "github.com", "gitlab.com",
-    ]
     def _website_filter(website: str):
         website = (website
                     .replace(" ", "")
@@ -104,112 +136,171 @@ def website_filter(website_url: Union[str, List[str]]):
                     .replace("http://", "")
                     .replace("www.", ""))
         website = website[:-1] if website.endswith("/") else website
-        return "" if website in common_urls else website
+        return "" if website in COMMON_URLS else website
     
     if isinstance(website_url, List):
         return [ _website_filter(w) for w in website_url if w]
     
     return _website_filter(website_url)
-        
 
-def build_rows(df: pd.DataFrame) -> List[Dict[str, str]]:
-    rows: List[Dict[str, str]] = []
-    for _, r in df.iterrows():
-        name = str(r.get("name") or "")
-        href = str(r.get("href") or "")
-        city_db = str(r.get("city") or "")
-        address = str(r.get("address") or "")
-        location_txt = str(r.get("location") or "")
-        phone = str(r.get("phone") or "")
-        website = website_filter(str(r.get("website") or ""))
-        social_media_urls = json_load_maybe(r.get("social_media_urls"), [])
-        open_time = str(r.get("open_time") or "")
-        eps = json_load_maybe(r.get("emails_phones_socials"), {})
-
-        # city/state/country
-        city_out, state_province, country = split_location_fields(location_txt, city_fallback=city_db)
-
-        # socials dict
-        socials = eps.get("socials") if isinstance(eps, dict) else {}
-        socials = socials if isinstance(socials, dict) else {}
-        facebook_url = str(socials.get("facebook") or "")
-        twitter_url = str(socials.get("twitter") or "")
-        yelp_url = str(socials.get("yelp") or "")
-
-        # instagram handle
-        ig_handle = extract_instagram_handle(social_media_urls)
-
-        # additional phones (distinct, excluding primary)
-        add_phones_list: List[str] = []
-        phs = eps.get("phones") if isinstance(eps, dict) else []
-        PHONE_VALID_RE = re.compile(r"^(?:\+(?:[1-9]\d{0,2})(?:[-\s]?\d{6,})?)$")
-
-        if isinstance(phs, list):
-            for p in phs:
-                pv = str(p.get("phone") if isinstance(p, dict) else p or "").strip()
-                # 过滤掉不符合正常手机号格式的项（如 +2336-237 这种）
-                if not PHONE_VALID_RE.match(pv):
-                    continue
-                if pv and pv.replace("+", "").replace(" ", "") != phone.replace("+", "").replace(" ", "") and pv not in add_phones_list:
-                    add_phones_list.append(pv)
-
-        add_phones_list = list(set(add_phones_list))
-        if phone in add_phones_list:
-            add_phones_list.remove(phone)
-        additional_phones = ",".join(add_phones_list)
-
-
-        # social medias raw list (combine raw list + summarized socials values)
-        raw_urls_list: List[str] = []
-        if isinstance(social_media_urls, list):
-            raw_urls_list.extend([str(u) for u in (social_media_urls or []) if u])
-        raw_urls_list.extend([str(v) for v in socials.values() if v])
-        raw_urls_list = list(dict.fromkeys([u for u in raw_urls_list if u]))
-        social_medias_raw = ",".join(raw_urls_list)
-
-        # emails list (one row per email)
-        emails_items = eps.get("emails") if isinstance(eps, dict) else []
-        emitted = False
-        if isinstance(emails_items, list) and emails_items:
-            for item in emails_items:
-                if not isinstance(item, dict):
-                    continue
-                src_text = str(item.get("email") or "")
-                owner = str(item.get("owner") or "")  # optional
-                source_url = str(item.get("source_url") or "")
-                for em in normalize_email(src_text):
-                    rows.append(
-                        {
-                            "business_name": name,
-                            "instagram_handle": ig_handle,
-                            "city": city_out,
-                            "state_province": state_province,
-                            "country": country,
-                            "full_address": address,
-                            "phone": phone,
-                            "additional_phones": additional_phones,
-                            "google_maps_url": href,
-                            "website_url": website,
-                            "opening_hours": open_time,
-                            "google_knowledge_url": "",
-                            "social_medias_raw": social_medias_raw,
-                            "facebook_url": facebook_url,
-                            "twitter_url": twitter_url,
-                            "yelp_url": yelp_url,
-                            "email": em,
-                            "email_owner_name": owner,
-                            "source_url": source_url,
-                            "scrape_notes": "",
-                        }
-                    )
-                    emitted = True
-        if not emitted:
-            # one email per row; skip if not found
+
+def _decode_many(texts: List[str], default) -> list:
+    # one json.loads per block; a bad value only costs the halves it sits in
+    if not texts:
+        return []
+    try:
+        decoded = json.loads("[" + ",".join(texts) + "]")
+        if len(decoded) == len(texts):
+            return decoded
+    except ValueError:
+        pass
+    if len(texts) == 1:
+        return [default]
+    mid = len(texts) // 2
+    return _decode_many(texts[:mid], default) + _decode_many(texts[mid:], default)
+
+
+def json_column(values, default) -> list:
+    """Decode a column of JSON texts; NULL/invalid values become ``default``.
+
+    Distinct texts are decoded in bulk (``json.loads`` over a joined array,
+    halved around invalid values).
+    """
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object), use_na_sentinel=True)
+    valid = [i for i, t in enumerate(uniques) if isinstance(t, str) and t.strip()]
+    decoded: list = [default] * len(uniques)
+    for i, v in zip(valid, _decode_many([uniques[i] for i in valid], default)):
+        decoded[i] = v
+    return [decoded[c] if c >= 0 else default for c in codes]
+
+
+def _text(series: pd.Series) -> List[str]:
+    # str(value or "") per cell; NULL is None (pandas < 3) or NaN (pandas 3 string inference)
+    return ["" if (v is None or v != v or v == "") else str(v) for v in series.astype(object).tolist()]
+
+
+def _additional_phones(phs, phone: str) -> str:
+    if not isinstance(phs, list):
+        return ""
+    primary = phone.replace("+", "").replace(" ", "")
+    out: Dict[str, None] = {}
+    for p in phs:
+        pv = str(p.get("phone") if isinstance(p, dict) else p or "").strip()
+        if not PHONE_VALID_RE.match(pv):
             continue
-    return rows
+        if pv and pv.replace("+", "").replace(" ", "") != primary:
+            out.setdefault(pv, None)
+    out.pop(phone, None)
+    return ",".join(out)
 
 
-def export_emails_csv(db_path: Path, out_csv: Path, *, city: Optional[str] = None, query: Optional[str] = None) -> int:
+def _social_medias_raw(social_media_urls, socials: dict) -> str:
+    raw: List[str] = []
+    if isinstance(social_media_urls, list):
+        raw.extend(str(u) for u in social_media_urls if u)
+    raw.extend(str(v) for v in socials.values() if v)
+    return ",".join(dict.fromkeys(u for u in raw if u))
+
+
+def _instagram(social_media_urls) -> str:
+    if not isinstance(social_media_urls, list):
+        return ""
+    return next((u for u in social_media_urls if isinstance(u, str) and "instagram" in u), "")
+
+
+def build_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Export rows (one per email, ``EXPORT_COLUMNS``) for a chunk of ``places`` rows.
+
+    Columnar version of the former per-row loop: JSON columns are decoded in
+    bulk, emails are exploded into (place, email) pairs first, and the place
+    columns are then built only for places that produced a row, location /
+    website normalisation running once per distinct value.
+    """
+    if df.empty:
+        return pd.DataFrame(columns=EXPORT_COLUMNS)
+    eps = json_column(df["emails_phones_socials"], {})
+
+    # exploded emails: one entry per (email item, address found in it)
+    e_row: List[int] = []
+    e_email: List[str] = []
+    e_owner: List[str] = []
+    e_src: List[str] = []
+    for i, e in enumerate(eps):
+        items = e.get("emails") if isinstance(e, dict) else None
+        if not isinstance(items, list):
+            continue
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            found = normalize_email(str(item.get("email") or ""))
+            if not found:
+                continue
+            owner = str(item.get("owner") or "")
+            src = str(item.get("source_url") or "")
+            for em in found:
+                e_row.append(i)
+                e_email.append(em)
+                e_owner.append(owner)
+                e_src.append(src)
+    if not e_row:
+        return pd.DataFrame(columns=EXPORT_COLUMNS)
+
+    # per-place columns, only for places that produced rows
+    rows_idx = list(dict.fromkeys(e_row))
+    sub = df.iloc[rows_idx]
+    text = {c: _text(sub[c]) if c in sub else [""] * len(sub) for c in _TEXT_COLUMNS}
+    sub_eps = [eps[i] for i in rows_idx]
+    sm_urls = json_column(sub["social_media_urls"], []) if "social_media_urls" in sub else [[]] * len(sub)
+    socials = [e.get("socials") if isinstance(e, dict) else {} for e in sub_eps]
+    socials = [s if isinstance(s, dict) else {} for s in socials]
+
+    loc_key = list(zip(text["location"], text["city"]))
+    loc_map = {k: split_location_fields(k[0], city_fallback=k[1]) for k in dict.fromkeys(loc_key)}
+    locs = [loc_map[k] for k in loc_key]
+    web_map = {w: website_filter(w) for w in dict.fromkeys(text["website"])}
+
+    place = {
+        "business_name": text["name"],
+        "instagram_handle": [_instagram(u) for u in sm_urls],
+        "city": [l[0] for l in locs],
+        "state_province": [l[1] for l in locs],
+        "country": [l[2] for l in locs],
+        "full_address": text["address"],
+        "phone": text["phone"],
+        "additional_phones": [_additional_phones(e.get("phones") if isinstance(e, dict) else [], ph) for e, ph in zip(sub_eps, text["phone"])],
+        "google_maps_url": text["href"],
+        "website_url": [web_map[w] for w in text["website"]],
+        "opening_hours": text["open_time"],
+        "social_medias_raw": [_social_medias_raw(u, s) for u, s in zip(sm_urls, socials)],
+        "facebook_url": [str(s.get("facebook") or "") for s in socials],
+        "twitter_url": [str(s.get("twitter") or "") for s in socials],
+        "yelp_url": [str(s.get("yelp") or "") for s in socials],
+    }
+    # repeat place columns per email
+    pos = {r: j for j, r in enumerate(rows_idx)}
+    take = np.fromiter((pos[r] for r in e_row), dtype=np.intp, count=len(e_row))
+    cols = {c: np.asarray(v, dtype=object)[take] for c, v in place.items()}
+    cols["google_knowledge_url"] = np.full(len(e_row), "", dtype=object)
+    cols["email"] = e_email
+    cols["email_owner_name"] = e_owner
+    cols["source_url"] = e_src
+    cols["scrape_notes"] = cols["google_knowledge_url"]
+    return pd.DataFrame({c: cols[c] for c in EXPORT_COLUMNS}, dtype=object)
+
+
+def build_rows(df: pd.DataFrame) -> List[Dict[str, str]]:
+    return build_frame(df).to_dict("records")
+
+
+def export_emails_csv(
+    db_path: Path,
+    out_csv: Path,
+    *,
+    city: Optional[str] = None,
+    query: Optional[str] = None,
+    chunksize: int = 50_000,
+) -> int:
+    """Write one row per email; places are streamed from SQLite ``chunksize`` at a time."""
     conn = sqlite3.connect(str(db_path))
     try:
         base_sql = (
@@ -224,40 +315,19 @@ def export_emails_csv(db_path: Path, out_csv: Path, *, city: Optional[str] = Non
         if query:
             conds.append("query = ?")
             params.append(query)
-        if conds:
-            base_sql += " WHERE " + " AND ".join(conds)
-        df = pd.read_sql(base_sql, conn, params=params)
-        rows = build_rows(df)
-
-        # Desired columns & order (per client doc)
-        cols = [
-            "business_name",
-            "instagram_handle",
-            "city",
-            "state_province",
-            "country",
-            "full_address",
-            "phone",
-            "additional_phones",
-            "google_maps_url",
-            "website_url",
-            "opening_hours",
-            "google_knowledge_url",
-            "social_medias_raw",
-            "facebook_url",
-            "twitter_url",
-            "yelp_url",
-            "email",
-            "email_owner_name",
-            "source_url",
-            "scrape_notes",
-        ]
-        if not rows:
-            pd.DataFrame(columns=cols).to_csv(out_csv, index=False, encoding="utf-8")
-            return 0
-        out_df = pd.DataFrame(rows)[cols]
-        out_df.to_csv(out_csv, index=False, encoding="utf-8")
-        return len(out_df)
+        # cheap pre-filter: places without any '@' in their contacts never produce a row
+        conds.append("instr(emails_phones_socials, '@') > 0")
+        base_sql += " WHERE " + " AND ".join(conds)
+
+        pd.DataFrame(columns=EXPORT_COLUMNS).to_csv(out_csv, index=False, encoding="utf-8")
+        total = 0
+        for chunk in pd.read_sql(base_sql, conn, params=params, chunksize=max(1, int(chunksize))):
+            out_df = build_frame(chunk)
+            if out_df.empty:
+                continue
+            out_df.to_csv(out_csv, mode="a", header=False, index=False, encoding="utf-8")
+            total += len(out_df)
+        return total
     finally:
         conn.close()
 
@@ -268,10 +338,11 @@ def parse_args() -> argparse.Namespace:
     p.add_argument("--out", type=Path, default=Path("data/export_emails.csv"), help="Output CSV path.")
     p.add_argument("--city", help="Optional city filter.")
     p.add_argument("--query", help="Optional query phrase filter.")
+    p.add_argument("--chunksize", type=int, default=50_000, help="Places read from SQLite per chunk.")
     return p.parse_args()
 
 
 if __name__ == "__main__":
     args = parse_args()
-    count = export_emails_csv(args.db, args.out, city=args.city, query=args.query)
+    count = export_emails_csv(args.db, args.out, city=args.city, query=args.query, chunksize=args.chunksize)
     print(f"Exported {count} email rows to {args.out}")
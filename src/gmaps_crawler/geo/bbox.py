@@ -1,14 +1,19 @@
 from logger import crawler_thread_logger as logger
 import os
+import re
 import time
 from dataclasses import dataclass
-from typing import Iterable, Optional, Tuple, Dict
+from typing import Any, Callable, Iterable, Optional, Tuple, Dict, TypeVar
 from threading import Lock
 from pathlib import Path
 import json
 
 import requests
 
+from gmaps_crawler.geo.polygon import CityPolygon
+
+T = TypeVar("T")
+
 DEFAULT_TIMEOUT = 30
 REQUEST_TIMEOUT = (10, DEFAULT_TIMEOUT)
 ENV_ENDPOINTS = "GMAPS_CRAWLER_OVERPASS_ENDPOINTS"
@@ -26,6 +31,10 @@ DEFAULT_OVERPASS_ENDPOINTS = [
 _BBOX_CACHE_MEM: Dict[Tuple[str, str], Tuple[float, float, float, float]] = {}
 _BBOX_CACHE_LOCK = Lock()
 _BBOX_CACHE_PATH = Path("data/cache/bbox_cache.json")
+# Boundary relations (raw ``out geom`` rings as GeoJSON, one file per city/country/admin_level)
+_POLYGON_CACHE_MEM: Dict[Tuple[str, str, str], CityPolygon] = {}
+_POLYGON_CACHE_LOCK = Lock()
+_POLYGON_CACHE_DIR = Path("data/cache/city_polygons")
 
 
 def _load_bbox_cache_disk() -> None:
@@ -86,8 +95,8 @@ def _iter_overpass_endpoints() -> Iterable[str]:
     return DEFAULT_OVERPASS_ENDPOINTS
 
 
-def _build_query(city: str, country: Optional[str] = None, admin_level: Optional[int] = None) -> str:
-    """Fetch bounding box via Overpass."""
+def _build_query(city: str, country: Optional[str] = None, admin_level: Optional[int] = None, out: str = "bb") -> str:
+    """Overpass QL for the city's administrative relation (``out bb`` or ``out geom``)."""
     city_filter = f'["name"="{city}"]'
     if admin_level is not None:
         city_filter += f'["admin_level"="{admin_level}"]'
@@ -97,44 +106,28 @@ def _build_query(city: str, country: Optional[str] = None, admin_level: Optional
             f"[out:json][timeout:{DEFAULT_TIMEOUT}];\n"
             f"area[\"name\"=\"{country}\"][\"boundary\"=\"administrative\"][\"admin_level\"=\"2\"]->.searchArea;\n"
             f"relation{city_filter}[\"boundary\"=\"administrative\"](area.searchArea);\n"
-            "out bb;"
+            f"out {out};"
         )
     return (
         f"[out:json][timeout:{DEFAULT_TIMEOUT}];\n"
         f"relation{city_filter}[\"boundary\"=\"administrative\"];\n"
-        "out bb;"
+        f"out {out};"
     )
 
 
-def fetch_bounding_box(
-    city: str,
-    *,
-    country: Optional[str] = None,
-    admin_level: Optional[int] = None,
-    session: Optional[requests.Session] = None,
-) -> BoundingBox:
-    """Fetch bounding box via Overpass."""
-    if not city:
-        raise ValueError("city 参数不能为空")
+def _query_overpass(query: str, parse: Callable[[Dict[str, Any]], T], *, session: Optional[requests.Session], label: str) -> T:
+    """POST ``query`` to each endpoint in turn until ``parse(payload)`` succeeds.
 
-    key = (city.strip(), (country or "").strip())
-    with _BBOX_CACHE_LOCK:
-        if not _BBOX_CACHE_MEM:
-            _load_bbox_cache_disk()
-        if key in _BBOX_CACHE_MEM:
-            min_lat, min_lon, max_lat, max_lon = _BBOX_CACHE_MEM[key]
-            logger.info("Using cached bbox for city=%s country=%s: (%s,%s,%s,%s)", city, country or "", min_lat, min_lon, max_lat, max_lon)
-            return BoundingBox(min_lat=min_lat, min_lon=min_lon, max_lat=max_lat, max_lon=max_lon)
-
-    query = _build_query(city, country=country, admin_level=admin_level)
+    ``parse`` raises OverpassDataError for unusable payloads, which moves on to
+    the next endpoint like transport errors do.
+    """
     own_session = False
     if session is None:
         session = requests.Session()
         own_session = True
 
     endpoints = list(_iter_overpass_endpoints())
-    logger.info("Fetching Overpass bounding box for city=%s country=%s endpoints=%d",
-                city, country or "N/A", len(endpoints))
+    logger.info("Fetching Overpass %s endpoints=%d", label, len(endpoints))
 
     last_error: Optional[Exception] = None
 
@@ -152,32 +145,9 @@ def fetch_bounding_box(
                         f"HTTP {response.status_code} from {endpoint} after {elapsed}ms: {response.text[:200]}"
                     )
 
-                payload = response.json()
-                elements = payload.get("elements")
-                if not elements:
-                    raise OverpassDataError(
-                        f"No bounding box found for city='{city}', country='{country}', admin_level={admin_level}"
-                    )
-
-                bounds = elements[0].get("bounds")
-                if not bounds:
-                    raise OverpassDataError(f"Missing 'bounds' field in Overpass response for {city}")
-
-                bbox = BoundingBox(
-                    min_lat=float(bounds["minlat"]),
-                    min_lon=float(bounds["minlon"]),
-                    max_lat=float(bounds["maxlat"]),
-                    max_lon=float(bounds["maxlon"]),
-                )
-
-                # cache and return
-                with _BBOX_CACHE_LOCK:
-                    _BBOX_CACHE_MEM[key] = bbox.as_tuple()
-                    _save_bbox_cache_disk()
-
-                logger.info("[overpass] success: city=%s country=%s endpoint=%s elapsed=%dms bbox=%s",
-                            city, country, endpoint, elapsed, bbox.as_tuple())
-                return bbox
+                result = parse(response.json())
+                logger.info("[overpass] success: %s endpoint=%s elapsed=%dms", label, endpoint, elapsed)
+                return result
 
             except requests.Timeout as e:
                 last_error = OverpassConnectionError(f"Timeout contacting {endpoint}: {e}")
@@ -199,7 +169,120 @@ def fetch_bounding_box(
         if own_session:
             session.close()
 
-    raise OverpassError(f"All Overpass endpoints failed for '{city}'. Last error: {last_error}")
+    raise OverpassError(f"All Overpass endpoints failed for {label}. Last error: {last_error}")
+
+
+def fetch_bounding_box(
+    city: str,
+    *,
+    country: Optional[str] = None,
+    admin_level: Optional[int] = None,
+    session: Optional[requests.Session] = None,
+) -> BoundingBox:
+    """Fetch bounding box via Overpass."""
+    if not city:
+        raise ValueError("city 参数不能为空")
+
+    key = (city.strip(), (country or "").strip())
+    with _BBOX_CACHE_LOCK:
+        if not _BBOX_CACHE_MEM:
+            _load_bbox_cache_disk()
+        if key in _BBOX_CACHE_MEM:
+            min_lat, min_lon, max_lat, max_lon = _BBOX_CACHE_MEM[key]
+            logger.info("Using cached bbox for city=%s country=%s: (%s,%s,%s,%s)", city, country or "", min_lat, min_lon, max_lat, max_lon)
+            return BoundingBox(min_lat=min_lat, min_lon=min_lon, max_lat=max_lat, max_lon=max_lon)
+
+    def parse(payload: Dict[str, Any]) -> BoundingBox:
+        elements = payload.get("elements")
+        if not elements:
+            raise OverpassDataError(
+                f"No bounding box found for city='{city}', country='{country}', admin_level={admin_level}"
+            )
+
+        bounds = elements[0].get("bounds")
+        if not bounds:
+            raise OverpassDataError(f"Missing 'bounds' field in Overpass response for {city}")
+
+        return BoundingBox(
+            min_lat=float(bounds["minlat"]),
+            min_lon=float(bounds["minlon"]),
+            max_lat=float(bounds["maxlat"]),
+            max_lon=float(bounds["maxlon"]),
+        )
+
+    query = _build_query(city, country=country, admin_level=admin_level)
+    bbox = _query_overpass(query, parse, session=session, label=f"bounding box for city={city} country={country or 'N/A'}")
+
+    # cache and return
+    with _BBOX_CACHE_LOCK:
+        _BBOX_CACHE_MEM[key] = bbox.as_tuple()
+        _save_bbox_cache_disk()
+    logger.info("[overpass] city=%s country=%s bbox=%s", city, country, bbox.as_tuple())
+    return bbox
+
+
+def _polygon_cache_file(key: Tuple[str, str, str]) -> Path:
+    slug = re.sub(r"[^\w.-]+", "_", "|".join(key), flags=re.UNICODE).strip("_")
+    return _POLYGON_CACHE_DIR / f"{slug}.geojson"
+
+
+def fetch_city_polygon(
+    city: str,
+    *,
+    country: Optional[str] = None,
+    admin_level: Optional[int] = None,
+    simplify_m: float = 50.0,
+    session: Optional[requests.Session] = None,
+) -> CityPolygon:
+    """Fetch the city's boundary relation via Overpass (``out geom``), simplified to ``simplify_m`` metres.
+
+    The raw rings are cached in memory and under data/cache/city_polygons/;
+    simplification runs on every call so the tolerance can change freely.
+    """
+    if not city:
+        raise ValueError("city 参数不能为空")
+
+    key = (city.strip(), (country or "").strip(), str(admin_level or ""))
+    path = _polygon_cache_file(key)
+    with _POLYGON_CACHE_LOCK:
+        polygon = _POLYGON_CACHE_MEM.get(key)
+        if polygon is None and path.exists():
+            try:
+                polygon = CityPolygon.from_geojson(json.loads(path.read_text(encoding="utf-8")))
+                _POLYGON_CACHE_MEM[key] = polygon
+                logger.info("Using cached boundary for city=%s country=%s (%s)", city, country or "", path)
+            except Exception as e:
+                logger.debug("polygon cache load failed (%s): %s", path, e)
+
+    if polygon is None:
+        def parse(payload: Dict[str, Any]) -> CityPolygon:
+            elements = payload.get("elements")
+            if not elements:
+                raise OverpassDataError(
+                    f"No boundary relation found for city='{city}', country='{country}', admin_level={admin_level}"
+                )
+            try:
+                # same relation fetch_bounding_box takes its bounds from
+                return CityPolygon.from_overpass(elements[0])
+            except ValueError as e:
+                raise OverpassDataError(f"Unusable boundary geometry for {city}: {e}") from e
+
+        query = _build_query(city, country=country, admin_level=admin_level, out="geom")
+        polygon = _query_overpass(query, parse, session=session, label=f"boundary for city={city} country={country or 'N/A'}")
+        with _POLYGON_CACHE_LOCK:
+            _POLYGON_CACHE_MEM[key] = polygon
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                path.write_text(json.dumps(polygon.to_geojson(city=city, country=country, admin_level=admin_level), ensure_ascii=False), encoding="utf-8")
+            except Exception as e:
+                logger.debug("polygon cache save failed: %s", e)
+
+    simplified = polygon.simplify(simplify_m)
+    logger.info(
+        "[overpass] boundary city=%s rings=%d vertices=%d simplified=%d (tolerance=%.0fm)",
+        city, len(simplified.rings), polygon.vertex_count, simplified.vertex_count, simplify_m,
+    )
+    return simplified
 # if __name__ == "__main__":
 #     import sys
 
@@ -0,0 +1,263 @@
+"""
+City boundary polygons
+Ring assembly for Overpass ``out geom`` relations, Douglas-Peucker simplification,
+GeoJSON (de)serialisation, and the cell test used to clip the tile grid.
+
+Rings are closed lists of (lat, lon), like the rest of the package (GeoJSON's
+[lon, lat] order only appears in ``to_geojson`` / ``from_geojson``). Inside tests
+use the even-odd rule over all rings, so holes need no special casing.
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Tuple, Union
+
+import numpy as np
+
+LatLon = Tuple[float, float]
+Ring = List[LatLon]
+
+KM_PER_LAT_DEG = 110.574
+
+
+@dataclass
+class CityPolygon:
+    """Boundary polygons, each ``[outer, hole, ...]``."""
+
+    polygons: List[List[Ring]]
+    # (n_edges, 4) array of a_lat, a_lon, b_lat, b_lon
+    _edges: np.ndarray = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        edges = [(a[0], a[1], b[0], b[1]) for ring in self.rings for a, b in zip(ring, ring[1:])]
+        self._edges = np.array(edges, dtype=np.float64).reshape(-1, 4)
+
+    @property
+    def rings(self) -> List[Ring]:
+        return [ring for poly in self.polygons for ring in poly]
+
+    @property
+    def vertex_count(self) -> int:
+        return sum(len(r) for r in self.rings)
+
+    def bounds(self) -> Tuple[float, float, float, float]:
+        """(min_lat, min_lon, max_lat, max_lon), same order as ``BoundingBox.as_tuple``."""
+        lats = [p[0] for r in self.rings for p in r]
+        lons = [p[1] for r in self.rings for p in r]
+        return min(lats), min(lons), max(lats), max(lons)
+
+    def _crossings(self, lat: float) -> np.ndarray:
+        """Sorted longitudes where the rings cross the parallel ``lat`` (half-open at vertices)."""
+        a_lat, a_lon, b_lat, b_lon = self._edges.T
+        hit = (a_lat <= lat) != (b_lat <= lat)
+        return np.sort(a_lon[hit] + (lat - a_lat[hit]) * (b_lon[hit] - a_lon[hit]) / (b_lat[hit] - a_lat[hit]))
+
+    def contains(self, lat: float, lon: float) -> bool:
+        # even-odd: crossings east of the point
+        return int((self._crossings(lat) > lon).sum()) % 2 == 1
+
+    def lon_spans(self, min_lat: float, max_lat: float) -> np.ndarray:
+        """Merged, sorted longitude intervals (k x 2) the polygon occupies within the band ``[min_lat, max_lat]``.
+
+        A part of the polygon inside the band either has boundary in the band
+        (clipped edges) or spans the band's full height (inside intervals on
+        its lower edge), so the union of both is the band's exact projection.
+        """
+        a_lat, a_lon, b_lat, b_lon = self._edges.T
+        sel = (np.maximum(a_lat, b_lat) >= min_lat) & (np.minimum(a_lat, b_lat) <= max_lat)
+        a_lat, a_lon, b_lat, b_lon = a_lat[sel], a_lon[sel], b_lat[sel], b_lon[sel]
+        dlat = b_lat - a_lat
+        flat = dlat == 0
+        # clip each edge to the band in its parameter t (flat edges lie inside it entirely)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t0 = np.where(flat, 0.0, (min_lat - a_lat) / dlat)
+            t1 = np.where(flat, 1.0, (max_lat - a_lat) / dlat)
+        lo_t = np.clip(np.minimum(t0, t1), 0.0, 1.0)
+        hi_t = np.clip(np.maximum(t0, t1), 0.0, 1.0)
+        x0 = a_lon + (b_lon - a_lon) * lo_t
+        x1 = a_lon + (b_lon - a_lon) * hi_t
+        crossings = self._crossings(min_lat)
+        los = np.concatenate([np.minimum(x0, x1), crossings[0::2]])
+        his = np.concatenate([np.maximum(x0, x1), crossings[1::2]])
+        return _merge(los, his)
+
+    def simplify(self, tolerance_m: float) -> "CityPolygon":
+        """Douglas-Peucker per ring; rings collapsing below a triangle (tiny islands/holes) are dropped."""
+        if tolerance_m <= 0:
+            return self
+        out: List[List[Ring]] = []
+        for poly in self.polygons:
+            rings = [_simplify_ring(r, tolerance_m / 1000.0) for r in poly]
+            if len(rings[0]) < 4:
+                continue
+            out.append([rings[0]] + [r for r in rings[1:] if len(r) >= 4])
+        return CityPolygon(out)
+
+    def to_geojson(self, **properties: Any) -> Dict[str, Any]:
+        return {
+            "type": "Feature",
+            "properties": properties,
+            "geometry": {
+                "type": "MultiPolygon",
+                "coordinates": [[[[lon, lat] for lat, lon in ring] for ring in poly] for poly in self.polygons],
+            },
+        }
+
+    @classmethod
+    def from_geojson(cls, data: Dict[str, Any]) -> "CityPolygon":
+        """Polygon / MultiPolygon geometry, a Feature, or the first feature of a FeatureCollection."""
+        if data.get("type") == "FeatureCollection":
+            data = (data.get("features") or [{}])[0]
+        geom = data.get("geometry", data) if data.get("type") == "Feature" else data
+        coords = geom.get("coordinates") or []
+        if geom.get("type") == "Polygon":
+            coords = [coords]
+        elif geom.get("type") != "MultiPolygon":
+            raise ValueError(f"unsupported GeoJSON geometry {geom.get('type')!r}")
+        return cls([[[(float(lat), float(lon)) for lon, lat in ring] for ring in poly] for poly in coords])
+
+    @classmethod
+    def from_overpass(cls, element: Dict[str, Any]) -> "CityPolygon":
+        """Assemble a relation returned by ``out geom`` (member ways -> closed rings)."""
+        outer: List[List[LatLon]] = []
+        inner: List[List[LatLon]] = []
+        for m in element.get("members") or []:
+            geometry = m.get("geometry")
+            if m.get("type") != "way" or not geometry:
+                continue
+            way = [(float(g["lat"]), float(g["lon"])) for g in geometry if g]
+            (inner if m.get("role") == "inner" else outer).append(way)
+        outers = _assemble(outer)
+        if not outers:
+            raise ValueError("relation has no outer ring geometry")
+        polygons: List[List[Ring]] = [[r] for r in outers]
+        for hole in _assemble(inner):
+            for poly in polygons:
+                if _ring_contains(poly[0], hole[0]):
+                    poly.append(hole)
+                    break
+        return cls(polygons)
+
+
+def spans_overlap(spans: np.ndarray, lo: Union[float, np.ndarray], hi: Union[float, np.ndarray]) -> Union[bool, np.ndarray]:
+    """Whether ``[lo, hi]`` touches any of the merged, sorted ``spans`` (element-wise for arrays)."""
+    if not len(spans):
+        return np.zeros(np.shape(lo), dtype=bool) if np.ndim(lo) else False
+    i = np.searchsorted(spans[:, 0], hi, side="right")
+    hit = (i > 0) & (spans[np.maximum(i - 1, 0), 1] >= lo)
+    return hit if np.ndim(hit) else bool(hit)
+
+
+def _merge(los: np.ndarray, his: np.ndarray) -> np.ndarray:
+    if not len(los):
+        return np.zeros((0, 2), dtype=np.float64)
+    order = np.argsort(los, kind="stable")
+    los, his = los[order], his[order]
+    reach = np.maximum.accumulate(his)
+    # a new interval starts where it begins beyond everything merged so far
+    start = np.concatenate([[True], los[1:] > reach[:-1]])
+    first = np.flatnonzero(start)
+    last = np.concatenate([first[1:], [len(los)]]) - 1
+    return np.column_stack([los[first], reach[last]])
+
+
+def _ring_contains(ring: Ring, p: LatLon) -> bool:
+    lat, lon = p
+    inside = False
+    for (a_lat, a_lon), (b_lat, b_lon) in zip(ring, ring[1:]):
+        if (a_lat <= lat < b_lat) or (b_lat <= lat < a_lat):
+            if a_lon + (lat - a_lat) * (b_lon - a_lon) / (b_lat - a_lat) > lon:
+                inside = not inside
+    return inside
+
+
+def _assemble(ways: List[List[LatLon]]) -> List[Ring]:
+    """Join ways sharing end nodes into closed rings (either direction)."""
+    pending = [w for w in ways if len(w) >= 2]
+    rings: List[Ring] = []
+    while pending:
+        ring = list(pending.pop())
+        while ring[0] != ring[-1]:
+            for i, w in enumerate(pending):
+                if w[0] == ring[-1]:
+                    ring.extend(w[1:])
+                elif w[-1] == ring[-1]:
+                    ring.extend(reversed(w[:-1]))
+                elif w[-1] == ring[0]:
+                    ring[:0] = w[:-1]
+                elif w[0] == ring[0]:
+                    ring[:0] = list(reversed(w[1:]))
+                else:
+                    continue
+                pending.pop(i)
+                break
+            else:
+                # broken relation (missing members): close the gap with a straight edge
+                ring.append(ring[0])
+        if len(ring) >= 4:
+            rings.append(ring)
+    return rings
+
+
+def _simplify_ring(ring: Ring, tolerance_km: float) -> Ring:
+    if len(ring) <= 4:
+        return ring
+    # local equirectangular km so the tolerance means the same in both axes
+    km_lon = 111.320 * math.cos(math.radians(sum(p[0] for p in ring) / len(ring)))
+    xy = [(lon * km_lon, lat * KM_PER_LAT_DEG) for lat, lon in ring]
+    keep = [False] * len(ring)
+    keep[0] = keep[-1] = True
+    # closed ring: split at the vertex farthest from the start so both halves are proper segments
+    far = max(range(len(xy)), key=lambda i: (xy[i][0] - xy[0][0]) ** 2 + (xy[i][1] - xy[0][1]) ** 2)
+    keep[far] = True
+    stack = [(0, far), (far, len(ring) - 1)]
+    while stack:
+        a, b = stack.pop()
+        if b - a < 2:
+            continue
+        (ax, ay), (bx, by) = xy[a], xy[b]
+        dx, dy = bx - ax, by - ay
+        seg2 = dx * dx + dy * dy
+        best, best_d = -1, tolerance_km
+        for i in range(a + 1, b):
+            px, py = xy[i]
+            if seg2 == 0:
+                d = math.hypot(px - ax, py - ay)
+            else:
+                t = max(0.0, min(1.0, ((px - ax) * dx + (py - ay) * dy) / seg2))
+                d = math.hypot(px - ax - t * dx, py - ay - t * dy)
+            if d > best_d:
+                best, best_d = i, d
+        if best >= 0:
+            keep[best] = True
+            stack.extend(((a, best), (best, b)))
+    return [p for p, k in zip(ring, keep) if k]
+
+
+if __name__ == "__main__":  # python -m gmaps_crawler.geo.polygon [boundary.geojson]
+    import json
+    import sys
+
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], encoding="utf-8") as f:
+            poly = CityPolygon.from_geojson(json.load(f))
+    else:
+        # L-shaped city with a lake
+        poly = CityPolygon([[
+            [(0.0, 0.0), (0.0, 2.0), (1.0, 2.0), (1.0, 1.0), (2.0, 1.0), (2.0, 0.0), (0.0, 0.0)],
+            [(0.2, 0.2), (0.4, 0.2), (0.4, 0.4), (0.2, 0.4), (0.2, 0.2)],
+        ]])
+    simple = poly.simplify(50.0)
+    print(f"rings={len(poly.rings)} vertices={poly.vertex_count} simplified={simple.vertex_count} bounds={poly.bounds()}")
+    min_lat, min_lon, max_lat, max_lon = simple.bounds()
+    rows = 20
+    for r in reversed(range(rows)):
+        lat = min_lat + (r + 0.5) * (max_lat - min_lat) / rows
+        spans = simple.lon_spans(lat - (max_lat - min_lat) / rows / 2, lat + (max_lat - min_lat) / rows / 2)
+        line = ""
+        for c in range(40):
+            lon = min_lon + (c + 0.5) * (max_lon - min_lon) / 40
+            line += "#" if simple.contains(lat, lon) else ("+" if spans_overlap(spans, lon - (max_lon - min_lon) / 80, lon + (max_lon - min_lon) / 80) else ".")
+        print(line)
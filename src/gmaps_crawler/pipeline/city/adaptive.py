@@ -0,0 +1,290 @@
+"""
+Adaptive quadtree tiling
+Split tiles whose result list hits Google's cap; push back / skip tiles around empty ones.
+"""
+
+from __future__ import annotations
+
+import heapq
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+from gmaps_crawler.pipeline.city.grid import GridPoint, km_to_lat_deg, km_to_lon_deg
+
+# Google Maps stops the result list at ~120 cards per search
+DEFAULT_RESULT_CAP = 120
+
+
+@dataclass
+class AdaptiveTile:
+    index: int
+    row: int
+    col: int
+    latitude: float
+    longitude: float
+    depth: int = 0
+    parent_index: Optional[int] = None
+    priority: float = 0.0
+    empty_neighbours: int = 0
+    # sequence from pipeline.city.ordering; None: tile_index order
+    visit_order: Optional[int] = None
+    # failed crawls so far (see AdaptiveTiler.fail)
+    attempts: int = 0
+
+    def as_grid_point(self) -> GridPoint:
+        return GridPoint(index=self.index, latitude=self.latitude, longitude=self.longitude, row=self.row, col=self.col)
+
+
+@dataclass
+class TileOutcome:
+    """Scheduling changes caused by one finished tile (to persist in ``tiles``)."""
+
+    children: List[AdaptiveTile] = field(default_factory=list)
+    skipped: List[AdaptiveTile] = field(default_factory=list)
+    reprioritized: List[AdaptiveTile] = field(default_factory=list)
+
+
+class AdaptiveTiler:
+    """Quadtree tile scheduler.
+
+    Features:
+    1. Highest-priority pending tile first (ties: visit_order, then tile_index)
+    2. A tile whose result_count reaches ``saturation * result_cap`` is split
+       into four children (half the cell size, one zoom level deeper)
+    3. A tile with ``result_count <= empty_threshold`` lowers the priority of
+       its pending same-depth neighbours; a neighbour with
+       ``skip_after_empty`` empty neighbours is skipped altogether
+    4. A failed tile goes back into a retry queue, served once nothing else is pending
+
+    The tiler never touches the browser or the DB, so it can be driven by a
+    synthetic density function (see :func:`simulate`).
+    """
+
+    def __init__(
+        self,
+        tiles: Iterable[AdaptiveTile],
+        *,
+        cell_width_km: float,
+        cell_height_km: float,
+        result_cap: int = DEFAULT_RESULT_CAP,
+        saturation: float = 0.9,
+        max_depth: int = 2,
+        empty_threshold: int = 3,
+        skip_after_empty: int = 4,
+        done: Iterable[int] = (),
+    ) -> None:
+        if cell_width_km <= 0 or cell_height_km <= 0:
+            raise ValueError("cell dimensions must be positive")
+        self.cell_width_km = float(cell_width_km)
+        self.cell_height_km = float(cell_height_km)
+        self.result_cap = int(result_cap)
+        self.saturation = float(saturation)
+        self.max_depth = int(max_depth)
+        self.empty_threshold = int(empty_threshold)
+        self.skip_after_empty = int(skip_after_empty)
+
+        self._tiles: Dict[int, AdaptiveTile] = {}
+        self._by_cell: Dict[Tuple[int, int, int], int] = {}
+        self._pending: set[int] = set()
+        self._heap: List[Tuple[float, int, int]] = []
+        self._retry: Deque[int] = deque()
+        done_set = set(int(i) for i in done)
+        for t in tiles:
+            self._tiles[t.index] = t
+            self._by_cell[(t.depth, t.row, t.col)] = t.index
+            if t.index not in done_set:
+                self._push(t)
+        self._next_index = (max(self._tiles) + 1) if self._tiles else 0
+
+    # ---- queue ----
+    @staticmethod
+    def _key(tile: AdaptiveTile) -> Tuple[float, int, int]:
+        return (-tile.priority, tile.visit_order if tile.visit_order is not None else tile.index, tile.index)
+
+    def _push(self, tile: AdaptiveTile) -> None:
+        self._pending.add(tile.index)
+        heapq.heappush(self._heap, self._key(tile))
+
+    def pop(self) -> Optional[AdaptiveTile]:
+        """Next tile to crawl, or None when nothing is pending."""
+        while self._heap:
+            neg_prio, _, idx = heapq.heappop(self._heap)
+            tile = self._tiles[idx]
+            # lazy invalidation: stale entries (re-prioritized or skipped) are dropped
+            if idx not in self._pending or -neg_prio != tile.priority:
+                continue
+            self._pending.discard(idx)
+            return tile
+        while self._retry:
+            idx = self._retry.popleft()
+            # skipped or re-queued through the heap (and crawled) meanwhile
+            if idx in self._pending:
+                self._pending.discard(idx)
+                return self._tiles[idx]
+        return None
+
+    def fail(self, tile: AdaptiveTile, max_attempts: Optional[int]) -> bool:
+        """Record a failed crawl; re-queue the tile for a later ``pop`` unless ``max_attempts`` is used up."""
+        tile.attempts += 1
+        if max_attempts is not None and tile.attempts >= max_attempts:
+            return False
+        self._pending.add(tile.index)
+        self._retry.append(tile.index)
+        return True
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    # ---- feedback ----
+    def cell_size_km(self, depth: int) -> Tuple[float, float]:
+        scale = 2 ** depth
+        return self.cell_width_km / scale, self.cell_height_km / scale
+
+    def is_saturated(self, result_count: int) -> bool:
+        return result_count >= self.saturation * self.result_cap
+
+    def report(self, tile: AdaptiveTile, result_count: int) -> TileOutcome:
+        """Feed back a finished tile's result count; returns the scheduling changes."""
+        outcome = TileOutcome()
+        if self.is_saturated(result_count) and tile.depth < self.max_depth:
+            outcome.children = self._split(tile)
+        elif result_count <= self.empty_threshold:
+            for nb in self._neighbours(tile):
+                nb.empty_neighbours += 1
+                if nb.empty_neighbours >= self.skip_after_empty:
+                    self._pending.discard(nb.index)
+                    outcome.skipped.append(nb)
+                else:
+                    nb.priority -= 1.0
+                    heapq.heappush(self._heap, self._key(nb))
+                    outcome.reprioritized.append(nb)
+        return outcome
+
+    def _neighbours(self, tile: AdaptiveTile) -> List[AdaptiveTile]:
+        out: List[AdaptiveTile] = []
+        for dr in (-1, 0, 1):
+            for dc in (-1, 0, 1):
+                if dr == 0 and dc == 0:
+                    continue
+                idx = self._by_cell.get((tile.depth, tile.row + dr, tile.col + dc))
+                if idx is not None and idx in self._pending:
+                    out.append(self._tiles[idx])
+        return out
+
+    def _split(self, tile: AdaptiveTile) -> List[AdaptiveTile]:
+        child_w, child_h = self.cell_size_km(tile.depth + 1)
+        dlat = km_to_lat_deg(child_h / 2.0)
+        dlng = km_to_lon_deg(child_w / 2.0, tile.latitude)
+        children: List[AdaptiveTile] = []
+        # children keep a global (row, col) lattice per depth: row*2+dr, col*2+dc
+        for dr, sign_lat in ((0, -1), (1, 1)):
+            for dc, sign_lng in ((0, -1), (1, 1)):
+                key = (tile.depth + 1, tile.row * 2 + dr, tile.col * 2 + dc)
+                if key in self._by_cell:
+                    continue
+                child = AdaptiveTile(
+                    index=self._next_index,
+                    row=key[1],
+                    col=key[2],
+                    latitude=tile.latitude + sign_lat * dlat,
+                    longitude=tile.longitude + sign_lng * dlng,
+                    depth=key[0],
+                    parent_index=tile.index,
+                    # dense areas first: children outrank untouched siblings
+                    priority=tile.priority + 1.0,
+                    # siblings stay where the parent sat in the visit order
+                    visit_order=tile.visit_order,
+                )
+                self._next_index += 1
+                self._tiles[child.index] = child
+                self._by_cell[key] = child.index
+                self._push(child)
+                children.append(child)
+        return children
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[dict], **kwargs) -> "AdaptiveTiler":
+        """Rebuild from ``DB.list_tiles`` rows (resume); completed tiles are not re-queued."""
+        tiles: List[AdaptiveTile] = []
+        done: List[int] = []
+        for r in rows:
+            tiles.append(
+                AdaptiveTile(
+                    index=int(r["tile_index"]),
+                    row=int(r["tile_row"]),
+                    col=int(r["tile_col"]),
+                    latitude=float(r["tile_center_lat"]),
+                    longitude=float(r["tile_center_lng"]),
+                    depth=int(r.get("depth") or 0),
+                    parent_index=(int(r["parent_index"]) if r.get("parent_index") is not None else None),
+                    priority=float(r.get("priority") or 0.0),
+                    visit_order=(int(r["visit_order"]) if r.get("visit_order") is not None else None),
+                )
+            )
+            if (r.get("status") or "") == "completed":
+                done.append(int(r["tile_index"]))
+        return cls(tiles, done=done, **kwargs)
+
+
+def simulate(
+    tiler: AdaptiveTiler,
+    count_fn: Callable[[float, float, float, float], int],
+) -> Dict[str, int]:
+    """Drive a tiler with a synthetic result-count function (no browser).
+
+    ``count_fn(lat, lng, cell_w_km, cell_h_km)`` returns the true number of
+    places in the cell; the crawler only "sees" ``min(true, result_cap)``.
+    """
+    stats = {"crawled": 0, "split": 0, "skipped": 0, "seen": 0, "lost_to_cap": 0, "lost_to_skip": 0}
+    while True:
+        tile = tiler.pop()
+        if tile is None:
+            break
+        w, h = tiler.cell_size_km(tile.depth)
+        true_count = int(count_fn(tile.latitude, tile.longitude, w, h))
+        seen = min(true_count, tiler.result_cap)
+        outcome = tiler.report(tile, seen)
+        stats["crawled"] += 1
+        stats["skipped"] += len(outcome.skipped)
+        for sk in outcome.skipped:
+            sw, sh = tiler.cell_size_km(sk.depth)
+            stats["lost_to_skip"] += int(count_fn(sk.latitude, sk.longitude, sw, sh))
+        if outcome.children:
+            stats["split"] += 1
+        else:
+            # leaf: whatever exceeded the cap is lost
+            stats["seen"] += seen
+            stats["lost_to_cap"] += max(0, true_count - seen)
+    return stats
+
+
+if __name__ == "__main__":  # synthetic smoke test: dense downtown + empty lake
+    import math
+
+    from gmaps_crawler.geo.bbox import BoundingBox
+    from gmaps_crawler.pipeline.city.grid import generate_grid_points
+
+    bbox = BoundingBox(min_lat=48.80, min_lon=2.25, max_lat=48.92, max_lon=2.42)
+    center = (48.86, 2.34)
+    lake = (48.83, 2.28)
+
+    def density(lat: float, lng: float, w_km: float, h_km: float) -> int:
+        d_center = math.hypot((lat - center[0]) * 111.0, (lng - center[1]) * 73.0)
+        d_lake = math.hypot((lat - lake[0]) * 111.0, (lng - lake[1]) * 73.0)
+        if d_lake < 2.5:
+            return 0
+        per_km2 = 5.0 + 120.0 * math.exp(-(d_center ** 2) / 8.0)
+        return int(per_km2 * w_km * h_km)
+
+    cell_w, cell_h = 1.5, 0.9
+    points = generate_grid_points(bbox, cell_width_km=cell_w, cell_height_km=cell_h, overlap_ratio=0.0)
+    base = [AdaptiveTile(index=p.index, row=p.row, col=p.col, latitude=p.latitude, longitude=p.longitude) for p in points]
+
+    uniform = simulate(AdaptiveTiler(base, cell_width_km=cell_w, cell_height_km=cell_h, max_depth=0, skip_after_empty=99), density)
+    base = [AdaptiveTile(index=p.index, row=p.row, col=p.col, latitude=p.latitude, longitude=p.longitude) for p in points]
+    adaptive = simulate(AdaptiveTiler(base, cell_width_km=cell_w, cell_height_km=cell_h, max_depth=3), density)
+    for name, st in (("uniform", uniform), ("adaptive", adaptive)):
+        per_tile = st["seen"] / max(1, st["crawled"])
+        print(f"[{name}] {st} seen/tile={per_tile:.1f}")
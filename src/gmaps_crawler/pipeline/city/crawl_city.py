@@ -2,18 +2,30 @@ from __future__ import annotations
 
 import uuid
 import traceback
+from itertools import repeat
 from pathlib import Path
-from typing import Optional, Sequence
+from typing import Any, Callable, Optional, Sequence
 
+import numpy as np
 from logger import main_thread_logger as logger
-from gmaps_crawler.geo.bbox import fetch_bounding_box
-from gmaps_crawler.pipeline.city.grid import generate_grid_points, GridPoint
+from gmaps_crawler.geo.bbox import fetch_bounding_box, fetch_city_polygon
+from gmaps_crawler.geo.polygon import CityPolygon
+from gmaps_crawler.pipeline.city.grid import iter_grid_chunks, GridPoint
+from gmaps_crawler.pipeline.city.adaptive import AdaptiveTiler, DEFAULT_RESULT_CAP
+from gmaps_crawler.pipeline.city.ordering import visit_order_arrays
 from gmaps_crawler.pipeline.city.context import RunContext, TileContext
+from gmaps_crawler.pipeline.city.sharding import LeaseKeeper, make_owner_id, run_shards
 from gmaps_crawler.pipeline.tile.runner import TileRunner
+from gmaps_crawler.pipeline.exec import aimd
+from gmaps_crawler.pipeline.exec.pipelined import PipelinedTileEngine
 from gmaps_crawler.pipeline.exec.stop import STOP_EVENT
 from gmaps_crawler.pipeline.search.urls import build_search_url
+from gmaps_crawler.config import settings
+from gmaps_crawler.storage.contact_cache import ContactCache
 from gmaps_crawler.storage.db import DB
-from gmaps_crawler.browser.drivers import create_browser
+from gmaps_crawler.storage.snapshots import flush_snapshots
+from gmaps_crawler.utils import metrics
+from gmaps_crawler.browser.pool import BrowserPool
 from gmaps_crawler.browser.coverage import measure_map_coverage
 
 
@@ -48,6 +60,26 @@ def crawl_city(
     retry_workers: int = 2,
     retry_max_total: Optional[int] = None,
     retry_only_errors: Optional[Sequence[str]] = None,
+    # 自适应四叉树切片：结果数触顶的 tile 拆成 4 个子 tile
+    adaptive: bool = False,
+    result_cap: int = DEFAULT_RESULT_CAP,
+    max_depth: int = 2,
+    # 流水线模式：采集下一个 tile 的同时抓取当前 tile 的详情
+    pipelined: bool = False,
+    # 自适应并发（AIMD）：workers 作为上限，按延迟/失败信号调整实际并发（None = settings.AIMD_ENABLED）
+    adaptive_workers: Optional[bool] = None,
+    # 多进程分片：N 个进程（各自一个浏览器）通过 tiles 表租约认领 tile
+    processes: int = 1,
+    # 认领模式：从共享 tiles 表按租约领取 tile（分片子进程自动开启；多台主机共用 DB 时手动开启）
+    claim: bool = False,
+    # CDP 资源拦截配置（off / maps / strict；None = settings.BLOCK_PROFILE）
+    block_profile: Optional[str] = None,
+    # 指标 HTTP 端点端口（None = settings.METRICS_PORT，0 = 不启动）；每次运行结束写 METRICS_DIR/<run_id>.json
+    metrics_port: Optional[int] = None,
+    # 浏览器工厂（默认 drivers.create_browser）；离线基准测试传入假浏览器
+    browser_factory: Optional[Callable[..., Any]] = None,
+    # tile 访问顺序（index / serpentine / hilbert / zorder / spiral；None = settings.TILE_ORDER），写入 tiles.visit_order
+    tile_order: Optional[str] = None,
 ) -> None:
     # Enforce fixed resolution regardless of external args
     window_width = 1920
@@ -56,265 +88,445 @@ def crawl_city(
     coverage_wait = 3.0
     coverage_attempts = 5
     coverage_interval = 0.5
+    if block_profile is not None:
+        # process-wide: read by every tab this process opens (shards get it via crawl_kwargs)
+        settings.BLOCK_PROFILE = block_profile
     # Prepare DB and run context
     db = DB(db_path)
     run_id = uuid.uuid4().hex
     db.start_run(run_id, city=city, country=country, query=query, zoom=zoom, language=language)
-
-    # Prepare viewport defaults and try reusing existing tiles first
-    vp_w_px = float(window_width)
-    vp_h_px = float(window_height)
-    points_with_url: list[tuple[GridPoint, str]] = []
-    tiles_rows = db.list_tiles(city, query)
-    if tiles_rows:
-        # Reuse existing tiles (skip coverage & grid generation); backfill missing URLs
-        db.reset_in_progress(city, query)
-        for row in tiles_rows:
-            gp = GridPoint(
-                index=int(row["tile_index"]),
-                latitude=float(row["tile_center_lat"]),
-                longitude=float(row["tile_center_lng"]),
-                row=int(row["tile_row"]),
-                col=int(row["tile_col"]),
-            )
-            url = row.get("tile_url") or ""
-            if not url:
-                url = build_search_url(query, gp.latitude, gp.longitude, zoom, language)
-                try:
-                    db.update_tile_url(city, query, gp.index, url)
-                except Exception:
-                    pass
-            points_with_url.append((gp, url))
-        # Try to reuse recorded viewport px from first tile
-        try:
-            r0 = tiles_rows[0]
-            if r0.get("viewport_width_px") and r0.get("viewport_height_px"):
-                vp_w_px = float(r0.get("viewport_width_px") or vp_w_px)
-                vp_h_px = float(r0.get("viewport_height_px") or vp_h_px)
-        except Exception:
-            pass
-    else:
-        # bbox + dynamic cell size (from actual viewport coverage if not provided)
-        bbox = fetch_bounding_box(city, country=country)
-        used_cell_w = cell_width_km
-        used_cell_h = cell_height_km
-        if used_cell_w is None or used_cell_h is None:
-            # Measure coverage at bbox center with current zoom + window to derive cell size
-            center_lat = (bbox.min_lat + bbox.max_lat) / 2.0
-            center_lng = (bbox.min_lon + bbox.max_lon) / 2.0
-            browser = create_browser(headless=headless, window_width=window_width, window_height=window_height, proxy=proxy)
+    # Tiles this process works on are leased to it; other processes skip them until the lease expires
+    owner = make_owner_id(run_id)
+    lease_s = float(settings.TILE_LEASE_S)
+    # Load known place_ids once; per-card dedupe is then an in-memory lookup
+    known = db.load_known_places()
+    logger.info("[city] known places loaded=%d mem=%.1fMiB", len(known), known.memory_bytes() / (1024.0 * 1024.0))
+    # Warm browsers are leased to the coverage probe and every tile, then recycled by the pool
+    browser_pool = BrowserPool(headless=headless, window_width=window_width, window_height=window_height, factory=browser_factory)
+    # started below; stopped in the finally block even when the crawl raises
+    engine: Optional[PipelinedTileEngine] = None
+    lease_keeper: Optional[LeaseKeeper] = None
+    metrics_server = None
+    try:
+        # Prepare viewport defaults and try reusing existing tiles first
+        vp_w_px = float(window_width)
+        vp_h_px = float(window_height)
+        # Tiles live in the DB only; they are paged through in visit order and
+        # their search URL is built when a tile is claimed
+        if db.count_tiles_by_status(city, query):
+            # Reuse existing tiles (skip coverage & grid generation)
+            reclaimed = db.reclaim_expired_leases(city, query)
+            if reclaimed:
+                logger.info("[city] reclaimed %d tile(s) with expired leases", reclaimed)
+            # Try to reuse recorded viewport px from first tile
             try:
-                url = build_search_url(query, center_lat, center_lng, zoom, language)
-                tab = browser.new_tab(url=url, background=False)
-                cov = measure_map_coverage(tab, attempts=max(1, coverage_attempts), interval=max(0.2, coverage_interval), wait_before=max(0.0, coverage_wait))
-                if cov:
-                    # Derive cell size from actual viewport coverage with a small safety factor
-                    used_cell_w = (cov.viewport_width_m / 1000.0) * 0.9
-                    used_cell_h = (cov.viewport_height_m / 1000.0) * 0.9
-                    vp_w_px = float(cov.viewport_width_px)
-                    vp_h_px = float(cov.viewport_height_px)
-                    mpp = float(cov.meters_per_pixel)
-                else:
-                    # Fallback to approximate formula if coverage failed
-                    import math
-                    mpp = 156543.03392 * math.cos(math.radians(center_lat)) / (2 ** zoom)
-                    used_cell_w = (mpp * float(window_width) / 1000.0) * 0.9
-                    used_cell_h = (mpp * float(window_height) / 1000.0) * 0.9
-            finally:
+                r0 = next(db.iter_tiles(city, query, page_size=1), None) or {}
+                if r0.get("viewport_width_px") and r0.get("viewport_height_px"):
+                    vp_w_px = float(r0.get("viewport_width_px") or vp_w_px)
+                    vp_h_px = float(r0.get("viewport_height_px") or vp_h_px)
+            except Exception:
+                pass
+            # Cell size of the original grid (needed to size quadtree children)
+            meta = db.get_grid_meta(city, query) or {}
+            grid_cell_w = float(meta.get("cell_width_km") or cell_width_km or 3.0)
+            grid_cell_h = float(meta.get("cell_height_km") or cell_height_km or 1.8)
+        else:
+            # bbox + dynamic cell size (from actual viewport coverage if not provided)
+            bbox = fetch_bounding_box(city, country=country)
+            # Real boundary: tiles outside it (sea, surrounding communes) are never created
+            polygon: Optional[CityPolygon] = None
+            if settings.GRID_CLIP_POLYGON:
                 try:
-                    browser.quit(timeout=5, force=True, del_data=False)
+                    polygon = fetch_city_polygon(city, country=country, simplify_m=float(settings.POLYGON_SIMPLIFY_M))
                 except Exception as e:
-                    logger.warning("browser quit failed after coverage probe: %s", e)
+                    logger.warning("[city] boundary polygon unavailable, covering the whole bbox: %s", e)
+            used_cell_w = cell_width_km
+            used_cell_h = cell_height_km
+            if used_cell_w is None or used_cell_h is None:
+                # Measure coverage at bbox center with current zoom + window to derive cell size
+                center_lat = (bbox.min_lat + bbox.max_lat) / 2.0
+                center_lng = (bbox.min_lon + bbox.max_lon) / 2.0
+                browser = browser_pool.lease(proxy=proxy)
+                probe_ok = False
+                try:
+                    url = build_search_url(query, center_lat, center_lng, zoom, language)
+                    tab = browser.new_tab(url=url, background=False)
+                    cov = measure_map_coverage(tab, attempts=max(1, coverage_attempts), interval=max(0.2, coverage_interval), wait_before=max(0.0, coverage_wait))
+                    if cov:
+                        # Derive cell size from actual viewport coverage with a small safety factor
+                        used_cell_w = (cov.viewport_width_m / 1000.0) * 0.9
+                        used_cell_h = (cov.viewport_height_m / 1000.0) * 0.9
+                        vp_w_px = float(cov.viewport_width_px)
+                        vp_h_px = float(cov.viewport_height_px)
+                        mpp = float(cov.meters_per_pixel)
+                    else:
+                        # Fallback to approximate formula if coverage failed
+                        import math
+                        mpp = 156543.03392 * math.cos(math.radians(center_lat)) / (2 ** zoom)
+                        used_cell_w = (mpp * float(window_width) / 1000.0) * 0.9
+                        used_cell_h = (mpp * float(window_height) / 1000.0) * 0.9
+                    try:
+                        tab.close()
+                        probe_ok = True
+                    except Exception as e:
+                        logger.warning("coverage tab close failed: %s", e)
+                finally:
+                    browser_pool.release(browser, healthy=probe_ok)
 
-        # Safety factor to reduce edge artifacts; overlap still applied below
-        used_cell_w = float(used_cell_w) if used_cell_w is not None else 3.0
-        used_cell_h = float(used_cell_h) if used_cell_h is not None else 1.8
-        points = generate_grid_points(bbox, cell_width_km=used_cell_w, cell_height_km=used_cell_h, overlap_ratio=0.25)
-        # Precompute tile URLs once per point
-        points_with_url = [
-            (p, build_search_url(query, float(p.latitude), float(p.longitude), zoom, language))
-            for p in points
-        ]
+            # Safety factor to reduce edge artifacts; overlap still applied below
+            used_cell_w = float(used_cell_w) if used_cell_w is not None else 3.0
+            used_cell_h = float(used_cell_h) if used_cell_h is not None else 1.8
+            grid_cell_w, grid_cell_h = used_cell_w, used_cell_h
+            grid_kwargs = dict(cell_width_km=used_cell_w, cell_height_km=used_cell_h, overlap_ratio=0.25)
 
-        # init tiles and reset in_progress
-        db.reset_in_progress(city, query)
-        db.init_tiles(
-            city,
-            query,
-            [
-                (
-                    int(p.index), int(p.row), int(p.col),
-                    float(p.latitude), float(p.longitude), url,
-                    int(window_width), int(window_height), float(vp_w_px), float(vp_h_px)
+            # init tiles chunk by chunk (bulk arrays -> executemany) and reclaim abandoned in_progress ones
+            db.reclaim_expired_leases(city, query)
+            total = 0
+            for chunk in iter_grid_chunks(bbox, polygon=polygon, chunk_size=settings.GRID_CHUNK_SIZE, **grid_kwargs):
+                db.init_tiles(
+                    city,
+                    query,
+                    zip(
+                        chunk.index.tolist(), chunk.row.tolist(), chunk.col.tolist(),
+                        chunk.latitude.tolist(), chunk.longitude.tolist(), repeat(None),
+                        repeat(int(window_width)), repeat(int(window_height)), repeat(float(vp_w_px)), repeat(float(vp_h_px)),
+                    ),
                 )
-                for (p, url) in points_with_url
-            ],
-        )
-        # persist run meta
+                total += len(chunk)
+            logger.info("[city] grid tiles=%d", total)
+            if polygon is not None:
+                full = sum(len(c) for c in iter_grid_chunks(bbox, chunk_size=settings.GRID_CHUNK_SIZE, **grid_kwargs))
+                logger.info("[city] grid clipped to boundary: %d of %d bbox tiles kept", total, full)
+            # persist run meta
+            try:
+                db.update_run_meta(
+                    run_id=run_id,
+                    window_width_px=window_width,
+                    window_height_px=window_height,
+                    viewport_width_px=vp_w_px,
+                    viewport_height_px=vp_h_px,
+                    mpp=float(mpp),
+                    cell_width_km=used_cell_w,
+                    cell_height_km=used_cell_h,
+                    overlap_ratio=0.25,
+                )
+            except Exception as e:
+                logger.warning("update_run_meta failed: %s", e)
+
+        if not claim:
+            # Visit order: neighbouring tiles back to back keep the map-tile cache and the
+            # overlap of result lists warm. Stored so claimers (shards, other hosts) follow it too.
+            order_method = tile_order or settings.TILE_ORDER
+            lattice = [np.array(rows, dtype=np.int64) for rows in db.iter_tile_lattice(city, query, chunk_size=settings.GRID_CHUNK_SIZE)]
+            cells = np.concatenate(lattice) if lattice else np.zeros((0, 5), dtype=np.int64)
+            seq = visit_order_arrays(cells[:, 0], cells[:, 1], cells[:, 2], order_method, depth=cells[:, 3], weights=cells[:, 4])
+            for start in range(0, len(seq), settings.GRID_CHUNK_SIZE):
+                end = start + settings.GRID_CHUNK_SIZE
+                db.set_tile_visit_order(city, query, zip(cells[start:end, 0].tolist(), seq[start:end].tolist()))
+            logger.info("[city] tile order=%s tiles=%d", order_method, len(seq))
+
+        # City-level tiles summary (before iterating)
         try:
-            db.update_run_meta(
-                run_id=run_id,
-                window_width_px=window_width,
-                window_height_px=window_height,
-                viewport_width_px=vp_w_px,
-                viewport_height_px=vp_h_px,
-                mpp=float(mpp),
-                cell_width_km=used_cell_w,
-                cell_height_km=used_cell_h,
-                overlap_ratio=0.25,
+            by_status = db.count_tiles_by_status(city, query)
+            _counts = {"pending": 0, "in_progress": 0, "failed": 0, "completed": 0, "other": 0}
+            for _st, _n in by_status.items():
+                _counts[_st if _st in _counts else "other"] += _n
+            _total = sum(by_status.values())
+            _to_run = _total - _counts["completed"]
+            logger.info(
+                "[city] tiles total=%d pending=%d in_progress=%d failed=%d completed=%d to_run=%d",
+                _total,
+                _counts["pending"],
+                _counts["in_progress"],
+                _counts["failed"],
+                _counts["completed"],
+                _to_run,
             )
         except Exception as e:
-            logger.warning("update_run_meta failed: %s", e)
+            logger.warning("[city] tiles summary failed: %s", e)
 
-    # City-level tiles summary (before iterating)
-    try:
-        tiles_rows_summary = db.list_tiles(city, query)
-        _counts = {"pending": 0, "in_progress": 0, "failed": 0, "completed": 0, "other": 0}
-        for _r in tiles_rows_summary:
-            _st = str(_r.get("status") or "")
-            if _st in _counts:
-                _counts[_st] += 1
-            else:
-                _counts["other"] += 1
-        _total = len(tiles_rows_summary)
-        _to_run = sum(1 for _r in tiles_rows_summary if (_r.get("status") or "") != "completed")
-        logger.info(
-            "[city] tiles total=%d pending=%d in_progress=%d failed=%d completed=%d to_run=%d",
-            _total,
-            _counts["pending"],
-            _counts["in_progress"],
-            _counts["failed"],
-            _counts["completed"],
-            _to_run,
+        if processes and int(processes) > 1 and not claim:
+            # Grid is in the DB now; shard processes claim tiles from it, each with its own browser
+            # (the finally block closes the pool and the DB even if sharding raises)
+            browser_pool.close()
+            db.close()
+            if adaptive:
+                logger.warning("[city] adaptive splitting runs in single-process mode only; shards crawl the stored tiles")
+            run_shards(
+                int(processes),
+                dict(
+                    city=city, query=query, country=country, language=language, zoom=zoom,
+                    headless=headless, print_coverage=print_coverage, verbose=verbose, sleep=sleep,
+                    proxy=proxy, proxy_list=proxy_list, proxy_file=proxy_file,
+                    proxy_sources=list(proxy_sources) if proxy_sources else None, proxy_strategy=proxy_strategy,
+                    cell_width_km=cell_width_km, cell_height_km=cell_height_km, workers=workers,
+                    thread_startup_delay=thread_startup_delay, thread_batch_size=thread_batch_size,
+                    thread_batch_delay=thread_batch_delay,
+                    db_path=db_path, csv_path=csv_path, html_root=html_root,
+                    pipelined=pipelined, adaptive_workers=adaptive_workers,
+                    block_profile=settings.BLOCK_PROFILE,
+                    # every shard records and dumps its own metrics; one port cannot be shared
+                    metrics_port=0,
+                ),
+            )
+            if retry_failed and not STOP_EVENT.is_set():
+                _auto_retry(city, query, db_path=db_path, headless=headless, retry_workers=retry_workers,
+                            retry_max_total=retry_max_total, retry_only_errors=retry_only_errors)
+            return
+
+        # Build explicit run context for the crawler
+        run_ctx = RunContext(
+            city=city,
+            query=query,
+            country=country,
+            zoom=zoom,
+            language=language,
+            run_id=run_id,
+            csv_path=csv_path,
+            html_root=html_root,
+            db=db,
         )
-    except Exception as e:
-        logger.warning("[city] tiles summary failed: %s", e)
 
-    # Build explicit run context for the crawler
-    run_ctx = RunContext(
-        city=city,
-        query=query,
-        country=country,
-        zoom=zoom,
-        language=language,
-        run_id=run_id,
-        csv_path=csv_path,
-        html_root=html_root,
-        db=db,
-    )
+        processed = 0
+        lease_keeper = LeaseKeeper(db_path, owner, lease_s=lease_s)
+        lease_keeper.start()
+        # Pipelined mode: one long-lived detail fleet drains tasks across tiles
+        # One concurrency controller for the whole city so what it learned carries across tiles
+        concurrency = aimd.from_settings(workers, enabled=adaptive_workers)
+        # per-run metrics: the JSON summary and the endpoint cover this run only
+        metrics.REGISTRY.reset()
+        if concurrency is not None:
+            metrics.REGISTRY.add_collector(concurrency.metrics)
+        port = settings.METRICS_PORT if metrics_port is None else metrics_port
+        metrics_server = metrics.start_http_server(port) if port else None
+        if pipelined:
+            engine = PipelinedTileEngine(browser_pool=browser_pool, run_ctx=run_ctx, db_path=db_path, workers=workers, proxy=proxy, controller=concurrency)
+            engine.start()
 
-    processed = 0
-    # Prepare a persistent process pool for cross-tile reuse when workers>1
-    executor = None
-    if workers and workers > 1:
-        from concurrent.futures import ProcessPoolExecutor
-        executor = ProcessPoolExecutor(max_workers=workers)
-    for (p, tile_url) in points_with_url:
-        if STOP_EVENT.is_set():
-            break
-        # Skip completed tiles
-        status = db.get_tile_status(city, query, int(p.index))
-        # logger.info(
-        #     "[tile %d] status=%s center=(%.6f,%.6f)",
-        #     int(p.index), status or "", float(p.latitude), float(p.longitude)
-        # )
-        if status == "completed":
-            processed += 1
-            continue
+        def run_tile(p: GridPoint, tile_url: str) -> Optional[int]:
+            """Crawl one tile and persist its status; returns result_count (None on failure)."""
+            # Mark in progress
+            db.set_tile_in_progress(
+                city,
+                query,
+                tile_index=int(p.index),
+                tile_row=int(p.row),
+                tile_col=int(p.col),
+                lat=float(p.latitude),
+                lng=float(p.longitude),
+                owner=owner,
+                lease_s=lease_s,
+            )
 
-        # Mark in progress
-        db.set_tile_in_progress(
-            city,
-            query,
-            tile_index=int(p.index),
-            tile_row=int(p.row),
-            tile_col=int(p.col),
-            lat=float(p.latitude),
-            lng=float(p.longitude),
-        )
+            # Build tile context
+            tile_ctx = TileContext(
+                index=int(p.index),
+                row=int(p.row),
+                col=int(p.col),
+                center_lat=float(p.latitude),
+                center_lng=float(p.longitude),
+                tile_url=tile_url,
+            )
 
-        # Build tile context
-        tile_ctx = TileContext(
-            index=int(p.index),
-            row=int(p.row),
-            col=int(p.col),
-            center_lat=float(p.latitude),
-            center_lng=float(p.longitude),
-            tile_url=tile_url,
-        )
+            try:
+                if engine is not None:
+                    # completion is recorded by the engine once the tile's details have landed
+                    return engine.harvest(tile_ctx)
+                runner = TileRunner(
+                    query=query,
+                    latitude=float(p.latitude),
+                    longitude=float(p.longitude),
+                    zoom=zoom,
+                    language=language,
+                    headless=headless,
+                    window_width=window_width,
+                    window_height=window_height,
+                    print_coverage=print_coverage,
+                    coverage_wait=coverage_wait,
+                    coverage_attempts=coverage_attempts,
+                    coverage_interval=coverage_interval,
+                    proxy=proxy,
+                    proxy_list=proxy_list,
+                    proxy_file=proxy_file,
+                    proxy_sources=proxy_sources,
+                    proxy_strategy=proxy_strategy,
+                    verbose=verbose,
+                    run_ctx=run_ctx,
+                    tile_ctx=tile_ctx,
+                    workers=workers,
+                    db_path=db_path,
+                    thread_startup_delay=thread_startup_delay,
+                    thread_batch_size=thread_batch_size,
+                    thread_batch_delay=thread_batch_delay,
+                    browser_pool=browser_pool,
+                    controller=concurrency,
+                )
+                seen_count, new_count, failed_count = runner.run()
+                db.set_tile_completed(city, query, int(p.index), result_count=seen_count or 0, processed_count=new_count or 0, failed_count=failed_count or 0)
+                return int(seen_count or 0)
+            except Exception as exc:
+                traceback.print_exc()
+                db.set_tile_failed(city, query, int(p.index), f"tile failed: {exc}")
+                # continue to next tile instead of stopping the whole run
+                return None
 
         try:
-            runner = TileRunner(
-                query=query,
-                latitude=float(p.latitude),
-                longitude=float(p.longitude),
-                zoom=zoom,
-                language=language,
-                headless=headless,
-                window_width=window_width,
-                window_height=window_height,
-                print_coverage=print_coverage,
-                coverage_wait=coverage_wait,
-                coverage_attempts=coverage_attempts,
-                coverage_interval=coverage_interval,
-                proxy=proxy,
-                proxy_list=proxy_list,
-                proxy_file=proxy_file,
-                proxy_sources=proxy_sources,
-                proxy_strategy=proxy_strategy,
-                verbose=verbose,
-                run_ctx=run_ctx,
-                tile_ctx=tile_ctx,
-                workers=workers,
-                db_path=db_path,
-                executor=executor,
-                thread_startup_delay=thread_startup_delay,
-                thread_batch_size=thread_batch_size,
-                thread_batch_delay=thread_batch_delay,
-            )
-            seen_count, new_count, failed_count = runner.run()
-            db.set_tile_completed(city, query, int(p.index), result_count=seen_count or 0, processed_count=new_count or 0, failed_count=failed_count or 0)
+            if claim:
+                # Sharded mode: lease tiles one at a time from the shared table until none are runnable
+                if adaptive:
+                    logger.warning("[city] adaptive splitting is ignored in claim mode")
+                while not STOP_EVENT.is_set():
+                    row = db.claim_tile(city, query, owner=owner, lease_s=lease_s, max_attempts=settings.TILE_MAX_ATTEMPTS)
+                    if row is None:
+                        break
+                    gp = GridPoint(
+                        index=int(row["tile_index"]),
+                        latitude=float(row["tile_center_lat"]),
+                        longitude=float(row["tile_center_lng"]),
+                        row=int(row["tile_row"]),
+                        col=int(row["tile_col"]),
+                    )
+                    depth = int(row.get("depth") or 0)
+                    tile_url = row.get("tile_url") or build_search_url(query, gp.latitude, gp.longitude, zoom + depth, language)
+                    logger.info("[city] claimed tile %d (attempt %d) owner=%s", gp.index, int(row.get("attempts") or 1), owner)
+                    run_tile(gp, tile_url)
+                    processed += 1
+            elif adaptive:
+                # Quadtree mode: saturated tiles are split, tiles around empty ones deprioritized/skipped
+                tile_rows = db.list_tiles(city, query)
+                tiler = AdaptiveTiler.from_rows(
+                    tile_rows,
+                    cell_width_km=grid_cell_w,
+                    cell_height_km=grid_cell_h,
+                    result_cap=result_cap,
+                    max_depth=max_depth,
+                )
+                urls = {int(r["tile_index"]): r["tile_url"] for r in tile_rows if r.get("tile_url")}
+                while not STOP_EVENT.is_set():
+                    tile = tiler.pop()
+                    if tile is None:
+                        break
+                    tile_url = urls.get(tile.index) or build_search_url(query, tile.latitude, tile.longitude, zoom + tile.depth, language)
+                    seen_count = run_tile(tile.as_grid_point(), tile_url)
+                    if seen_count is None:
+                        if tiler.fail(tile, settings.TILE_MAX_ATTEMPTS):
+                            logger.info("[city] tile %d failed (attempt %d/%d), requeued", tile.index, tile.attempts, settings.TILE_MAX_ATTEMPTS)
+                        else:
+                            logger.warning("[city] tile %d failed %d time(s), giving up", tile.index, tile.attempts)
+                        continue
+                    outcome = tiler.report(tile, seen_count)
+                    if outcome.children:
+                        children = []
+                        for c in outcome.children:
+                            urls[c.index] = build_search_url(query, c.latitude, c.longitude, zoom + c.depth, language)
+                            children.append((c.index, c.row, c.col, c.latitude, c.longitude, urls[c.index], c.depth, c.priority))
+                        db.add_child_tiles(city, query, parent_index=tile.index, children=children)
+                        logger.info("[city] tile %d saturated (%d results) -> split into %d", tile.index, seen_count, len(children))
+                    for t in outcome.skipped:
+                        db.skip_tile(city, query, t.index, "skipped: empty neighbourhood")
+                    for t in outcome.reprioritized:
+                        db.set_tile_priority(city, query, t.index, t.priority)
+                    processed += 1
+            else:
+                for row in db.iter_tiles(city, query, page_size=settings.TILE_PAGE_SIZE):
+                    if STOP_EVENT.is_set():
+                        break
+                    # Skip completed tiles and tiles leased by another live process
+                    if row.get("status") == "completed" or db.claim_tile(city, query, owner=owner, lease_s=lease_s, max_attempts=None, tile_index=int(row["tile_index"])) is None:
+                        processed += 1
+                        continue
+                    p = GridPoint(
+                        index=int(row["tile_index"]),
+                        latitude=float(row["tile_center_lat"]),
+                        longitude=float(row["tile_center_lng"]),
+                        row=int(row["tile_row"]),
+                        col=int(row["tile_col"]),
+                    )
+                    tile_url = row.get("tile_url") or build_search_url(query, p.latitude, p.longitude, zoom + int(row.get("depth") or 0), language)
+                    run_tile(p, tile_url)
+                    processed += 1
         except KeyboardInterrupt:
             STOP_EVENT.set()
-            break
-        except Exception as exc:
-            traceback.print_exc()
-            db.set_tile_failed(city, query, int(p.index), f"tile failed: {exc}")
-            # continue to next tile instead of stopping the whole run
-            continue
-    # shutdown persistent pool
-    if executor is not None:
+        _shutdown(db=db, browser_pool=browser_pool, engine=engine, lease_keeper=lease_keeper, metrics_server=None)
+        if engine is not None:
+            engine.log_utilization()
+        browser_pool.log_stats()
+        if concurrency is not None:
+            concurrency.log_stats()
+        ContactCache.shared(db_path).log_stats()
+        flush_snapshots()
+        metrics.REGISTRY.log_summary()
+        try:
+            out = metrics.REGISTRY.dump_json(Path(settings.METRICS_DIR) / f"{run_id}.json", run_id=run_id, city=city, query=query)
+            logger.info("[city] metrics summary written to %s", out)
+        except OSError as e:
+            logger.warning("[city] metrics summary not written: %s", e)
+        if metrics_server is not None:
+            metrics_server.shutdown()
+        # torn down; the finally block only re-closes the (idempotent) pool and DB
+        engine = lease_keeper = metrics_server = None
+
+        if retry_failed and not STOP_EVENT.is_set():
+            _auto_retry(city, query, db_path=db_path, headless=headless, retry_workers=retry_workers,
+                        retry_max_total=retry_max_total, retry_only_errors=retry_only_errors)
+    finally:
+        _shutdown(db=db, browser_pool=browser_pool, engine=engine, lease_keeper=lease_keeper, metrics_server=metrics_server)
+
+
+def _shutdown(*, db: DB, browser_pool: BrowserPool, engine: Optional[PipelinedTileEngine], lease_keeper: Optional[LeaseKeeper], metrics_server) -> None:
+    """Stop what a crawl started, in dependency order; every step runs even if an earlier one fails (all are idempotent)."""
+    steps = []
+    if engine is not None:
+        steps.append(("engine", engine.close))
+    if lease_keeper is not None:
+        # after the engine: pipelined tiles stay leased until their details have landed
+        steps.append(("leases", lambda: lease_keeper.stop(release=True)))
+    steps.append(("browser pool", browser_pool.close))
+    if metrics_server is not None:
+        steps.append(("metrics endpoint", metrics_server.shutdown))
+    steps.append(("db", db.close))
+    for name, step in steps:
         try:
-            executor.shutdown(wait=True, cancel_futures=True)
+            step()
         except Exception as e:
-            logger.warning("executor shutdown failed: %s", e)
+            logger.warning("[city] %s shutdown failed: %s", name, e)
+
 
+def _auto_retry(
+    city: str,
+    query: str,
+    *,
+    db_path: Path,
+    headless: bool,
+    retry_workers: int,
+    retry_max_total: Optional[int],
+    retry_only_errors: Optional[Sequence[str]],
+) -> None:
     # 可选：在城市级抓取完成后，自动重试失败的 place 记录
-    if retry_failed and not STOP_EVENT.is_set():
-        try:
-            # 延迟导入以避免循环依赖
-            from gmaps_crawler.api import retry_failed_places  # type: ignore
+    try:
+        # 延迟导入以避免循环依赖
+        from gmaps_crawler.api import retry_failed_places  # type: ignore
 
-            summary = retry_failed_places(
-                city,
-                query,
-                db_path=db_path,
-                headless=headless,
-                workers=max(1, int(retry_workers or 1)),
-                max_total=retry_max_total,
-                only_errors=tuple(retry_only_errors) if retry_only_errors else None,
-            )
-            logger.info(
-                "[auto-retry] city=%s query=%s selected=%s attempted=%s succeeded=%s failed=%s",
-                city,
-                query,
-                summary.get("selected", 0),
-                summary.get("attempted", 0),
-                summary.get("succeeded", 0),
-                summary.get("failed", 0),
-            )
-        except Exception as e:
-            logger.warning("[auto-retry] failed to run: %s", e)
+        summary = retry_failed_places(
+            city,
+            query,
+            db_path=db_path,
+            headless=headless,
+            workers=max(1, int(retry_workers or 1)),
+            max_total=retry_max_total,
+            only_errors=tuple(retry_only_errors) if retry_only_errors else None,
+        )
+        logger.info(
+            "[auto-retry] city=%s query=%s selected=%s attempted=%s succeeded=%s failed=%s",
+            city,
+            query,
+            summary.get("selected", 0),
+            summary.get("attempted", 0),
+            summary.get("succeeded", 0),
+            summary.get("failed", 0),
+        )
+    except Exception as e:
+        logger.warning("[auto-retry] failed to run: %s", e)
 
 
 if __name__ == "__main__":  # simple smoke test
@@ -2,9 +2,12 @@ from __future__ import annotations
 
 import math
 from dataclasses import dataclass
-from typing import Iterable, List
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
 
 from gmaps_crawler.geo.bbox import BoundingBox
+from gmaps_crawler.geo.polygon import CityPolygon, spans_overlap
 
 EARTH_RADIUS_KM = 6371.0088
 MEAN_LAT_KM = 110.574  # average kilometres per degree latitude
@@ -31,52 +34,110 @@ def km_to_lon_deg(kilometres: float, latitude: float) -> float:
     return kilometres / km_per_degree
 
 
-def _frange(start: float, stop: float, step: float) -> Iterable[float]:
-    value = start
-    epsilon = step / 10.0
-    while value <= stop + epsilon:
-        yield value
-        value += step
+def _steps(start: float, stop: float, step: float) -> np.ndarray:
+    """``start, start + step, ...`` up to ``stop`` (with a step/10 tolerance), as one array."""
+    count = int(math.floor((stop + step / 10.0 - start) / step)) + 1
+    return start + step * np.arange(max(0, count), dtype=np.float64)
 
 
-def generate_grid_points(
+@dataclass(frozen=True)
+class GridChunk:
+    """A contiguous run of grid cells as parallel arrays (tile_index order)."""
+
+    index: np.ndarray
+    row: np.ndarray
+    col: np.ndarray
+    latitude: np.ndarray
+    longitude: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def points(self) -> List[GridPoint]:
+        return [
+            GridPoint(index=i, latitude=lat, longitude=lng, row=r, col=c)
+            for i, r, c, lat, lng in zip(
+                self.index.tolist(), self.row.tolist(), self.col.tolist(), self.latitude.tolist(), self.longitude.tolist()
+            )
+        ]
+
+
+def iter_grid_chunks(
     bbox: BoundingBox,
     *,
     cell_width_km: float,
     cell_height_km: float,
     overlap_ratio: float = 0.1,
-) -> List[GridPoint]:
+    polygon: Optional[CityPolygon] = None,
+    chunk_size: int = 50_000,
+) -> Iterator[GridChunk]:
+    """Grid cells covering ``bbox`` row by row, in chunks of ``chunk_size`` (the last may be shorter).
+
+    Each row is computed in bulk; memory stays at about one chunk plus one row
+    however large the region. With ``polygon`` only cells intersecting it are
+    kept; row/col stay those of the full bbox lattice (so neighbours remain
+    neighbours) and ``index`` is contiguous over the kept cells.
+    """
     if cell_width_km <= 0 or cell_height_km <= 0:
         raise ValueError("cell dimensions must be positive")
     if not (0 <= overlap_ratio < 1):
         raise ValueError("overlap_ratio must be between 0 (inclusive) and 1 (exclusive)")
+    chunk_size = max(1, int(chunk_size))
 
-    row_idx = 0
-    index = 0
-    points: List[GridPoint] = []
-
-    lat_step_km = cell_height_km * (1 - overlap_ratio)
-    lat_step_deg = km_to_lat_deg(lat_step_km)
+    lat_step_deg = km_to_lat_deg(cell_height_km * (1 - overlap_ratio))
     lat_cell_deg = km_to_lat_deg(cell_height_km)
+    lon_step_km = cell_width_km * (1 - overlap_ratio)
+
+    parts: List[Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]] = []
+    pending = 0
+    next_index = 0
+
+    def emit(final: bool) -> Iterator[GridChunk]:
+        nonlocal parts, pending, next_index
+        if not parts:
+            return
+        row, col, lat, lng = (np.concatenate(a) for a in zip(*parts))
+        start = 0
+        while len(row) - start >= chunk_size or (final and start < len(row)):
+            end = min(len(row), start + chunk_size)
+            yield GridChunk(
+                index=np.arange(next_index, next_index + end - start, dtype=np.int64),
+                row=row[start:end], col=col[start:end], latitude=lat[start:end], longitude=lng[start:end],
+            )
+            next_index += end - start
+            start = end
+        parts = [(row[start:], col[start:], lat[start:], lng[start:])] if start < len(row) else []
+        pending = len(row) - start
 
-    for lat_center in _frange(bbox.min_lat + lat_cell_deg / 2, bbox.max_lat, lat_step_deg):
-        lon_step_km = cell_width_km * (1 - overlap_ratio)
+    for row_idx, lat_center in enumerate(_steps(bbox.min_lat + lat_cell_deg / 2, bbox.max_lat, lat_step_deg).tolist()):
         lon_step_deg = km_to_lon_deg(lon_step_km, lat_center)
         lon_cell_deg = km_to_lon_deg(cell_width_km, lat_center)
+        lons = _steps(bbox.min_lon + lon_cell_deg / 2, bbox.max_lon, lon_step_deg)
+        cols = np.arange(len(lons), dtype=np.int64)
+        if polygon is not None:
+            # longitudes the polygon occupies within this row's band; one pass over the edges per row
+            spans = polygon.lon_spans(lat_center - lat_cell_deg / 2, lat_center + lat_cell_deg / 2)
+            keep = spans_overlap(spans, lons - lon_cell_deg / 2, lons + lon_cell_deg / 2)
+            lons, cols = lons[keep], cols[keep]
+        if not len(lons):
+            continue
+        parts.append((np.full(len(lons), row_idx, dtype=np.int64), cols, np.full(len(lons), lat_center), lons))
+        pending += len(lons)
+        if pending >= chunk_size:
+            yield from emit(final=False)
+    yield from emit(final=True)
 
-        col_idx = 0
-        for lon_center in _frange(bbox.min_lon + lon_cell_deg / 2, bbox.max_lon, lon_step_deg):
-            points.append(
-                GridPoint(
-                    index=index,
-                    latitude=lat_center,
-                    longitude=lon_center,
-                    row=row_idx,
-                    col=col_idx,
-                )
-            )
-            index += 1
-            col_idx += 1
-        row_idx += 1
 
+def generate_grid_points(
+    bbox: BoundingBox,
+    *,
+    cell_width_km: float,
+    cell_height_km: float,
+    overlap_ratio: float = 0.1,
+    polygon: Optional[CityPolygon] = None,
+) -> List[GridPoint]:
+    """All cells of :func:`iter_grid_chunks` as :class:`GridPoint` s (city-sized grids)."""
+    points: List[GridPoint] = []
+    for chunk in iter_grid_chunks(bbox, cell_width_km=cell_width_km, cell_height_km=cell_height_km, overlap_ratio=overlap_ratio, polygon=polygon):
+        points.extend(chunk.points())
     return points
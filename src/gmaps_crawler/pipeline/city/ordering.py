@@ -0,0 +1,170 @@
+"""
+Tile visit ordering
+Row-major ``tile_index`` order jumps a whole row width between the last tile of
+a row and the first of the next. Space-filling curves keep consecutive tiles
+adjacent, so the browser's map-tile cache and the overlap between neighbouring
+result lists (already-known cards) are reused while they are still warm.
+
+Orders are computed on the (row, col) lattice of the grid. Quadtree children
+(depth > 0, ``row*2+dr`` / ``col*2+dc``) are mapped onto the finest lattice by
+their cell centre, so mixed-depth grids order consistently.
+"""
+
+from __future__ import annotations
+
+from typing import Callable, Dict, Iterable, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from gmaps_crawler.pipeline.city.grid import GridPoint
+
+# (tile_index, row, col, depth)
+TileCell = Tuple[int, int, int, int]
+# (index, x, y, weights) -> permutation of positions, first visited first
+OrderFn = Callable[[np.ndarray, np.ndarray, np.ndarray, Optional[np.ndarray]], np.ndarray]
+
+
+def hilbert_index(order: int, x, y) -> np.ndarray:
+    """Position of (x, y) on a Hilbert curve filling a 2**order x 2**order square (element-wise)."""
+    x = np.array(x, dtype=np.int64, copy=True)
+    y = np.array(y, dtype=np.int64, copy=True)
+    n = 1 << order
+    d = np.zeros(np.broadcast(x, y).shape, dtype=np.int64)
+    s = n >> 1
+    while s > 0:
+        rx = (x & s) > 0
+        ry = (y & s) > 0
+        d += s * s * ((3 * rx.astype(np.int64)) ^ ry.astype(np.int64))
+        # rotate the quadrant so the sub-curve connects to its neighbours
+        flip = rx & ~ry
+        x = np.where(flip, n - 1 - x, x)
+        y = np.where(flip, n - 1 - y, y)
+        x, y = np.where(ry, x, y), np.where(ry, y, x)
+        s >>= 1
+    return d
+
+
+def zorder_index(x, y) -> np.ndarray:
+    """Morton code: bits of x and y interleaved (element-wise)."""
+    x = np.asarray(x, dtype=np.int64)
+    y = np.asarray(y, dtype=np.int64)
+    d = np.zeros(np.broadcast(x, y).shape, dtype=np.int64)
+    bits = int(max(int(x.max(initial=0)), int(y.max(initial=0)))).bit_length()
+    for bit in range(bits):
+        d |= ((x >> bit) & 1) << (2 * bit) | ((y >> bit) & 1) << (2 * bit + 1)
+    return d
+
+
+def _lattice(row: np.ndarray, col: np.ndarray, depth: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Cell centres on the finest lattice (doubled so centres are integers)."""
+    shift = int(depth.max(initial=0)) - depth
+    return (2 * col + 1) << shift, (2 * row + 1) << shift
+
+
+def _curve(key: Callable[[int, np.ndarray, np.ndarray], np.ndarray]) -> OrderFn:
+    def order(index: np.ndarray, x: np.ndarray, y: np.ndarray, weights: Optional[np.ndarray] = None) -> np.ndarray:
+        side = int(max(x.max(initial=0), y.max(initial=0))) + 1
+        bits = max(1, (side - 1).bit_length())
+        return np.lexsort((index, key(bits, x, y)))
+
+    return order
+
+
+def _index_order(index: np.ndarray, x: np.ndarray, y: np.ndarray, weights: Optional[np.ndarray] = None) -> np.ndarray:
+    return np.argsort(index, kind="stable")
+
+
+def _serpentine_order(index: np.ndarray, x: np.ndarray, y: np.ndarray, weights: Optional[np.ndarray] = None) -> np.ndarray:
+    # row-major, every other row reversed (baseline without the row-end jump)
+    return np.lexsort((index, np.where((y // 2) % 2 == 0, x, -x), y))
+
+
+def _spiral_order(index: np.ndarray, x: np.ndarray, y: np.ndarray, weights: Optional[np.ndarray] = None) -> np.ndarray:
+    """Square rings around the densest cell (3x3 weight sum); grid centre without weights."""
+    if not len(index):
+        return np.zeros(0, dtype=np.intp)
+    # spacing of depth-0 cells on the lattice (their centres are odd multiples of step / 2)
+    step = 2 * int((x & -x).max())
+    start = -1
+    if weights is not None and weights.any():
+        # 3x3 neighbourhood sums by looking the shifted positions up in the sorted position keys
+        span = int(y.max()) + 2 * step + 1
+        pos = x * span + y
+        order = np.argsort(pos)
+        sorted_pos, sorted_w = pos[order], weights[order].astype(np.float64)
+        density = np.zeros(len(pos), dtype=np.float64)
+        for dx in (-step, 0, step):
+            for dy in (-step, 0, step):
+                target = (x + dx) * span + (y + dy)
+                at = np.clip(np.searchsorted(sorted_pos, target), 0, len(pos) - 1)
+                density += np.where(sorted_pos[at] == target, sorted_w[at], 0.0)
+        # densest first; ties: lowest row, then lowest column
+        start = int(np.lexsort((x, y, -density))[0])
+    if start < 0:
+        dist = (x - x.mean()) ** 2 + (y - y.mean()) ** 2
+        start = int(np.lexsort((x, y, dist))[0])
+    dx = (x - x[start]) / step
+    dy = (y - y[start]) / step
+    ring = np.rint(np.maximum(np.abs(dx), np.abs(dy))).astype(np.int64)
+    # walk each ring counter-clockwise starting east of the centre
+    angle = np.arctan2(dy, dx) % (2 * np.pi)
+    return np.lexsort((index, angle, ring))
+
+
+ORDERINGS: Dict[str, OrderFn] = {
+    "index": _index_order,
+    "serpentine": _serpentine_order,
+    "hilbert": _curve(hilbert_index),
+    "zorder": _curve(lambda bits, x, y: zorder_index(x, y)),
+    "spiral": _spiral_order,
+}
+
+
+def visit_order_arrays(
+    index: np.ndarray,
+    row: np.ndarray,
+    col: np.ndarray,
+    method: str,
+    *,
+    depth: Optional[np.ndarray] = None,
+    weights: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """Visit sequence number (0-based) of every tile, aligned with the input arrays.
+
+    ``weights`` (recorded result counts) picks the spiral's start. Works on
+    millions of tiles without building Python objects per tile.
+    """
+    fn = ORDERINGS.get(method)
+    if fn is None:
+        raise ValueError(f"unknown tile order {method!r}; expected one of {', '.join(ORDERINGS)}")
+    index = np.asarray(index, dtype=np.int64)
+    depth = np.zeros(len(index), dtype=np.int64) if depth is None else np.asarray(depth, dtype=np.int64)
+    x, y = _lattice(np.asarray(row, dtype=np.int64), np.asarray(col, dtype=np.int64), depth)
+    ranked = fn(index, x, y, None if weights is None else np.asarray(weights, dtype=np.float64))
+    seq = np.empty(len(index), dtype=np.int64)
+    seq[ranked] = np.arange(len(index), dtype=np.int64)
+    return seq
+
+
+def visit_order(cells: Iterable[TileCell], method: str, *, weights: Optional[Mapping[int, float]] = None) -> Dict[int, int]:
+    """Map tile_index -> visit sequence number (0-based) for ``method`` (see ``ORDERINGS``)."""
+    arr = np.array(list(cells), dtype=np.int64).reshape(-1, 4)
+    w = None if weights is None else np.array([float(weights.get(int(i), 0.0)) for i in arr[:, 0]])
+    seq = visit_order_arrays(arr[:, 0], arr[:, 1], arr[:, 2], method, depth=arr[:, 3], weights=w)
+    return dict(zip(arr[:, 0].tolist(), seq.tolist()))
+
+
+def order_points(points: Sequence[GridPoint], method: str, *, depths: Optional[Mapping[int, int]] = None, weights: Optional[Mapping[int, float]] = None) -> Dict[int, int]:
+    """``visit_order`` for grid points (``depths`` maps tile_index -> quadtree depth, default 0)."""
+    depths = depths or {}
+    return visit_order(((p.index, p.row, p.col, int(depths.get(p.index, 0))) for p in points), method, weights=weights)
+
+
+if __name__ == "__main__":
+    demo = [(r * 6 + c, r, c, 0) for r in range(4) for c in range(6)]
+    for name in ORDERINGS:
+        seq = visit_order(demo, name)
+        grid = [[seq[r * 6 + c] for c in range(6)] for r in range(4)]
+        print(name)
+        for row in reversed(grid):
+            print("  " + " ".join(f"{v:2d}" for v in row))
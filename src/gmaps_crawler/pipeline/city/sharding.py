@@ -0,0 +1,108 @@
+"""
+Multi-process tile sharding over the ``tiles`` table.
+
+Every crawler process (local shard or another host sharing the DB file)
+claims tiles with a lease (``status='in_progress'``, ``lease_owner``,
+``lease_expires_at``). A :class:`LeaseKeeper` heartbeat renews all leases of
+its owner; tiles of a crashed process become claimable again once their
+lease expires.
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import os
+import socket
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from logger import main_thread_logger as logger
+
+from gmaps_crawler.config import settings
+from gmaps_crawler.pipeline.exec.stop import STOP_EVENT
+from gmaps_crawler.storage.db import get_connection, init_schema, release_leases, renew_leases
+
+
+def make_owner_id(run_id: str) -> str:
+    """Lease owner for this process: host, pid and run."""
+    return f"{socket.gethostname()}:{os.getpid()}:{run_id[:8]}"
+
+
+class LeaseKeeper(threading.Thread):
+    """Heartbeat that extends every in_progress lease of ``owner`` every ``lease_s / 3``."""
+
+    def __init__(self, db_path: Path, owner: str, *, lease_s: Optional[float] = None) -> None:
+        super().__init__(name="LeaseKeeper", daemon=True)
+        self.db_path = Path(db_path)
+        self.owner = owner
+        self.lease_s = float(lease_s if lease_s is not None else settings.TILE_LEASE_S)
+        self._stop_event = threading.Event()
+        self.renewals = 0
+
+    def run(self) -> None:
+        conn = get_connection(self.db_path)
+        try:
+            while not self._stop_event.wait(max(1.0, self.lease_s / 3.0)):
+                try:
+                    self.renewals += renew_leases(conn, self.owner, self.lease_s)
+                except sqlite3.Error as e:
+                    logger.warning("[lease] heartbeat failed for %s: %s", self.owner, e)
+        finally:
+            conn.close()
+
+    def stop(self, *, release: bool = True) -> None:
+        """Stop the heartbeat; with ``release`` unfinished tiles go back to 'pending' right away."""
+        self._stop_event.set()
+        if self.is_alive():
+            self.join(timeout=5.0)
+        if not release:
+            return
+        conn = get_connection(self.db_path)
+        try:
+            init_schema(conn)
+            n = release_leases(conn, self.owner)
+            if n:
+                logger.info("[lease] released %d unfinished tile(s) of %s", n, self.owner)
+        except sqlite3.Error as e:
+            logger.warning("[lease] release failed for %s: %s", self.owner, e)
+        finally:
+            conn.close()
+
+
+def _shard_main(shard_no: int, crawl_kwargs: Dict[str, Any]) -> None:
+    # imported here: crawl_city imports this module
+    from gmaps_crawler.pipeline.city.crawl_city import crawl_city
+
+    try:
+        logger.info("[shard %d] pid=%d start", shard_no, os.getpid())
+        crawl_city(**crawl_kwargs, processes=1, claim=True, retry_failed=False)
+    except KeyboardInterrupt:
+        STOP_EVENT.set()
+
+
+def run_shards(processes: int, crawl_kwargs: Dict[str, Any]) -> List[Optional[int]]:
+    """Run ``processes`` claiming crawl_city processes (own browser each); returns exit codes."""
+    ctx = multiprocessing.get_context("spawn")
+    procs = [
+        ctx.Process(target=_shard_main, args=(i, dict(crawl_kwargs)), name=f"shard-{i}")
+        for i in range(max(1, int(processes)))
+    ]
+    for p in procs:
+        p.start()
+    logger.info("[city] %d shard process(es) started: pids=%s", len(procs), [p.pid for p in procs])
+    try:
+        for p in procs:
+            p.join()
+    except KeyboardInterrupt:
+        # children got the same SIGINT; give them time to release their leases
+        STOP_EVENT.set()
+        for p in procs:
+            p.join(timeout=30.0)
+            if p.is_alive():
+                p.terminate()
+    codes = [p.exitcode for p in procs]
+    if any(c not in (0, None) for c in codes):
+        logger.warning("[city] shard exit codes: %s", codes)
+    return codes
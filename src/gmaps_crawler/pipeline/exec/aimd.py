@@ -0,0 +1,252 @@
+"""
+AIMD (additive increase / multiplicative decrease) concurrency control.
+
+Detail workers report each place's latency and outcome; the controller
+raises the concurrency limit by ``increase`` after every healthy window and
+cuts it by ``decrease`` on congestion signals (timeouts, consent walls,
+``ElementNotFoundError`` spikes, high failure rate or latency). Workers gate
+on ``acquire``/``release`` so the number of places in flight follows the
+limit while the number of open tabs stays fixed.
+"""
+
+from __future__ import annotations
+
+import math
+import statistics
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, List, Optional
+
+from logger import crawler_thread_logger as logger
+
+from gmaps_crawler.config import settings
+from gmaps_crawler.pipeline.exec.stop import STOP_EVENT
+
+TIMEOUT = "timeout"
+CONSENT = "consent"
+ENFE = "enfe"
+# a single one of these cuts the limit right away (once per cooldown)
+HARD_SIGNALS = (TIMEOUT, CONSENT)
+
+
+def classify_error(error: Optional[str]) -> Optional[str]:
+    """Map an exception class name / stored last_error to a congestion signal."""
+    if not error:
+        return None
+    if error in ("ENFE", "ElementNotFoundError"):
+        return ENFE
+    if "timeout" in error.lower():
+        return TIMEOUT
+    if "consent" in error.lower():
+        return CONSENT
+    return None
+
+
+@dataclass
+class Adjustment:
+    at: float
+    old: int
+    new: int
+    reason: str
+    samples: int
+    latency_p50_s: float
+    failure_rate: float
+
+
+@dataclass
+class _Window:
+    latencies: List[float] = field(default_factory=list)
+    failures: int = 0
+    signals: Dict[str, int] = field(default_factory=dict)
+    peak_in_flight: int = 0
+
+
+class AIMDController:
+    """Adaptive concurrency limit for detail workers (thread-safe)."""
+
+    def __init__(
+        self,
+        *,
+        max_limit: int,
+        min_limit: Optional[int] = None,
+        initial: Optional[int] = None,
+        increase: int = 1,
+        decrease: Optional[float] = None,
+        window: Optional[int] = None,
+        latency_target_s: Optional[float] = None,
+        max_failure_rate: Optional[float] = None,
+        max_enfe_rate: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+        on_adjust: Optional[Callable[[Adjustment], None]] = None,
+    ) -> None:
+        self.max_limit = max(1, int(max_limit))
+        self.min_limit = max(1, min(self.max_limit, int(min_limit if min_limit is not None else settings.AIMD_MIN_WORKERS)))
+        start = initial if initial is not None else self.min_limit
+        self._limit = max(self.min_limit, min(self.max_limit, int(start)))
+        self.increase = max(1, int(increase))
+        self.decrease = float(decrease if decrease is not None else settings.AIMD_DECREASE)
+        self.window = max(1, int(window if window is not None else settings.AIMD_WINDOW))
+        self.latency_target_s = float(latency_target_s if latency_target_s is not None else settings.AIMD_LATENCY_TARGET_S)
+        self.max_failure_rate = float(max_failure_rate if max_failure_rate is not None else settings.AIMD_MAX_FAILURE_RATE)
+        self.max_enfe_rate = float(max_enfe_rate if max_enfe_rate is not None else settings.AIMD_MAX_ENFE_RATE)
+        self.clock = clock
+        self._listeners: List[Callable[[Adjustment], None]] = [on_adjust] if on_adjust else []
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._win = _Window()
+        # no second decrease until this many samples were observed after a cut
+        self._cooldown = 0
+        self.history: Deque[Adjustment] = deque(maxlen=1000)
+        self.counters: Dict[str, int] = {"samples": 0, "failures": 0, "increases": 0, "decreases": 0}
+
+    # ---- gate ----
+    @property
+    def limit(self) -> int:
+        with self._cond:
+            return self._limit
+
+    @property
+    def in_flight(self) -> int:
+        with self._cond:
+            return self._in_flight
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """Take a slot; blocks while ``in_flight >= limit``. False on timeout/STOP_EVENT."""
+        deadline = None if timeout is None else self.clock() + timeout
+        with self._cond:
+            while self._in_flight >= self._limit:
+                if STOP_EVENT.is_set():
+                    return False
+                wait_s = 0.5
+                if deadline is not None:
+                    left = deadline - self.clock()
+                    if left <= 0:
+                        return False
+                    wait_s = min(wait_s, left)
+                self._cond.wait(wait_s)
+            self._in_flight += 1
+            self._win.peak_in_flight = max(self._win.peak_in_flight, self._in_flight)
+            return True
+
+    def release(self, latency_s: float, *, ok: bool, signal: Optional[str] = None) -> None:
+        """Return a slot and record the task's outcome."""
+        with self._cond:
+            self._in_flight = max(0, self._in_flight - 1)
+            self._cond.notify_all()
+        self.record(latency_s, ok=ok, signal=signal)
+
+    # ---- feedback ----
+    def add_listener(self, fn: Callable[[Adjustment], None]) -> None:
+        self._listeners.append(fn)
+
+    def record(self, latency_s: float, *, ok: bool, signal: Optional[str] = None, in_flight: Optional[int] = None) -> None:
+        """Feed one finished task (latency, success, congestion signal).
+
+        Callers that gate concurrency themselves pass their ``in_flight`` count.
+        """
+        adj: Optional[Adjustment] = None
+        with self._cond:
+            w = self._win
+            if in_flight is not None:
+                w.peak_in_flight = max(w.peak_in_flight, int(in_flight))
+            w.latencies.append(max(0.0, float(latency_s)))
+            self.counters["samples"] += 1
+            if not ok:
+                w.failures += 1
+                self.counters["failures"] += 1
+            if signal:
+                w.signals[signal] = w.signals.get(signal, 0) + 1
+                self.counters[f"signal_{signal}"] = self.counters.get(f"signal_{signal}", 0) + 1
+            if self._cooldown > 0:
+                self._cooldown -= 1
+
+            if signal in HARD_SIGNALS and self._cooldown == 0:
+                adj = self._decrease_locked(signal)
+            elif len(w.latencies) >= self.window:
+                adj = self._evaluate_locked()
+        if adj is not None:
+            self._emit(adj)
+
+    def _stats_locked(self):
+        w = self._win
+        n = len(w.latencies)
+        p50 = statistics.median(w.latencies) if n else 0.0
+        return n, p50, (w.failures / n) if n else 0.0
+
+    def _evaluate_locked(self) -> Optional[Adjustment]:
+        n, p50, fail_rate = self._stats_locked()
+        enfe_rate = self._win.signals.get(ENFE, 0) / n if n else 0.0
+        reason = None
+        if enfe_rate > self.max_enfe_rate:
+            reason = ENFE
+        elif fail_rate > self.max_failure_rate:
+            reason = "failures"
+        elif p50 > self.latency_target_s:
+            reason = "latency"
+        if reason is not None:
+            if self._cooldown > 0:
+                self._win = _Window(peak_in_flight=self._in_flight)
+                return None
+            return self._decrease_locked(reason)
+        # healthy window: only grow when the limit is actually being used
+        if self._limit < self.max_limit and self._win.peak_in_flight >= self._limit:
+            return self._set_locked(min(self.max_limit, self._limit + self.increase), "healthy")
+        self._win = _Window(peak_in_flight=self._in_flight)
+        return None
+
+    def _decrease_locked(self, reason: str) -> Optional[Adjustment]:
+        self._cooldown = max(self._limit, self.window // 2)
+        new = max(self.min_limit, int(math.floor(self._limit * self.decrease)))
+        if new == self._limit:
+            self._win = _Window(peak_in_flight=self._in_flight)
+            return None
+        return self._set_locked(new, reason)
+
+    def _set_locked(self, new: int, reason: str) -> Adjustment:
+        n, p50, fail_rate = self._stats_locked()
+        adj = Adjustment(at=self.clock(), old=self._limit, new=new, reason=reason, samples=n, latency_p50_s=p50, failure_rate=fail_rate)
+        self.counters["increases" if new > self._limit else "decreases"] += 1
+        self._limit = new
+        self._win = _Window(peak_in_flight=self._in_flight)
+        self.history.append(adj)
+        self._cond.notify_all()
+        return adj
+
+    def _emit(self, adj: Adjustment) -> None:
+        logger.info(
+            "[aimd] limit %d -> %d reason=%s samples=%d p50=%.1fs fail=%.0f%%",
+            adj.old, adj.new, adj.reason, adj.samples, adj.latency_p50_s, adj.failure_rate * 100.0,
+        )
+        for fn in list(self._listeners):
+            try:
+                fn(adj)
+            except Exception as e:
+                logger.debug("aimd listener failed: %s", e)
+
+    # ---- reporting ----
+    def metrics(self) -> Dict[str, float]:
+        """Current gauge/counter values (``aimd_*``) for export."""
+        with self._cond:
+            out: Dict[str, float] = {f"aimd_{k}_total": float(v) for k, v in self.counters.items()}
+            out["aimd_limit"] = float(self._limit)
+            out["aimd_in_flight"] = float(self._in_flight)
+            out["aimd_max_limit"] = float(self.max_limit)
+        return out
+
+    def log_stats(self) -> None:
+        m = self.metrics()
+        logger.info(
+            "[aimd] final limit=%d/%d samples=%d failures=%d increases=%d decreases=%d",
+            m["aimd_limit"], m["aimd_max_limit"], m["aimd_samples_total"], m["aimd_failures_total"],
+            m["aimd_increases_total"], m["aimd_decreases_total"],
+        )
+
+
+def from_settings(max_limit: int, *, enabled: Optional[bool] = None) -> Optional[AIMDController]:
+    """Controller for ``max_limit`` workers when enabled (default AIMD_ENABLED), else None (fixed concurrency)."""
+    if not (settings.AIMD_ENABLED if enabled is None else enabled) or max_limit <= 1:
+        return None
+    return AIMDController(max_limit=max_limit, initial=settings.AIMD_INITIAL_WORKERS or None)
+
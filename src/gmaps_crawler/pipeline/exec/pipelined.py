@@ -0,0 +1,314 @@
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+from DrissionPage import Chromium
+from logger import crawler_thread_logger as logger
+
+from gmaps_crawler.browser.pool import BrowserPool
+from gmaps_crawler.config import settings
+from gmaps_crawler.pipeline.city.context import RunContext, TileContext
+from gmaps_crawler.pipeline.exec.aimd import AIMDController
+from gmaps_crawler.pipeline.exec.simple_pool import TabWorker
+from gmaps_crawler.pipeline.exec.stop import STOP_EVENT
+from gmaps_crawler.pipeline.search.cards import collect_cards
+from gmaps_crawler.pipeline.tasks.build import build_tasks
+from gmaps_crawler.pipeline.tile.session import BrowserSession
+from gmaps_crawler.storage.db import DB
+from gmaps_crawler.storage.snapshots import TILE, SnapshotStore, tile_key
+from gmaps_crawler.utils.metrics import metric_labels
+from gmaps_crawler.utils.time import log_duration
+
+
+@dataclass
+class _TileState:
+    ctx: TileContext
+    seen: int
+    outstanding: int
+    harvested: bool = False
+    inserted: int = 0
+    failed: int = 0
+
+
+class PipelinedTileEngine:
+    """Two-stage tile engine: card harvesting feeds a long-lived detail fleet.
+
+    Stages:
+    1. harvest (caller thread): open the tile search, scroll, collect cards,
+       enqueue detail tasks into a bounded global queue (blocks when full)
+    2. detail (``workers`` TabWorker threads): drain the queue across tiles
+
+    So the search tab scrolls tile N+1 while the detail tabs still work on
+    tile N. A tile is marked completed once all of its tasks have landed.
+
+    One browser serves the search tab and the detail tabs. Between tiles the
+    engine asks the pool whether it is due for recycling (tile count / RSS);
+    if so the detail queue is drained, the fleet stopped, the browser
+    released, and a fresh fleet opens its tabs on the replacement. Per-tile
+    proxy rotation is not applied in this mode.
+    """
+
+    def __init__(
+        self,
+        *,
+        browser_pool: BrowserPool,
+        run_ctx: RunContext,
+        db_path: Optional[Path],
+        workers: int = 1,
+        queue_size: Optional[int] = None,
+        proxy: Optional[str] = None,
+        controller: Optional[AIMDController] = None,
+    ) -> None:
+        self.browser_pool = browser_pool
+        self.run_ctx = run_ctx
+        self.db_path = db_path
+        self.workers = max(1, int(workers))
+        self.proxy = proxy
+        self.controller = controller
+        size = int(queue_size if queue_size is not None else settings.PIPELINE_QUEUE_SIZE)
+        self._queue: "queue.Queue[Optional[Dict]]" = queue.Queue(maxsize=max(1, size))
+        self._session = BrowserSession()
+        self._lock = threading.Lock()
+        self._tiles: Dict[int, _TileState] = {}
+        # place_ids queued but not landed yet; overlapping tiles must not queue them twice
+        self._in_flight: Set[str] = set()
+        self._threads: List[TabWorker] = []
+        self._fleets = 0
+        self._retired_busy_s = 0.0
+        self._browser: Optional[Chromium] = None
+        self._db: Optional[DB] = None
+        self._started_at = 0.0
+        self._stopped_at = 0.0
+        self._harvest_busy_s = 0.0
+        self._harvest_blocked_s = 0.0
+        self._queue_max = 0
+        self._tiles_completed = 0
+
+    # ---- lifecycle ----
+    def start(self) -> None:
+        if self._threads:
+            return
+        self._started_at = time.monotonic()
+        self._browser = self.browser_pool.lease(proxy=self.proxy)
+        known = getattr(self.run_ctx.db, "known_places", None)
+        self._db = DB(self.db_path, batched=True, known_places=known)
+        self._start_fleet()
+
+    def _start_fleet(self) -> None:
+        self._fleets += 1
+        for i in range(self.workers):
+            t = TabWorker(
+                browser=self._browser,
+                task_queue=self._queue,
+                run_ctx=self.run_ctx,
+                tile_ctx=None,
+                db_path=self.db_path,
+                query=self.run_ctx.query,
+                db=self._db,
+                on_result=self._on_result,
+                controller=self.controller,
+            )
+            t.name = f"tab-{i}" if self._fleets == 1 else f"tab-{i}.{self._fleets}"
+            t.start()
+            self._threads.append(t)
+
+    def _stop_fleet(self) -> None:
+        # sentinels queue behind every pending task, so the fleet drains the queue first;
+        # after STOP_EVENT the workers leave without draining, so the (full) queue is emptied instead
+        sent = 0
+        while sent < len(self._threads):
+            if STOP_EVENT.is_set() or not any(t.is_alive() for t in self._threads):
+                self._discard_queued()
+                break
+            try:
+                self._queue.put(None, timeout=0.5)
+            except queue.Full:
+                continue
+            sent += 1
+        for t in self._threads:
+            t.join()
+
+    def _discard_queued(self) -> None:
+        dropped = 0
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+            self._queue.task_done()
+            dropped += 1
+        if dropped:
+            logger.info("[pipeline] stop: %d queued detail task(s) dropped", dropped)
+
+    def _maybe_recycle(self) -> None:
+        """Swap in a fresh browser between tiles when the pool says this one is due."""
+        if self._browser is None or STOP_EVENT.is_set():
+            return
+        reason = self.browser_pool.recycle_due(self._browser)
+        if reason is None:
+            return
+        t0 = time.monotonic()
+        self._stop_fleet()
+        if STOP_EVENT.is_set():
+            # stopped while draining: close() releases the browser, no replacement needed
+            return
+        self._retired_busy_s += sum(t.busy_s for t in self._threads)
+        self._threads = []
+        browser, self._browser = self._browser, None
+        self.browser_pool.release(browser, count_tile=False)
+        self._browser = self.browser_pool.lease(proxy=self.proxy)
+        self._start_fleet()
+        logger.info("[pipeline] browser recycled (%s); fleet restarted in %.1fs", reason, time.monotonic() - t0)
+
+    def close(self) -> None:
+        """Drain the detail queue, stop the fleet, flush writes and return the browser."""
+        if not self._threads and self._db is None:
+            return
+        self._stop_fleet()
+        self._stopped_at = time.monotonic()
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+        if self._browser is not None:
+            self.browser_pool.release(self._browser, healthy=not STOP_EVENT.is_set(), count_tile=False)
+            self._browser = None
+        with self._lock:
+            pending = [s.ctx.index for s in self._tiles.values()]
+        if pending:
+            logger.warning("[pipeline] %d tile(s) left in_progress (stopped): %s", len(pending), pending)
+
+    # ---- harvest stage ----
+    def harvest(self, tile_ctx: TileContext) -> int:
+        """Collect one tile's cards and queue its detail tasks; returns the card count.
+
+        Raises on search failures (the caller marks the tile failed).
+        """
+        if self._browser is None:
+            raise RuntimeError("PipelinedTileEngine not started")
+        self._maybe_recycle()
+        t0 = time.monotonic()
+        blocked = 0.0
+        search_tab = None
+        with metric_labels(tile=tile_ctx.index):
+            try:
+                with log_duration(logger, "open_search_tab"):
+                    search_tab = self._session.open_search_tab(self._browser, tile_ctx.tile_url)
+                self._session.ensure_consent(search_tab, attempts=3)
+                # first results page, picked up by the XHR card collector
+                packets: List = []
+                self._session.ensure_local_search(search_tab, attempts=5, packets=packets)
+                search_tab.wait(2)
+                if search_tab.wait.eles_loaded("@text():No results found"):
+                    cards: List[Dict] = []
+                else:
+                    with log_duration(logger, "scroll_and_collect"):
+                        cards = collect_cards(self._browser, search_tab, self.run_ctx.query, packets)
+                    self._snapshot_search(search_tab, tile_ctx)
+            finally:
+                if search_tab is not None:
+                    try:
+                        search_tab.close()
+                    except Exception as e:
+                        logger.warning("search tab close failed: %s", e)
+                self.browser_pool.note_tile(self._browser)
+
+        tasks = build_tasks(cards, city=self.run_ctx.city, query=self.run_ctx.query, db=self.run_ctx.db)
+        with self._lock:
+            tasks = [t for t in tasks if t["_pid"] not in self._in_flight]
+            self._in_flight.update(t["_pid"] for t in tasks)
+            state = _TileState(ctx=tile_ctx, seen=len(cards), outstanding=len(tasks))
+            self._tiles[tile_ctx.index] = state
+        logger.info("[pipeline] tile %d harvested cards=%d queued=%d backlog=%d", tile_ctx.index, len(cards), len(tasks), self._queue.qsize())
+
+        for info in tasks:
+            info["_tile_ctx"] = tile_ctx
+            tb = time.monotonic()
+            while not STOP_EVENT.is_set():
+                try:
+                    self._queue.put(info, timeout=0.5)
+                    break
+                except queue.Full:
+                    continue
+            blocked += time.monotonic() - tb
+        with self._lock:
+            self._queue_max = max(self._queue_max, self._queue.qsize())
+            state.harvested = True
+            self._harvest_busy_s += time.monotonic() - t0 - blocked
+            self._harvest_blocked_s += blocked
+            self._maybe_finish(state)
+        return state.seen
+
+    def _snapshot_search(self, search_tab, tile_ctx: TileContext) -> None:
+        html_root = getattr(self.run_ctx, "html_root", None)
+        if not (settings.SNAPSHOT_HTML and html_root):
+            return
+        try:
+            key = tile_key(self.run_ctx.city, self.run_ctx.query, tile_ctx.index)
+            SnapshotStore(html_root).put_async(TILE, key, search_tab.html, url=tile_ctx.tile_url)
+        except Exception as e:
+            logger.debug("search snapshot failed: %s", e)
+
+    # ---- detail stage callbacks ----
+    def _on_result(self, info: Dict, ok: bool) -> None:
+        tile_ctx = info.get("_tile_ctx")
+        with self._lock:
+            self._in_flight.discard(str(info.get("_pid") or ""))
+            state = self._tiles.get(tile_ctx.index) if tile_ctx is not None else None
+            if state is None:
+                return
+            state.outstanding -= 1
+            if ok:
+                state.inserted += 1
+            else:
+                state.failed += 1
+            self._maybe_finish(state)
+
+    def _maybe_finish(self, state: _TileState) -> None:
+        # caller holds self._lock
+        if not state.harvested or state.outstanding > 0:
+            return
+        self._tiles.pop(state.ctx.index, None)
+        self._tiles_completed += 1
+        db = self._db or self.run_ctx.db
+        db.set_tile_completed(
+            self.run_ctx.city,
+            self.run_ctx.query,
+            int(state.ctx.index),
+            result_count=state.seen,
+            processed_count=state.inserted,
+            failed_count=state.failed,
+        )
+        logger.info("[tile %d] summary: seen=%d inserted=%d failed=%d", state.ctx.index, state.seen, state.inserted, state.failed)
+
+    # ---- reporting ----
+    def utilization(self) -> Dict[str, float]:
+        """Busy fraction of each stage over the engine's wall time."""
+        end = self._stopped_at or time.monotonic()
+        wall = max(1e-9, end - self._started_at) if self._started_at else 0.0
+        detail_busy = self._retired_busy_s + sum(t.busy_s for t in self._threads)
+        with self._lock:
+            return {
+                "wall_s": wall,
+                "tiles_completed": self._tiles_completed,
+                "harvest_busy_s": self._harvest_busy_s,
+                "harvest_blocked_s": self._harvest_blocked_s,
+                "harvest_util": (self._harvest_busy_s / wall) if wall else 0.0,
+                "detail_busy_s": detail_busy,
+                "detail_util": (detail_busy / (wall * len(self._threads))) if wall and self._threads else 0.0,
+                "queue_max": self._queue_max,
+            }
+
+    def log_utilization(self) -> None:
+        u = self.utilization()
+        logger.info(
+            "[pipeline] wall=%.1fs tiles=%d harvest_util=%.0f%% (busy=%.1fs blocked=%.1fs) detail_util=%.0f%% (busy=%.1fs x%d) queue_max=%d",
+            u["wall_s"], u["tiles_completed"],
+            u["harvest_util"] * 100.0, u["harvest_busy_s"], u["harvest_blocked_s"],
+            u["detail_util"] * 100.0, u["detail_busy_s"], len(self._threads),
+            u["queue_max"],
+        )
@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import math
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from DrissionPage import Chromium
+from logger import crawler_thread_logger as logger
+
+from gmaps_crawler.browser.pool import BrowserPool
+from gmaps_crawler.config import settings
+from gmaps_crawler.pipeline.city.context import RunContext, TileContext
+from gmaps_crawler.pipeline.exec.simple_pool import TabWorker
+from gmaps_crawler.pipeline.exec.stop import STOP_EVENT
+from gmaps_crawler.storage.db import DB
+from gmaps_crawler.storage.snapshots import flush_snapshots
+
+TileKey = Tuple[str, str, int]
+
+
+class BatchRerunEngine:
+    """Stream failed places through ``browsers`` x ``tabs_per_browser`` long-lived tabs.
+
+    Every rerun task carries its own run/tile context (``_run_ctx`` /
+    ``_tile_ctx``), so one fleet of :class:`TabWorker` s can retry places of
+    any city, query or tile. Rows go through one batched DB.
+
+    Each browser slot works in lease cycles of ``RERUN_LEASE_PLACES`` places:
+    lease a browser, open its tabs, drain the cycle's places, release. The
+    pool checks RSS on every release and relaunches a browser after
+    ``RERUN_RECYCLE_PLACES`` places, as it does for tiles in a city crawl.
+    """
+
+    def __init__(
+        self,
+        *,
+        db_path: Path,
+        headless: bool = True,
+        browsers: int = 1,
+        tabs_per_browser: int = 4,
+        html_root: Optional[Path] = None,
+        browser_factory: Optional[Callable[..., Chromium]] = None,
+    ) -> None:
+        self.db_path = db_path
+        self.headless = headless
+        self.browsers = max(1, int(browsers))
+        self.tabs_per_browser = max(1, int(tabs_per_browser))
+        self.html_root = html_root
+        self._factory = browser_factory
+        self._lock = threading.Lock()
+        self._affected: Set[TileKey] = set()
+        self._results: List[Dict[str, Any]] = []
+
+    def _on_result(self, info: Dict, ok: bool) -> None:
+        run_ctx, tile_ctx = info["_run_ctx"], info["_tile_ctx"]
+        with self._lock:
+            self._affected.add((run_ctx.city, run_ctx.query, tile_ctx.index))
+            self._results.append({"place_id": info.get("_pid"), "status": "success" if ok else "failed", "tile_index": tile_ctx.index})
+
+    def _tasks(self, rows: List[Dict], db: DB) -> List[Dict]:
+        runs: Dict[Tuple[str, str, str], RunContext] = {}
+        tiles: Dict[int, TileContext] = {}
+        tasks: List[Dict] = []
+        for r in rows:
+            city, query = str(r.get("city") or ""), str(r.get("query") or "")
+            run_id = str(r.get("run_id") or "manual_rerun")
+            run_ctx = runs.get((city, query, run_id))
+            if run_ctx is None:
+                run_ctx = runs[(city, query, run_id)] = RunContext(
+                    city=city, query=query, country=None, zoom=0, language="en", run_id=run_id,
+                    csv_path=Path(""), html_root=self.html_root, db=db,
+                )
+            index = int(r.get("tile_index") or 0)
+            tile_ctx = tiles.get(index)
+            if tile_ctx is None:
+                tile_ctx = tiles[index] = TileContext(index=index, row=0, col=0, center_lat=0.0, center_lng=0.0, tile_url="")
+            lat, lng = float(r.get("lat") or 0.0), float(r.get("lng") or 0.0)
+            tasks.append({
+                "name": str(r.get("name") or ""),
+                "href": str(r.get("href") or ""),
+                "_pid": str(r.get("place_id") or ""),
+                # 0.0 means unknown: the worker parses the coordinates from the href instead
+                "_lat": lat or None,
+                "_lng": lng or None,
+                # a failed retry writes these back instead of blanking the stored row
+                "_warnings": r.get("warnings") or "[]",
+                "_run_ctx": run_ctx,
+                "_tile_ctx": tile_ctx,
+            })
+        return tasks
+
+    def _serve_slot(self, slot: int, pool: BrowserPool, pending: "queue.Queue[Dict]", tabs: int, cycle: int, db: DB) -> None:
+        """Lease a browser per ``cycle`` places until ``pending`` is empty."""
+        n = 0
+        while not STOP_EVENT.is_set():
+            batch: "queue.Queue[Optional[Dict]]" = queue.Queue()
+            first: Optional[Dict] = None
+            size = 0
+            while size < cycle:
+                try:
+                    info = pending.get_nowait()
+                except queue.Empty:
+                    break
+                first = first or info
+                batch.put(info)
+                size += 1
+            if first is None:
+                return
+            n_tabs = min(tabs, size)
+            for _ in range(n_tabs):
+                batch.put(None)
+            browser = pool.lease()
+            healthy = False
+            try:
+                workers: List[TabWorker] = []
+                for i in range(n_tabs):
+                    w = TabWorker(
+                        browser=browser,
+                        task_queue=batch,
+                        run_ctx=first["_run_ctx"],
+                        tile_ctx=first["_tile_ctx"],
+                        db_path=self.db_path,
+                        query=first["_run_ctx"].query,
+                        db=db,
+                        on_result=self._on_result,
+                    )
+                    w.name = f"rerun-{slot}-{i}" if n == 0 else f"rerun-{slot}-{i}.{n}"
+                    w.start()
+                    workers.append(w)
+                for w in workers:
+                    w.join()
+                healthy = True
+            finally:
+                pool.release(browser, healthy=healthy)
+            n += 1
+
+    def run(self, rows: List[Dict]) -> Dict[str, Any]:
+        """Rerun ``rows`` (place rows as returned by ``rerun_place._select_failed_places``) and return a summary."""
+        if not rows:
+            return {"selected": 0, "attempted": 0, "succeeded": 0, "failed": 0, "results": []}
+        t0 = time.monotonic()
+        db = DB(self.db_path, batched=True)
+        tasks = self._tasks(rows, db)
+        # no more browsers/tabs than there is work for
+        browsers = min(self.browsers, len(tasks))
+        tabs = min(self.tabs_per_browser, math.ceil(len(tasks) / browsers))
+        pending: "queue.Queue[Dict]" = queue.Queue()
+        for info in tasks:
+            pending.put(info)
+
+        cycle = max(1, int(settings.RERUN_LEASE_PLACES))
+        # one pool "tile" per lease cycle
+        recycle = math.ceil(int(settings.RERUN_RECYCLE_PLACES) / cycle) if settings.RERUN_RECYCLE_PLACES > 0 else 0
+        pool = BrowserPool(headless=self.headless, size=browsers, max_tiles=recycle, factory=self._factory)
+        slots = [
+            threading.Thread(target=self._serve_slot, args=(b, pool, pending, tabs, cycle, db), name=f"rerun-slot-{b}", daemon=True)
+            for b in range(browsers)
+        ]
+        logger.info("[rerun] %d place(s) -> %d browser(s) x %d tab(s), %d place(s) per lease", len(tasks), browsers, tabs, cycle)
+        try:
+            for t in slots:
+                t.start()
+            for t in slots:
+                t.join()
+        finally:
+            pool.close()
+            pool.log_stats()
+            # tile counters follow each row through the places triggers
+            db.close()
+            flush_snapshots()
+
+        elapsed = time.monotonic() - t0
+        succeeded = sum(1 for r in self._results if r["status"] == "success")
+        attempted = len(self._results)
+        logger.info(
+            "[rerun] attempted=%d succeeded=%d failed=%d tiles=%d elapsed=%.1fs rate=%.2f/s",
+            attempted, succeeded, attempted - succeeded, len(self._affected), elapsed, attempted / elapsed if elapsed else 0.0,
+        )
+        return {
+            "selected": len(rows),
+            "attempted": attempted,
+            "succeeded": succeeded,
+            "failed": attempted - succeeded,
+            "tiles_updated": len(self._affected),
+            "elapsed_s": round(elapsed, 3),
+            "browsers": browsers,
+            "tabs_per_browser": tabs,
+            "results": list(self._results),
+        }
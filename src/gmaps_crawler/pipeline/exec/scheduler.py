@@ -8,11 +8,12 @@ from __future__ import annotations
 import time
 from logger import crawler_thread_logger as logger
 import threading
-from typing import List, Callable, Any, Optional, Dict
+from collections import deque
+from typing import List, Callable, Any, Optional, Dict, Deque, Tuple
 from concurrent.futures import ThreadPoolExecutor, Future
-from queue import Queue, Empty
 
 from gmaps_crawler.config import settings
+from gmaps_crawler.pipeline.exec.aimd import AIMDController, classify_error
 from gmaps_crawler.pipeline.exec.stop import STOP_EVENT
 
 
@@ -27,26 +28,39 @@ class ProgressiveTaskScheduler:
     2. Configurable startup delay and batch size
     3. Support dynamic task submission
     4. Graceful stop via STOP_EVENT
+
+    Event driven: every state change (submit, task done, stop) notifies one
+    condition variable; finished futures land in a completion queue via their
+    done-callback, so nothing polls ``_active_futures``.
     """
 
+    # bounded waits only so STOP_EVENT (a plain Event) is noticed
+    _STOP_CHECK_S = 0.5
+
     def __init__(
         self,
         max_workers: int,
         startup_delay: Optional[float] = None,
         batch_size: Optional[int] = None,
         batch_delay: Optional[float] = None,
+        controller: Optional[AIMDController] = None,
     ):
         self.max_workers = max_workers
-        self.startup_delay = startup_delay or settings.THREAD_STARTUP_DELAY
+        self.startup_delay = settings.THREAD_STARTUP_DELAY if startup_delay is None else startup_delay
         self.batch_size = batch_size or settings.THREAD_BATCH_SIZE
-        self.batch_delay = batch_delay or settings.THREAD_BATCH_DELAY
+        self.batch_delay = settings.THREAD_BATCH_DELAY if batch_delay is None else batch_delay
+        # adaptive concurrency: running tasks follow controller.limit (capped at max_workers)
+        self.controller = controller
 
-        self._task_queue: Queue = Queue()
+        self._pending: Deque[Tuple[Callable, tuple, dict]] = deque()
         self._active_futures: Dict[Future, Any] = {}
+        self._completed: Deque[Future] = deque()
+        self._starting = 0  # dequeued, not yet active/completed
         self._executor: Optional[ThreadPoolExecutor] = None
         self._scheduler_thread: Optional[threading.Thread] = None
         self._running = False
         self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
 
         # logger.info(
         #     "Initialize progressive scheduler: max_workers=%d, batch_size=%d, batch_delay=%.1fs",
@@ -70,11 +84,12 @@ class ProgressiveTaskScheduler:
 
     def stop(self, wait: bool = True):
         """Stop scheduler."""
-        with self._lock:
+        with self._cond:
             if not self._running:
                 return
 
             self._running = False
+            self._cond.notify_all()
 
         if self._scheduler_thread and wait:
             self._scheduler_thread.join(timeout=5.0)
@@ -89,14 +104,16 @@ class ProgressiveTaskScheduler:
         if not self._running:
             raise RuntimeError("Scheduler not started")
 
-        task = (func, args, kwargs)
-        self._task_queue.put(task)
+        with self._cond:
+            self._pending.append((func, args, kwargs))
+            self._cond.notify_all()
 
     def submit_tasks(self, tasks: List[tuple]) -> None:
         """Submit a batch of tasks.
 
         Each item is (func, args) or (func, args, kwargs).
         """
+        items = []
         for task in tasks:
             if len(task) == 1:
                 func = task[0]
@@ -106,48 +123,78 @@ class ProgressiveTaskScheduler:
                 kwargs = {}
             else:
                 func, args, kwargs = task
+            items.append((func, tuple(args), dict(kwargs)))
 
-            self.submit_task(func, *args, **kwargs)
+        if not self._running:
+            raise RuntimeError("Scheduler not started")
+        with self._cond:
+            self._pending.extend(items)
+            self._cond.notify_all()
 
-    def get_results(self):
-        """Yield results of finished tasks and remove them from active list."""
-        completed_futures: List[Future] = []
+    @staticmethod
+    def _unwrap(future: Future):
+        try:
+            return future.result()
+        except Exception as e:
+            logger.warning("Task failed: %s", e)
+            return None
 
+    def get_results(self):
+        """Yield results of finished tasks without blocking (None for failed tasks)."""
         with self._lock:
-            for future in list(self._active_futures.keys()):
-                if future.done():
-                    completed_futures.append(future)
-                    del self._active_futures[future]
+            completed = list(self._completed)
+            self._completed.clear()
 
-        for future in completed_futures:
-            try:
-                yield future.result()
-            except Exception as e:
-                logger.warning("Task failed: %s", e)
-                yield None
+        for future in completed:
+            yield self._unwrap(future)
 
-    def wait_for_completion(self, timeout: Optional[float] = None):
-        """Block until all tasks finished or timeout/STOP_EVENT triggered."""
-        start_time = time.time()
+    def iter_results(self, timeout: Optional[float] = None):
+        """Yield results as tasks finish until all submitted work is done.
 
+        Blocks on the condition variable between results; ends early on
+        STOP_EVENT, ``stop()`` or ``timeout`` (already finished results are
+        still yielded).
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
         while True:
-            if STOP_EVENT.is_set():
-                break
-
-            with self._lock:
-                has_pending = not self._task_queue.empty()
-                has_active = len(self._active_futures) > 0
+            with self._cond:
+                while not self._completed:
+                    if STOP_EVENT.is_set() or not self._running:
+                        return
+                    if self._idle():
+                        return
+                    wait_s = self._STOP_CHECK_S
+                    if deadline is not None:
+                        left = deadline - time.monotonic()
+                        if left <= 0:
+                            logger.warning("Wait for results timed out")
+                            return
+                        wait_s = min(wait_s, left)
+                    self._cond.wait(wait_s)
+                completed = list(self._completed)
+                self._completed.clear()
+
+            for future in completed:
+                yield self._unwrap(future)
 
-            if not has_pending and not has_active:
-                break
-
-            if timeout and (time.time() - start_time) > timeout:
-                logger.warning("Wait for completion timed out")
-                break
+    def wait_for_completion(self, timeout: Optional[float] = None):
+        """Block until all tasks finished or timeout/STOP_EVENT triggered.
 
-            # Drain any finished results to keep active set small
-            list(self.get_results())
-            time.sleep(0.1)
+        Finished results stay queued for ``get_results``/``iter_results``.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while not self._idle():
+                if STOP_EVENT.is_set() or not self._running:
+                    break
+                wait_s = self._STOP_CHECK_S
+                if deadline is not None:
+                    left = deadline - time.monotonic()
+                    if left <= 0:
+                        logger.warning("Wait for completion timed out")
+                        break
+                    wait_s = min(wait_s, left)
+                self._cond.wait(wait_s)
 
         logger.info("All tasks completed or stopped")
 
@@ -155,29 +202,27 @@ class ProgressiveTaskScheduler:
         """Background loop to start queued tasks progressively."""
         logger.info("Scheduler main loop start")
 
-        while self._running and not STOP_EVENT.is_set():
+        while True:
             try:
-                with self._lock:
+                with self._cond:
+                    # sleep until a slot and a task are both available
+                    while self._running and not STOP_EVENT.is_set() and (
+                        not self._pending or len(self._active_futures) >= self._slots()
+                    ):
+                        self._cond.wait(self._STOP_CHECK_S)
+                    if not self._running or STOP_EVENT.is_set():
+                        break
                     active_count = len(self._active_futures)
+                    batch_size = min(self.batch_size, self._slots() - active_count)
 
-                if active_count < self.max_workers:
-                    available_slots = self.max_workers - active_count
-                    batch_size = min(self.batch_size, available_slots)
-
-                    started_count = self._start_task_batch(batch_size)
-
-                    if started_count > 0:
-                        logger.debug("Started %d new task(s), active=%d", started_count, active_count + started_count)
-
-                        # If a full batch was started, wait batch delay
-                        if started_count == batch_size:
-                            time.sleep(self.batch_delay)
-                        continue
+                started_count = self._start_task_batch(batch_size)
 
-                # Cleanup completed
-                self._cleanup_completed_tasks()
+                if started_count > 0:
+                    logger.debug("Started %d new task(s), active=%d", started_count, active_count + started_count)
 
-                time.sleep(0.1)
+                    # If a full batch was started, wait batch delay
+                    if started_count == batch_size and self.batch_delay > 0:
+                        STOP_EVENT.wait(self.batch_delay)
 
             except Exception as e:
                 logger.error("Scheduler loop error: %s", e)
@@ -185,27 +230,64 @@ class ProgressiveTaskScheduler:
 
         logger.info("Scheduler main loop end")
 
+    def _idle(self) -> bool:
+        # caller holds self._lock
+        return not self._pending and not self._active_futures and not self._starting
+
+    def _slots(self) -> int:
+        if self.controller is None:
+            return self.max_workers
+        return max(1, min(self.max_workers, self.controller.limit))
+
+    def _feed_controller(self, future: Future, started_at: float) -> None:
+        ok, error = True, None
+        exc = future.exception()
+        if exc is not None:
+            ok, error = False, exc.__class__.__name__
+        else:
+            res = future.result()
+            if isinstance(res, dict) and res.get("status") == "failed":
+                ok, error = False, str((res.get("payload") or {}).get("last_error") or "")
+        with self._lock:
+            in_flight = len(self._active_futures)
+        self.controller.record(time.monotonic() - started_at, ok=ok, signal=classify_error(error), in_flight=in_flight)
+
+    def _on_task_done(self, future: Future, started_at: Optional[float] = None) -> None:
+        if self.controller is not None and started_at is not None:
+            try:
+                self._feed_controller(future, started_at)
+            except Exception as e:
+                logger.debug("controller feedback failed: %s", e)
+        with self._cond:
+            self._active_futures.pop(future, None)
+            self._completed.append(future)
+            self._cond.notify_all()
+
     def _start_task_batch(self, batch_size: int) -> int:
         """Start up to batch_size tasks from the queue."""
         started = 0
 
         for _ in range(batch_size):
+            with self._lock:
+                if not self._pending:
+                    break
+                task = self._pending.popleft()
+                self._starting += 1
+            func, args, kwargs = task
             try:
-                task = self._task_queue.get_nowait()
-                func, args, kwargs = task
-
+                started_at = time.monotonic()
                 future = self._executor.submit(func, *args, **kwargs)
-
                 with self._lock:
                     self._active_futures[future] = task
+                    self._starting -= 1
+                # registered after the insert so a fast task cannot finish "before" it started
+                future.add_done_callback(lambda f, t0=started_at: self._on_task_done(f, t0))
 
                 started += 1
 
                 if started < batch_size and self.startup_delay > 0:
-                    time.sleep(self.startup_delay)
+                    STOP_EVENT.wait(self.startup_delay)
 
-            except Empty:
-                break
             except Exception as e:
                 # Submit失败：同步降级执行以保证每个出队任务都产生一个结果
                 logger.error("Failed to start task: %s", e)
@@ -215,31 +297,19 @@ class ProgressiveTaskScheduler:
                     # 包装为已完成的 Future 纳入结果收集
                     fut = Future()
                     fut.set_result(result)
-                    with self._lock:
-                        self._active_futures[fut] = task
+                    with self._cond:
+                        self._completed.append(fut)
                     started += 1
                 except Exception as e2:
                     # 同步执行也失败，仅记录错误；为避免 writer 端协议破坏，不塞入无效结果
                     logger.error("Fallback execute task failed: %s", e2)
+                finally:
+                    with self._cond:
+                        self._starting -= 1
+                        self._cond.notify_all()
 
         return started
 
-    def _cleanup_completed_tasks(self):
-        """Evict completed futures from active set; no-op hook for extra processing."""
-        completed_futures: List[Future] = []
-
-        with self._lock:
-            for future in list(self._active_futures.keys()):
-                if future.done():
-                    completed_futures.append(future)
-                    del self._active_futures[future]
-
-        for future in completed_futures:
-            try:
-                _ = future.result()
-            except Exception as e:
-                logger.warning("Task execution exception: %s", e)
-
     @property
     def active_task_count(self) -> int:
         with self._lock:
@@ -247,7 +317,8 @@ class ProgressiveTaskScheduler:
 
     @property
     def pending_task_count(self) -> int:
-        return self._task_queue.qsize()
+        with self._lock:
+            return len(self._pending)
 
 
 class ProgressiveTaskManager:
@@ -257,7 +328,6 @@ class ProgressiveTaskManager:
         self.scheduler = scheduler
         self.results: List[Any] = []
         self.errors: List[Exception] = []
-        self._result_lock = threading.Lock()
 
     def execute_tasks(self, tasks: List[tuple], timeout: Optional[float] = None) -> List[Any]:
         """Execute tasks and return collected results."""
@@ -268,44 +338,22 @@ class ProgressiveTaskManager:
 
         try:
             self.scheduler.submit_tasks(tasks)
-
-            self._collect_results_async()
-            self.scheduler.wait_for_completion(timeout)
-
-            self._collect_remaining_results()
+            for result in self.scheduler.iter_results(timeout):
+                self._collect(result)
 
         finally:
             self.scheduler.stop()
 
+        # tasks that finished while stopping
+        for result in self.scheduler.get_results():
+            self._collect(result)
+
         logger.info("Tasks finished: success=%d, failures=%d", len(self.results), len(self.errors))
 
         return self.results
 
-    def _collect_results_async(self):
-        """Background collector that appends results as they become available."""
-
-        def collect_loop():
-            while self.scheduler._running and not STOP_EVENT.is_set():
-                for result in self.scheduler.get_results():
-                    with self._result_lock:
-                        if result is not None:
-                            self.results.append(result)
-                        else:
-                            self.errors.append(Exception("task returned None"))
-                time.sleep(0.1)
-
-        collector_thread = threading.Thread(
-            target=collect_loop,
-            name="ResultCollector",
-            daemon=True,
-        )
-        collector_thread.start()
-
-    def _collect_remaining_results(self):
-        for result in self.scheduler.get_results():
-            with self._result_lock:
-                if result is not None:
-                    self.results.append(result)
-                else:
-                    self.errors.append(Exception("task returned None"))
-
+    def _collect(self, result: Any) -> None:
+        if result is not None:
+            self.results.append(result)
+        else:
+            self.errors.append(Exception("task returned None"))
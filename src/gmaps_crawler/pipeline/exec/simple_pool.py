@@ -2,7 +2,8 @@
 
 import threading
 import queue
-from typing import List, Dict, Optional, Tuple
+import time
+from typing import Callable, List, Dict, Optional, Tuple
 
 from logger import crawler_thread_logger as logger
 from DrissionPage import Chromium
@@ -16,7 +17,13 @@ from gmaps_crawler.pipeline.tasks.payloads import (
     build_success_payload,
     build_failure_payload,
 )
+from gmaps_crawler.browser.blocking import apply_blocking
+from gmaps_crawler.config import settings
+from gmaps_crawler.storage.contact_cache import ContactCache
 from gmaps_crawler.storage.db import DB
+from gmaps_crawler.storage.snapshots import PLACE, SnapshotStore
+from gmaps_crawler.utils.metrics import inc, metric_labels, observe, stage
+from gmaps_crawler.pipeline.exec.aimd import CONSENT, AIMDController, classify_error
 from gmaps_crawler.pipeline.exec.stop import STOP_EVENT
 
 
@@ -31,6 +38,9 @@ class TabWorker(threading.Thread):
         db_path,
         query: str,
         wait_title_seconds: int = 8,
+        db: Optional[DB] = None,
+        on_result: Optional[Callable[[Dict, bool], None]] = None,
+        controller: Optional[AIMDController] = None,
     ) -> None:
         super().__init__(daemon=True)
         self.browser = browser
@@ -42,18 +52,42 @@ class TabWorker(threading.Thread):
         self._inserted = 0
         self._failed = 0
         self.db_path = db_path
+        self.db = db
+        # called with (task, ok) after each task; used by the pipelined engine
+        self.on_result = on_result
+        # adaptive concurrency gate shared by the fleet (None = every tab works)
+        self.controller = controller
+        self.busy_s = 0.0
+        html_root = getattr(run_ctx, "html_root", None)
+        self.snapshots = SnapshotStore(html_root) if (settings.SNAPSHOT_HTML and html_root) else None
+        self.contact_cache = ContactCache.shared(db_path) if (settings.CONTACT_CACHE_ENABLED and db_path) else None
+
+    def _snapshot(self, tab: ChromiumTab, pid: str, href: str) -> None:
+        # keep the rendered detail page so fields can be re-extracted offline;
+        # compression and disk I/O happen on the snapshot writer thread
+        if self.snapshots is None or not pid:
+            return
+        try:
+            self.snapshots.put_async(PLACE, pid, tab.html, url=href)
+        except Exception as e:
+            logger.debug("snapshot failed for %s: %s", pid, e)
 
     def stats(self) -> Tuple[int, int]:
         return self._inserted, self._failed
 
     def run(self) -> None:
-        db = DB(self.db_path)
+        # Shared batched DB (group commit) when provided by the pool
+        db = self.db or DB(self.db_path)
 
         tab: ChromiumTab = self.browser.new_tab(background=True)
+        # photos/fonts/trackers are never read by the extractors
+        blocker = apply_blocking(tab)
         try:
             while not STOP_EVENT.is_set():
                 try:
                     item = self.task_queue.get(timeout=0.2)
+                except queue.Empty:
+                    continue
                 except Exception as e:
                     logger.exception("Failed to get task from queue: %s", str(e))
                     continue
@@ -61,58 +95,92 @@ class TabWorker(threading.Thread):
                     self.task_queue.task_done()
                     break
                 info: Dict = item
-                try:
-                    name = (info.get("name") or "").strip()
-                    href = (info.get("href") or "").strip()
-                    pid = str(info.get("_pid") or "")
-                    if not href:
-                        base = build_base_payload(run_ctx=self.run_ctx, tile_ctx=self.tile_ctx, query=self.query, name=name, href=href, pid=pid, lat=0.0, lng=0.0)
-                        payload = build_failure_payload(base, run_ctx=self.run_ctx, last_error="empty href")
-                        db.upsert_place_failure(**payload)
-                        self._failed += 1
-                        continue
-                    _dismiss_consent(tab)
-                    tab.get(href)
-                    data = extract_pipeline(tab, self.browser, city_name=self.run_ctx.city, place_id=pid or info.get("_pid"))
+                if self.controller is not None and not self.controller.acquire():
+                    self.task_queue.task_done()
+                    break
+                # tasks from the pipelined engine carry their own tile; batch reruns also their own run
+                tile_ctx = info.get("_tile_ctx") or self.tile_ctx
+                run_ctx = info.get("_run_ctx") or self.run_ctx
+                query = run_ctx.query if info.get("_run_ctx") is not None else self.query
+                with metric_labels(tile=getattr(tile_ctx, "index", None), worker=self.name):
+                    t0 = time.monotonic()
+                    ok = False
+                    signal = None
+                    try:
+                        name = (info.get("name") or "").strip()
+                        href = (info.get("href") or "").strip()
+                        pid = str(info.get("_pid") or "")
+                        if not href:
+                            base = build_base_payload(run_ctx=run_ctx, tile_ctx=tile_ctx, query=query, name=name, href=href, pid=pid, lat=0.0, lng=0.0)
+                            payload = build_failure_payload(base, run_ctx=run_ctx, last_error="empty href")
+                            db.upsert_place_failure(**payload)
+                            self._failed += 1
+                            continue
+                        if not _dismiss_consent(tab):
+                            signal = CONSENT
+                        with stage("detail_get"):
+                            tab.get(href)
+                        try:
+                            data = extract_pipeline(tab, self.browser, city_name=run_ctx.city, place_id=pid or info.get("_pid"), contact_cache=self.contact_cache)
+                        finally:
+                            self._snapshot(tab, pid, href)
                     
-                    address = (data.get("address") or "").strip()
+                        address = (data.get("address") or "").strip()
 
-                    # ensure lat/lng/pid
-                    lat = float(info.get("_lat")) if info.get("_lat") is not None else None
-                    lng = float(info.get("_lng")) if info.get("_lng") is not None else None
+                        # ensure lat/lng/pid
+                        lat = float(info.get("_lat")) if info.get("_lat") is not None else None
+                        lng = float(info.get("_lng")) if info.get("_lng") is not None else None
                     
-                    if lat is None or lng is None:
-                        lat, lng = parse_lat_lng_from_href(href)
+                        if lat is None or lng is None:
+                            lat, lng = parse_lat_lng_from_href(href)
                     
-                    if not lat or not lng:
-                        raise ValueError("missing lat/lng")
+                        if not lat or not lng:
+                            raise ValueError("missing lat/lng")
                         
-                    pid_final = pid or (make_place_id_from_latlng(lat, lng) if (lat and lng) else "")
-                    if not pid_final:
-                        raise ValueError("missing pid_final")
+                        pid_final = pid or (make_place_id_from_latlng(lat, lng) if (lat and lng) else "")
+                        if not pid_final:
+                            raise ValueError("missing pid_final")
                     
-                    base = build_base_payload(run_ctx=self.run_ctx, tile_ctx=self.tile_ctx, query=self.query, name=name, href=href, pid=pid_final, lat=lat or 0.0, lng=lng or 0.0)
-                    if not address:
-                        raise ValueError("missing address")
-                    else:
-                        payload = build_success_payload({**base}, data)
-                        db.upsert_place_struct(**payload, extracted_at=None, run_id=self.run_ctx.run_id)
-                        # logger.info("Successfully processed place: %s", pid)
-                        self._inserted += 1
+                        base = build_base_payload(run_ctx=run_ctx, tile_ctx=tile_ctx, query=query, name=name, href=href, pid=pid_final, lat=lat or 0.0, lng=lng or 0.0)
+                        if not address:
+                            raise ValueError("missing address")
+                        else:
+                            payload = build_success_payload({**base}, data)
+                            db.upsert_place_struct(**payload, extracted_at=None, run_id=run_ctx.run_id)
+                            # logger.info("Successfully processed place: %s", pid)
+                            self._inserted += 1
+                            ok = True
                         
-                except Exception as e:
-                    nm = (info.get("name") or "").strip()
-                    href = (info.get("href") or "").strip()
-                    pid = str(info.get("_pid") or "")
-                    base = build_base_payload(run_ctx=self.run_ctx, tile_ctx=self.tile_ctx, query=self.query, name=nm, href=href, pid=pid, lat=0.0, lng=0.0)
-                    payload = build_failure_payload(base, run_ctx=self.run_ctx, last_error=getattr(e, "__class__", type(e)).__name__, warnings_json="[]")
-                    db.upsert_place_failure(**payload)
-                    logger.exception("Failed to process place: %s", pid)
-                    self._failed += 1
-                finally:
-                    # logger.info("Successfully processed place: %s %s %s", self._inserted, self._failed, pid)
-                    self.task_queue.task_done()
+                    except Exception as e:
+                        signal = signal or classify_error(e.__class__.__name__)
+                        nm = (info.get("name") or "").strip()
+                        href = (info.get("href") or "").strip()
+                        pid = str(info.get("_pid") or "")
+                        # keep what the task already knows (rerun rows carry their stored coordinates/warnings)
+                        base = build_base_payload(run_ctx=run_ctx, tile_ctx=tile_ctx, query=query, name=nm, href=href, pid=pid,
+                                                  lat=float(info.get("_lat") or 0.0), lng=float(info.get("_lng") or 0.0))
+                        payload = build_failure_payload(base, run_ctx=run_ctx, last_error=getattr(e, "__class__", type(e)).__name__, warnings_json=info.get("_warnings") or "[]")
+                        db.upsert_place_failure(**payload)
+                        logger.exception("Failed to process place: %s", pid)
+                        self._failed += 1
+                    finally:
+                        elapsed = time.monotonic() - t0
+                        logger.info("[task][done] ok=%s inserted=%d failed=%d pid=%s %.0fms", ok, self._inserted, self._failed, pid, elapsed * 1000,
+                                    extra={"sampled": True, "place_id": pid or None, "stage": "place_total", "status": "success" if ok else "failed", "elapsed_ms": round(elapsed * 1000, 1)})
+                        self.busy_s += elapsed
+                        observe("stage_seconds", time.monotonic() - t0, stage="place_total")
+                        inc("places_total", result="ok" if ok else "failed")
+                        if self.controller is not None:
+                            self.controller.release(time.monotonic() - t0, ok=ok, signal=signal)
+                        if self.on_result is not None:
+                            try:
+                                self.on_result(info, ok)
+                            except Exception:
+                                logger.exception("on_result callback failed")
+                        self.task_queue.task_done()
         finally:
+            if blocker is not None:
+                logger.debug("[block] %s %s", blocker.profile.name, blocker.stats())
             tab.close()
 
 
@@ -122,14 +190,19 @@ class TabWorkerPool:
                  run_ctx, 
                  tile_ctx, 
                  db_path, 
-                 workers: int = 2):
+                 workers: int = 2,
+                 controller: Optional[AIMDController] = None):
         self.browser = browser
         self.run_ctx = run_ctx
         self.tile_ctx = tile_ctx
         self.db_path = db_path
         self.workers = max(1, int(workers))
+        # one tab per worker is opened; the controller decides how many work at once
+        self.controller = controller
         self._queue: "queue.Queue[Optional[Dict]]" = queue.Queue()
         self._threads: List[TabWorker] = []
+        # One group-commit writer for the whole fleet instead of one connection per tab
+        self._db: Optional[DB] = None
 
     def submit_tasks(self, tasks: List[Dict]) -> None:
         for info in tasks:
@@ -140,19 +213,28 @@ class TabWorkerPool:
     def start(self) -> None:
         if self._threads:
             return
-        for _ in range(self.workers):
+        known = getattr(getattr(self.run_ctx, "db", None), "known_places", None)
+        self._db = DB(self.db_path, batched=True, known_places=known)
+        for i in range(self.workers):
             t = TabWorker(browser=self.browser, 
                           task_queue=self._queue, 
                           run_ctx=self.run_ctx, 
                           tile_ctx=self.tile_ctx, 
                           db_path=self.db_path, 
-                          query=self.run_ctx.query if hasattr(self.run_ctx, 'query') else "")
+                          query=self.run_ctx.query if hasattr(self.run_ctx, 'query') else "",
+                          db=self._db,
+                          controller=self.controller)
+            t.name = f"tab-{i}"
             t.start()
             self._threads.append(t)
 
     def join(self) -> None:
         for t in self._threads:
             t.join()
+        if self._db is not None:
+            # flush pending rows before the tile is marked completed
+            self._db.close()
+            self._db = None
 
     def stats(self) -> Tuple[int, int]:
         inserted = 0
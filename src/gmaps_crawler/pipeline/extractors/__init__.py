@@ -4,20 +4,23 @@ from DrissionPage import Chromium
 from DrissionPage._pages.chromium_tab import ChromiumTab
 from DrissionPage.errors import ElementNotFoundError
 
+from gmaps_crawler.config import settings
 from gmaps_crawler.pipeline.extractors.page_extractors.address import extract_address
+from gmaps_crawler.pipeline.extractors.page_extractors.batch_js import extract_fields_js
 from gmaps_crawler.pipeline.extractors.page_extractors.open_time import extract_open_time
 from gmaps_crawler.pipeline.extractors.page_extractors.phone import extract_phone
 from gmaps_crawler.pipeline.extractors.page_extractors.plus_code import extract_plus_code
 from gmaps_crawler.pipeline.extractors.page_extractors.social_media_url import extract_social_media_urls
 from gmaps_crawler.pipeline.extractors.page_extractors.website import extract_website
 from gmaps_crawler.pipeline.extractors.web_extractors.email_phone_social import extract_emails_phones_socials
+from gmaps_crawler.utils.metrics import stage
 import logging
 from typing import Any, Callable, Dict, Optional
 
 # NOTE: online geocoding removed; location uses provided city_name text
 
 
-def extract_pipeline(page: ChromiumTab, browser: Chromium, city_name: str, *, place_id: Optional[str] = None) -> dict:
+def extract_pipeline(page: ChromiumTab, browser: Chromium, city_name: str, *, place_id: Optional[str] = None, use_js: Optional[bool] = None, contact_cache=None) -> dict:
     """
     Extracts structured information (address, contact, socials, etc.) from a page.
 
@@ -25,6 +28,9 @@ def extract_pipeline(page: ChromiumTab, browser: Chromium, city_name: str, *, pl
         page (ChromiumTab): The browser tab to extract data from.
         browser (Chromium): Browser instance for additional requests.
         city_name (str): Name of the city for location details.
+        use_js (bool): Read the DOM fields with one run_js call (default: settings.EXTRACT_USE_JS);
+            the per-field extractors remain the fallback.
+        contact_cache (ContactCache): Per-site contact results; cached websites are not fetched again.
 
     Returns:
         dict: A dictionary containing extracted business data.
@@ -37,7 +43,8 @@ def extract_pipeline(page: ChromiumTab, browser: Chromium, city_name: str, *, pl
         No warning logs are emitted for extractor fields per requirement.
         """
         try:
-            return extractor(*args)
+            with stage(extractor.__name__):
+                return extractor(*args)
         except Exception as e:
             # Abbreviate ElementNotFoundError -> ENFE; otherwise use class name
             err_code = "ENFE" if isinstance(e, ElementNotFoundError) else e.__class__.__name__
@@ -45,21 +52,54 @@ def extract_pipeline(page: ChromiumTab, browser: Chromium, city_name: str, *, pl
             warnings_list.append({"field": field_name, "error": err_code})
             return default
 
-    data: Dict[str, Any] = {
-        "address": extract_address(page),  # required field, should raise if missing
-        "location": city_name or "",
-        "phone": safe_extract(extract_phone, page, default="", field_name="phone"),
-        "plus_code": safe_extract(extract_plus_code, page, default="", field_name="plus code"),
-        "website": safe_extract(extract_website, page, default="", field_name="website"),
-        "social_media_urls": safe_extract(extract_social_media_urls, page, default=[], field_name="social media urls"),
-        "open_time": safe_extract(extract_open_time, page, default="", field_name="open time"),
-    }
+    fields: Optional[Dict[str, Optional[str]]] = None
+    if settings.EXTRACT_USE_JS if use_js is None else use_js:
+        try:
+            with stage("extract_fields_js"):
+                fields = extract_fields_js(page)
+        except Exception as e:
+            logging.getLogger(__name__).debug("js field extraction failed, falling back: %s", e)
+            fields = None
+        # panel not rendered yet: the per-field path waits for the address anchor
+        if fields is not None and not fields.get("address"):
+            fields = None
+
+    if fields is not None:
+        def js_field(name: str, field_name: str) -> str:
+            value = fields.get(name)
+            if value is None:
+                warnings_list.append({"field": field_name, "error": "ENFE"})
+                return ""
+            return value
+
+        data: Dict[str, Any] = {
+            "address": fields["address"],
+            "location": city_name or "",
+            "phone": js_field("phone", "phone"),
+            "plus_code": js_field("plus_code", "plus code"),
+            "website": js_field("website", "website"),
+            "social_media_urls": safe_extract(extract_social_media_urls, page, default=[], field_name="social media urls"),
+            # hours table is only in the DOM once expanded; otherwise click through as before
+            "open_time": fields.get("open_time") or safe_extract(extract_open_time, page, default="", field_name="open time"),
+        }
+    else:
+        with stage("extract_address"):
+            address = extract_address(page)  # required field, should raise if missing
+        data = {
+            "address": address,
+            "location": city_name or "",
+            "phone": safe_extract(extract_phone, page, default="", field_name="phone"),
+            "plus_code": safe_extract(extract_plus_code, page, default="", field_name="plus code"),
+            "website": safe_extract(extract_website, page, default="", field_name="website"),
+            "social_media_urls": safe_extract(extract_social_media_urls, page, default=[], field_name="social media urls"),
+            "open_time": safe_extract(extract_open_time, page, default="", field_name="open time"),
+        }
 
     # Dependent extraction (needs website + socials)
     all_urls = [data.get("website", "")] + data.get("social_media_urls", [])
     all_urls = [u for u in all_urls if u]
     data["emails_phones_socials"] = safe_extract(
-        extract_emails_phones_socials, browser, all_urls, default={}, field_name="emails/phones/socials"
+        extract_emails_phones_socials, browser, all_urls, contact_cache, default={}, field_name="emails/phones/socials"
     )
 
     # attach warnings list for per-place persistence
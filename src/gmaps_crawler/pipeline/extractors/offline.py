@@ -0,0 +1,146 @@
+"""
+Browserless re-extraction over stored HTML snapshots.
+
+Mirrors the DOM anchors of the live extractors (aria-label + parent(4)) with
+lxml, so a fixed extractor can be re-applied to every stored place page in a
+process pool and written back through ``DB`` without opening Chromium.
+"""
+
+from __future__ import annotations
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from lxml import html as lxml_html
+
+from gmaps_crawler.pipeline.extractors.utils import clean_strange_chars
+from gmaps_crawler.storage.db import DB
+from gmaps_crawler.storage.snapshots import PLACE, SnapshotStore
+
+FIELD_LABELS = {
+    "address": "Copy address",
+    "phone": "Call phone number",
+    "plus_code": "Learn more about plus codes",
+    "website": "Copy website",
+}
+
+
+def _text(el) -> str:
+    return "\n".join(t.strip() for t in el.itertext() if t and t.strip())
+
+
+def _up(el, n: int):
+    for _ in range(n):
+        if el is None:
+            return None
+        el = el.getparent()
+    return el
+
+
+def extract_fields_html(page_html: str) -> Dict[str, Optional[str]]:
+    """Same fields/shape as ``extract_fields_js``, parsed from saved HTML."""
+    out: Dict[str, Optional[str]] = {}
+    if not page_html or not page_html.strip():
+        return {k: None for k in (*FIELD_LABELS, "open_time")}
+    root = lxml_html.fromstring(page_html)
+    for field, label in FIELD_LABELS.items():
+        hits = root.xpath("//*[@aria-label=$label]", label=label)
+        parent = _up(hits[0], 4) if hits else None
+        out[field] = clean_strange_chars(_text(parent)) if parent is not None else None
+    out["open_time"] = None
+    tbody = root.find(".//tbody")
+    if tbody is not None:
+        rows = [c for c in tbody if isinstance(c.tag, str)]
+        if len(rows) == 7:
+            out["open_time"] = "\n".join(clean_strange_chars(_text(r).replace(" ", "")) for r in rows)
+    return out
+
+
+def _extract_one(args: Tuple[str, str, str, str]) -> Tuple[str, Optional[Dict[str, Optional[str]]], str]:
+    """Process-pool task: (root, place_id, sha, codec) -> (place_id, fields, error)."""
+    root, place_id, sha, codec = args
+    try:
+        page_html = SnapshotStore(Path(root)).read_object(sha, codec)
+        return place_id, extract_fields_html(page_html), ""
+    except Exception as e:
+        return place_id, None, e.__class__.__name__
+
+
+def _iter_jobs(store: SnapshotStore, place_ids: Optional[Iterable[str]]) -> Iterator[Tuple[str, str, str, str]]:
+    root = str(store.root)
+    if place_ids is None:
+        for key, ref in store.iter_refs(PLACE):
+            yield root, key, ref["sha256"], ref.get("codec") or "gzip"
+        return
+    for pid in place_ids:
+        ref = store.ref(PLACE, pid)
+        if ref is not None:
+            yield root, pid, ref["sha256"], ref.get("codec") or "gzip"
+
+
+def reextract_snapshots(
+    *,
+    db_path: Path,
+    html_root: Path,
+    place_ids: Optional[Iterable[str]] = None,
+    workers: Optional[int] = None,
+    chunksize: int = 64,
+    dry_run: bool = False,
+) -> Dict[str, int]:
+    """Re-run DOM field extraction over stored place snapshots and update ``places``.
+
+    Only rows that already exist are updated; a snapshot without an address
+    leaves its row untouched. Returns counters.
+    """
+    store = SnapshotStore(html_root)
+    summary = {"selected": 0, "updated": 0, "missing_address": 0, "errors": 0}
+    db = None if dry_run else DB(db_path, batched=True)
+    workers = max(1, int(workers or os.cpu_count() or 1))
+    try:
+        jobs = _iter_jobs(store, place_ids)
+        if workers == 1:
+            results = map(_extract_one, jobs)
+            executor = None
+        else:
+            executor = ProcessPoolExecutor(max_workers=workers)
+            results = executor.map(_extract_one, jobs, chunksize=max(1, chunksize))
+        try:
+            for place_id, fields, err in results:
+                summary["selected"] += 1
+                if fields is None:
+                    summary["errors"] += 1
+                    continue
+                if not fields.get("address"):
+                    summary["missing_address"] += 1
+                    continue
+                if db is not None:
+                    db.update_place_fields(place_id, **fields)
+                summary["updated"] += 1
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=True, cancel_futures=True)
+    finally:
+        if db is not None:
+            db.close()
+    return summary
+
+
+if __name__ == "__main__":  # smoke test on the bundled fixture (not a place page: no fields expected)
+    import tempfile
+    import time
+
+    fixture = Path(__file__).resolve().parents[4] / "data" / "example.html"
+    page = fixture.read_text(encoding="utf-8", errors="replace")
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SnapshotStore(Path(tmp))
+        sha = store.put(PLACE, "00000000-0000-0000-0000-000000000000", page, url=fixture.as_uri())
+        assert store.get(PLACE, "00000000-0000-0000-0000-000000000000") == page
+        size = sum(p.stat().st_size for p in Path(tmp).rglob("*") if p.is_file())
+        print(f"stored sha={sha[:12]} codec={store.codec} raw={len(page.encode())}B on_disk={size}B")
+    t0 = time.perf_counter()
+    n = 20
+    for _ in range(n):
+        fields = extract_fields_html(page)
+    print(f"fields={fields} parse={(time.perf_counter() - t0) * 1000.0 / n:.1f}ms/page")
@@ -0,0 +1,72 @@
+import json
+from typing import Any, Dict, Optional
+
+from DrissionPage._pages.chromium_tab import ChromiumTab
+
+from gmaps_crawler.pipeline.extractors.utils import clean_strange_chars
+
+# Same anchors as the per-field extractors (aria-label + parent(4)), evaluated
+# in one run_js call. A field is null when its anchor is not on the page.
+EXTRACT_FIELDS_JS = r"""
+function () {
+    const up = (el, n) => { for (let i = 0; i < n && el; i++) { el = el.parentElement; } return el; };
+    const textAt = (label, n) => {
+        const el = document.querySelector('[aria-label="' + label + '"]');
+        if (!el) { return null; }
+        const p = up(el, n);
+        return p ? p.innerText : null;
+    };
+    let openTime = null;
+    const tbody = document.querySelector('tbody');
+    if (tbody && tbody.children.length === 7) {
+        openTime = Array.from(tbody.children).map((tr) => tr.innerText);
+    }
+    return JSON.stringify({
+        address: textAt('Copy address', 4),
+        phone: textAt('Call phone number', 4),
+        plus_code: textAt('Learn more about plus codes', 4),
+        website: textAt('Copy website', 4),
+        open_time: openTime,
+    });
+}
+"""
+
+
+def _clean(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    return clean_strange_chars(str(value))
+
+
+def extract_fields_js(page: ChromiumTab) -> Dict[str, Optional[str]]:
+    """单次 run_js 提取详情页字段（address/phone/plus_code/website/open_time）。
+
+    Args:
+        page (ChromiumTab): 已打开地点详情页的标签页。
+
+    Returns:
+        dict: 字段 -> 字符串；页面上不存在的字段为 None。
+    """
+    raw = page.run_js(EXTRACT_FIELDS_JS)
+    data = json.loads(raw) if isinstance(raw, str) else dict(raw or {})
+    rows = data.get("open_time")
+    open_time = None
+    if isinstance(rows, list) and len(rows) == 7:
+        # match extract_open_time: one line per day, spaces removed
+        open_time = "\n".join(clean_strange_chars(str(r).replace("\t", "").replace(" ", "")) for r in rows)
+    return {
+        "address": _clean(data.get("address")),
+        "phone": _clean(data.get("phone")),
+        "plus_code": _clean(data.get("plus_code")),
+        "website": _clean(data.get("website")),
+        "open_time": open_time,
+    }
+
+
+if __name__ == "__main__":
+    from DrissionPage import ChromiumPage
+
+    cp = ChromiumPage()
+    cp.get("https://www.google.com/maps/place/Emilie+and+the+Cool+Kids/data=!4m7!3m6!1s0x47e67badd056802d:0x6541e257467da4ab!8m2!3d48.8300641!4d2.2453215!16s%2Fg%2F11td9h96mk!19sChIJLYBW0K175kcRq6R9RlfiQWU?authuser=0&hl=en&rclk=1")
+
+    print("Extracted fields:", extract_fields_js(cp))
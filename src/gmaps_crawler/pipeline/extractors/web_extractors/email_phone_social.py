@@ -1,14 +1,18 @@
-import re
-import base64
-from pathlib import Path
 from DrissionPage import Chromium
-from gmaps_crawler.pipeline.extractors.web_extractors.utils import extract_base64_links
+from gmaps_crawler.browser.blocking import PROFILES, apply_blocking
+from gmaps_crawler.config import settings
+from gmaps_crawler.pipeline.extractors.web_extractors.http_fetch import fetch_pages, http_available, needs_browser
+from gmaps_crawler.pipeline.extractors.web_extractors.scanner import EMAIL_RE, SOCIAL_DOMAINS, scan_html
+from gmaps_crawler.utils.metrics import inc, stage
+from logger import crawler_thread_logger as logger
 
 
-def extract_emails_phones_socials(page: Chromium, websites: list) -> dict:
+def extract_emails_phones_socials(page: Chromium, websites: list, cache=None) -> dict:
     """
     从多个网站提取邮箱、电话、社交媒体链接（含Base64解析）。
     自动过滤 URL 中的 '@'（如 Sentry DSN），避免误识别。
+    网页优先用 HTTP 并发直连获取（http_fetch），只有 JS 渲染/被拦截的站点才用浏览器标签页打开。
+    传入 cache（storage.contact_cache.ContactCache）时，已缓存的网站直接复用结果，不再抓取。
     返回:
     {
         "emails": [ {"email": str, "source_url": str}, ... ],
@@ -32,25 +36,32 @@ def extract_emails_phones_socials(page: Chromium, websites: list) -> dict:
         for url in websites
     ]
 
-    tab = page.new_tab()
-
-    # 改进版正则（排除URL中的@）
-    email_pattern = r'(?<![\/:@])\b[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}\b(?![\/:])'
-    phone_pattern = r'\+\d[\d\s\-]{6,15}\d'
-    url_pattern = r'https?://[^\s"\'<>]+'
-
-    # 常见社交平台域名
-    social_domains = {
-        "facebook": ["facebook.com"],
-        "instagram": ["instagram.com"],
-        "twitter": ["twitter.com", "x.com"],
-        "linkedin": ["linkedin.com"],
-        "youtube": ["youtube.com", "youtu.be"],
-        "tiktok": ["tiktok.com"],
-        "whatsapp": ["whatsapp.com"],
-        "telegram": ["t.me", "telegram.me"],
-        "yelp": ["yelp.com", "yelp.fr", "yelp.ie", "yelp.co.uk"],
-    }
+    # 正则与社交域名表预编译在 scanner 模块中
+    social_domains = SOCIAL_DOMAINS
+
+    # 缓存命中的网站直接复用扫描结果
+    cached = {}
+    if cache is not None:
+        for u in websites:
+            hit = cache.get(u)
+            if hit is not None:
+                cached[u] = hit
+    to_fetch = [u for u in websites if u not in cached]
+    inc("contact_sites_total", len(cached), source="cache")
+
+    # HTTP 直连获取；JS 渲染/被拦截（且源码里没有邮箱）的 URL 留给浏览器
+    html_by_url = {}
+    if to_fetch and settings.CONTACT_HTTP_ENABLED and http_available():
+        try:
+            with stage("contact_http_fetch"):
+                pages = fetch_pages(to_fetch)
+            for u, r in pages.items():
+                if not needs_browser(r) or (r.ok and EMAIL_RE.search(r.html)):
+                    html_by_url[u] = r.html
+            inc("contact_sites_total", len(html_by_url), source="http")
+        except Exception as e:
+            logger.warning("⚠️ HTTP 抓取失败，回退浏览器: %s", e)
+    tab = None
 
     # 全局存储
     emails_with_source = {}
@@ -58,55 +69,57 @@ def extract_emails_phones_socials(page: Chromium, websites: list) -> dict:
     found_socials = {k: set() for k in social_domains}
     results_per_site = {}
 
+    def merge_cached(url: str, hit: dict) -> None:
+        for e in hit.get("emails") or []:
+            emails_with_source.setdefault(e, url)
+        all_phones.update(hit.get("phones") or [])
+        for platform, link in (hit.get("socials") or {}).items():
+            if link and platform in found_socials:
+                found_socials[platform].add(link)
+        results_per_site[url] = hit
+
     for url in websites:
+        hit = cached.get(url)
+        if hit is not None:
+            merge_cached(url, hit)
+            continue
+
         site_emails = set()
         site_phones = set()
         site_socials = {k: set() for k in social_domains}
+        html_content = None
 
         try:
-            tab.get(url, timeout=15)
-            html_content = tab.html
-
-            # === 邮箱 ===
-            for e in re.findall(email_pattern, html_content):
-                e = e.lower()
-                # 排除常见非邮箱用途的域（Sentry、AWS、Cloudflare等）
-                if any(x in e for x in ['sentry.io', 'amazonaws.com', 'cloudflare.com']):
-                    continue
-                # 邮箱不应出现在URL内部
-                if re.search(r'https?://[^"\'\s]*' + re.escape(e), html_content):
-                    continue
-                # 排除图片文件伪装的邮箱名
-                if re.search(r'\.(jpg|jpeg|png|gif|svg|webp)$', e, re.IGNORECASE):
-                    continue
-
+            html_content = html_by_url.get(url)
+            if html_content is None:
+                if tab is None:
+                    tab = page.new_tab()
+                    # 只需要 HTML：开启拦截时网站标签页用 strict 配置（连样式表也不加载）
+                    if settings.BLOCK_PROFILE != "off":
+                        apply_blocking(tab, PROFILES["strict"])
+                with stage("contact_browser_get"):
+                    tab.get(url, timeout=15)
+                    html_content = tab.html
+                inc("contact_sites_total", source="browser")
+
+            # 过期条目：页面内容哈希未变则沿用旧结果，跳过重新扫描
+            stale = cache.stale_result(url, html_content) if cache is not None else None
+            if stale is not None:
+                merge_cached(url, stale)
+                continue
+
+            # === 单次扫描：邮箱 / 电话 / 社交链接（含Base64隐藏链接） ===
+            # 邮箱已过滤 Sentry/AWS/Cloudflare、URL 内部出现的和图片文件名
+            site_email_list, site_phones, site_socials = scan_html(html_content)
+            for e in site_email_list:
                 emails_with_source.setdefault(e, url)
-                site_emails.add(e)
-
-            # === 电话 ===
-            for p in re.findall(phone_pattern, html_content):
-                clean_p = re.sub(r'\s+', '', p)
-                all_phones.add(clean_p)
-                site_phones.add(clean_p)
-
-            # === 普通社交链接 ===
-            for link in re.findall(url_pattern, html_content):
-                link_lower = link.lower()
-                for platform, domains in social_domains.items():
-                    if any(d in link_lower for d in domains):
-                        found_socials[platform].add(link)
-                        site_socials[platform].add(link)
-
-            # === Base64隐藏链接 ===
-            decoded_links = extract_base64_links(html_content)
-            for d_link in decoded_links:
-                for platform, domains in social_domains.items():
-                    if any(d in d_link.lower() for d in domains):
-                        found_socials[platform].add(d_link)
-                        site_socials[platform].add(d_link)
+            site_emails.update(site_email_list)
+            all_phones.update(site_phones)
+            for platform, links in site_socials.items():
+                found_socials[platform].update(links)
 
         except Exception as e:
-            print(f"⚠️ 访问 {url} 时出错: {e}")
+            logger.warning("⚠️ 访问 %s 时出错: %s", url, e)
 
         # 每个网站单独保存
         results_per_site[url] = {
@@ -114,8 +127,12 @@ def extract_emails_phones_socials(page: Chromium, websites: list) -> dict:
             "phones": sorted(site_phones),
             "socials": {p: (min(v, key=len) if v else "") for p, v in site_socials.items()},
         }
+        # 只缓存成功获取到页面的网站
+        if cache is not None and html_content:
+            cache.put(url, results_per_site[url], html_content)
 
-    tab.close()
+    if tab is not None:
+        tab.close()
 
     # 汇总结果
     socials_summary = {p: (min(v, key=len) if v else "") for p, v in found_socials.items()}
@@ -0,0 +1,237 @@
+"""
+Async HTTP fetcher for business websites / social pages.
+
+One event loop on a background thread owns a single process-wide aiohttp
+session, so connections (and DNS/TLS) are reused across places and worker
+threads. Every URL of a place is fetched concurrently with a global and a
+per-host limit, a total timeout per request and a body size cap. Pages that
+look JavaScript-rendered are flagged so the caller can fall back to the
+browser for just those URLs.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import atexit
+import re
+import threading
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from gmaps_crawler.config import settings
+
+try:  # the browser path keeps working without aiohttp
+    import aiohttp  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    aiohttp = None  # type: ignore
+
+DEFAULT_USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+)
+
+_SCRIPT_STYLE = re.compile(r"<(script|style|noscript|template)\b.*?</\1\s*>", re.I | re.S)
+_TAGS = re.compile(r"<[^>]+>")
+_JS_HINTS = re.compile(
+    r"enable javascript|javascript is (?:disabled|required)|you need to enable javascript"
+    r'|<div[^>]+id=["\'](?:root|app|__next|__nuxt)["\'][^>]*>\s*</div>',
+    re.I,
+)
+
+
+@dataclass
+class FetchResult:
+    url: str
+    final_url: str = ""
+    status: int = 0
+    html: str = ""
+    content_type: str = ""
+    truncated: bool = False
+    error: str = ""
+
+    @property
+    def ok(self) -> bool:
+        return not self.error and 200 <= self.status < 400
+
+
+def http_available() -> bool:
+    return aiohttp is not None
+
+
+def visible_text_len(html: str) -> int:
+    return len(" ".join(_TAGS.sub(" ", _SCRIPT_STYLE.sub(" ", html)).split()))
+
+
+def needs_browser(result: FetchResult, *, min_text: int = 200) -> bool:
+    """True when the HTTP result is unusable and a real browser should render the page.
+
+    Network errors, 4xx/5xx (bot walls), non-HTML bodies and pages with almost
+    no server-rendered text but an SPA root / "enable JavaScript" notice.
+    """
+    if not result.ok:
+        return True
+    if result.content_type and "html" not in result.content_type:
+        return True
+    if visible_text_len(result.html) >= min_text:
+        return False
+    return bool(_JS_HINTS.search(result.html)) or "<script" in result.html.lower()
+
+
+class _HostSlot:
+    __slots__ = ("sem", "users")
+
+    def __init__(self, per_host: int) -> None:
+        self.sem = asyncio.Semaphore(per_host)
+        self.users = 0
+
+
+class _HttpClient:
+    """Background event loop + shared session; worker threads submit coroutines to it."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._session = None
+        # only hosts with a request running or waiting; touched on the client loop only
+        self._host_slots: Dict[Tuple[str, int], _HostSlot] = {}
+
+    def loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, name="HttpFetchLoop", daemon=True)
+                self._thread.start()
+            return self._loop
+
+    def session(self):
+        # only called on the client loop
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=max(1, int(settings.CONTACT_HTTP_CONCURRENCY)),
+                limit_per_host=0,  # per-host limit is the semaphore in host_slot
+                ttl_dns_cache=300,
+            )
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    @asynccontextmanager
+    async def host_slot(self, url: str, per_host: int) -> AsyncIterator[None]:
+        """Per-host limit; a host's semaphore is dropped once its last request leaves."""
+        key = ((urlsplit(url).hostname or "").lower(), per_host)
+        slot = self._host_slots.get(key)
+        if slot is None:
+            slot = self._host_slots[key] = _HostSlot(per_host)
+        slot.users += 1
+        try:
+            async with slot.sem:
+                yield
+        finally:
+            slot.users -= 1
+            if not slot.users and self._host_slots.get(key) is slot:
+                del self._host_slots[key]
+
+    def run(self, coro, timeout: Optional[float] = None):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop()).result(timeout=timeout)
+
+    def close(self) -> None:
+        with self._lock:
+            loop, thread, self._loop, self._thread = self._loop, self._thread, None, None
+        if loop is None:
+            return
+
+        async def _shutdown() -> None:
+            if self._session is not None:
+                await self._session.close()
+            self._session = None
+            self._host_slots.clear()
+
+        try:
+            asyncio.run_coroutine_threadsafe(_shutdown(), loop).result(timeout=5)
+        except Exception:
+            pass
+        loop.call_soon_threadsafe(loop.stop)
+        if thread is not None:
+            thread.join(timeout=5)
+        loop.close()
+
+
+_client = _HttpClient()
+atexit.register(_client.close)
+
+
+async def _fetch_one(session, url: str, *, max_bytes: int, per_host: int, timeout, headers: Dict[str, str]) -> FetchResult:
+    result = FetchResult(url=url)
+    try:
+        async with _client.host_slot(url, per_host), session.get(url, allow_redirects=True, timeout=timeout, headers=headers) as resp:
+            result.status = resp.status
+            result.final_url = str(resp.url)
+            result.content_type = (resp.headers.get("Content-Type") or "").lower()
+            chunks: List[bytes] = []
+            size = 0
+            async for chunk in resp.content.iter_chunked(64 * 1024):
+                chunks.append(chunk)
+                size += len(chunk)
+                if size >= max_bytes:
+                    result.truncated = True
+                    break
+            body = b"".join(chunks)[:max_bytes]
+            result.html = body.decode(resp.charset or "utf-8", errors="replace")
+    except asyncio.TimeoutError:
+        result.error = "timeout"
+    except Exception as e:
+        result.error = e.__class__.__name__
+    return result
+
+
+async def fetch_pages_async(
+    urls: Iterable[str],
+    *,
+    timeout: Optional[float] = None,
+    per_host: Optional[int] = None,
+    concurrency: Optional[int] = None,
+    max_bytes: Optional[int] = None,
+    user_agent: str = DEFAULT_USER_AGENT,
+) -> Dict[str, FetchResult]:
+    """Fetch ``urls`` concurrently; must run on the client loop (see ``fetch_pages``)."""
+    if aiohttp is None:
+        raise RuntimeError("aiohttp is not installed")
+    unique = list(dict.fromkeys(u for u in urls if u))
+    if not unique:
+        return {}
+    timeout_s = float(timeout if timeout is not None else settings.CONTACT_HTTP_TIMEOUT)
+    per_host_n = int(per_host if per_host is not None else settings.CONTACT_HTTP_PER_HOST)
+    limit = int(concurrency if concurrency is not None else settings.CONTACT_HTTP_CONCURRENCY)
+    cap = int(max_bytes if max_bytes is not None else settings.CONTACT_HTTP_MAX_BYTES)
+
+    headers = {"User-Agent": user_agent, "Accept": "text/html,application/xhtml+xml;q=0.9,*/*;q=0.5", "Accept-Language": "en"}
+    session = _client.session()
+    # the session's connector caps all places together; this call may use at most `limit` of it
+    gate = asyncio.Semaphore(max(1, limit))
+
+    async def one(u: str) -> FetchResult:
+        async with gate:
+            return await _fetch_one(
+                session,
+                u,
+                max_bytes=cap,
+                per_host=max(1, per_host_n),
+                timeout=aiohttp.ClientTimeout(total=timeout_s),
+                headers=headers,
+            )
+
+    results = await asyncio.gather(*(one(u) for u in unique))
+    return {r.url: r for r in results}
+
+
+def fetch_pages(urls: Iterable[str], **kwargs) -> Dict[str, FetchResult]:
+    """Blocking wrapper for worker threads: runs on the shared background loop and session."""
+    return _client.run(fetch_pages_async(urls, **kwargs))
+
+
+def close() -> None:
+    """Close the shared session and stop the loop (also runs at exit)."""
+    _client.close()
+
@@ -0,0 +1,190 @@
+"""
+Contact scanner for page HTML (emails, phones, social links).
+
+Produces exactly what the original per-email / per-domain loops in
+``email_phone_social`` produced, without their O(emails x html) cost. It is
+not a single pass: the page is still scanned once per kind of token, but each
+scan only does work where its token can be.
+
+- emails: ``EMAIL_RE`` is only run on the local/domain runs around each
+  ``@`` (``str.find``), instead of being tried at every offset of the page
+- "email inside a URL" is answered from the URL tails (``https?://`` up to
+  the next quote/whitespace) found from the scheme occurrences, instead of
+  one full-document regex search per candidate email
+- social platforms are matched with one precompiled alternation of all
+  domains (a miss - the common case - costs a single scan per link)
+- base64 blobs are decoded once; the URL regex only runs on decodings that
+  can contain ``http``
+"""
+
+from __future__ import annotations
+
+import base64
+import html as html_lib
+import re
+from typing import Dict, Iterable, List, Set, Tuple
+
+EMAIL_RE = re.compile(r'(?<![\/:@])\b[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}\b(?![\/:])')
+PHONE_RE = re.compile(r'\+\d[\d\s\-]{6,15}\d')
+URL_RE = re.compile(r'https?://[^\s"\'<>]+')
+_WS_RE = re.compile(r'\s+')
+_RUN_END_RE = re.compile(r'["\'\s]')
+_SCHEME_RE = re.compile(r'https?://')
+_IMAGE_RE = re.compile(r'\.(jpg|jpeg|png|gif|svg|webp)$', re.IGNORECASE)
+_B64_RE = re.compile(r'(?<![A-Za-z0-9+/=])([A-Za-z0-9+/]{%d,}={0,2})(?![A-Za-z0-9+/=])' % 20)
+
+EXCLUDED_EMAIL_PARTS = ("sentry.io", "amazonaws.com", "cloudflare.com")
+
+SOCIAL_DOMAINS: Dict[str, List[str]] = {
+    "facebook": ["facebook.com"],
+    "instagram": ["instagram.com"],
+    "twitter": ["twitter.com", "x.com"],
+    "linkedin": ["linkedin.com"],
+    "youtube": ["youtube.com", "youtu.be"],
+    "tiktok": ["tiktok.com"],
+    "whatsapp": ["whatsapp.com"],
+    "telegram": ["t.me", "telegram.me"],
+    "yelp": ["yelp.com", "yelp.fr", "yelp.ie", "yelp.co.uk"],
+}
+# domain lookup table + one alternation used as a prefilter
+_DOMAIN_TABLE: List[Tuple[str, str]] = [(d, p) for p, ds in SOCIAL_DOMAINS.items() for d in ds]
+_DOMAIN_RE = re.compile("|".join(re.escape(d) for d, _ in sorted(_DOMAIN_TABLE, key=lambda x: -len(x[0]))))
+
+_LOCAL_CHARS = frozenset("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789._%+-")
+_DOMAIN_CHARS = frozenset("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789.-")
+
+
+def _find_emails(text: str) -> List[str]:
+    """``EMAIL_RE.findall(text)``, searching only the runs around each ``@``.
+
+    A match needs an ``@``: its local part lies in the run of local characters
+    before it, its domain in the run of domain characters after it (plus one
+    character for the closing word boundary / lookahead). Runs cannot contain
+    ``@``, so a match around a later ``@`` never starts before an earlier one.
+    """
+    out: List[str] = []
+    n = len(text)
+    pos = 0
+    while True:
+        at = text.find("@", pos)
+        if at == -1:
+            return out
+        i = at
+        while i > pos and text[i - 1] in _LOCAL_CHARS:
+            i -= 1
+        j = at + 1
+        while j < n and text[j] in _DOMAIN_CHARS:
+            j += 1
+        m = EMAIL_RE.search(text, i, j + 1) if i < at and j > at + 1 else None
+        if m is None:
+            pos = at + 1
+        else:
+            out.append(m.group(0))
+            pos = m.end()
+
+
+def _url_tails(text: str) -> Iterable[str]:
+    """Every span a ``https?://[^"'\\s]*`` match can reach: run text after its first scheme."""
+    run_end = -1
+    for s in _SCHEME_RE.finditer(text):
+        if s.start() < run_end:
+            # a later scheme of the same run: already inside the previous tail
+            continue
+        m = _RUN_END_RE.search(text, s.end())
+        run_end = m.start() if m is not None else len(text)
+        yield text[s.end():run_end]
+
+
+def _emails_in_urls(text: str, candidates: Set[str]) -> Set[str]:
+    """Candidates that occur (case-sensitively) inside some URL tail.
+
+    Every candidate has exactly one ``@``, so an occurrence is pinned to an
+    ``@`` of the tail; only suffix/prefix lengths that candidates use are tried.
+    """
+    if not candidates:
+        return set()
+    pairs = {}
+    for e in candidates:
+        local, _, domain = e.partition("@")
+        pairs[(local, domain)] = e
+    local_lens = sorted({len(lo) for lo, _ in pairs})
+    domain_lens = sorted({len(d) for _, d in pairs})
+    found: Set[str] = set()
+    for tail in _url_tails(text):
+        at = tail.find("@")
+        while at != -1:
+            # maximal local-part run before '@' and domain run after it
+            i = at
+            while i > 0 and tail[i - 1] in _LOCAL_CHARS:
+                i -= 1
+            j = at + 1
+            while j < len(tail) and tail[j] in _DOMAIN_CHARS:
+                j += 1
+            for ll in local_lens:
+                if ll > at - i:
+                    break
+                local = tail[at - ll:at]
+                for dl in domain_lens:
+                    if dl > j - at - 1:
+                        break
+                    e = pairs.get((local, tail[at + 1:at + 1 + dl]))
+                    if e is not None:
+                        found.add(e)
+            at = tail.find("@", at + 1)
+    return found
+
+
+def _platforms(link: str) -> List[str]:
+    low = link.lower()
+    if _DOMAIN_RE.search(low) is None:
+        return []
+    return [p for p, ds in SOCIAL_DOMAINS.items() if any(d in low for d in ds)]
+
+
+def _base64_links(text: str) -> List[str]:
+    """Same result as ``utils.extract_base64_links`` (min_length=20)."""
+    text = html_lib.unescape(text)
+    links = set()
+    for match in _B64_RE.findall(text):
+        try:
+            raw = base64.b64decode(match)
+        except Exception:
+            continue
+        if b"http" not in raw:
+            # strict utf-8 decoding drops nothing, so no 'http' can appear after decode
+            try:
+                raw.decode("utf-8")
+                continue
+            except UnicodeDecodeError:
+                pass
+        decoded = raw.decode("utf-8", errors="ignore").strip()
+        for u in URL_RE.findall(decoded):
+            links.add(u.strip())
+    return sorted(links)
+
+
+def scan_html(text: str) -> Tuple[List[str], Set[str], Dict[str, Set[str]]]:
+    """Return (emails in discovery order, phones, social links per platform)."""
+    raw_emails = [e.lower() for e in _find_emails(text)]
+    candidates = {
+        e for e in raw_emails
+        if not any(x in e for x in EXCLUDED_EMAIL_PARTS) and not _IMAGE_RE.search(e)
+    }
+    in_urls = _emails_in_urls(text, candidates)
+    emails: List[str] = []
+    seen: Set[str] = set()
+    for e in raw_emails:
+        if e in candidates and e not in in_urls and e not in seen:
+            seen.add(e)
+            emails.append(e)
+
+    phones = {_WS_RE.sub("", p) for p in PHONE_RE.findall(text)}
+
+    socials: Dict[str, Set[str]] = {k: set() for k in SOCIAL_DOMAINS}
+    for link in URL_RE.findall(text):
+        for platform in _platforms(link):
+            socials[platform].add(link)
+    for link in _base64_links(text):
+        for platform in _platforms(link):
+            socials[platform].add(link)
+    return emails, phones, socials
@@ -60,7 +60,6 @@ class ResultWriter:
                     db.upsert_place_struct(**payload, extracted_at=None, run_id=self.run_ctx.run_id)
                     with self._lock:
                         self._inserted += 1
-                        print(f"➕1: {self._inserted}")
                         if self._inserted % self.every == 0:
                             logger.info("[writer][tile %d] inserted=%d", self.tile_ctx.index, self._inserted)
                 elif status == "failed":
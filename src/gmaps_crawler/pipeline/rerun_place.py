@@ -1,7 +1,8 @@
 from __future__ import annotations
 
 import json
-from typing import List, Any
+import math
+from typing import Callable, List, Any
 import time
 import sqlite3
 from dataclasses import dataclass
@@ -13,8 +14,10 @@ from DrissionPage._pages.chromium_tab import ChromiumTab
 
 from logger import crawler_thread_logger as logger
 from gmaps_crawler.browser.drivers import create_browser
+from gmaps_crawler.config import settings
 from gmaps_crawler.pipeline.utils import _dismiss_consent
 from gmaps_crawler.pipeline.extractors import extract_pipeline
+from gmaps_crawler.storage.contact_cache import ContactCache
 from gmaps_crawler.storage.db import DB
 
 
@@ -37,7 +40,7 @@ def rerun_place(
     db_path: Path = Path("data/db/gmaps.sqlite"),
     headless: bool = True,
 ) -> Dict[str, Any]:
-    """Re-extract a single place by place_id and update DB and tile counts.
+    """Re-extract a single place by place_id and update its DB row (tile counts follow via triggers).
 
     Fixed params by request:
     - window size forced by drivers to 1920x1080
@@ -87,7 +90,8 @@ def rerun_place(
             logger.warning("Title not visible within timeout (non-fatal): %s", e)
 
         t2 = time.monotonic()
-        data = extract_pipeline(tab, browser, city_name=city, place_id=place_id)
+        cache = ContactCache.shared(db_path) if settings.CONTACT_CACHE_ENABLED else None
+        data = extract_pipeline(tab, browser, city_name=city, place_id=place_id, contact_cache=cache)
         address = (data.get("address") or "").strip()
         # Only use 'warnings' per unified contract
         warnings_json = json.dumps(data.get("warnings") or [], ensure_ascii=False)
@@ -137,10 +141,7 @@ def rerun_place(
             status = "success"
             last_error = ""
 
-        # refresh tile counts (no tile recalculation)
-        t4 = time.monotonic()
-        db.update_tile_counts(city, query, tile_index)
-        timings["update_tile_ms"] = int((time.monotonic() - t4) * 1000)
+        # tile counts follow the row through the places triggers (no recount needed)
 
         res = RerunResult(
             place_id=place_id,
@@ -189,6 +190,36 @@ def _select_failed_place_ids(db_path: Path,
         conn.close()
 
 
+def _select_failed_places(db_path: Path,
+                          *,
+                          city: Optional[str] = None,
+                          query: Optional[str] = None,
+                          limit: Optional[int] = None,
+                          only_errors: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """Same filter as ``_select_failed_place_ids`` but returns the rows a rerun needs (one query)."""
+    conn = sqlite3.connect(str(db_path))
+    try:
+        sql = (
+            "SELECT place_id, city, query, tile_index, name, href, lat, lng, warnings, run_id FROM places WHERE status='failed'"
+        )
+        params: List[Any] = []
+        if city:
+            sql += " AND city=?"; params.append(city)
+        if query:
+            sql += " AND query=?"; params.append(query)
+        if only_errors:
+            ph = ",".join(["?"] * len(only_errors))
+            sql += f" AND last_error IN ({ph})"; params.extend(list(only_errors))
+        sql += " ORDER BY extracted_at DESC"
+        if limit and limit > 0:
+            sql += f" LIMIT {int(limit)}"
+        cur = conn.execute(sql, params)
+        cols = [c[0] for c in cur.description]
+        return [dict(zip(cols, r)) for r in cur.fetchall()]
+    finally:
+        conn.close()
+
+
 def rerun_failed_places(
     *,
     db_path: Path = Path("data/db/gmaps.sqlite"),
@@ -198,11 +229,35 @@ def rerun_failed_places(
     query: Optional[str] = "Coffee Store",
     limit: Optional[int] = None,
     only_errors: Optional[List[str]] = None,
+    batch: Optional[bool] = None,
+    browsers: Optional[int] = None,
+    html_root: Optional[Path] = None,
+    browser_factory: Optional[Callable[..., Any]] = None,
 ) -> Dict[str, Any]:
-    """Rerun all failed places (optionally filtered) with a thread pool.
+    """Rerun all failed places (optionally filtered).
+
+    batch (default settings.RERUN_BATCH): stream the places through ``browsers``
+    pooled Chromium instances with ``workers`` tabs split between them
+    (BatchRerunEngine).
+    Otherwise every place gets its own browser via ``rerun_place`` on a thread pool.
 
-    Returns summary dict: {selected, attempted, succeeded, failed}
+    Returns summary dict: {selected, attempted, succeeded, failed, results}
     """
+    if settings.RERUN_BATCH if batch is None else batch:
+        from gmaps_crawler.pipeline.exec.rerun_batch import BatchRerunEngine
+
+        rows = _select_failed_places(db_path, city=city, query=query, limit=limit, only_errors=only_errors)
+        n_browsers = max(1, int(browsers or settings.RERUN_BROWSERS))
+        engine = BatchRerunEngine(
+            db_path=db_path,
+            headless=headless,
+            browsers=n_browsers,
+            tabs_per_browser=max(1, math.ceil(max(1, int(workers or 1)) / n_browsers)),
+            html_root=html_root,
+            browser_factory=browser_factory,
+        )
+        return engine.run(rows)
+
     pids = _select_failed_place_ids(db_path, city=city, query=query, limit=limit, only_errors=only_errors)
     selected = len(pids)
     if selected == 0:
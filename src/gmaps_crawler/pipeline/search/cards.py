@@ -1,13 +1,32 @@
 from __future__ import annotations
 
-from typing import Dict, List
+from typing import Dict, Iterable, List
 from DrissionPage import Chromium
 from DrissionPage._pages.chromium_tab import ChromiumTab
+from logger import crawler_thread_logger as logger
 
+from gmaps_crawler.config import settings
 from gmaps_crawler.pipeline.search.places_crawler import GMapsPlacesCrawler
+from gmaps_crawler.pipeline.search.xhr_cards import XhrCardCollector
 
 
-def collect_cards(browser: Chromium, search_tab: ChromiumTab, query: str) -> List[Dict]:
+def collect_cards(browser: Chromium, search_tab: ChromiumTab, query: str, seed_packets: Iterable = ()) -> List[Dict]:
+    """Cards of the search tab's results list.
+
+    ``seed_packets`` are the search responses already taken off ``tab.listen``
+    (see ``local_search_click``). Falls back to scrolling + DOM cards when no
+    results payload could be parsed.
+    """
+    if settings.CARDS_FROM_XHR:
+        try:
+            cards = XhrCardCollector(search_tab, query).collect(seed_packets)
+        finally:
+            try:
+                search_tab.listen.stop()
+            except Exception as e:
+                logger.debug("listen.stop failed: %s", e)
+        if cards is not None:
+            return cards
+        logger.warning("xhr cards: no search payload parsed; falling back to DOM cards")
     crawler = GMapsPlacesCrawler(browser=browser, search_tab=search_tab, proxy_pool=None)
     return crawler._gather_all_cards(query_text=query)
-
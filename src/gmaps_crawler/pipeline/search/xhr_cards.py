@@ -0,0 +1,197 @@
+"""
+Collect result cards from the listened ``search?tbm=map`` XHR responses.
+
+``local_search_click`` starts ``tab.listen`` on ``https://www.google.com/search?``
+before clicking "Search this area"; every page of the results list (the first
+one and each page the list lazily loads while scrolling) arrives as one such
+response. Its body carries name, feature id and coordinates of each place, so
+cards are built from the payload instead of walking the anchors of the list
+afterwards, and scrolling stops as soon as a short page shows the results
+ran out.
+
+Body shapes seen in the wild:
+
+- ``)]}'\\n[...]``
+- ``{"c":0,"d":")]}'\\n[...]"}/*""*/`` (``tch=1`` requests)
+
+Results live at ``data[0][1][i][14]``; the first entry is metadata.
+"""
+
+from __future__ import annotations
+
+import json
+import random
+import time
+from typing import Any, Dict, Iterable, List, Optional
+from urllib.parse import parse_qs, quote_plus, urlparse
+
+from logger import crawler_thread_logger as logger
+
+from DrissionPage._pages.chromium_tab import ChromiumTab
+
+from gmaps_crawler.pipeline.exec.stop import STOP_EVENT
+from gmaps_crawler.pipeline.utils import card_matches_query
+
+# results per page of the list; a shorter page is the last one
+PAGE_SIZE = 20
+_XSSI = ")]}'"
+
+
+def _decode(body: Any) -> Optional[list]:
+    """JSON array of a search response body, or None when it is not one."""
+    if isinstance(body, bytes):
+        body = body.decode("utf-8", errors="replace")
+    if isinstance(body, dict):
+        body = body.get("d")
+    if not isinstance(body, str):
+        return body if isinstance(body, list) else None
+    text = body.strip()
+    if text.startswith("{"):
+        end = text.rfind("}")
+        try:
+            text = (json.loads(text[: end + 1]).get("d") or "").strip()
+        except (ValueError, AttributeError):
+            return None
+    if text.startswith(_XSSI):
+        text = text[len(_XSSI):]
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return None
+    return data if isinstance(data, list) else None
+
+
+def _at(node: Any, *path: int) -> Any:
+    for i in path:
+        if not isinstance(node, list) or i >= len(node):
+            return None
+        node = node[i]
+    return node
+
+
+def _record_to_card(rec: list, hl: str) -> Optional[Dict]:
+    name = _at(rec, 11)
+    lat = _at(rec, 9, 2)
+    lng = _at(rec, 9, 3)
+    fid = _at(rec, 10)
+    if not isinstance(name, str) or not isinstance(lat, (int, float)) or not isinstance(lng, (int, float)):
+        return None
+    data = f"!4m7!3m6!1s{fid}!8m2!3d{lat}!4d{lng}" if isinstance(fid, str) else f"!3m1!8m2!3d{lat}!4d{lng}"
+    href = f"https://www.google.com/maps/place/{quote_plus(name)}/data={data}?authuser=0&hl={hl}&rclk=1"
+    categories = [c for c in (_at(rec, 13) or []) if isinstance(c, str)]
+    return {
+        "name": name,
+        "href": href,
+        "card_html": "",
+        "categories": categories,
+        "address": _at(rec, 39) if isinstance(_at(rec, 39), str) else "",
+        "feature_id": fid if isinstance(fid, str) else "",
+    }
+
+
+def parse_search_payload(body: Any, *, hl: str = "en") -> Optional[List[Dict]]:
+    """Cards of one results page; None when ``body`` is not a places search payload."""
+    data = _decode(body)
+    entries = _at(data, 0, 1)
+    if not isinstance(entries, list):
+        return None
+    cards = []
+    for entry in entries:
+        rec = _at(entry, 14)
+        if isinstance(rec, list):
+            card = _record_to_card(rec, hl)
+            if card is not None:
+                cards.append(card)
+    return cards
+
+
+class XhrCardCollector:
+    """Scroll the results list and build cards from the search responses it triggers."""
+
+    def __init__(self, tab: ChromiumTab, query_text: str, *, max_steps: int = 120, idle_steps: int = 6) -> None:
+        self.tab = tab
+        self.query_text = query_text
+        self.max_steps = max_steps
+        self.idle_steps = idle_steps
+        self.hl = (parse_qs(urlparse(tab.url or "").query).get("hl") or ["en"])[0]
+        self._cards: Dict[str, Dict] = {}
+        self.pages = 0
+        self.exhausted = False
+
+    def feed(self, packet) -> bool:
+        """Add the cards of one listened packet; False when it is not a results page."""
+        if "tbm=map" not in (getattr(packet, "url", "") or ""):
+            return False
+        try:
+            cards = parse_search_payload(packet.response.body, hl=self.hl)
+        except Exception as e:
+            logger.debug("search payload parse failed: %s", e)
+            return False
+        if cards is None:
+            return False
+        self.pages += 1
+        for card in cards:
+            if not card_matches_query(self.query_text, " ".join([card["name"], *card["categories"]])):
+                continue
+            self._cards.setdefault(card["feature_id"] or card["href"], card)
+        if len(cards) < PAGE_SIZE:
+            self.exhausted = True
+        return True
+
+    def _drain(self, timeout: float) -> int:
+        fed = 0
+        while True:
+            packet = self.tab.listen.wait(timeout=timeout)
+            if not packet:
+                return fed
+            fed += self.feed(packet)
+            timeout = 0.05
+
+    def _end_of_list(self, container) -> bool:
+        try:
+            return bool(container.ele("@text():You've reached the end of the list.", timeout=0.3))
+        except Exception:
+            return False
+
+    def collect(self, seed_packets: Iterable = ()) -> Optional[List[Dict]]:
+        """Cards of the whole list, or None when no results payload was seen (caller falls back to the DOM)."""
+        for packet in seed_packets:
+            self.feed(packet)
+        self._drain(0.2)
+        container = None
+        idle = 0
+        for _ in range(self.max_steps):
+            if self.exhausted:
+                break
+            if STOP_EVENT.is_set():
+                raise KeyboardInterrupt
+            if container is None:
+                container = self.tab.ele(f"@aria-label=Results for {self.query_text}", timeout=2)
+                if not container:
+                    break
+            container.scroll(900)
+            if self._drain(random.uniform(0.6, 1.0)):
+                idle = 0
+                continue
+            idle += 1
+            # no page for a while: either the last page had exactly PAGE_SIZE results or the list is done
+            if idle >= self.idle_steps and self._end_of_list(container):
+                self.exhausted = True
+                break
+        if not self.pages:
+            return None
+        if not self.exhausted:
+            logger.warning("xhr cards: list not exhausted after %d scrolls (pages=%d)", self.max_steps, self.pages)
+        logger.info("xhr cards: pages=%d cards=%d", self.pages, len(self._cards))
+        return list(self._cards.values())
+
+
+if __name__ == "__main__":  # parse a saved response body: python -m ... body.txt
+    import sys
+
+    with open(sys.argv[1], encoding="utf-8") as fh:
+        t0 = time.perf_counter()
+        parsed = parse_search_payload(fh.read())
+    print(f"{len(parsed or [])} cards in {1000 * (time.perf_counter() - t0):.1f} ms")
+    for c in (parsed or [])[:5]:
+        print(c["name"], c["categories"], c["href"][:120])
@@ -7,6 +7,7 @@ from typing import Any, Dict, List, Optional, Sequence, Tuple
 
 from DrissionPage import Chromium
 
+from gmaps_crawler.browser.pool import BrowserPool
 from gmaps_crawler.config import settings
 from gmaps_crawler.network.proxy import ProxyPool, parse_proxy_sources
 from gmaps_crawler.pipeline.city.context import RunContext, TileContext
@@ -17,10 +18,13 @@ from gmaps_crawler.pipeline.tasks.build import build_tasks
 from gmaps_crawler.pipeline.tasks.worker import make_extract_worker  # legacy only
 from gmaps_crawler.pipeline.exec.streaming import run_streaming  # legacy only
 from gmaps_crawler.pipeline.exec.scheduler import ProgressiveTaskScheduler  # legacy only
+from gmaps_crawler.pipeline.exec.aimd import AIMDController
 from gmaps_crawler.pipeline.exec.stop import STOP_EVENT
 from gmaps_crawler.pipeline.search.urls import build_search_url
+from gmaps_crawler.utils.metrics import metric_labels
 from gmaps_crawler.utils.time import log_duration
 from gmaps_crawler.pipeline.exec.simple_pool import TabWorkerPool
+from gmaps_crawler.storage.snapshots import TILE, SnapshotStore, tile_key
 
 
 # use named crawler logger
@@ -57,6 +61,8 @@ class TileRunner:
         thread_batch_size: Optional[int] = None,
         thread_batch_delay: Optional[float] = None,
         use_simple_executor: bool = True,
+        browser_pool: Optional[BrowserPool] = None,
+        controller: Optional[AIMDController] = None,
     ) -> None:
         self.query = query
         self.latitude = latitude
@@ -85,6 +91,8 @@ class TileRunner:
         self.thread_batch_size = thread_batch_size
         self.thread_batch_delay = thread_batch_delay
         self.use_simple_executor = use_simple_executor
+        self.browser_pool = browser_pool
+        self.controller = controller
         self.browser: Optional[Chromium] = None
         self.seen = 0
 
@@ -113,6 +121,10 @@ class TileRunner:
         return ProxyPool(sources, strategy=self.proxy_strategy) if sources else None
 
     def run(self) -> Tuple[int, int, int]:
+        with metric_labels(tile=self.tile_ctx.index):
+            return self._run()
+
+    def _run(self) -> Tuple[int, int, int]:
         logger.info("[bold yellow]\n============== * Running Gmaps Crawler =============[/]", extra={"markup": True})
         payload = settings.model_dump() if hasattr(settings, "model_dump") else settings.dict()
         # logger.info("[yellow]Settings:[/yellow] %s", payload, extra={"markup": True})
@@ -128,62 +140,96 @@ class TileRunner:
 
         session = BrowserSession()
         with log_duration(logger, "create_browser"):
-            self.browser = session.open_browser(
-                headless=self.headless,
-                window_width=self.window_width,
-                window_height=self.window_height,
-                proxy=selected_proxy,
-            )
+            if self.browser_pool is not None:
+                self.browser = self.browser_pool.lease(proxy=selected_proxy)
+            else:
+                self.browser = session.open_browser(
+                    headless=self.headless,
+                    window_width=self.window_width,
+                    window_height=self.window_height,
+                    proxy=selected_proxy,
+                )
         assert self.browser is not None
 
-        search_url = getattr(self.tile_ctx, "tile_url", None) or build_search_url(self.query, self.latitude, self.longitude, self.zoom, self.language)
-        logger.info(f"Navigating to search URL, tile idx is {self.tile_ctx.index}\nURL: {search_url}")
-        with log_duration(logger, "open_search_tab"):
-            search_tab = session.open_search_tab(self.browser, search_url)
-        # if self.print_coverage:
-        #     logger.info("Coverage already measured at run start; reuse cached.")
-
-        # consent
-        session.ensure_consent(search_tab, attempts=3)
-        # search this area
-        session.ensure_local_search(search_tab, attempts=5)
-        search_tab.wait(2)
-        
-        if search_tab.wait.eles_loaded("@text():No results found"):
-            return 0, 0, 0
-
-        with log_duration(logger, "scroll_and_collect"):
-            cards = collect_cards(self.browser, search_tab, self.query)
-        self.seen = len(cards)
-        logger.info("Collect cards done, count=%d", self.seen)
-
-        tasks = build_tasks(cards, city=self.run_ctx.city, query=self.query, db=self.run_ctx.db)
-        total = len(tasks)
-        # Always use simple tab worker pool that writes directly to DB
-        logger.info("Using tab worker pool: tasks=%d cards_total=%d workers=%d", total, len(cards), self.workers)
-        pool = TabWorkerPool(
-            browser=self.browser,
-            run_ctx=self.run_ctx,
-            tile_ctx=self.tile_ctx,
-            db_path=self.db_path,
-            workers=self.workers,
-        )
-        pool.submit_tasks(tasks)
-        pool.start()
-        pool.join()
-        inserted, failed_count = pool.stats()
-        thread_done = inserted + failed_count
-
-        logger.info(
-            "[tile %d] summary: scheduled=%d thread_done=%d inserted=%d failed=%d",
-            self.tile_ctx.index,
-            total,
-            thread_done,
-            inserted,
-            failed_count,
-        )
-
-        # teardown
-        # simple pool creates and closes tabs in workers; nothing to close here
-        self.browser.quit(timeout=5, force=True, del_data=False)
-        return self.seen, inserted, failed_count
+        search_tab = None
+        healthy = False
+        try:
+            search_url = getattr(self.tile_ctx, "tile_url", None) or build_search_url(self.query, self.latitude, self.longitude, self.zoom, self.language)
+            logger.info(f"Navigating to search URL, tile idx is {self.tile_ctx.index}\nURL: {search_url}")
+            with log_duration(logger, "open_search_tab"):
+                search_tab = session.open_search_tab(self.browser, search_url)
+            # if self.print_coverage:
+            #     logger.info("Coverage already measured at run start; reuse cached.")
+
+            # consent (a reused browser keeps the consent cookie, so this is a no-op)
+            session.ensure_consent(search_tab, attempts=3)
+            # search this area; its first results page is kept for the XHR card collector
+            packets: List = []
+            session.ensure_local_search(search_tab, attempts=5, packets=packets)
+            search_tab.wait(2)
+
+            if search_tab.wait.eles_loaded("@text():No results found"):
+                healthy = True
+                return 0, 0, 0
+
+            with log_duration(logger, "scroll_and_collect"):
+                cards = collect_cards(self.browser, search_tab, self.query, packets)
+            self.seen = len(cards)
+            logger.info("Collect cards done, count=%d", self.seen)
+            self._snapshot_search(search_tab, search_url)
+
+            tasks = build_tasks(cards, city=self.run_ctx.city, query=self.query, db=self.run_ctx.db)
+            total = len(tasks)
+            # Always use simple tab worker pool that writes directly to DB
+            logger.info("Using tab worker pool: tasks=%d cards_total=%d workers=%d", total, len(cards), self.workers)
+            pool = TabWorkerPool(
+                browser=self.browser,
+                run_ctx=self.run_ctx,
+                tile_ctx=self.tile_ctx,
+                db_path=self.db_path,
+                workers=self.workers,
+                controller=self.controller,
+            )
+            pool.submit_tasks(tasks)
+            pool.start()
+            pool.join()
+            inserted, failed_count = pool.stats()
+            thread_done = inserted + failed_count
+
+            logger.info(
+                "[tile %d] summary: scheduled=%d thread_done=%d inserted=%d failed=%d",
+                self.tile_ctx.index,
+                total,
+                thread_done,
+                inserted,
+                failed_count,
+            )
+            healthy = True
+            return self.seen, inserted, failed_count
+        finally:
+            self._teardown(search_tab, healthy=healthy)
+
+    def _snapshot_search(self, search_tab, search_url: str) -> None:
+        html_root = getattr(self.run_ctx, "html_root", None)
+        if not (settings.SNAPSHOT_HTML and html_root):
+            return
+        try:
+            key = tile_key(self.run_ctx.city, self.query, self.tile_ctx.index)
+            SnapshotStore(html_root).put_async(TILE, key, search_tab.html, url=search_url)
+        except Exception as e:
+            logger.debug("search snapshot failed: %s", e)
+
+    def _teardown(self, search_tab, *, healthy: bool) -> None:
+        # simple pool creates and closes tabs in workers; only the search tab is ours
+        if self.browser is None:
+            return
+        if self.browser_pool is None:
+            self.browser.quit(timeout=5, force=True, del_data=False)
+            return
+        if search_tab is not None:
+            try:
+                search_tab.close()
+            except Exception as e:
+                logger.warning("search tab close failed: %s", e)
+                healthy = False
+        self.browser_pool.release(self.browser, healthy=healthy)
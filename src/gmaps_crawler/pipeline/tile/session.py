@@ -1,11 +1,12 @@
 from __future__ import annotations
 
 import time
-from typing import Optional
+from typing import List, Optional
 
 from DrissionPage import Chromium
 from DrissionPage._pages.chromium_tab import ChromiumTab
 
+from gmaps_crawler.browser.blocking import apply_blocking
 from gmaps_crawler.browser.drivers import create_browser
 from gmaps_crawler.pipeline.utils import _dismiss_consent, local_search_click
 
@@ -15,7 +16,11 @@ class BrowserSession:
         return create_browser(headless=headless, window_width=window_width, window_height=window_height, proxy=proxy)
 
     def open_search_tab(self, browser: Chromium, url: str) -> ChromiumTab:
-        return browser.new_tab(url=url, background=False)
+        tab = browser.new_tab(background=False)
+        # installed before the first request; the map canvas and scale bar stay loaded
+        apply_blocking(tab)
+        tab.get(url)
+        return tab
 
     def ensure_consent(self, tab: ChromiumTab, attempts: int = 3) -> None:
         for _ in range(max(1, attempts)):
@@ -24,9 +29,9 @@ class BrowserSession:
             time.sleep(0.2)
         raise RuntimeError("consent dismiss failed")
 
-    def ensure_local_search(self, tab: ChromiumTab, attempts: int = 5) -> None:
+    def ensure_local_search(self, tab: ChromiumTab, attempts: int = 5, packets: Optional[List] = None) -> None:
         for _ in range(max(1, attempts)):
-            if local_search_click(tab):
+            if local_search_click(tab, packets):
                 return
         raise RuntimeError(f"local search click failed: url={tab.url}")
 
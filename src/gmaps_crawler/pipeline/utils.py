@@ -1,4 +1,5 @@
 import random
+from typing import List, Optional
 from logger import crawler_thread_logger as logger
 
 from DrissionPage._pages.chromium_tab import ChromiumTab
@@ -23,7 +24,7 @@ def _dismiss_consent(tab: ChromiumTab) -> bool:
     return True
 
 
-def local_search_click(tab: ChromiumTab) -> bool:
+def local_search_click(tab: ChromiumTab, packets: Optional[List] = None) -> bool:
     def _local_search_click(tab: ChromiumTab) -> bool:
         map_ele = tab.ele("@class=id-content-container")
         x = 500
@@ -46,9 +47,12 @@ def local_search_click(tab: ChromiumTab) -> bool:
             return False
 
     res = _local_search_click(tab)
-    import time
-    time.sleep(5)
-    return True if tab.listen.wait(timeout=3) else False
+    tab.wait(5)
+    packet = tab.listen.wait(timeout=3)
+    # first results page; the XHR card collector parses it (listening stays on)
+    if packet and packets is not None:
+        packets.append(packet)
+    return True if packet else False
         
         
 # def _get_places_wrapper2(tab):
@@ -56,12 +60,21 @@ def local_search_click(tab: ChromiumTab) -> bool:
 #     links = tab.eles(f"xpath:{xpath}") or []
 #     return links
 
-def get_places_wrapper(tab, query_text):
-    alias =  {
-    "coffee":["coffee", "cafe", "expresso bar"]
+QUERY_ALIASES = {
+    "coffee": ["coffee", "cafe", "expresso bar"],
 }
+
+
+def card_matches_query(query_text: str, text: str) -> bool:
+    """Card text (name/category line) mentions the query's first word or one of its aliases."""
+    word = query_text.split(" ")[0].lower()
+    text = text.lower()
+    return any(a in text for a in QUERY_ALIASES.get(word, [word]))
+
+
+def get_places_wrapper(tab, query_text):
     coffee = query_text.split(" ")[0].lower()
-    coffees = alias[coffee]
+    coffees = QUERY_ALIASES[coffee]
     xpath = "//a[contains(@href, 'https://www.google.com/maps/place/') and @jsaction]"
     links = tab.eles(f"xpath:{xpath}") or []
     filter_links = []
@@ -0,0 +1,264 @@
+from __future__ import annotations
+
+import atexit
+import hashlib
+import json
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from logger import crawler_thread_logger as logger
+
+from gmaps_crawler.config import settings
+from gmaps_crawler.storage.db import BatchWriter, get_connection, get_contact_cache, init_schema, put_contact_cache
+
+
+TRACKING_PARAMS = frozenset({"srsltid", "fbclid", "gclid"})
+
+# read connections shared by all worker threads (opened lazily, reused round-robin)
+READ_POOL_SIZE = 4
+
+
+def _is_tracking(name: str) -> bool:
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith("utm_")
+
+
+def cache_key(url: str) -> str:
+    """Normalized site key: lower-case host without ``www.`` + path + sorted query, no scheme/fragment.
+
+    Tracking parameters are dropped; the rest of the query stays, since it can
+    select the page (``facebook.com/profile.php?id=..``).
+
+    ``http://www.Amorino.com/stores/issy/?srsltid=..`` -> ``amorino.com/stores/issy``
+    """
+    url = (url or "").strip()
+    parts = urlsplit(url if "://" in url else f"http://{url}")
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if not _is_tracking(k))
+    return host + parts.path.rstrip("/") + (f"?{urlencode(query)}" if query else "")
+
+
+def content_hash(html: str) -> str:
+    return hashlib.sha256((html or "").encode("utf-8", errors="replace")).hexdigest()
+
+
+class ContactCache:
+    """Per-site emails/phones/socials scan results, shared across places and runs.
+
+    Two layers:
+    1. in-memory LRU (``max_entries``) in front of
+    2. the ``contact_cache`` table (url_key, url, result_json, content_sha256, fetched_at)
+
+    Entries older than ``ttl_s`` are misses; ``stale_result`` still returns them
+    so a re-fetched page with an unchanged content hash skips the re-scan.
+
+    ``self._lock`` only guards the LRU and counters: table reads check out one
+    of at most ``READ_POOL_SIZE`` pooled connections, and writes go through a
+    :class:`BatchWriter`, so no worker waits on SQLite while holding the lock.
+    The pool is bounded regardless of how many threads come and go.
+    """
+
+    _shared: Dict[str, "ContactCache"] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, db_path: Path, *, ttl_s: Optional[float] = None, max_entries: Optional[int] = None) -> None:
+        self.db_path = Path(db_path)
+        self.ttl_s = float(ttl_s if ttl_s is not None else settings.CONTACT_CACHE_TTL_DAYS * 86400.0)
+        self.max_entries = max(1, int(max_entries if max_entries is not None else settings.CONTACT_CACHE_MAX_ENTRIES))
+        self._lock = threading.Lock()
+        self._init_lock = threading.Lock()
+        self._lru: "OrderedDict[str, Tuple[dict, str, float]]" = OrderedDict()
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._opened = 0
+        self._writer: Optional[BatchWriter] = None
+        self._stats = {"hits_mem": 0, "hits_db": 0, "misses": 0, "expired": 0, "unchanged": 0, "puts": 0, "evictions": 0}
+
+    @classmethod
+    def shared(cls, db_path: Path) -> "ContactCache":
+        """Process-wide instance per DB file, so all workers share the memory layer."""
+        key = str(Path(db_path).resolve())
+        with cls._shared_lock:
+            inst = cls._shared.get(key)
+            if inst is None:
+                inst = cls._shared[key] = cls(Path(db_path))
+                # pending batched writes land before the interpreter exits
+                atexit.register(inst.close)
+            return inst
+
+    # ---- storage ----
+    @contextmanager
+    def _reader(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a pooled read connection; waits when all ``READ_POOL_SIZE`` are in use."""
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._init_lock:
+                grow = self._opened < READ_POOL_SIZE
+                if grow:
+                    self._opened += 1
+            if grow:
+                try:
+                    # the writer creates the schema before the first read
+                    self._db()
+                    conn = get_connection(self.db_path, check_same_thread=False)
+                except BaseException:
+                    with self._init_lock:
+                        self._opened -= 1
+                    raise
+            else:
+                conn = self._idle.get()
+        try:
+            yield conn
+        finally:
+            self._idle.put(conn)
+
+    def _db(self) -> BatchWriter:
+        with self._init_lock:
+            if self._writer is None:
+                conn = get_connection(self.db_path)
+                try:
+                    init_schema(conn)
+                finally:
+                    conn.close()
+                self._writer = BatchWriter(self.db_path)
+            return self._writer
+
+    def _remember(self, key: str, entry: Tuple[dict, str, float]) -> None:
+        self._lru[key] = entry
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def _lookup(self, key: str) -> Tuple[Optional[Tuple[dict, str, float]], bool]:
+        """(entry, from_memory); the table is read outside the lock."""
+        with self._lock:
+            entry = self._lru.get(key)
+            if entry is not None:
+                self._lru.move_to_end(key)
+                return entry, True
+        try:
+            with self._reader() as conn:
+                row = get_contact_cache(conn, key)
+        except sqlite3.Error as e:
+            logger.warning("[contact-cache] read failed for %s: %s", key, e)
+            return None, False
+        if row is None:
+            return None, False
+        try:
+            fetched = datetime.fromisoformat(row["fetched_at"]).timestamp()
+            entry = (json.loads(row["result_json"]), row["content_sha256"] or "", fetched)
+        except (TypeError, ValueError):
+            return None, False
+        with self._lock:
+            # a concurrent put may have landed meanwhile: keep the newer entry
+            current = self._lru.get(key)
+            if current is None or current[2] < entry[2]:
+                self._remember(key, entry)
+            else:
+                entry = current
+        return entry, False
+
+    # ---- API ----
+    def get(self, url: str) -> Optional[dict]:
+        """Fresh cached result for ``url`` or None (counts hit/miss)."""
+        key = cache_key(url)
+        entry, in_mem = self._lookup(key)
+        with self._lock:
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            if time.time() - entry[2] > self.ttl_s:
+                self._stats["expired"] += 1
+                self._stats["misses"] += 1
+                return None
+            self._stats["hits_mem" if in_mem else "hits_db"] += 1
+            return entry[0]
+
+    def stale_result(self, url: str, html: str) -> Optional[dict]:
+        """Expired result whose page content is unchanged; refreshes its timestamp."""
+        key = cache_key(url)
+        digest = content_hash(html)
+        entry, _ = self._lookup(key)
+        if entry is None or entry[1] != digest:
+            return None
+        with self._lock:
+            self._stats["unchanged"] += 1
+        self.put(url, entry[0], html)
+        return entry[0]
+
+    def put(self, url: str, result: dict, html: str) -> None:
+        key = cache_key(url)
+        now = datetime.now(timezone.utc)
+        digest = content_hash(html)
+        with self._lock:
+            self._remember(key, (result, digest, now.timestamp()))
+            self._stats["puts"] += 1
+        # group-committed by the writer thread; the memory layer already serves the entry
+        try:
+            fut = self._db().submit(
+                put_contact_cache,
+                url_key=key,
+                url=url,
+                result_json=json.dumps(result, ensure_ascii=False),
+                content_sha256=digest,
+                fetched_at=now.isoformat(),
+            )
+        except (sqlite3.Error, RuntimeError) as e:
+            logger.warning("[contact-cache] persist failed for %s: %s", key, e)
+            return
+        fut.add_done_callback(lambda f: self._on_persisted(f, key))
+
+    @staticmethod
+    def _on_persisted(fut: "Future[None]", key: str) -> None:
+        exc = fut.exception()
+        if exc is not None:
+            logger.warning("[contact-cache] persist failed for %s: %s", key, exc)
+
+    def flush(self) -> None:
+        if self._writer is not None:
+            self._writer.flush()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            out: Dict[str, float] = dict(self._stats)
+            out["entries_mem"] = len(self._lru)
+        lookups = out["hits_mem"] + out["hits_db"] + out["misses"]
+        out["hit_rate"] = ((out["hits_mem"] + out["hits_db"]) / lookups) if lookups else 0.0
+        return out
+
+    def log_stats(self) -> None:
+        s = self.stats()
+        logger.info(
+            "[contact-cache] hits=%d (mem=%d db=%d) misses=%d expired=%d unchanged=%d hit_rate=%.0f%% entries=%d evictions=%d",
+            s["hits_mem"] + s["hits_db"], s["hits_mem"], s["hits_db"], s["misses"], s["expired"],
+            s["unchanged"], s["hit_rate"] * 100.0, s["entries_mem"], s["evictions"],
+        )
+
+    def close(self) -> None:
+        with self._init_lock:
+            writer, self._writer = self._writer, None
+        if writer is not None:
+            writer.close()
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            with self._init_lock:
+                self._opened -= 1
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
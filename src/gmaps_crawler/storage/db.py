@@ -1,12 +1,22 @@
-﻿import sqlite3
+﻿import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
 from pathlib import Path
 from datetime import datetime, timezone
-from typing import Iterable, Optional
+from typing import Any, Callable, Iterable, Iterator, List, Optional
 
+from gmaps_crawler.config import settings
+from gmaps_crawler.pipeline.exec.stop import STOP_EVENT
+from gmaps_crawler.storage.known_places import KnownPlaceIndex
+from gmaps_crawler.utils.metrics import current_labels, observe, stage
 
-def get_connection(db_path: Path) -> sqlite3.Connection:
+
+def get_connection(db_path: Path, *, check_same_thread: bool = True) -> sqlite3.Connection:
     db_path.parent.mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(str(db_path))
+    # several crawler processes may share the file: wait for locks instead of failing fast
+    conn = sqlite3.connect(str(db_path), check_same_thread=check_same_thread, timeout=30.0)
     conn.execute("PRAGMA journal_mode=WAL;")
     conn.execute("PRAGMA foreign_keys=ON;")
     return conn
@@ -59,6 +69,22 @@ def init_schema(conn: sqlite3.Connection) -> None:
         CREATE TABLE IF NOT EXISTS places (\n            place_id TEXT NOT NULL,\n            city TEXT NOT NULL,\n            query TEXT NOT NULL,\n            tile_index INTEGER NOT NULL,\n            name TEXT NOT NULL,\n            href TEXT NOT NULL,\n            lat REAL NOT NULL,\n            lng REAL NOT NULL,\n            address TEXT,\n            location TEXT,\n            phone TEXT,\n            plus_code TEXT,\n            website TEXT,\n            social_media_urls TEXT,\n            open_time TEXT,\n            emails_phones_socials TEXT,\n            status TEXT NOT NULL CHECK(status in ('success','failed')) DEFAULT 'success',\n            last_error TEXT,\n            warnings TEXT,\n            extracted_at TEXT NOT NULL,\n            run_id TEXT NOT NULL,\n            PRIMARY KEY (city, query, place_id)\n        );
         CREATE INDEX IF NOT EXISTS places_tile ON places(city, query, tile_index);
         CREATE UNIQUE INDEX IF NOT EXISTS places_place_id_unique ON places(place_id);
+        CREATE INDEX IF NOT EXISTS places_extracted_at ON places(extracted_at);
+
+        CREATE TABLE IF NOT EXISTS export_watermarks (
+            name TEXT PRIMARY KEY,
+            watermark TEXT NOT NULL,
+            exported_at TEXT NOT NULL,
+            rows INTEGER NOT NULL DEFAULT 0
+        );
+
+        CREATE TABLE IF NOT EXISTS contact_cache (
+            url_key TEXT PRIMARY KEY,
+            url TEXT NOT NULL,
+            result_json TEXT NOT NULL,
+            content_sha256 TEXT,
+            fetched_at TEXT NOT NULL
+        );
         """
     )
     # best-effort migrations for existing DBs (ignore if columns already exist)
@@ -108,6 +134,28 @@ def init_schema(conn: sqlite3.Connection) -> None:
         conn.execute("ALTER TABLE tiles ADD COLUMN failed_count INTEGER DEFAULT 0")
     except Exception:
         pass
+    # adaptive (quadtree) tiling: parent link, depth and scheduling priority
+    for sql in (
+        "ALTER TABLE tiles ADD COLUMN parent_index INTEGER",
+        "ALTER TABLE tiles ADD COLUMN depth INTEGER DEFAULT 0",
+        "ALTER TABLE tiles ADD COLUMN priority REAL DEFAULT 0",
+        # multi-process sharding: lease owner/expiry (epoch seconds) and claim count
+        "ALTER TABLE tiles ADD COLUMN lease_owner TEXT",
+        "ALTER TABLE tiles ADD COLUMN lease_expires_at REAL",
+        "ALTER TABLE tiles ADD COLUMN attempts INTEGER DEFAULT 0",
+        # scheduling sequence from pipeline.city.ordering (NULL: tile_index order)
+        "ALTER TABLE tiles ADD COLUMN visit_order INTEGER",
+        # iter_tiles pages through tiles in visit order
+        "CREATE INDEX IF NOT EXISTS tiles_visit ON tiles(city, query, COALESCE(visit_order, tile_index), tile_index)",
+        # claim_tile walks one status in claim order without sorting
+        "CREATE INDEX IF NOT EXISTS tiles_claim ON tiles(city, query, status, COALESCE(priority, 0) DESC, COALESCE(visit_order, tile_index), tile_index)",
+        # renew_leases / release_leases look up one owner's tiles (only leased rows are indexed)
+        "CREATE INDEX IF NOT EXISTS tiles_lease_owner ON tiles(lease_owner) WHERE lease_owner IS NOT NULL",
+    ):
+        try:
+            conn.execute(sql)
+        except Exception:
+            pass
     for sql in (
         "ALTER TABLE places ADD COLUMN address TEXT",
         "ALTER TABLE places ADD COLUMN location TEXT",
@@ -126,6 +174,98 @@ def init_schema(conn: sqlite3.Connection) -> None:
         except Exception:
             pass
     conn.commit()
+    ensure_tile_count_triggers(conn)
+
+
+# tiles.processed_count / failed_count follow places status transitions (O(1) per write);
+# a row counts as processed when its status is success/empty and as failed when 'failed'
+_TILE_COUNT_TRIGGERS = """
+CREATE TRIGGER IF NOT EXISTS places_tile_counts_ins AFTER INSERT ON places
+BEGIN
+    UPDATE tiles SET
+        processed_count = COALESCE(processed_count, 0) + (COALESCE(NEW.status, '') IN ('', 'success')),
+        failed_count = COALESCE(failed_count, 0) + (NEW.status IS 'failed')
+    WHERE city = NEW.city AND query = NEW.query AND tile_index = NEW.tile_index;
+END;
+
+CREATE TRIGGER IF NOT EXISTS places_tile_counts_del AFTER DELETE ON places
+BEGIN
+    UPDATE tiles SET
+        processed_count = COALESCE(processed_count, 0) - (COALESCE(OLD.status, '') IN ('', 'success')),
+        failed_count = COALESCE(failed_count, 0) - (OLD.status IS 'failed')
+    WHERE city = OLD.city AND query = OLD.query AND tile_index = OLD.tile_index;
+END;
+
+CREATE TRIGGER IF NOT EXISTS places_tile_counts_upd AFTER UPDATE OF status, city, query, tile_index ON places
+WHEN OLD.status IS NOT NEW.status OR OLD.city IS NOT NEW.city OR OLD.query IS NOT NEW.query OR OLD.tile_index IS NOT NEW.tile_index
+BEGIN
+    UPDATE tiles SET
+        processed_count = COALESCE(processed_count, 0) - (COALESCE(OLD.status, '') IN ('', 'success')),
+        failed_count = COALESCE(failed_count, 0) - (OLD.status IS 'failed')
+    WHERE city = OLD.city AND query = OLD.query AND tile_index = OLD.tile_index;
+    UPDATE tiles SET
+        processed_count = COALESCE(processed_count, 0) + (COALESCE(NEW.status, '') IN ('', 'success')),
+        failed_count = COALESCE(failed_count, 0) + (NEW.status IS 'failed')
+    WHERE city = NEW.city AND query = NEW.query AND tile_index = NEW.tile_index;
+END;
+"""
+
+
+def ensure_tile_count_triggers(conn: sqlite3.Connection, *, rebuild: bool = True) -> None:
+    """Install the tile counter triggers; the first install rebuilds the counters once."""
+    installed = conn.execute(
+        "SELECT COUNT(1) FROM sqlite_master WHERE type='trigger' AND name LIKE 'places_tile_counts_%'"
+    ).fetchone()[0]
+    if installed == 3:
+        return
+    conn.executescript(_TILE_COUNT_TRIGGERS)
+    # counters written before the triggers existed were per-run stats, not place totals
+    if rebuild:
+        rebuild_tile_counts(conn)
+
+
+def rebuild_tile_counts(
+    conn: sqlite3.Connection,
+    city: Optional[str] = None,
+    query: Optional[str] = None,
+    tile_index: Optional[int] = None,
+) -> int:
+    """Recompute tile counters from places in one GROUP BY pass (repair / migration).
+
+    Scoped to ``city`` / ``query`` / ``tile_index`` when given. Returns the
+    number of tiles that have places.
+    """
+    where, params = [], {}
+    for col, val in (("city", city), ("query", query), ("tile_index", tile_index)):
+        if val is not None:
+            where.append(f"{col}=:{col}")
+            params[col] = int(val) if col == "tile_index" else val
+    scope = (" WHERE " + " AND ".join(where)) if where else ""
+    grouped = (
+        "SELECT city, query, tile_index,"
+        " SUM(COALESCE(status, '') IN ('', 'success')) AS ok, SUM(status IS 'failed') AS bad"
+        f" FROM places{scope} GROUP BY city, query, tile_index"
+    )
+    conn.execute(f"UPDATE tiles SET processed_count=0, failed_count=0{scope}", params)
+    if sqlite3.sqlite_version_info >= (3, 33, 0):
+        cur = conn.execute(
+            f"""
+            UPDATE tiles SET processed_count=c.ok, failed_count=c.bad
+            FROM ({grouped}) AS c
+            WHERE tiles.city=c.city AND tiles.query=c.query AND tiles.tile_index=c.tile_index
+            """,
+            params,
+        )
+        n = cur.rowcount
+    else:  # pragma: no cover - UPDATE ... FROM needs SQLite 3.33
+        rows = conn.execute(grouped, params).fetchall()
+        conn.executemany(
+            "UPDATE tiles SET processed_count=?, failed_count=? WHERE city=? AND query=? AND tile_index=?",
+            [(ok, bad, c, q, i) for (c, q, i, ok, bad) in rows],
+        )
+        n = len(rows)
+    conn.commit()
+    return n
 
 
 def start_run(conn: sqlite3.Connection, run_id: str, *, city: str, country: Optional[str], query: str, zoom: int, language: str) -> None:
@@ -184,6 +324,7 @@ def update_run_meta(
 
 
 def reset_in_progress(conn: sqlite3.Connection, city: str, query: str) -> None:
+    """Single-process only: also resets tiles other live crawlers hold. Prefer reclaim_expired_leases."""
     conn.execute(
         "UPDATE tiles SET status='pending' WHERE city=:city AND query=:query AND status='in_progress'",
         {"city": city, "query": query},
@@ -191,12 +332,145 @@ def reset_in_progress(conn: sqlite3.Connection, city: str, query: str) -> None:
     conn.commit()
 
 
+def reclaim_expired_leases(conn: sqlite3.Connection, city: str, query: str, *, now: Optional[float] = None) -> int:
+    """Return in_progress tiles whose lease expired (or that never had one) to 'pending'."""
+    cur = conn.execute(
+        "UPDATE tiles SET status='pending', lease_owner=NULL, lease_expires_at=NULL "
+        "WHERE city=:city AND query=:query AND status='in_progress' "
+        "AND (lease_expires_at IS NULL OR lease_expires_at < :now)",
+        {"city": city, "query": query, "now": float(now if now is not None else time.time())},
+    )
+    conn.commit()
+    return cur.rowcount
+
+
+def claim_tile(
+    conn: sqlite3.Connection,
+    city: str,
+    query: str,
+    *,
+    owner: str,
+    lease_s: float,
+    max_attempts: Optional[int] = 3,
+    tile_index: Optional[int] = None,
+    now: Optional[float] = None,
+) -> Optional[dict]:
+    """Atomically lease the next runnable tile (or ``tile_index``) to ``owner``.
+
+    Runnable: pending, failed with attempts left (``max_attempts=None``: no
+    limit), or in_progress with an expired lease. Pending tiles go first, read
+    off the ``tiles_claim`` index so a claim stays O(log n) under the write
+    lock; retries are only looked for once nothing is pending. Within each
+    group: highest priority first, then visit_order (tile_index when unset).
+    Returns the tile row or None when nothing is left to claim.
+    """
+    now = float(now if now is not None else time.time())
+    params = {"city": city, "query": query, "now": now, "max_attempts": int(max_attempts) if max_attempts is not None else 1 << 30}
+    failed = "status='failed' AND COALESCE(attempts, 0) < :max_attempts"
+    expired = "status='in_progress' AND (lease_expires_at IS NULL OR lease_expires_at < :now)"
+    if tile_index is not None:
+        params["tile_index"] = int(tile_index)
+        passes = [[f"tile_index=:tile_index AND (status='pending' OR ({failed}) OR ({expired}))"]]
+    else:
+        # one index walk per status; the retry pass takes the better of its two heads
+        passes = [["status='pending'"], [failed, expired]]
+    conn.commit()
+    # IMMEDIATE takes the write lock up front so two claimers cannot pick the same row
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        tile = None
+        for wheres in passes:
+            heads = []
+            for where in wheres:
+                cur = conn.execute(
+                    f"""
+                    SELECT tile_index, tile_row, tile_col, tile_center_lat, tile_center_lng, tile_url,
+                           status, depth, priority, attempts, visit_order
+                    FROM tiles WHERE city=:city AND query=:query AND {where}
+                    ORDER BY COALESCE(priority, 0) DESC, COALESCE(visit_order, tile_index) ASC, tile_index ASC LIMIT 1
+                    """,
+                    params,
+                )
+                row = cur.fetchone()
+                if row is not None:
+                    heads.append(dict(zip([c[0] for c in cur.description], row)))
+            if heads:
+                tile = min(heads, key=lambda t: (-(t["priority"] or 0), t["visit_order"] if t["visit_order"] is not None else t["tile_index"], t["tile_index"]))
+                break
+        if tile is None:
+            conn.commit()
+            return None
+        conn.execute(
+            "UPDATE tiles SET status='in_progress', lease_owner=:owner, lease_expires_at=:expires, "
+            "attempts=COALESCE(attempts, 0) + 1, updated_at=:updated_at "
+            "WHERE city=:city AND query=:query AND tile_index=:tile_index",
+            {
+                "owner": owner,
+                "expires": now + float(lease_s),
+                "updated_at": datetime.now(timezone.utc).isoformat(),
+                "city": city,
+                "query": query,
+                "tile_index": int(tile["tile_index"]),
+            },
+        )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    tile["attempts"] = int(tile.get("attempts") or 0) + 1
+    return tile
+
+
+def renew_leases(conn: sqlite3.Connection, owner: str, lease_s: float, *, now: Optional[float] = None) -> int:
+    """Heartbeat: extend every in_progress lease held by ``owner``; returns the number renewed."""
+    cur = conn.execute(
+        "UPDATE tiles SET lease_expires_at=:expires WHERE lease_owner=:owner AND status='in_progress'",
+        {"expires": float(now if now is not None else time.time()) + float(lease_s), "owner": owner},
+    )
+    conn.commit()
+    return cur.rowcount
+
+
+def release_leases(conn: sqlite3.Connection, owner: str) -> int:
+    """Hand ``owner``'s unfinished tiles back to 'pending' (clean shutdown)."""
+    cur = conn.execute(
+        "UPDATE tiles SET status='pending', lease_owner=NULL, lease_expires_at=NULL "
+        "WHERE lease_owner=:owner AND status='in_progress'",
+        {"owner": owner},
+    )
+    conn.commit()
+    return cur.rowcount
+
+
+def get_export_watermark(conn: sqlite3.Connection, name: str) -> Optional[str]:
+    """Highest ``places.extracted_at`` already exported by incremental export ``name``."""
+    row = conn.execute("SELECT watermark FROM export_watermarks WHERE name=?", (name,)).fetchone()
+    return row[0] if row else None
+
+
+def set_export_watermark(conn: sqlite3.Connection, name: str, watermark: str, rows: int) -> None:
+    conn.execute(
+        """
+        INSERT INTO export_watermarks(name, watermark, exported_at, rows) VALUES (?, ?, ?, ?)
+        ON CONFLICT(name) DO UPDATE SET watermark=excluded.watermark, exported_at=excluded.exported_at, rows=excluded.rows
+        """,
+        (name, watermark, datetime.now(timezone.utc).isoformat(), int(rows)),
+    )
+    conn.commit()
+
+
 def init_tiles(
     conn: sqlite3.Connection,
     city: str,
     query: str,
-    points: Iterable[tuple[int, int, int, float, float, str, int, int, float, float]],
+    points: Iterable[tuple[int, int, int, float, float, Optional[str], int, int, float, float]],
 ) -> None:
+    """Insert/refresh grid tiles (tile_index, row, col, lat, lng, url, win_w, win_h, vp_w, vp_h).
+
+    ``points`` is consumed lazily by executemany, so a generator over a grid
+    chunk never materialises per-row objects. A None url is built when the
+    tile is claimed (an existing url is kept).
+    """
     now = datetime.now(timezone.utc).isoformat()
     conn.executemany(
         """
@@ -206,40 +480,23 @@ def init_tiles(
             window_width_px, window_height_px, viewport_width_px, viewport_height_px,
             status, updated_at
         )
-        VALUES (:city, :query, :tile_index, :tile_row, :tile_col,
-                :tile_center_lat, :tile_center_lng, :tile_url,
-                :window_width_px, :window_height_px, :viewport_width_px, :viewport_height_px,
-                'pending', :updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 'pending', ?)
         ON CONFLICT(city, query, tile_index) DO UPDATE SET
             tile_row=excluded.tile_row,
             tile_col=excluded.tile_col,
             tile_center_lat=excluded.tile_center_lat,
             tile_center_lng=excluded.tile_center_lng,
-            tile_url=excluded.tile_url,
+            tile_url=COALESCE(excluded.tile_url, tiles.tile_url),
             window_width_px=excluded.window_width_px,
             window_height_px=excluded.window_height_px,
             viewport_width_px=excluded.viewport_width_px,
             viewport_height_px=excluded.viewport_height_px,
             updated_at=excluded.updated_at
         """,
-        [
-            {
-                "city": city,
-                "query": query,
-                "tile_index": idx,
-                "tile_row": r,
-                "tile_col": c,
-                "tile_center_lat": float(lat),
-                "tile_center_lng": float(lng),
-                "tile_url": url,
-                "window_width_px": int(win_w),
-                "window_height_px": int(win_h),
-                "viewport_width_px": float(vp_w),
-                "viewport_height_px": float(vp_h),
-                "updated_at": now,
-            }
+        (
+            (city, query, int(idx), int(r), int(c), float(lat), float(lng), url, int(win_w), int(win_h), float(vp_w), float(vp_h), now)
             for (idx, r, c, lat, lng, url, win_w, win_h, vp_w, vp_h) in points
-        ],
+        ),
     )
     conn.commit()
 
@@ -263,17 +520,21 @@ def set_tile_in_progress(
     tile_col: int,
     lat: float,
     lng: float,
+    owner: Optional[str] = None,
+    lease_s: Optional[float] = None,
 ) -> None:
     now = datetime.now(timezone.utc).isoformat()
+    expires = time.time() + float(lease_s) if (owner and lease_s) else None
     conn.execute(
         """
-        INSERT INTO tiles(city, query, tile_index, tile_row, tile_col, tile_center_lat, tile_center_lng, result_count, status, updated_at, last_error)
-        VALUES (:city, :query, :tile_index, :tile_row, :tile_col, :tile_center_lat, :tile_center_lng, 0, 'in_progress', :updated_at, NULL)
+        INSERT INTO tiles(city, query, tile_index, tile_row, tile_col, tile_center_lat, tile_center_lng, result_count, status, updated_at, last_error, lease_owner, lease_expires_at)
+        VALUES (:city, :query, :tile_index, :tile_row, :tile_col, :tile_center_lat, :tile_center_lng, 0, 'in_progress', :updated_at, NULL, :owner, :expires)
         ON CONFLICT(city, query, tile_index) DO UPDATE SET
             status='in_progress', tile_row=excluded.tile_row, tile_col=excluded.tile_col,
             tile_center_lat=excluded.tile_center_lat, tile_center_lng=excluded.tile_center_lng,
             result_count=0,
-            updated_at=excluded.updated_at, last_error=NULL
+            updated_at=excluded.updated_at, last_error=NULL,
+            lease_owner=excluded.lease_owner, lease_expires_at=excluded.lease_expires_at
         """,
         {
             "city": city,
@@ -284,19 +545,21 @@ def set_tile_in_progress(
             "tile_center_lat": float(lat),
             "tile_center_lng": float(lng),
             "updated_at": now,
+            "owner": owner,
+            "expires": expires,
         },
     )
     conn.commit()
 
 
 def set_tile_completed(conn: sqlite3.Connection, city: str, query: str, tile_index: int, *, result_count: int, processed_count: int = 0, failed_count: int = 0) -> None:
+    # processed_count / failed_count are this run's stats (logged by the caller); the tile
+    # columns are maintained by the places triggers and are not overwritten here
     now = datetime.now(timezone.utc).isoformat()
     conn.execute(
-        "UPDATE tiles SET status='completed', result_count=:result_count, processed_count=:processed_count, failed_count=:failed_count, updated_at=:updated_at WHERE city=:city AND query=:query AND tile_index=:tile_index",
+        "UPDATE tiles SET status='completed', result_count=:result_count, updated_at=:updated_at, lease_owner=NULL, lease_expires_at=NULL WHERE city=:city AND query=:query AND tile_index=:tile_index",
         {
             "result_count": int(result_count),
-            "processed_count": int(processed_count),
-            "failed_count": int(failed_count),
             "updated_at": now,
             "city": city,
             "query": query,
@@ -309,7 +572,7 @@ def set_tile_completed(conn: sqlite3.Connection, city: str, query: str, tile_ind
 def set_tile_failed(conn: sqlite3.Connection, city: str, query: str, tile_index: int, error_text: str) -> None:
     now = datetime.now(timezone.utc).isoformat()
     conn.execute(
-        "UPDATE tiles SET status='failed', updated_at=:updated_at, last_error=:last_error WHERE city=:city AND query=:query AND tile_index=:tile_index",
+        "UPDATE tiles SET status='failed', updated_at=:updated_at, last_error=:last_error, lease_owner=NULL, lease_expires_at=NULL WHERE city=:city AND query=:query AND tile_index=:tile_index",
         {"updated_at": now, "last_error": error_text, "city": city, "query": query, "tile_index": int(tile_index)},
     )
     conn.commit()
@@ -332,10 +595,10 @@ def list_tiles(conn: sqlite3.Connection, city: str, query: str) -> list[dict]:
                tile_center_lat, tile_center_lng,
                tile_url, window_width_px, window_height_px,
                viewport_width_px, viewport_height_px,
-               status
+               status, result_count, parent_index, depth, priority, visit_order
         FROM tiles
         WHERE city=:city AND query=:query
-        ORDER BY tile_index ASC
+        ORDER BY COALESCE(visit_order, tile_index) ASC, tile_index ASC
         """,
         {"city": city, "query": query},
     )
@@ -343,6 +606,148 @@ def list_tiles(conn: sqlite3.Connection, city: str, query: str) -> list[dict]:
     return [dict(zip(cols, row)) for row in cur.fetchall()]
 
 
+def iter_tiles(conn: sqlite3.Connection, city: str, query: str, *, page_size: int = 1000) -> Iterator[dict]:
+    """Tiles in visit order (``COALESCE(visit_order, tile_index)``), fetched ``page_size`` rows at a time.
+
+    Keyset pagination: no cursor stays open between pages, so the caller may
+    write through the same connection while iterating.
+    """
+    after: tuple[int, int] = (-(1 << 62), -(1 << 62))
+    while True:
+        cur = conn.execute(
+            """
+            SELECT tile_index, tile_row, tile_col,
+                   tile_center_lat, tile_center_lng,
+                   tile_url, window_width_px, window_height_px,
+                   viewport_width_px, viewport_height_px,
+                   status, result_count, parent_index, depth, priority, visit_order,
+                   COALESCE(visit_order, tile_index) AS seq
+            FROM tiles
+            WHERE city=:city AND query=:query
+              AND COALESCE(visit_order, tile_index) >= :seq
+              AND (COALESCE(visit_order, tile_index) > :seq OR tile_index > :tile_index)
+            ORDER BY COALESCE(visit_order, tile_index) ASC, tile_index ASC
+            LIMIT :limit
+            """,
+            {"city": city, "query": query, "seq": after[0], "tile_index": after[1], "limit": int(page_size)},
+        )
+        cols = [c[0] for c in cur.description]
+        rows = [dict(zip(cols, row)) for row in cur.fetchall()]
+        if not rows:
+            return
+        yield from rows
+        after = (int(rows[-1]["seq"]), int(rows[-1]["tile_index"]))
+
+
+def iter_tile_lattice(conn: sqlite3.Connection, city: str, query: str, *, chunk_size: int = 50_000) -> Iterator[list[tuple[int, int, int, int, int]]]:
+    """(tile_index, row, col, depth, result_count) of every tile, in lists of ``chunk_size`` (for ordering)."""
+    cur = conn.execute(
+        "SELECT tile_index, tile_row, tile_col, COALESCE(depth, 0), COALESCE(result_count, 0) FROM tiles "
+        "WHERE city=:city AND query=:query",
+        {"city": city, "query": query},
+    )
+    while True:
+        rows = cur.fetchmany(chunk_size)
+        if not rows:
+            return
+        yield rows
+
+
+def count_tiles_by_status(conn: sqlite3.Connection, city: str, query: str) -> dict[str, int]:
+    cur = conn.execute(
+        "SELECT COALESCE(status, ''), COUNT(*) FROM tiles WHERE city=:city AND query=:query GROUP BY 1",
+        {"city": city, "query": query},
+    )
+    return {str(st): int(n) for st, n in cur.fetchall()}
+
+
+def add_child_tiles(
+    conn: sqlite3.Connection,
+    city: str,
+    query: str,
+    *,
+    parent_index: int,
+    children: Iterable[tuple[int, int, int, float, float, str, int, float]],
+) -> None:
+    """Insert quadtree children (tile_index, row, col, lat, lng, url, depth, priority) of a split tile."""
+    now = datetime.now(timezone.utc).isoformat()
+    conn.executemany(
+        """
+        INSERT OR IGNORE INTO tiles(
+            city, query, tile_index, tile_row, tile_col,
+            tile_center_lat, tile_center_lng, tile_url,
+            parent_index, depth, priority, status, updated_at
+        )
+        VALUES (:city, :query, :tile_index, :tile_row, :tile_col,
+                :tile_center_lat, :tile_center_lng, :tile_url,
+                :parent_index, :depth, :priority, 'pending', :updated_at)
+        """,
+        [
+            {
+                "city": city,
+                "query": query,
+                "tile_index": int(idx),
+                "tile_row": int(r),
+                "tile_col": int(c),
+                "tile_center_lat": float(lat),
+                "tile_center_lng": float(lng),
+                "tile_url": url,
+                "parent_index": int(parent_index),
+                "depth": int(depth),
+                "priority": float(priority),
+                "updated_at": now,
+            }
+            for (idx, r, c, lat, lng, url, depth, priority) in children
+        ],
+    )
+    conn.commit()
+
+
+def set_tile_priority(conn: sqlite3.Connection, city: str, query: str, tile_index: int, priority: float) -> None:
+    conn.execute(
+        "UPDATE tiles SET priority=:priority WHERE city=:city AND query=:query AND tile_index=:tile_index",
+        {"priority": float(priority), "city": city, "query": query, "tile_index": int(tile_index)},
+    )
+    conn.commit()
+
+
+def set_tile_visit_order(conn: sqlite3.Connection, city: str, query: str, orders: Iterable[tuple[int, int]]) -> None:
+    """Store (tile_index, visit_order) pairs computed by ``pipeline.city.ordering``."""
+    conn.executemany(
+        "UPDATE tiles SET visit_order=:visit_order WHERE city=:city AND query=:query AND tile_index=:tile_index",
+        [{"visit_order": int(seq), "city": city, "query": query, "tile_index": int(idx)} for idx, seq in orders],
+    )
+    conn.commit()
+
+
+def skip_tile(conn: sqlite3.Connection, city: str, query: str, tile_index: int, reason: str) -> None:
+    """Close a pending tile without crawling it (e.g. surrounded by empty tiles)."""
+    now = datetime.now(timezone.utc).isoformat()
+    conn.execute(
+        "UPDATE tiles SET status='completed', result_count=0, updated_at=:updated_at, last_error=:last_error "
+        "WHERE city=:city AND query=:query AND tile_index=:tile_index AND status='pending'",
+        {"updated_at": now, "last_error": reason, "city": city, "query": query, "tile_index": int(tile_index)},
+    )
+    conn.commit()
+
+
+def get_grid_meta(conn: sqlite3.Connection, city: str, query: str) -> Optional[dict]:
+    """Cell size of the latest run that generated the grid for city/query."""
+    cur = conn.execute(
+        """
+        SELECT cell_width_km, cell_height_km, overlap_ratio, zoom FROM runs
+        WHERE city=:city AND query=:query AND cell_width_km IS NOT NULL AND cell_height_km IS NOT NULL
+        ORDER BY started_at DESC LIMIT 1
+        """,
+        {"city": city, "query": query},
+    )
+    row = cur.fetchone()
+    if not row:
+        return None
+    cols = [c[0] for c in cur.description]
+    return dict(zip(cols, row))
+
+
 def update_tile_url(conn: sqlite3.Connection, city: str, query: str, tile_index: int, tile_url: str) -> None:
     now = datetime.now(timezone.utc).isoformat()
     conn.execute(
@@ -536,6 +941,69 @@ def upsert_place_failure(
     conn.commit()
 
 
+def update_place_fields(
+    conn: sqlite3.Connection,
+    place_id: str,
+    *,
+    address: str,
+    phone: Optional[str] = None,
+    plus_code: Optional[str] = None,
+    website: Optional[str] = None,
+    open_time: Optional[str] = None,
+) -> None:
+    """Overwrite the DOM-extracted fields of an existing place (offline re-extraction).
+
+    A non-empty address makes the row a success; network-derived columns
+    (social_media_urls, emails_phones_socials) are left untouched.
+    """
+    conn.execute(
+        """
+        UPDATE places SET
+            address=:address, phone=:phone, plus_code=:plus_code, website=:website, open_time=:open_time,
+            status='success', last_error='', extracted_at=:extracted_at
+        WHERE place_id=:place_id
+        """,
+        {
+            "place_id": place_id,
+            "address": address,
+            "phone": phone or "",
+            "plus_code": plus_code or "",
+            "website": website or "",
+            "open_time": open_time or "",
+            "extracted_at": datetime.now(timezone.utc).isoformat(),
+        },
+    )
+    conn.commit()
+
+
+def get_contact_cache(conn: sqlite3.Connection, url_key: str) -> Optional[dict]:
+    cur = conn.execute(
+        "SELECT url_key, url, result_json, content_sha256, fetched_at FROM contact_cache WHERE url_key=:url_key",
+        {"url_key": url_key},
+    )
+    row = cur.fetchone()
+    if not row:
+        return None
+    cols = [c[0] for c in cur.description]
+    return dict(zip(cols, row))
+
+
+def put_contact_cache(conn: sqlite3.Connection, *, url_key: str, url: str, result_json: str, content_sha256: str, fetched_at: str) -> None:
+    conn.execute(
+        """
+        INSERT INTO contact_cache(url_key, url, result_json, content_sha256, fetched_at)
+        VALUES (:url_key, :url, :result_json, :content_sha256, :fetched_at)
+        ON CONFLICT(url_key) DO UPDATE SET
+            url=excluded.url,
+            result_json=excluded.result_json,
+            content_sha256=excluded.content_sha256,
+            fetched_at=excluded.fetched_at
+        """,
+        {"url_key": url_key, "url": url, "result_json": result_json, "content_sha256": content_sha256, "fetched_at": fetched_at},
+    )
+    conn.commit()
+
+
 def get_place_by_id(conn: sqlite3.Connection, place_id: str) -> Optional[dict]:
     cur = conn.execute(
         """
@@ -552,32 +1020,214 @@ def get_place_by_id(conn: sqlite3.Connection, place_id: str) -> Optional[dict]:
 
 
 def update_tile_counts(conn: sqlite3.Connection, city: str, query: str, tile_index: int) -> None:
-    now = datetime.now(timezone.utc).isoformat()
-    conn.execute(
-        """
-        UPDATE tiles SET
-            processed_count = (
-                SELECT COUNT(1) FROM places p
-                WHERE p.city=tiles.city AND p.query=tiles.query AND p.tile_index=tiles.tile_index
-                  AND (p.status IS NULL OR p.status='' OR p.status='success')
-            ),
-            failed_count = (
-                SELECT COUNT(1) FROM places p
-                WHERE p.city=tiles.city AND p.query=tiles.query AND p.tile_index=tiles.tile_index
-                  AND p.status='failed'
-            ),
-            updated_at = :updated_at
-        WHERE city=:city AND query=:query AND tile_index=:tile_index
-        """,
-        {"updated_at": now, "city": city, "query": query, "tile_index": int(tile_index)},
-    )
-    conn.commit()
+    """Recount one tile from places (the triggers keep it current; this is a repair)."""
+    rebuild_tile_counts(conn, city, query, tile_index)
+
+
+class _DeferredCommitConnection:
+    """Connection proxy handed to write functions by the batch writer.
+
+    ``commit()`` is a no-op so that the writer can group many statements into
+    a single transaction; everything else is delegated to the real connection.
+    """
+
+    def __init__(self, conn: sqlite3.Connection) -> None:
+        self._conn = conn
+
+    def execute(self, *args, **kwargs) -> sqlite3.Cursor:
+        return self._conn.execute(*args, **kwargs)
+
+    def executemany(self, *args, **kwargs) -> sqlite3.Cursor:
+        return self._conn.executemany(*args, **kwargs)
+
+    def commit(self) -> None:
+        pass
+
+
+_FLUSH = object()
+
+
+class BatchWriter:
+    """Single writer thread with group commit.
+
+    Write functions (``fn(conn, *args, **kwargs)``) are queued and executed on
+    a dedicated connection; the transaction is committed every ``batch_size``
+    statements or every ``flush_interval_ms`` milliseconds, whichever comes
+    first. Each submission returns a Future resolved once its row is durable.
+    Pending rows are flushed immediately once STOP_EVENT is set.
+    """
+
+    def __init__(self, db_path: Path, *, batch_size: Optional[int] = None, flush_interval_ms: Optional[float] = None) -> None:
+        self.db_path = db_path
+        self.batch_size = max(1, int(batch_size or settings.DB_BATCH_SIZE))
+        self.flush_interval = max(0.0, float(flush_interval_ms if flush_interval_ms is not None else settings.DB_BATCH_INTERVAL_MS)) / 1000.0
+        self._q: "queue.Queue[Any]" = queue.Queue()
+        self._closed = False
+        self._lock = threading.Lock()
+        self.commits = 0
+        self.rows = 0
+        self._t = threading.Thread(target=self._loop, name="DBBatchWriter", daemon=True)
+        self._t.start()
+
+    def submit(self, fn: Callable[..., None], *args, **kwargs) -> "Future[None]":
+        fut: "Future[None]" = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("BatchWriter is closed")
+            self._q.put((fn, args, kwargs, fut))
+        return fut
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """Block until everything submitted so far is committed."""
+        fut: "Future[None]" = Future()
+        with self._lock:
+            if self._closed:
+                return
+            self._q.put((_FLUSH, (), {}, fut))
+        fut.result(timeout=timeout)
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._q.put(None)
+        self._t.join(timeout=timeout)
+
+    def _loop(self) -> None:
+        conn = get_connection(self.db_path)
+        proxy = _DeferredCommitConnection(conn)
+        pending: List["Future[None]"] = []
+        deadline = 0.0
+        try:
+            while True:
+                wait = max(0.0, deadline - time.monotonic()) if pending else 0.2
+                try:
+                    item = self._q.get(timeout=wait)
+                except queue.Empty:
+                    # flush interval elapsed (or idle tick)
+                    self._commit(conn, pending)
+                    continue
+                if item is None:
+                    break
+                fn, args, kwargs, fut = item
+                if fn is _FLUSH:
+                    self._commit(conn, pending)
+                    fut.set_result(None)
+                    continue
+                if not pending:
+                    deadline = time.monotonic() + self.flush_interval
+                try:
+                    self._apply(conn, proxy, fn, args, kwargs)
+                except Exception as e:
+                    fut.set_exception(e)
+                else:
+                    pending.append(fut)
+                if len(pending) >= self.batch_size or time.monotonic() >= deadline or STOP_EVENT.is_set():
+                    self._commit(conn, pending)
+        finally:
+            self._commit(conn, pending)
+            conn.close()
+
+    @staticmethod
+    def _apply(conn: sqlite3.Connection, proxy: "_DeferredCommitConnection", fn: Callable[..., None], args: tuple, kwargs: dict) -> None:
+        """Run one write function inside a savepoint so a failure undoes only its own statements."""
+        if not conn.in_transaction:
+            # an outermost SAVEPOINT would commit on RELEASE; keep the group transaction open instead
+            conn.execute("BEGIN")
+        conn.execute("SAVEPOINT w")
+        try:
+            fn(proxy, *args, **kwargs)
+        except BaseException:
+            conn.execute("ROLLBACK TO w")
+            conn.execute("RELEASE w")
+            raise
+        conn.execute("RELEASE w")
+
+    def _commit(self, conn: sqlite3.Connection, pending: List["Future[None]"]) -> None:
+        if not pending:
+            return
+        try:
+            with stage("db_commit"):
+                conn.commit()
+        except Exception as e:
+            try:
+                conn.rollback()
+            except Exception:
+                pass
+            for fut in pending:
+                fut.set_exception(e)
+        else:
+            self.commits += 1
+            self.rows += len(pending)
+            for fut in pending:
+                fut.set_result(None)
+        pending.clear()
 
 
 class DB:
-    def __init__(self, db_path: Path) -> None:
+    """Thin facade over the module-level SQL helpers.
+
+    With ``batched=True`` all per-row writes go through a :class:`BatchWriter`
+    and return a durability Future instead of committing synchronously; reads
+    still use ``self.conn`` and only see rows once they are flushed.
+
+    When a :class:`KnownPlaceIndex` is attached, ``place_exists`` is answered
+    from memory and the index is updated as place writes land.
+    """
+
+    def __init__(
+        self,
+        db_path: Path,
+        *,
+        batched: bool = False,
+        batch_size: Optional[int] = None,
+        flush_interval_ms: Optional[float] = None,
+        known_places: Optional[KnownPlaceIndex] = None,
+    ) -> None:
+        self.db_path = db_path
+        self.known_places = known_places
         self.conn = get_connection(db_path)
         init_schema(self.conn)
+        self._writer: Optional[BatchWriter] = None
+        if batched:
+            self._writer = BatchWriter(db_path, batch_size=batch_size, flush_interval_ms=flush_interval_ms)
+
+    def _write(self, fn: Callable[..., None], *args, **kwargs) -> "Optional[Future[None]]":
+        # stage time is submit -> durable, so batched writes include their wait for the group commit
+        name = f"db_{fn.__name__}"
+        t0 = time.monotonic()
+        if self._writer is not None:
+            labels = current_labels()
+            fut = self._writer.submit(fn, *args, **kwargs)
+            fut.add_done_callback(lambda f: observe("stage_seconds", time.monotonic() - t0, stage=name, **labels))
+            return fut
+        fn(self.conn, *args, **kwargs)
+        observe("stage_seconds", time.monotonic() - t0, stage=name)
+        return None
+
+    def _on_landed(self, fut: "Optional[Future[None]]", apply: Callable[[], None]) -> "Optional[Future[None]]":
+        """Run ``apply`` once the write is durable (immediately in sync mode)."""
+        if fut is None:
+            apply()
+        else:
+            fut.add_done_callback(lambda f: apply() if f.exception() is None else None)
+        return fut
+
+    def load_known_places(self) -> KnownPlaceIndex:
+        """Build the in-memory known-place index once and attach it."""
+        self.known_places = KnownPlaceIndex.load(self.conn)
+        return self.known_places
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        if self._writer is not None:
+            self._writer.flush(timeout=timeout)
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        self.conn.close()
 
     def start_run(self, run_id: str, *, city: str, country: Optional[str], query: str, zoom: int, language: str) -> None:
         start_run(self.conn, run_id, city=city, country=country, query=query, zoom=zoom, language=language)
@@ -585,61 +1235,105 @@ class DB:
     def reset_in_progress(self, city: str, query: str) -> None:
         reset_in_progress(self.conn, city, query)
 
-    def init_tiles(self, city: str, query: str, points: Iterable[tuple[int, int, int, float, float, str, int, int, float, float]]) -> None:
+    def reclaim_expired_leases(self, city: str, query: str) -> int:
+        return reclaim_expired_leases(self.conn, city, query)
+
+    def claim_tile(self, city: str, query: str, *, owner: str, lease_s: float, max_attempts: Optional[int] = 3, tile_index: Optional[int] = None) -> Optional[dict]:
+        # always synchronous: the claim must be visible to other processes before the tile runs
+        return claim_tile(self.conn, city, query, owner=owner, lease_s=lease_s, max_attempts=max_attempts, tile_index=tile_index)
+
+    def renew_leases(self, owner: str, lease_s: float) -> int:
+        return renew_leases(self.conn, owner, lease_s)
+
+    def release_leases(self, owner: str) -> int:
+        return release_leases(self.conn, owner)
+
+    def init_tiles(self, city: str, query: str, points: Iterable[tuple[int, int, int, float, float, Optional[str], int, int, float, float]]) -> None:
         init_tiles(self.conn, city, query, points)
 
     def get_tile_status(self, city: str, query: str, tile_index: int) -> Optional[str]:
         return get_tile_status(self.conn, city, query, tile_index)
 
-    def set_tile_in_progress(self, city: str, query: str, *, tile_index: int, tile_row: int, tile_col: int, lat: float, lng: float) -> None:
-        set_tile_in_progress(self.conn, city, query, tile_index=tile_index, tile_row=tile_row, tile_col=tile_col, lat=lat, lng=lng)
+    def set_tile_in_progress(self, city: str, query: str, *, tile_index: int, tile_row: int, tile_col: int, lat: float, lng: float, owner: Optional[str] = None, lease_s: Optional[float] = None) -> "Optional[Future[None]]":
+        return self._write(set_tile_in_progress, city, query, tile_index=tile_index, tile_row=tile_row, tile_col=tile_col, lat=lat, lng=lng, owner=owner, lease_s=lease_s)
 
-    def set_tile_completed(self, city: str, query: str, tile_index: int, *, result_count: int, processed_count: int = 0, failed_count: int = 0) -> None:
-        set_tile_completed(self.conn, city, query, tile_index, result_count=result_count, processed_count=processed_count, failed_count=failed_count)
+    def set_tile_completed(self, city: str, query: str, tile_index: int, *, result_count: int, processed_count: int = 0, failed_count: int = 0) -> "Optional[Future[None]]":
+        return self._write(set_tile_completed, city, query, tile_index, result_count=result_count, processed_count=processed_count, failed_count=failed_count)
 
-    def set_tile_failed(self, city: str, query: str, tile_index: int, error_text: str) -> None:
-        set_tile_failed(self.conn, city, query, tile_index, error_text)
+    def set_tile_failed(self, city: str, query: str, tile_index: int, error_text: str) -> "Optional[Future[None]]":
+        return self._write(set_tile_failed, city, query, tile_index, error_text)
 
-    def set_tile_note(self, city: str, query: str, tile_index: int, error_text: str) -> None:
-        set_tile_note(self.conn, city, query, tile_index, error_text)
+    def set_tile_note(self, city: str, query: str, tile_index: int, error_text: str) -> "Optional[Future[None]]":
+        return self._write(set_tile_note, city, query, tile_index, error_text)
 
     def list_tiles(self, city: str, query: str) -> list[dict]:
         return list_tiles(self.conn, city, query)
 
-    def update_tile_url(self, city: str, query: str, tile_index: int, tile_url: str) -> None:
-        update_tile_url(self.conn, city, query, tile_index, tile_url)
-
-    def place_exists(self, city: str, query: str, place_id: str) -> bool:
-        return place_exists(self.conn, city, query, place_id)
-
-    def upsert_place(self, *, place_id: str, city: str, query: str, tile_index: int, name: str, href: str, lat: float, lng: float, extracted_at: Optional[str], run_id: str) -> None:
-        upsert_place(self.conn, place_id=place_id, city=city, query=query, tile_index=tile_index, name=name, href=href, lat=lat, lng=lng, extracted_at=extracted_at, run_id=run_id)
-
-    def upsert_place_struct(self, **payload) -> None:
-        upsert_place_struct(self.conn, **payload)
-
-    def upsert_place_failure(self, **payload) -> None:
-        upsert_place_failure(self.conn, **payload)
-
-    def update_run_meta(self, **kwargs) -> None:
-        update_run_meta(self.conn, **kwargs)
-
-    def get_place_by_id(self, place_id: str) -> Optional[dict]:
-        return get_place_by_id(self.conn, place_id)
-
-    def update_tile_counts(self, city: str, query: str, tile_index: int) -> None:
-        update_tile_counts(self.conn, city, query, tile_index)
-
+    def iter_tiles(self, city: str, query: str, *, page_size: int = 1000) -> Iterator[dict]:
+        return iter_tiles(self.conn, city, query, page_size=page_size)
 
+    def iter_tile_lattice(self, city: str, query: str, *, chunk_size: int = 50_000) -> Iterator[list[tuple[int, int, int, int, int]]]:
+        return iter_tile_lattice(self.conn, city, query, chunk_size=chunk_size)
 
+    def count_tiles_by_status(self, city: str, query: str) -> dict[str, int]:
+        return count_tiles_by_status(self.conn, city, query)
 
+    def add_child_tiles(self, city: str, query: str, *, parent_index: int, children: Iterable[tuple[int, int, int, float, float, str, int, float]]) -> "Optional[Future[None]]":
+        return self._write(add_child_tiles, city, query, parent_index=parent_index, children=list(children))
 
+    def set_tile_priority(self, city: str, query: str, tile_index: int, priority: float) -> "Optional[Future[None]]":
+        return self._write(set_tile_priority, city, query, tile_index, priority)
 
+    def set_tile_visit_order(self, city: str, query: str, orders: Iterable[tuple[int, int]]) -> "Optional[Future[None]]":
+        return self._write(set_tile_visit_order, city, query, list(orders))
 
+    def skip_tile(self, city: str, query: str, tile_index: int, reason: str) -> "Optional[Future[None]]":
+        return self._write(skip_tile, city, query, tile_index, reason)
 
+    def get_grid_meta(self, city: str, query: str) -> Optional[dict]:
+        return get_grid_meta(self.conn, city, query)
 
+    def update_tile_url(self, city: str, query: str, tile_index: int, tile_url: str) -> "Optional[Future[None]]":
+        return self._write(update_tile_url, city, query, tile_index, tile_url)
 
+    def place_exists(self, city: str, query: str, place_id: str) -> bool:
+        if self.known_places is not None:
+            return place_id in self.known_places
+        return place_exists(self.conn, city, query, place_id)
 
+    def upsert_place(self, *, place_id: str, city: str, query: str, tile_index: int, name: str, href: str, lat: float, lng: float, extracted_at: Optional[str], run_id: str) -> "Optional[Future[None]]":
+        return self._write(upsert_place, place_id=place_id, city=city, query=query, tile_index=tile_index, name=name, href=href, lat=lat, lng=lng, extracted_at=extracted_at, run_id=run_id)
+
+    def upsert_place_struct(self, **payload) -> "Optional[Future[None]]":
+        fut = self._write(upsert_place_struct, **payload)
+        if self.known_places is not None:
+            index, pid = self.known_places, str(payload.get("place_id") or "")
+            self._on_landed(fut, lambda: index.add(pid))
+        return fut
+
+    def upsert_place_failure(self, **payload) -> "Optional[Future[None]]":
+        fut = self._write(upsert_place_failure, **payload)
+        if self.known_places is not None:
+            index, pid = self.known_places, str(payload.get("place_id") or "")
+            self._on_landed(fut, lambda: index.discard(pid))
+        return fut
+
+    def update_run_meta(self, **kwargs) -> "Optional[Future[None]]":
+        return self._write(update_run_meta, **kwargs)
+
+    def update_place_fields(self, place_id: str, **fields) -> "Optional[Future[None]]":
+        fut = self._write(update_place_fields, place_id, **fields)
+        if self.known_places is not None:
+            index = self.known_places
+            self._on_landed(fut, lambda: index.add(place_id))
+        return fut
 
+    def get_place_by_id(self, place_id: str) -> Optional[dict]:
+        return get_place_by_id(self.conn, place_id)
 
+    def update_tile_counts(self, city: str, query: str, tile_index: int) -> "Optional[Future[None]]":
+        return self._write(update_tile_counts, city, query, tile_index)
 
+    def rebuild_tile_counts(self, city: Optional[str] = None, query: Optional[str] = None) -> int:
+        self.flush()
+        return rebuild_tile_counts(self.conn, city, query)
@@ -0,0 +1,321 @@
+"""
+Streaming export of the ``places`` table to Parquet, Arrow IPC, JSONL or CSV.
+
+Rows are read with ``cursor.fetchmany(batch_rows)`` and handed batch by batch
+to a sink, so memory stays bounded by one batch whatever the table size:
+
+- ``parquet``: one row group per batch, typed columns (pyarrow)
+- ``arrow``: Arrow IPC file, one record batch per batch (pyarrow)
+- ``jsonl``: one JSON object per line
+- ``csv``: header + rows, utf-8-sig like ``storage/csv_writer``
+
+Filters: city / query / run_id / status and ``since`` (``extracted_at``).
+With ``incremental=NAME`` only rows newer than the watermark stored under
+NAME in ``export_watermarks`` are written and the watermark is advanced.
+
+Usage:
+  python -m gmaps_crawler.storage.export --out data/export/places.parquet --city Paris
+  python -m gmaps_crawler.storage.export --out data/export/delta.jsonl --incremental nightly
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import sqlite3
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from logger import writer_thread_logger as logger
+
+from gmaps_crawler.storage.db import get_connection, get_export_watermark, init_schema, set_export_watermark
+
+try:  # parquet / arrow sinks only
+    import pyarrow as pa  # type: ignore
+    import pyarrow.parquet as pq  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    pa = None  # type: ignore
+    pq = None  # type: ignore
+
+# places columns and their export types
+PLACE_COLUMNS: Dict[str, str] = {
+    "place_id": "string",
+    "city": "string",
+    "query": "string",
+    "tile_index": "int64",
+    "name": "string",
+    "href": "string",
+    "lat": "float64",
+    "lng": "float64",
+    "address": "string",
+    "location": "string",
+    "phone": "string",
+    "plus_code": "string",
+    "website": "string",
+    "social_media_urls": "string",
+    "open_time": "string",
+    "emails_phones_socials": "string",
+    "status": "string",
+    "last_error": "string",
+    "warnings": "string",
+    "extracted_at": "string",
+    "run_id": "string",
+}
+
+FORMATS = ("parquet", "arrow", "jsonl", "csv")
+_SUFFIXES = {".parquet": "parquet", ".pq": "parquet", ".arrow": "arrow", ".feather": "arrow", ".ipc": "arrow",
+             ".jsonl": "jsonl", ".ndjson": "jsonl", ".csv": "csv"}
+
+# rows stamped this close to "now" wait for the next incremental run: extracted_at is
+# taken before the batched write commits, so a late commit could land behind the watermark
+WATERMARK_LAG_S = 30.0
+
+
+@dataclass
+class ExportResult:
+    path: Path
+    format: str
+    rows: int
+    batches: int
+    watermark: Optional[str]
+
+
+# ---- sinks ----
+class Sink:
+    def __init__(self, path: Path, columns: Sequence[str]) -> None:
+        self.path = Path(path)
+        self.columns = list(columns)
+
+    def write(self, rows: List[tuple]) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class CsvSink(Sink):
+    def __init__(self, path: Path, columns: Sequence[str]) -> None:
+        super().__init__(path, columns)
+        self._fh = self.path.open("w", newline="", encoding="utf-8-sig")
+        self._writer = csv.writer(self._fh)
+        self._writer.writerow(self.columns)
+
+    def write(self, rows: List[tuple]) -> None:
+        self._writer.writerows(rows)
+
+    def close(self) -> None:
+        self._fh.close()
+
+
+class JsonlSink(Sink):
+    def __init__(self, path: Path, columns: Sequence[str]) -> None:
+        super().__init__(path, columns)
+        self._fh = self.path.open("w", encoding="utf-8")
+
+    def write(self, rows: List[tuple]) -> None:
+        cols = self.columns
+        dumps = json.dumps
+        self._fh.write("".join(dumps(dict(zip(cols, r)), ensure_ascii=False) + "\n" for r in rows))
+
+    def close(self) -> None:
+        self._fh.close()
+
+
+def arrow_schema(columns: Sequence[str]):
+    types = {"string": pa.string(), "int64": pa.int64(), "float64": pa.float64()}
+    return pa.schema([(c, types[PLACE_COLUMNS.get(c, "string")]) for c in columns])
+
+
+class _ArrowSinkBase(Sink):
+    def __init__(self, path: Path, columns: Sequence[str]) -> None:
+        if pa is None:
+            raise RuntimeError("pyarrow is required for parquet/arrow export (pip install pyarrow)")
+        super().__init__(path, columns)
+        self.schema = arrow_schema(self.columns)
+
+    def _batch(self, rows: List[tuple]):
+        arrays = [pa.array([r[i] for r in rows], type=f.type) for i, f in enumerate(self.schema)]
+        return pa.RecordBatch.from_arrays(arrays, schema=self.schema)
+
+
+class ParquetSink(_ArrowSinkBase):
+    def __init__(self, path: Path, columns: Sequence[str], *, compression: str = "zstd") -> None:
+        super().__init__(path, columns)
+        self._writer = pq.ParquetWriter(str(self.path), self.schema, compression=compression)
+
+    def write(self, rows: List[tuple]) -> None:
+        # one row group per fetched batch
+        self._writer.write_batch(self._batch(rows), row_group_size=len(rows))
+
+    def close(self) -> None:
+        self._writer.close()
+
+
+class ArrowSink(_ArrowSinkBase):
+    def __init__(self, path: Path, columns: Sequence[str]) -> None:
+        super().__init__(path, columns)
+        self._sink = pa.OSFile(str(self.path), "wb")
+        self._writer = pa.ipc.new_file(self._sink, self.schema)
+
+    def write(self, rows: List[tuple]) -> None:
+        self._writer.write_batch(self._batch(rows))
+
+    def close(self) -> None:
+        self._writer.close()
+        self._sink.close()
+
+
+SINKS = {"parquet": ParquetSink, "arrow": ArrowSink, "jsonl": JsonlSink, "csv": CsvSink}
+
+
+def infer_format(path: Path) -> str:
+    fmt = _SUFFIXES.get(Path(path).suffix.lower())
+    if fmt is None:
+        raise ValueError(f"cannot infer export format from {path}; pass one of {FORMATS}")
+    return fmt
+
+
+# ---- source ----
+def build_query(
+    columns: Sequence[str],
+    *,
+    city: Optional[str] = None,
+    query: Optional[str] = None,
+    run_id: Optional[str] = None,
+    status: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+) -> Tuple[str, List[str]]:
+    unknown = [c for c in columns if c not in PLACE_COLUMNS]
+    if unknown:
+        raise ValueError(f"unknown places column(s): {unknown}")
+    conds: List[str] = []
+    params: List[str] = []
+    for col, val in (("city", city), ("query", query), ("run_id", run_id), ("status", status)):
+        if val:
+            conds.append(f"{col} = ?")
+            params.append(val)
+    if since:
+        conds.append("extracted_at > ?")
+        params.append(since)
+    if until:
+        conds.append("extracted_at <= ?")
+        params.append(until)
+    sql = f"SELECT {', '.join(columns)} FROM places"
+    if conds:
+        sql += " WHERE " + " AND ".join(conds)
+    # watermark order keeps incremental files append-friendly
+    sql += " ORDER BY extracted_at" if (since or until) else ""
+    return sql, params
+
+
+def iter_batches(conn: sqlite3.Connection, sql: str, params: Sequence, batch_rows: int) -> Iterator[List[tuple]]:
+    cur = conn.execute(sql, list(params))
+    try:
+        while True:
+            rows = cur.fetchmany(batch_rows)
+            if not rows:
+                return
+            yield rows
+    finally:
+        cur.close()
+
+
+def export_places(
+    db_path: Path,
+    out_path: Path,
+    *,
+    fmt: Optional[str] = None,
+    columns: Optional[Sequence[str]] = None,
+    city: Optional[str] = None,
+    query: Optional[str] = None,
+    run_id: Optional[str] = None,
+    status: Optional[str] = None,
+    since: Optional[str] = None,
+    incremental: Optional[str] = None,
+    batch_rows: int = 50_000,
+) -> ExportResult:
+    """Stream matching ``places`` rows into ``out_path``.
+
+    ``incremental`` names a watermark: rows with ``extracted_at`` after it (and
+    at least WATERMARK_LAG_S old) are exported, then the watermark moves to the
+    newest exported value. An empty delta still writes a (header-only) file.
+    """
+    fmt = fmt or infer_format(out_path)
+    if fmt not in SINKS:
+        raise ValueError(f"unknown export format {fmt!r}; expected one of {FORMATS}")
+    cols = list(columns) if columns else list(PLACE_COLUMNS)
+    conn = get_connection(Path(db_path))
+    try:
+        init_schema(conn)
+        until = None
+        if incremental:
+            since = max(filter(None, [since, get_export_watermark(conn, incremental)]), default=None)
+            until = (datetime.now(timezone.utc) - timedelta(seconds=WATERMARK_LAG_S)).isoformat()
+        # the watermark needs extracted_at even when it is not projected
+        read_cols = cols if (not incremental or "extracted_at" in cols) else cols + ["extracted_at"]
+        sql, params = build_query(read_cols, city=city, query=query, run_id=run_id, status=status, since=since, until=until)
+
+        out_path = Path(out_path)
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = out_path.with_name(out_path.name + ".part")
+        sink = SINKS[fmt](tmp, cols)
+        rows = batches = 0
+        newest = since
+        try:
+            ts_i = read_cols.index("extracted_at") if incremental else -1
+            for batch in iter_batches(conn, sql, params, max(1, int(batch_rows))):
+                if incremental:
+                    newest = batch[-1][ts_i] or newest
+                    if len(read_cols) != len(cols):
+                        batch = [r[:-1] for r in batch]
+                sink.write(batch)
+                rows += len(batch)
+                batches += 1
+        finally:
+            sink.close()
+        # readers never see a half-written file
+        tmp.replace(out_path)
+        if incremental and newest:
+            set_export_watermark(conn, incremental, newest, rows)
+        logger.info("[export] %s rows=%d batches=%d -> %s (%s)", fmt, rows, batches, out_path, f"watermark={newest}" if incremental else "full")
+        return ExportResult(path=out_path, format=fmt, rows=rows, batches=batches, watermark=newest if incremental else None)
+    finally:
+        conn.close()
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Stream the places table to Parquet / Arrow IPC / JSONL / CSV.")
+    p.add_argument("--db", type=Path, default=Path("data/db/gmaps.sqlite"), help="Path to SQLite DB.")
+    p.add_argument("--out", type=Path, required=True, help="Output file; format inferred from the suffix unless --format.")
+    p.add_argument("--format", choices=FORMATS)
+    p.add_argument("--columns", help="Comma-separated column projection (default: all).")
+    p.add_argument("--city")
+    p.add_argument("--query")
+    p.add_argument("--run-id")
+    p.add_argument("--status", choices=["success", "failed"])
+    p.add_argument("--since", help="Only rows with extracted_at after this ISO timestamp.")
+    p.add_argument("--incremental", metavar="NAME", help="Export rows newer than watermark NAME and advance it.")
+    p.add_argument("--batch-rows", type=int, default=50_000, help="Rows per fetchmany batch / parquet row group.")
+    return p.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    res = export_places(
+        args.db,
+        args.out,
+        fmt=args.format,
+        columns=[c.strip() for c in args.columns.split(",") if c.strip()] if args.columns else None,
+        city=args.city,
+        query=args.query,
+        run_id=args.run_id,
+        status=args.status,
+        since=args.since,
+        incremental=args.incremental,
+        batch_rows=args.batch_rows,
+    )
+    print(f"Exported {res.rows} rows ({res.batches} batches) to {res.path}")
@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import os
+import queue
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+
+from logger import crawler_thread_logger as logger
+
+from gmaps_crawler.config import settings
+from gmaps_crawler.utils.metrics import inc
+
+try:  # zstd is smaller/faster; gzip keeps the store usable without the extra wheel
+    import zstandard  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    zstandard = None  # type: ignore
+
+PLACE = "place"
+TILE = "tile"
+
+
+def tile_key(city: str, query: str, tile_index: int) -> str:
+    """Filename-safe key for a tile's search-list snapshot."""
+    digest = hashlib.sha1(f"{city}\x1f{query}".encode("utf-8")).hexdigest()[:16]
+    return f"{digest}-{int(tile_index)}"
+
+
+class SnapshotStore:
+    """Compressed, content-addressed HTML snapshots.
+
+    Layout under ``root``:
+    - ``objects/<sha[:2]>/<sha256>.html.zst|.html.gz`` — page HTML, written once
+    - ``refs/<kind>/<key[:2]>/<key>.json`` — {sha256, codec, url, saved_at}
+
+    ``kind`` is ``place`` (key = place_id) or ``tile`` (key = :func:`tile_key`).
+    Identical pages share one object; a ref is overwritten when a key is re-crawled.
+    """
+
+    def __init__(self, root: Path, *, codec: Optional[str] = None, level: int = 6) -> None:
+        self.root = Path(root)
+        self.codec = codec or ("zstd" if zstandard is not None else "gzip")
+        if self.codec == "zstd" and zstandard is None:
+            raise RuntimeError("zstd codec requested but 'zstandard' is not installed")
+        self.level = level
+
+    # ---- paths ----
+    def _object_path(self, sha: str, codec: str) -> Path:
+        ext = ".html.zst" if codec == "zstd" else ".html.gz"
+        return self.root / "objects" / sha[:2] / f"{sha}{ext}"
+
+    def _ref_path(self, kind: str, key: str) -> Path:
+        return self.root / "refs" / kind / key[:2] / f"{key}.json"
+
+    # ---- codec ----
+    def _compress(self, data: bytes) -> bytes:
+        if self.codec == "zstd":
+            return zstandard.ZstdCompressor(level=self.level).compress(data)
+        return gzip.compress(data, compresslevel=self.level)
+
+    @staticmethod
+    def _decompress(data: bytes, codec: str) -> bytes:
+        if codec == "zstd":
+            if zstandard is None:
+                raise RuntimeError("snapshot is zstd-compressed but 'zstandard' is not installed")
+            return zstandard.ZstdDecompressor().decompress(data)
+        return gzip.decompress(data)
+
+    # ---- API ----
+    def put(self, kind: str, key: str, html: str, *, url: str = "") -> str:
+        """Store ``html`` under ``kind/key``; returns its sha256."""
+        raw = (html or "").encode("utf-8")
+        sha = hashlib.sha256(raw).hexdigest()
+        obj = self._object_path(sha, self.codec)
+        if not obj.exists():
+            _atomic_write(obj, self._compress(raw))
+        ref = {"sha256": sha, "codec": self.codec, "url": url, "saved_at": datetime.now(timezone.utc).isoformat()}
+        _atomic_write(self._ref_path(kind, key), json.dumps(ref).encode("utf-8"))
+        return sha
+
+    def put_async(self, kind: str, key: str, html: str, *, url: str = "") -> bool:
+        """Queue ``put`` on the background :class:`SnapshotWriter`; False when dropped (queue full)."""
+        return snapshot_writer().submit(self, kind, key, html, url=url)
+
+    def ref(self, kind: str, key: str) -> Optional[Dict[str, str]]:
+        path = self._ref_path(kind, key)
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
+
+    def get(self, kind: str, key: str) -> Optional[str]:
+        ref = self.ref(kind, key)
+        if ref is None:
+            return None
+        return self.read_object(ref["sha256"], ref.get("codec") or "gzip")
+
+    def read_object(self, sha: str, codec: str) -> str:
+        data = self._object_path(sha, codec).read_bytes()
+        return self._decompress(data, codec).decode("utf-8", errors="replace")
+
+    def iter_refs(self, kind: str) -> Iterator[Tuple[str, Dict[str, str]]]:
+        """Yield ``(key, ref)`` for every snapshot of ``kind``."""
+        base = self.root / "refs" / kind
+        if not base.exists():
+            return
+        for path in sorted(base.glob("*/*.json")):
+            try:
+                yield path.stem, json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                continue
+
+
+class SnapshotWriter:
+    """One background thread that hashes, compresses and writes snapshots.
+
+    Workers hand over the page HTML and go back to their tab; when the queue
+    is full the snapshot is dropped (counted in ``snapshots_dropped_total``)
+    rather than stalling the crawl.
+    """
+
+    def __init__(self, maxsize: Optional[int] = None) -> None:
+        self._q: "queue.Queue[Optional[tuple]]" = queue.Queue(maxsize=max(1, int(maxsize or settings.SNAPSHOT_QUEUE_SIZE)))
+        self._t = threading.Thread(target=self._loop, name="SnapshotWriter", daemon=True)
+        self._t.start()
+
+    def submit(self, store: SnapshotStore, kind: str, key: str, html: str, *, url: str = "") -> bool:
+        try:
+            self._q.put_nowait((store, kind, key, html, url))
+        except queue.Full:
+            inc("snapshots_dropped_total", kind=kind)
+            return False
+        return True
+
+    def flush(self) -> None:
+        """Block until every queued snapshot is on disk."""
+        self._q.join()
+
+    def _loop(self) -> None:
+        while True:
+            item = self._q.get()
+            try:
+                if item is None:
+                    return
+                store, kind, key, html, url = item
+                try:
+                    store.put(kind, key, html, url=url)
+                except Exception as e:
+                    logger.debug("snapshot failed for %s/%s: %s", kind, key, e)
+            finally:
+                self._q.task_done()
+
+
+_writer: Optional[SnapshotWriter] = None
+_writer_lock = threading.Lock()
+
+
+def snapshot_writer() -> SnapshotWriter:
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = SnapshotWriter()
+        return _writer
+
+
+def flush_snapshots() -> None:
+    """Wait for queued snapshots (no-op when nothing was ever queued)."""
+    if _writer is not None:
+        _writer.flush()
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
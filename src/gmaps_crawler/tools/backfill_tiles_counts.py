@@ -5,6 +5,10 @@ import sqlite3
 from pathlib import Path
 from typing import Iterable
 
+# runnable as a plain script (python src/gmaps_crawler/tools/backfill_tiles_counts.py)
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from gmaps_crawler.storage.db import ensure_tile_count_triggers, rebuild_tile_counts  # noqa: E402
 
 DEFAULT_CANDIDATES = [
     Path("data/db/gmaps.sqlite"),
@@ -20,25 +24,10 @@ def ensure_columns(conn: sqlite3.Connection) -> None:
     conn.commit()
 
 
-def backfill(conn: sqlite3.Connection) -> None:
-    cur = conn.cursor()
-    # processed_count = success count from places
-    cur.execute(
-        """
-        UPDATE tiles SET
-            processed_count = (
-                SELECT COUNT(1) FROM places p
-                WHERE p.city=tiles.city AND p.query=tiles.query AND p.tile_index=tiles.tile_index
-                  AND (p.status IS NULL OR p.status='' OR p.status='success')
-            ),
-            failed_count = (
-                SELECT COUNT(1) FROM places p
-                WHERE p.city=tiles.city AND p.query=tiles.query AND p.tile_index=tiles.tile_index
-                  AND p.status='failed'
-            )
-        """
-    )
-    conn.commit()
+def backfill(conn: sqlite3.Connection) -> int:
+    # one GROUP BY pass over places; installs the counter triggers on DBs that predate them
+    ensure_tile_count_triggers(conn, rebuild=False)
+    return rebuild_tile_counts(conn)
 
 
 def run(paths: Iterable[Path]) -> None:
@@ -53,8 +42,8 @@ def run(paths: Iterable[Path]) -> None:
             continue
         try:
             ensure_columns(conn)
-            backfill(conn)
-            print(f"[backfill-tiles] Updated tiles counts from places for {p}")
+            n = backfill(conn)
+            print(f"[backfill-tiles] Rebuilt counts of {n} tile(s) from places for {p}")
             any_done = True
         finally:
             try:
@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import argparse
+import time
+from pathlib import Path
+from typing import Optional, Sequence
+
+from gmaps_crawler.pipeline.extractors.offline import reextract_snapshots
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Re-extract place fields from stored HTML snapshots (no browser).")
+    parser.add_argument("--db-path", type=Path, default=Path("data/db/gmaps.sqlite"))
+    parser.add_argument("--html-root", type=Path, default=Path("data/html"))
+    parser.add_argument("--place-id", action="append", help="Limit to these place_ids (repeatable).")
+    parser.add_argument("--workers", type=int, help="Process count (default: CPU count).")
+    parser.add_argument("--dry-run", action="store_true", help="Parse only; do not write to DB.")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    args = parse_args(argv)
+    t0 = time.monotonic()
+    summary = reextract_snapshots(
+        db_path=args.db_path,
+        html_root=args.html_root,
+        place_ids=args.place_id,
+        workers=args.workers,
+        dry_run=args.dry_run,
+    )
+    elapsed = time.monotonic() - t0
+    rate = summary["selected"] / elapsed if elapsed > 0 else 0.0
+    print(f"[reextract] {summary} elapsed={elapsed:.1f}s rate={rate:.0f} pages/s")
+
+
+if __name__ == "__main__":
+    main()
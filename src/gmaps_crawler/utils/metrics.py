@@ -0,0 +1,358 @@
+"""
+In-process metrics: counters, gauges and HDR-style latency histograms.
+
+Every sample carries the labels of the current context (``metric_labels``:
+tile and worker are set by the tile runner / detail workers) merged with the
+labels passed at the call site. Histograms use log-linear buckets (16 linear
+sub-buckets per power of two, ~3% relative error from 100 µs to hours) so
+percentiles stay accurate without storing samples.
+
+Exposed as Prometheus text (histograms as summaries with quantiles) on an
+optional local HTTP endpoint (``start_http_server``, ``/metrics`` and
+``/metrics.json``) and dumped as a JSON summary at the end of a run.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import json
+import math
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from logger import RECORD_CONTEXT, main_thread_logger as logger
+
+from gmaps_crawler.config import settings
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+_SUB_BUCKETS = 16
+_MIN_VALUE = 1e-4  # seconds; anything below lands in bucket 0
+QUANTILES = (0.5, 0.9, 0.99)
+
+_labels: contextvars.ContextVar[Dict[str, str]] = contextvars.ContextVar("metric_labels", default={})
+
+
+@contextmanager
+def metric_labels(**labels: object) -> Iterator[None]:
+    """Add labels (e.g. ``tile=3, worker='w1'``) to every sample recorded in this context."""
+    merged = {**_labels.get(), **{k: str(v) for k, v in labels.items() if v is not None}}
+    token = _labels.set(merged)
+    try:
+        yield
+    finally:
+        _labels.reset(token)
+
+
+def current_labels() -> Dict[str, str]:
+    return dict(_labels.get())
+
+
+# log records pick up the same tile/worker labels (structured JSON sink)
+RECORD_CONTEXT.append(current_labels)
+
+
+def _key(labels: Dict[str, object]) -> LabelKey:
+    merged = {**_labels.get(), **{k: str(v) for k, v in labels.items() if v is not None}}
+    return tuple(sorted(merged.items()))
+
+
+class Histogram:
+    """Log-linear bucketed histogram (HdrHistogram-style, fixed relative precision)."""
+
+    __slots__ = ("buckets", "count", "sum", "min", "max")
+
+    def __init__(self) -> None:
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    @staticmethod
+    def bucket_of(value: float) -> int:
+        if value <= _MIN_VALUE:
+            return 0
+        m, e = math.frexp(value / _MIN_VALUE)  # value/_MIN = m * 2**e, 0.5 <= m < 1
+        return e * _SUB_BUCKETS + int((m - 0.5) * 2 * _SUB_BUCKETS)
+
+    @staticmethod
+    def bucket_mid(idx: int) -> float:
+        if idx <= 0:
+            return _MIN_VALUE
+        e, sub = divmod(idx, _SUB_BUCKETS)
+        return math.ldexp(0.5 + (sub + 0.5) / (2 * _SUB_BUCKETS), e) * _MIN_VALUE
+
+    def record(self, value: float) -> None:
+        value = max(0.0, float(value))
+        b = self.bucket_of(value)
+        self.buckets[b] = self.buckets.get(b, 0) + 1
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def merge(self, other: "Histogram") -> None:
+        for b, n in other.buckets.items():
+            self.buckets[b] = self.buckets.get(b, 0) + n
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for b in sorted(self.buckets):
+            seen += self.buckets[b]
+            if seen >= rank:
+                return min(max(self.bucket_mid(b), self.min), self.max)
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        out = {"count": self.count, "sum_s": round(self.sum, 6), "mean_s": round(self.sum / self.count, 6) if self.count else 0.0,
+               "min_s": round(self.min, 6) if self.count else 0.0, "max_s": round(self.max, 6)}
+        for q in QUANTILES:
+            out[f"p{int(q * 100)}_s"] = round(self.quantile(q), 6)
+        return out
+
+
+class Registry:
+    """Thread-safe store of labelled counters, gauges and histograms."""
+
+    def __init__(self, namespace: str = "gmaps") -> None:
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._gauges: Dict[str, Dict[LabelKey, float]] = {}
+        self._hists: Dict[str, Dict[LabelKey, Histogram]] = {}
+        self._help: Dict[str, str] = {}
+        self._collectors: List[Callable[[], Dict[str, float]]] = []
+
+    # ---- recording ----
+    def inc(self, name: str, value: float = 1.0, **labels: object) -> None:
+        key = _key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def set_gauge(self, name: str, value: float, **labels: object) -> None:
+        key = _key(labels)
+        with self._lock:
+            self._gauges.setdefault(name, {})[key] = float(value)
+
+    def observe(self, name: str, seconds: float, **labels: object) -> None:
+        key = _key(labels)
+        with self._lock:
+            series = self._hists.setdefault(name, {})
+            h = series.get(key)
+            if h is None:
+                h = series[key] = Histogram()
+            h.record(seconds)
+
+    @contextmanager
+    def timed(self, name: str, **labels: object) -> Iterator[None]:
+        """Observe the block's wall time in ``name`` (also when it raises)."""
+        t0 = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(name, time.monotonic() - t0, **labels)
+
+    def describe(self, name: str, text: str) -> None:
+        self._help[name] = text
+
+    def add_collector(self, fn: Callable[[], Dict[str, float]]) -> None:
+        """``fn()`` -> {name: value}, read as gauges at export time (e.g. AIMDController.metrics)."""
+        self._collectors.append(fn)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._hists.clear()
+            self._collectors.clear()
+
+    # ---- export ----
+    def _snapshot(self):
+        with self._lock:
+            counters = {n: dict(s) for n, s in self._counters.items()}
+            gauges = {n: dict(s) for n, s in self._gauges.items()}
+            hists = {}
+            for n, s in self._hists.items():
+                hists[n] = {}
+                for k, h in s.items():
+                    c = Histogram()
+                    c.merge(h)
+                    hists[n][k] = c
+            collectors = list(self._collectors)
+        for fn in collectors:
+            try:
+                for n, v in fn().items():
+                    gauges.setdefault(n, {})[()] = float(v)
+            except Exception as e:
+                logger.debug("metrics collector failed: %s", e)
+        return counters, gauges, hists
+
+    def _full(self, name: str) -> str:
+        return name if name.startswith(self.namespace + "_") else f"{self.namespace}_{name}"
+
+    def render_prometheus(self) -> str:
+        counters, gauges, hists = self._snapshot()
+        lines: List[str] = []
+
+        def fmt(key: LabelKey, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+            items = key + extra
+            if not items:
+                return ""
+            esc = lambda v: v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+            return "{" + ",".join(f'{k}="{esc(v)}"' for k, v in items) + "}"
+
+        def header(name: str, kind: str) -> None:
+            if name in self._help:
+                lines.append(f"# HELP {self._full(name)} {self._help[name]}")
+            lines.append(f"# TYPE {self._full(name)} {kind}")
+
+        for name, series in sorted(counters.items()):
+            header(name, "counter")
+            full = self._full(name)
+            lines.extend(f"{full}{fmt(k)} {v:g}" for k, v in series.items())
+        for name, series in sorted(gauges.items()):
+            header(name, "gauge")
+            full = self._full(name)
+            lines.extend(f"{full}{fmt(k)} {v:g}" for k, v in series.items())
+        for name, series in sorted(hists.items()):
+            header(name, "summary")
+            full = self._full(name)
+            for k, h in series.items():
+                for q in QUANTILES:
+                    lines.append(f"{full}{fmt(k, (('quantile', f'{q:g}'),))} {h.quantile(q):.6g}")
+                lines.append(f"{full}_sum{fmt(k)} {h.sum:.6g}")
+                lines.append(f"{full}_count{fmt(k)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self, *, group_by: Tuple[str, ...] = ("stage",)) -> Dict[str, object]:
+        """JSON-able summary: per histogram the totals per ``group_by`` labels plus every labelled series."""
+        counters, gauges, hists = self._snapshot()
+        out: Dict[str, object] = {"counters": {}, "gauges": {}, "histograms": {}}
+        for name, series in counters.items():
+            out["counters"][name] = [{"labels": dict(k), "value": v} for k, v in series.items()]
+        for name, series in gauges.items():
+            out["gauges"][name] = [{"labels": dict(k), "value": v} for k, v in series.items()]
+        for name, series in hists.items():
+            totals: Dict[LabelKey, Histogram] = {}
+            for k, h in series.items():
+                gk = tuple((lk, lv) for lk, lv in k if lk in group_by)
+                totals.setdefault(gk, Histogram()).merge(h)
+            out["histograms"][name] = {
+                "totals": sorted(({"labels": dict(k), **h.summary()} for k, h in totals.items()), key=lambda d: -d["sum_s"]),
+                "series": [{"labels": dict(k), **h.summary()} for k, h in series.items()],
+            }
+        return out
+
+    def dump_json(self, path: Path, **extra: object) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({**extra, **self.summary()}, ensure_ascii=False, indent=1), encoding="utf-8")
+        return path
+
+    def log_summary(self, name: str = "stage_seconds") -> None:
+        hist = self.summary()["histograms"].get(name)
+        if not hist:
+            return
+        for row in hist["totals"]:
+            logger.info(
+                "[metrics] %-22s n=%-6d total=%8.1fs mean=%6.2fs p50=%6.2fs p90=%6.2fs p99=%6.2fs max=%6.2fs",
+                row["labels"].get("stage", "-"), row["count"], row["sum_s"], row["mean_s"],
+                row["p50_s"], row["p90_s"], row["p99_s"], row["max_s"],
+            )
+
+
+REGISTRY = Registry()
+REGISTRY.describe("stage_seconds", "Wall time per crawl stage (labels: stage, tile, worker).")
+REGISTRY.describe("places_total", "Detail pages processed (labels: result, worker).")
+
+
+def observe(name: str, seconds: float, **labels: object) -> None:
+    if settings.METRICS_ENABLED:
+        REGISTRY.observe(name, seconds, **labels)
+
+
+def inc(name: str, value: float = 1.0, **labels: object) -> None:
+    if settings.METRICS_ENABLED:
+        REGISTRY.inc(name, value, **labels)
+
+
+@contextmanager
+def stage(name: str, **labels: object) -> Iterator[None]:
+    """Time a crawl stage into ``stage_seconds{stage=name}``."""
+    t0 = time.monotonic()
+    try:
+        yield
+    finally:
+        observe("stage_seconds", time.monotonic() - t0, stage=name, **labels)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    registry: Registry = REGISTRY
+
+    def do_GET(self) -> None:  # noqa: N802
+        if self.path.startswith("/metrics.json"):
+            body = json.dumps(self.registry.summary(), ensure_ascii=False).encode("utf-8")
+            ctype = "application/json"
+        elif self.path.startswith("/metrics"):
+            body = self.registry.render_prometheus().encode("utf-8")
+            ctype = "text/plain; version=0.0.4; charset=utf-8"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, fmt: str, *args) -> None:
+        logger.debug("metrics http: " + fmt, *args)
+
+
+def start_http_server(port: int, host: str = "127.0.0.1", registry: Registry = REGISTRY) -> Optional[ThreadingHTTPServer]:
+    """Serve ``/metrics`` (Prometheus text) and ``/metrics.json`` on a daemon thread; None if the port is taken."""
+    handler = type("MetricsHandler", (_Handler,), {"registry": registry})
+    try:
+        server = ThreadingHTTPServer((host, int(port)), handler)
+    except OSError as e:
+        logger.warning("metrics endpoint not started on %s:%s: %s", host, port, e)
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="MetricsHTTP", daemon=True).start()
+    logger.info("metrics endpoint: http://%s:%d/metrics", host, server.server_address[1])
+    return server
+
+
+if __name__ == "__main__":
+    import random
+
+    random.seed(1)
+    for tile in range(3):
+        with metric_labels(tile=tile, worker="w0"):
+            for _ in range(200):
+                observe("stage_seconds", random.lognormvariate(0.5, 0.6), stage="detail_get")
+                observe("stage_seconds", random.expovariate(4.0), stage="extract_address")
+            inc("places_total", 200, result="ok")
+    h = Histogram()
+    vals = [random.uniform(0.001, 30.0) for _ in range(100000)]
+    for v in vals:
+        h.record(v)
+    vals.sort()
+    for q in QUANTILES:
+        exact = vals[int(q * len(vals)) - 1]
+        print(f"p{int(q * 100)} exact={exact:.4f} hist={h.quantile(q):.4f} err={abs(h.quantile(q) - exact) / exact:.2%}")
+    print(REGISTRY.render_prometheus()[:800])
+    REGISTRY.log_summary()
@@ -3,6 +3,8 @@ from contextlib import contextmanager
 import time
 from typing import Iterator, Optional
 
+from gmaps_crawler.utils.metrics import observe
+
 
 def now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
@@ -12,6 +14,8 @@ def now_iso() -> str:
 def log_duration(logger, label: str, *, level: str = "info", enabled: bool = True) -> Iterator[None]:
     """Context manager to log a block's elapsed time in milliseconds.
 
+    The time is also recorded in the ``stage_seconds{stage=label}`` histogram.
+
     Usage:
         with log_duration(logger, "open_search_tab"):
             tab = browser.new_tab(url=url)
@@ -20,7 +24,8 @@ def log_duration(logger, label: str, *, level: str = "info", enabled: bool = Tru
     try:
         yield
     finally:
+        seconds = time.monotonic() - t0
+        observe("stage_seconds", seconds, stage=label)
         if enabled:
-            elapsed = int((time.monotonic() - t0) * 1000)
             log = getattr(logger, level, logger.info)
-            log("%s elapsed=%dms", label, elapsed)
+            log("%s elapsed=%dms", label, int(seconds * 1000), extra={"stage": label, "elapsed_ms": round(seconds * 1000, 1)})
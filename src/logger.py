@@ -1,13 +1,19 @@
+import atexit
+import json
 import logging
-from logging.handlers import RotatingFileHandler
+import os
+import queue
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Callable, Dict, List, Optional
+
 from rich.logging import RichHandler
 from rich.console import Console
-import os
 
-# 日志目录与文件
-LOG_DIR = "logs"
+# 日志目录与文件：$LOG_DIR，默认项目根目录下的 logs/（不随当前工作目录变化）
+LOG_DIR = os.path.abspath(os.environ.get("LOG_DIR") or os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "logs"))
 LOG_FILE = "app.log"
-os.makedirs(LOG_DIR, exist_ok=True)
 LOG_PATH = os.path.join(LOG_DIR, LOG_FILE)
 
 # Rich 控制台配置
@@ -17,13 +23,34 @@ console = Console(force_terminal=True)  # 强制彩色输出（即使非 TTY 环
 LOG_FORMAT = "[%(levelname)s] | %(filename)s:%(lineno)d | %(message)s"
 DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
 
-# 文件日志 Handler（带轮换）
-file_handler = RotatingFileHandler(
-    LOG_PATH,
-    maxBytes=5 * 1024 * 1024,  # 每个文件最大 5MB
-    backupCount=5,             # 最多保留 5 个历史日志
-    encoding="utf-8"
-)
+# 队列模式：业务线程只把日志记录放入队列，由单独的监听线程负责 Rich 渲染与文件写入（LOG_QUEUE=0 关闭）
+LOG_QUEUE = os.environ.get("LOG_QUEUE", "1").lower() not in ("0", "false", "no")
+# JSON Lines 结构化日志路径（空 = 不写）；字段含 tile / place_id / stage / elapsed_ms 等
+LOG_JSON_PATH = os.environ.get("LOG_JSON_PATH", "")
+# 逐任务完成日志（extra={"sampled": True}）在控制台/文本文件中每 N 条保留 1 条；JSON 中全部保留
+LOG_DONE_EVERY = int(os.environ.get("LOG_DONE_EVERY", "20") or 1)
+
+# 结构化字段：来自 extra=... 或上下文提供者（如 utils.metrics 的 tile/worker 标签）
+STRUCT_FIELDS = ("run_id", "tile", "worker", "place_id", "stage", "status", "elapsed_ms", "done", "total")
+# callables returning {field: value} for the emitting thread; evaluated before the record is queued
+RECORD_CONTEXT: List[Callable[[], Dict[str, object]]] = []
+
+
+def _open_file_handler(path: str) -> RotatingFileHandler:
+    """文件日志 Handler（带轮换）"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    handler = RotatingFileHandler(
+        path,
+        maxBytes=5 * 1024 * 1024,  # 每个文件最大 5MB
+        backupCount=5,             # 最多保留 5 个历史日志
+        encoding="utf-8"
+    )
+    handler.setFormatter(logging.Formatter(LOG_FORMAT, DATE_FORMAT))
+    return handler
+
+
+# opened by configure()
+file_handler: Optional[RotatingFileHandler] = None
 
 # Rich 控制台日志 Handler（关闭 file://）
 rich_handler = RichHandler(
@@ -32,14 +59,151 @@ rich_handler = RichHandler(
     show_path=False,  # ✅ 关键：关闭 file:// 路径
     console=console
 )
+rich_handler.setFormatter(logging.Formatter(LOG_FORMAT, DATE_FORMAT))
+
+
+class ContextFilter(logging.Filter):
+    """Copy RECORD_CONTEXT fields onto the record in the emitting thread (extra=... wins)."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        for provider in RECORD_CONTEXT:
+            try:
+                for k, v in provider().items():
+                    if not hasattr(record, k):
+                        setattr(record, k, v)
+            except Exception:
+                pass
+        return True
+
+
+class SampleFilter(logging.Filter):
+    """Keep 1 of every ``every`` records marked ``sampled``; warnings and above always pass."""
+
+    def __init__(self, every: int) -> None:
+        super().__init__()
+        self.every = max(1, int(every))
+        self._n = 0
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.every <= 1 or not getattr(record, "sampled", False) or record.levelno >= logging.WARNING:
+            return True
+        with self._lock:
+            self._n += 1
+            return self._n % self.every == 1
+
+
+class JsonLinesFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        out = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "src": f"{record.filename}:{record.lineno}",
+            "msg": record.getMessage(),
+        }
+        for k in STRUCT_FIELDS:
+            v = getattr(record, k, None)
+            if v is not None:
+                out[k] = v
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            out["exc"] = record.exc_text
+        return json.dumps(out, ensure_ascii=False, default=str)
+
+
+class _Prepared(QueueHandler):
+    """QueueHandler that keeps record attributes and only merges args in the caller thread."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            # tracebacks are rendered here (frames may be gone by the time the listener runs);
+            # Formatter.format appends exc_text for the text sinks
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+_listener: Optional[QueueListener] = None
+_json_handler: Optional[logging.Handler] = None
+
+
+def configure(
+    *,
+    use_queue: Optional[bool] = None,
+    json_path: Optional[str] = None,
+    done_every: Optional[int] = None,
+    log_dir: Optional[str] = None,
+    level: int = logging.INFO,
+) -> None:
+    """(Re)install the root handlers.
+
+    use_queue: workers enqueue records; one ``LogListener`` thread renders and writes them
+    json_path: also write JSON lines here ("" = off)
+    done_every: sampling of per-task done lines for console/file
+    log_dir: directory of app.log (made absolute, so a later chdir does not move it)
+    """
+    global _listener, _json_handler, file_handler, LOG_QUEUE, LOG_JSON_PATH, LOG_DONE_EVERY, LOG_DIR, LOG_PATH
+    LOG_QUEUE = LOG_QUEUE if use_queue is None else bool(use_queue)
+    LOG_DIR = LOG_DIR if log_dir is None else os.path.abspath(log_dir)
+    LOG_PATH = os.path.join(LOG_DIR, LOG_FILE)
+    LOG_JSON_PATH = LOG_JSON_PATH if json_path is None else json_path
+    LOG_DONE_EVERY = LOG_DONE_EVERY if done_every is None else max(1, int(done_every))
+
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+    if _json_handler is not None:
+        _json_handler.close()
+        _json_handler = None
+    if file_handler is None or file_handler.baseFilename != LOG_PATH:
+        if file_handler is not None:
+            file_handler.close()
+        file_handler = _open_file_handler(LOG_PATH)
+
+    for h in (file_handler, rich_handler):
+        h.filters[:] = [SampleFilter(LOG_DONE_EVERY)]
+    sinks: List[logging.Handler] = [file_handler, rich_handler]
+    if LOG_JSON_PATH:
+        os.makedirs(os.path.dirname(LOG_JSON_PATH) or ".", exist_ok=True)
+        _json_handler = logging.FileHandler(LOG_JSON_PATH, encoding="utf-8")
+        _json_handler.setFormatter(JsonLinesFormatter())
+        sinks.append(_json_handler)
+
+    root = logging.getLogger()
+    root.handlers[:] = []
+    root.setLevel(level)
+    if LOG_QUEUE:
+        q: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+        front = _Prepared(q)
+        front.addFilter(ContextFilter())
+        root.addHandler(front)
+        _listener = QueueListener(q, *sinks, respect_handler_level=True)
+        _listener.start()
+        _listener._thread.name = "LogListener"  # type: ignore[union-attr]
+    else:
+        ctx = ContextFilter()
+        for h in sinks:
+            h.addFilter(ctx)
+            root.addHandler(h)
+
+
+def shutdown() -> None:
+    """Drain the queue and stop the listener (registered with atexit)."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
 
 # 统一配置
-logging.basicConfig(
-    level=logging.INFO,
-    format=LOG_FORMAT,
-    datefmt=DATE_FORMAT,
-    handlers=[file_handler, rich_handler]
-)
+configure()
+atexit.register(shutdown)
 
 # 获取主 logger
 main_thread_logger = logging.getLogger("main")
@@ -0,0 +1,182 @@
+from typing import List
+
+import pytest
+
+from gmaps_crawler.pipeline.city.adaptive import AdaptiveTile, AdaptiveTiler, simulate
+from gmaps_crawler.pipeline.city.grid import km_to_lat_deg, km_to_lon_deg
+
+CELL_W, CELL_H = 2.0, 1.0
+
+
+def grid(rows: int, cols: int) -> List[AdaptiveTile]:
+    """rows x cols lattice of 2 x 1 km cells around Paris, tile_index row-major."""
+    dlat, dlng = km_to_lat_deg(CELL_H), km_to_lon_deg(CELL_W, 48.85)
+    return [
+        AdaptiveTile(index=r * cols + c, row=r, col=c, latitude=48.85 + r * dlat, longitude=2.35 + c * dlng)
+        for r in range(rows)
+        for c in range(cols)
+    ]
+
+
+def tiler(tiles: List[AdaptiveTile], **kw) -> AdaptiveTiler:
+    opts = dict(cell_width_km=CELL_W, cell_height_km=CELL_H, result_cap=120, saturation=0.9, max_depth=2,
+                empty_threshold=3, skip_after_empty=4)
+    opts.update(kw)
+    return AdaptiveTiler(tiles, **opts)
+
+
+def drain(t: AdaptiveTiler) -> List[AdaptiveTile]:
+    out = []
+    while (tile := t.pop()) is not None:
+        out.append(tile)
+    return out
+
+
+def test_pop_order_priority_then_visit_order_then_index():
+    tiles = grid(1, 4)
+    tiles[0].visit_order, tiles[1].visit_order, tiles[2].visit_order, tiles[3].visit_order = 3, 2, 1, 0
+    tiles[2].priority = 1.0
+    assert [t.index for t in drain(tiler(tiles))] == [2, 3, 1, 0]
+
+
+def test_saturated_tile_splits_into_four_quadrants():
+    t = tiler(grid(2, 2))
+    parent = t.pop()
+    out = t.report(parent, 108)  # 0.9 * 120
+    assert len(out.children) == 4
+    assert {(c.depth, c.row, c.col) for c in out.children} == {(1, 0, 0), (1, 0, 1), (1, 1, 0), (1, 1, 1)}
+    assert {c.parent_index for c in out.children} == {parent.index}
+    assert [c.index for c in out.children] == [4, 5, 6, 7]
+    assert t.cell_size_km(1) == (CELL_W / 2, CELL_H / 2)
+    # children sit a quarter cell from the parent centre
+    dlat, dlng = km_to_lat_deg(CELL_H / 4), km_to_lon_deg(CELL_W / 4, parent.latitude)
+    for c in out.children:
+        assert c.latitude == pytest.approx(parent.latitude + (dlat if c.row % 2 else -dlat))
+        assert c.longitude == pytest.approx(parent.longitude + (dlng if c.col % 2 else -dlng))
+    # dense area first: the children outrank the untouched siblings
+    assert [x.index for x in drain(t)] == [4, 5, 6, 7, 1, 2, 3]
+
+
+def test_unsaturated_tile_is_not_split():
+    t = tiler(grid(1, 1))
+    out = t.report(t.pop(), 107)
+    assert not out.children and t.pop() is None
+
+
+def test_split_stops_at_max_depth():
+    t = tiler(grid(1, 1), max_depth=1)
+    children = t.report(t.pop(), 120).children
+    assert len(children) == 4
+    for child in children:
+        assert t.pop() is child
+        assert not t.report(child, 120).children
+    assert t.pop() is None
+
+
+def test_simulate_saturated_everywhere_reaches_min_cell_size():
+    sizes = []
+
+    def count(lat, lng, w_km, h_km):
+        sizes.append((w_km, h_km))
+        return 10_000  # always at the cap
+
+    t = tiler(grid(2, 3), max_depth=2)
+    stats = simulate(t, count)
+    # every tile splits down to max_depth: 6 roots + 24 children + 96 grandchildren
+    assert stats["crawled"] == 6 * (1 + 4 + 16)
+    assert stats["split"] == 6 * (1 + 4)
+    assert min(sizes) == (CELL_W / 4, CELL_H / 4)
+    # only the leaves' results count, each capped
+    assert stats["seen"] == 96 * 120
+    assert stats["lost_to_cap"] == 96 * (10_000 - 120)
+
+
+def test_simulate_dense_spot_splits_only_there():
+    dense = grid(3, 3)[4]
+
+    def count(lat, lng, w_km, h_km):
+        near = abs(lat - dense.latitude) < km_to_lat_deg(CELL_H) / 2 and abs(lng - dense.longitude) < km_to_lon_deg(CELL_W, lat) / 2
+        return 500 if near else 50
+
+    t = tiler(grid(3, 3), max_depth=1)
+    stats = simulate(t, count)
+    assert stats["split"] == 1
+    assert stats["crawled"] == 9 + 4
+    assert stats["seen"] == 8 * 50 + 4 * 120
+
+
+def test_empty_tile_deprioritizes_then_skips_neighbours():
+    t = tiler(grid(3, 3), skip_after_empty=2)
+    corner = t.pop()
+    assert corner.index == 0
+    out = t.report(corner, 0)
+    assert sorted(n.index for n in out.reprioritized) == [1, 3, 4]
+    assert all(n.priority == -1.0 for n in out.reprioritized)
+    assert not out.skipped
+    # next: tile 2 (untouched, priority 0); empty too -> 1 and 4 reach two empty neighbours
+    nxt = t.pop()
+    assert nxt.index == 2
+    out = t.report(nxt, 3)
+    assert sorted(n.index for n in out.skipped) == [1, 4]
+    assert sorted(n.index for n in out.reprioritized) == [5]
+    remaining = [x.index for x in drain(t)]
+    assert 1 not in remaining and 4 not in remaining
+    assert sorted(remaining) == [3, 5, 6, 7, 8]
+
+
+def test_failed_tile_is_requeued_after_pending_tiles():
+    t = tiler(grid(1, 3))
+    first = t.pop()
+    assert t.fail(first, max_attempts=3)
+    assert first.attempts == 1
+    assert t.pending_count == 3
+    # served once the rest is done
+    assert [x.index for x in drain(t)] == [1, 2, 0]
+
+
+def test_fail_gives_up_after_max_attempts():
+    t = tiler(grid(1, 1))
+    tile = t.pop()
+    assert t.fail(tile, max_attempts=2)
+    assert t.pop() is tile
+    assert not t.fail(tile, max_attempts=2)
+    assert tile.attempts == 2
+    assert t.pop() is None and t.pending_count == 0
+
+
+def test_fail_without_limit_always_requeues():
+    t = tiler(grid(1, 1))
+    tile = t.pop()
+    for _ in range(5):
+        assert t.fail(tile, max_attempts=None)
+        assert t.pop() is tile
+    assert tile.attempts == 5
+
+
+def test_requeued_tile_skipped_meanwhile_is_not_served():
+    t = tiler(grid(1, 3), skip_after_empty=1)
+    left, middle = t.pop(), t.pop()
+    t.fail(middle, max_attempts=None)
+    # an empty neighbour skips the pending retry
+    assert [x.index for x in t.report(left, 0).skipped] == [middle.index]
+    assert [x.index for x in drain(t)] == [2]
+
+
+def test_from_rows_resumes_pending_tiles():
+    rows = [
+        {"tile_index": 0, "tile_row": 0, "tile_col": 0, "tile_center_lat": 48.85, "tile_center_lng": 2.35, "status": "completed"},
+        {"tile_index": 1, "tile_row": 0, "tile_col": 1, "tile_center_lat": 48.85, "tile_center_lng": 2.37, "status": "pending"},
+        {"tile_index": 2, "tile_row": 0, "tile_col": 0, "tile_center_lat": 48.85, "tile_center_lng": 2.35,
+         "status": "pending", "depth": 1, "parent_index": 0, "priority": 1.0},
+    ]
+    t = AdaptiveTiler.from_rows(rows, cell_width_km=CELL_W, cell_height_km=CELL_H)
+    order = drain(t)
+    assert [x.index for x in order] == [2, 1]
+    assert order[0].depth == 1 and order[0].parent_index == 0
+    # new children get fresh indexes after the stored ones
+    assert t.report(order[1], 120).children[0].index == 3
+
+
+def test_rejects_non_positive_cell_size():
+    with pytest.raises(ValueError):
+        AdaptiveTiler([], cell_width_km=0, cell_height_km=1)
@@ -0,0 +1,171 @@
+import random
+
+import pytest
+
+from gmaps_crawler.pipeline.exec.aimd import CONSENT, ENFE, TIMEOUT, AIMDController, classify_error
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.t = 0.0
+
+    def __call__(self) -> float:
+        return self.t
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    return FakeClock()
+
+
+def make(clock, **kw) -> AIMDController:
+    opts = dict(max_limit=8, min_limit=1, initial=2, increase=1, decrease=0.5, window=4,
+                latency_target_s=5.0, max_failure_rate=0.25, max_enfe_rate=0.25, clock=clock)
+    opts.update(kw)
+    return AIMDController(**opts)
+
+
+def busy_window(ctl: AIMDController, clock: FakeClock, latency_s: float, *, ok: bool = True, signal=None) -> None:
+    """Run ``window`` places with the limit fully used, one clock second per batch."""
+    done = 0
+    while done < ctl.window:
+        n = min(ctl.limit, ctl.window - done)
+        for _ in range(n):
+            assert ctl.acquire(timeout=0)
+        for _ in range(n):
+            ctl.release(latency_s, ok=ok, signal=signal)
+        done += n
+        clock.t += 1.0
+
+
+def test_additive_increase_under_latency_target(clock):
+    ctl = make(clock, max_limit=5, increase=1)
+    seen = [ctl.limit]
+    for _ in range(6):
+        busy_window(ctl, clock, latency_s=1.0)
+        seen.append(ctl.limit)
+    # +1 per healthy window, then capped at max_limit
+    assert seen == [2, 3, 4, 5, 5, 5, 5]
+    assert [(a.old, a.new, a.reason) for a in ctl.history] == [(2, 3, "healthy"), (3, 4, "healthy"), (4, 5, "healthy")]
+    assert [a.at for a in ctl.history] == sorted(a.at for a in ctl.history)
+    assert ctl.counters["increases"] == 3 and ctl.counters["decreases"] == 0
+
+
+def test_increase_step(clock):
+    ctl = make(clock, max_limit=16, increase=3)
+    busy_window(ctl, clock, latency_s=1.0)
+    assert ctl.limit == 5
+
+
+def test_no_increase_when_limit_unused(clock):
+    ctl = make(clock, initial=4)
+    for _ in range(3 * ctl.window):
+        # one place at a time: the limit of 4 is never reached
+        assert ctl.acquire(timeout=0)
+        ctl.release(1.0, ok=True)
+    assert ctl.limit == 4
+    assert not ctl.history
+
+
+def test_multiplicative_decrease_on_latency_breach(clock):
+    ctl = make(clock, initial=8)
+    busy_window(ctl, clock, latency_s=9.0)
+    assert ctl.limit == 4
+    assert ctl.history[-1].reason == "latency"
+    assert ctl.history[-1].latency_p50_s == 9.0
+
+
+def test_multiplicative_decrease_on_failures(clock):
+    ctl = make(clock, initial=8)
+    busy_window(ctl, clock, latency_s=1.0, ok=False)
+    assert ctl.limit == 4
+    assert ctl.history[-1].reason == "failures"
+    assert ctl.history[-1].failure_rate == 1.0
+
+
+def test_enfe_rate_breach(clock):
+    ctl = make(clock, initial=8)
+    busy_window(ctl, clock, latency_s=1.0, ok=False, signal=ENFE)
+    assert ctl.limit == 4
+    assert ctl.history[-1].reason == ENFE
+
+
+@pytest.mark.parametrize("signal", [TIMEOUT, CONSENT])
+def test_hard_signal_cuts_at_once_then_cools_down(clock, signal):
+    ctl = make(clock, initial=8)
+    ctl.record(1.0, ok=False, signal=signal)
+    assert ctl.limit == 4
+    assert ctl.history[-1].reason == signal
+    # cooldown: further hard signals right after the cut do not cut again
+    for _ in range(3):
+        ctl.record(1.0, ok=False, signal=signal)
+    assert ctl.limit == 4
+    # ... until enough samples were observed after the cut
+    for _ in range(8):
+        ctl.record(1.0, ok=True)
+    ctl.record(1.0, ok=False, signal=signal)
+    assert ctl.limit == 2
+
+
+def test_min_limit_holds(clock):
+    ctl = make(clock, min_limit=2, initial=8, window=2)
+    for _ in range(20):
+        clock.t += 1.0
+        for _ in range(ctl.window * ctl.max_limit):
+            ctl.record(1.0, ok=True)
+        ctl.record(1.0, ok=False, signal=TIMEOUT)
+        assert ctl.limit >= 2
+    assert ctl.limit == 2
+    assert all(a.new >= 2 for a in ctl.history)
+
+
+def test_initial_is_clamped_to_bounds(clock):
+    assert make(clock, min_limit=3, initial=1).limit == 3
+    assert make(clock, max_limit=4, initial=10).limit == 4
+    assert make(clock, max_limit=2, min_limit=5).min_limit == 2
+
+
+def test_acquire_gates_on_limit(clock):
+    ctl = make(clock, initial=2)
+    assert ctl.acquire(timeout=0) and ctl.acquire(timeout=0)
+    assert ctl.in_flight == 2
+    # deadline is measured with the injected clock, which does not move
+    assert not ctl.acquire(timeout=0)
+    ctl.release(1.0, ok=True)
+    assert ctl.acquire(timeout=0)
+    assert ctl.in_flight == 2
+
+
+def test_converges_below_backend_capacity(clock):
+    """The backend throttles above 6 concurrent places: the limit settles around it and never leaves its bounds."""
+    rng = random.Random(7)
+    capacity = 6
+    ctl = make(clock, max_limit=16, min_limit=1, initial=2, window=10, latency_target_s=8.0, max_failure_rate=0.2, max_enfe_rate=0.2)
+    trace = []
+    for _ in range(400):
+        n = ctl.limit
+        for _ in range(n):
+            assert ctl.acquire(timeout=0)
+        overload = max(0, n - capacity)
+        for _ in range(n):
+            latency = rng.uniform(3.0, 6.0) * (1.0 + 0.6 * overload)
+            p_timeout = min(0.9, 0.05 * overload)
+            r = rng.random()
+            signal = TIMEOUT if r < p_timeout else (ENFE if r < 2 * p_timeout else None)
+            ctl.release(latency, ok=signal is None, signal=signal)
+        clock.t += 1.0
+        trace.append(n)
+    assert all(1 <= n <= 16 for n in trace)
+    settled = trace[100:]
+    assert max(settled) <= capacity + 3
+    assert capacity - 2 <= sum(settled) / len(settled) <= capacity + 1
+    assert ctl.counters["increases"] and ctl.counters["decreases"]
+
+
+def test_classify_error():
+    assert classify_error("TimeoutError") == TIMEOUT
+    assert classify_error("ElementNotFoundError") == ENFE
+    assert classify_error("ENFE") == ENFE
+    assert classify_error("ConsentWall") == CONSENT
+    assert classify_error("ValueError") is None
+    assert classify_error(None) is None
@@ -0,0 +1,139 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("aiohttp")
+
+from gmaps_crawler.pipeline.extractors.web_extractors import http_fetch
+from gmaps_crawler.pipeline.extractors.web_extractors.http_fetch import fetch_pages, needs_browser
+
+STATIC = b"<html><body><h1>Cafe</h1>" + b"<p>Open daily, call us or write to hello@example.com</p>" * 10 + b"</body></html>"
+PAGES = {
+    "/static": (STATIC, "text/html; charset=utf-8"),
+    "/spa": (b'<html><head><script src="/app.js"></script></head><body><div id="root"></div></body></html>', "text/html"),
+    "/menu.pdf": (b"%PDF-1.4 " + b"x" * 500, "application/pdf"),
+    "/big": (b"<html><body>" + b"x" * 300_000 + b"</body></html>", "text/html"),
+    "/busy": (b"<html><body>" + b"<p>open daily</p>" * 50 + b"</body></html>", "text/html"),
+}
+
+
+class Server:
+    def __init__(self) -> None:
+        self.in_flight = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+        owner = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, so the shared session reuses connections
+            disable_nagle_algorithm = True  # headers and body are separate writes on a reused connection
+
+            def do_GET(self):  # noqa: N802
+                path = self.path.split("?")[0]
+                if path == "/slow":
+                    time.sleep(2)
+                if path == "/redirect":
+                    self.send_response(302)
+                    self.send_header("Location", "/static")
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                if path == "/busy":
+                    with owner.lock:
+                        owner.in_flight += 1
+                        owner.peak = max(owner.peak, owner.in_flight)
+                    time.sleep(0.1)
+                    with owner.lock:
+                        owner.in_flight -= 1
+                page = PAGES.get(path)
+                if page is None:
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                body, content_type = page
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.handle_error = lambda *args: None  # capped/timed-out reads reset their connection
+        self.base = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+
+@pytest.fixture(scope="module")
+def server():
+    srv = Server()
+    threading.Thread(target=srv.httpd.serve_forever, daemon=True).start()
+    yield srv
+    http_fetch.close()
+    srv.httpd.shutdown()
+    srv.httpd.server_close()
+
+
+def test_static_page_is_usable(server):
+    res = fetch_pages([f"{server.base}/static"])[f"{server.base}/static"]
+    assert res.ok and res.status == 200
+    assert "hello@example.com" in res.html
+    assert res.content_type.startswith("text/html")
+    assert not needs_browser(res)
+
+
+def test_redirect_is_followed(server):
+    res = fetch_pages([f"{server.base}/redirect"])[f"{server.base}/redirect"]
+    assert res.ok and res.status == 200
+    assert res.final_url == f"{server.base}/static"
+    assert "hello@example.com" in res.html
+
+
+def test_timeout(server):
+    t0 = time.perf_counter()
+    res = fetch_pages([f"{server.base}/slow", f"{server.base}/static"], timeout=0.5)
+    elapsed = time.perf_counter() - t0
+    slow = res[f"{server.base}/slow"]
+    assert slow.error == "timeout" and not slow.ok
+    assert needs_browser(slow)
+    # the other URL of the batch is unaffected, and nobody waits for the slow server
+    assert res[f"{server.base}/static"].ok
+    assert elapsed < 1.5
+
+
+def test_non_html_content_type_needs_browser(server):
+    res = fetch_pages([f"{server.base}/menu.pdf"])[f"{server.base}/menu.pdf"]
+    assert res.ok and res.content_type == "application/pdf"
+    assert needs_browser(res)
+
+
+def test_js_only_page_and_errors_need_browser(server):
+    res = fetch_pages([f"{server.base}/spa", f"{server.base}/missing"])
+    spa, missing = res[f"{server.base}/spa"], res[f"{server.base}/missing"]
+    assert spa.ok and needs_browser(spa)
+    assert missing.status == 404 and needs_browser(missing)
+
+
+def test_body_is_capped(server):
+    res = fetch_pages([f"{server.base}/big"], max_bytes=100_000)[f"{server.base}/big"]
+    assert res.truncated and len(res.html) == 100_000
+
+
+def test_per_host_limit_holds_across_threads(server):
+    fetch_pages([f"{server.base}/static"])
+    session = http_fetch._client._session
+    server.peak = 0
+    with ThreadPoolExecutor(6) as pool:
+        batches = list(pool.map(lambda n: fetch_pages([f"{server.base}/busy?{n}-{i}" for i in range(3)], per_host=2), range(6)))
+    assert all(r.ok for b in batches for r in b.values())
+    assert sum(len(b) for b in batches) == 18
+    assert server.peak == 2
+    # one shared session, and no per-host semaphore outlives its requests
+    assert http_fetch._client._session is session
+    assert http_fetch._client._host_slots == {}
@@ -0,0 +1,148 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from gmaps_crawler.geo.bbox import BoundingBox
+from gmaps_crawler.geo.polygon import CityPolygon, spans_overlap
+from gmaps_crawler.pipeline.city.grid import iter_grid_chunks, km_to_lat_deg, km_to_lon_deg
+
+# L-shaped mainland (lat 0..1 x lon 0..2 plus lat 1..2 x lon 0..1) with a small lake
+# at lat/lon 0.2..0.4, and an island at lat 0..0.5 x lon 3..3.5
+FIXTURE = Path(__file__).parent / "data" / "city.geojson"
+
+BOUNDS = BoundingBox(0.0, 0.0, 2.0, 3.5)
+CELL_KM = 11.0
+
+
+@pytest.fixture
+def city() -> CityPolygon:
+    with FIXTURE.open(encoding="utf-8") as f:
+        return CityPolygon.from_geojson(json.load(f))
+
+
+def test_from_geojson_swaps_to_lat_lon(city):
+    assert len(city.polygons) == 2
+    assert [len(p) for p in city.polygons] == [2, 1]
+    assert city.bounds() == BOUNDS.as_tuple()
+    # the notch corner, stored as GeoJSON [lon, lat] = [1.0, 2.0]
+    assert (2.0, 1.0) in city.polygons[0][0]
+
+
+def test_geojson_round_trip(city):
+    again = CityPolygon.from_geojson(city.to_geojson(name="L-town"))
+    assert again.polygons == city.polygons
+
+
+def test_single_polygon_geometry():
+    poly = CityPolygon.from_geojson({"type": "Polygon", "coordinates": [[[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]]]})
+    assert poly.contains(0.5, 0.5)
+    assert not poly.contains(1.5, 0.5)
+
+
+def test_unsupported_geometry():
+    with pytest.raises(ValueError):
+        CityPolygon.from_geojson({"type": "LineString", "coordinates": [[0, 0], [1, 1]]})
+
+
+@pytest.mark.parametrize(
+    "lat, lon, inside",
+    [
+        (0.5, 0.5, True),    # mainland
+        (1.5, 0.5, True),    # upper arm of the L
+        (0.5, 1.5, True),    # right arm of the L
+        (1.5, 1.5, False),   # notch between the arms
+        (0.3, 0.3, False),   # lake (hole)
+        (0.1, 0.3, True),    # shore just south of the lake
+        (0.25, 3.25, True),  # island (second polygon)
+        (0.25, 2.5, False),  # strait between mainland and island
+        (0.75, 3.25, False), # north of the island
+        (-0.1, 0.5, False),  # outside the bounds
+    ],
+)
+def test_contains(city, lat, lon, inside):
+    assert city.contains(lat, lon) is inside
+
+
+def test_lon_spans(city):
+    # band crossing the lake's shore: the lake's longitudes are still land somewhere in the band
+    assert city.lon_spans(0.1, 0.3).tolist() == [[0.0, 2.0], [3.0, 3.5]]
+    # band within the lake's latitudes: the lake splits the mainland
+    assert city.lon_spans(0.25, 0.35).tolist() == [[0.0, 0.2], [0.4, 2.0], [3.0, 3.5]]
+    # band through the notch only sees the upper arm
+    assert city.lon_spans(1.4, 1.6).tolist() == [[0.0, 1.0]]
+    # band straddling the notch edge sees both arms
+    assert city.lon_spans(0.9, 1.1).tolist() == [[0.0, 2.0]]
+    assert len(city.lon_spans(2.5, 3.0)) == 0
+
+
+def test_spans_overlap():
+    spans = np.array([[0.0, 2.0], [3.0, 3.5]])
+    assert spans_overlap(spans, 1.9, 2.1)
+    assert not spans_overlap(spans, 2.1, 2.9)
+    assert spans_overlap(spans, np.array([2.1, 2.5, 3.4]), np.array([2.9, 3.1, 3.6])).tolist() == [False, True, True]
+    assert not spans_overlap(np.zeros((0, 2)), 0.0, 1.0)
+
+
+def _cells(city=None, chunk_size=50_000):
+    chunks = list(iter_grid_chunks(BOUNDS, cell_width_km=CELL_KM, cell_height_km=CELL_KM, overlap_ratio=0.0, polygon=city, chunk_size=chunk_size))
+    return chunks, {
+        "index": np.concatenate([c.index for c in chunks]),
+        "row": np.concatenate([c.row for c in chunks]),
+        "col": np.concatenate([c.col for c in chunks]),
+        "lat": np.concatenate([c.latitude for c in chunks]),
+        "lng": np.concatenate([c.longitude for c in chunks]),
+    }
+
+
+def _touches(city: CityPolygon, lat: float, lng: float) -> bool:
+    """Brute force: does the cell around (lat, lng) overlap the fixture polygon?"""
+    half_lat, half_lon = km_to_lat_deg(CELL_KM) / 2, km_to_lon_deg(CELL_KM, lat) / 2
+    # the fixture's edges are axis-aligned, so any overlap covers a point of this
+    # lattice (which includes the cell's own edges)
+    for y in np.linspace(lat - half_lat, lat + half_lat, 21):
+        for x in np.linspace(lng - half_lon, lng + half_lon, 21):
+            if city.contains(float(y), float(x)):
+                return True
+    return False
+
+
+def test_grid_clip_keeps_exactly_the_touching_cells(city):
+    _, full = _cells()
+    _, kept = _cells(city)
+    expected = {
+        (r, c) for r, c, lat, lng in zip(full["row"].tolist(), full["col"].tolist(), full["lat"].tolist(), full["lng"].tolist())
+        if _touches(city, lat, lng)
+    }
+    assert set(zip(kept["row"].tolist(), kept["col"].tolist())) == expected
+    assert 0 < len(expected) < len(full["row"])
+
+
+def test_grid_clip_drops_notch_strait_and_lake(city):
+    _, kept = _cells(city)
+    half_lat = km_to_lat_deg(CELL_KM) / 2
+    for lat, lng in zip(kept["lat"].tolist(), kept["lng"].tolist()):
+        half_lon = km_to_lon_deg(CELL_KM, lat) / 2
+        assert not (lat - half_lat > 1.0 and lng - half_lon > 1.0), "cell inside the notch"
+        assert not (lng - half_lon > 2.0 and lng + half_lon < 3.0), "cell inside the strait"
+        assert not (lat - half_lat > 0.5 and lng - half_lon > 2.0), "cell north of the island"
+    # cells entirely over the lake are dropped too
+    _, full = _cells()
+    in_lake = [
+        (r, c) for r, c, lat, lng in zip(full["row"].tolist(), full["col"].tolist(), full["lat"].tolist(), full["lng"].tolist())
+        if 0.2 < lat - half_lat and lat + half_lat < 0.4
+        and 0.2 < lng - km_to_lon_deg(CELL_KM, lat) / 2 and lng + km_to_lon_deg(CELL_KM, lat) / 2 < 0.4
+    ]
+    assert in_lake
+    assert not set(in_lake) & set(zip(kept["row"].tolist(), kept["col"].tolist()))
+
+
+def test_grid_clip_chunking_keeps_lattice_and_contiguous_index(city):
+    one_chunk, whole = _cells(city)
+    chunks, chunked = _cells(city, chunk_size=7)
+    assert len(one_chunk) == 1
+    assert all(len(c) == 7 for c in chunks[:-1]) and 0 < len(chunks[-1]) <= 7
+    assert chunked["index"].tolist() == list(range(len(whole["index"])))
+    for key in ("row", "col", "lat", "lng"):
+        assert chunked[key].tolist() == whole[key].tolist()
@@ -0,0 +1,45 @@
+import random
+
+import pytest
+
+from gmaps_crawler.pipeline.extractors.web_extractors.scanner import EMAIL_RE, _find_emails, scan_html
+from scripts.bench_scanner import reference_scan
+
+PAGE = (
+    '<a href="mailto:Info@Cafe-Paris.fr">Info@Cafe-Paris.fr</a> '
+    '<a href="https://www.facebook.com/cafeparis">fb</a> '
+    '<img src="https://cdn.example.com/contact@cafe-paris.fr/logo.png"> '
+    "<p>Call +33 1 23 45 67 89 or write to hello@cafe-paris.fr or contact@cafe-paris.fr.</p> "
+    "<p>icon@2x.png sentry@o123.ingest.sentry.io a@b.c x@@y.com __x@y.com_</p> "
+    '<script>var u="aHR0cHM6Ly93d3cuaW5zdGFncmFtLmNvbS9jYWZlcGFyaXM=";</script>'
+)
+
+
+def test_scan_page():
+    emails, phones, socials = scan_html(PAGE)
+    # the address that also sits inside a URL is dropped, like the original loop did
+    assert emails == ["info@cafe-paris.fr", "hello@cafe-paris.fr"]
+    assert phones == {"+33123456789"}
+    assert socials["facebook"] == {"https://www.facebook.com/cafeparis"}
+    assert socials["instagram"] == {"https://www.instagram.com/cafeparis"}
+    assert scan_html(PAGE) == reference_scan(PAGE)
+
+
+@pytest.mark.parametrize(
+    "text",
+    ["", "@", "a@b", "a@b.co", "a.b@c.d.ef-", "x:a@b.com", "a@b.com/x", "a@b.com:", "a@b.cc.d@e.fr", "é@b.com", "a_@b.com", "a@b.co_", "a@b@c.com"],
+)
+def test_find_emails_matches_findall(text):
+    assert _find_emails(text) == EMAIL_RE.findall(text)
+
+
+def test_matches_reference_on_random_markup():
+    rng = random.Random(3)
+    tokens = [
+        "a", "B", ".", "-", "_", "+", "%", "@", ":", "/", " ", "\n", "1", '"', "'", "é", "co", "x.com", "@b.fr",
+        "https://", "http://", '<a href="', '">', "facebook.com/p", "t.me/x", "+33 6 12 34 56 78", "info@cafe.fr",
+        "aHR0cHM6Ly9mYWNlYm9vay5jb20vY2FmZQ==",
+    ]
+    for _ in range(2000):
+        text = "".join(rng.choice(tokens) for _ in range(rng.randint(0, 40)))
+        assert scan_html(text) == reference_scan(text), text